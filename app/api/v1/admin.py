@@ -1,8 +1,11 @@
 
 from typing import List
-from fastapi import APIRouter, Depends, HTTPException, status
+from fastapi import APIRouter, Depends, HTTPException, Query, status
 from app.core.security import AdminUser, SuperAdminUser
-from app.domain.admin.models import KillswitchFlags, AuditLogEntry, SentinelStatus
+from app.domain.admin.models import (
+    KillswitchFlags, AuditLogEntry, SentinelStatus, SentinelBusMetrics, SentinelEventRecord
+)
+from app.support.event_bus import get_event_bus, sentinel_dashboard
 
 router = APIRouter(
     prefix="/admin/governance",
@@ -43,6 +46,10 @@ def toggle_feature_flag(flag_name: str, super_admin: SuperAdminUser):
         after=str(new_val)
     )
     AUDIT_LOGS.append(log)
+    get_event_bus().publish(
+        "KillswitchToggled",
+        {"flag": flag_name, "enabled": new_val, "admin_id": super_admin.id},
+    )
     
     return CURRENT_FLAGS
 
@@ -53,9 +60,19 @@ def get_sentinel_status(admin: AdminUser):
         api_latency_ms=42,
         system_health_percent=99,
         active_connections=156,
-        last_critical_alert=None
+        last_critical_alert=sentinel_dashboard.last_critical_alert,
+        event_bus=SentinelBusMetrics(**get_event_bus().stats()),
+        events_by_type=dict(sentinel_dashboard.counts),
     )
 
+@router.get("/sentinel/events", response_model=List[SentinelEventRecord])
+def get_sentinel_events(admin: AdminUser, limit: int = Query(50, ge=1, le=200)):
+    """Eventos mais recentes entregues pelo event bus (feed do painel Sentinel)."""
+    return [
+        SentinelEventRecord(seq=e.seq, event_type=e.event_type, payload=e.payload, timestamp=e.timestamp)
+        for e in sentinel_dashboard.snapshot(limit)
+    ]
+
 @router.get("/audit", response_model=List[AuditLogEntry])
 def get_audit_trail(super_admin: SuperAdminUser):
     """Trilho de auditoria completo (Exclusivo Super Admin)."""
@@ -1,21 +1,81 @@
-
-from typing import List
-from fastapi import APIRouter, Depends, HTTPException
-from app.core.security import GenericUser, get_current_user
-from app.notifications.service import _notif_repo
-from app.domain.notifications.models import Notification
+from typing import Annotated, Optional
+from fastapi import APIRouter, Depends, HTTPException, Query, status
+from app.core.security import AdminUser, CurrentUser, GenericUser
+from app.notifications.service import _notif_repo, notification_service
+from app.domain.notifications.models import (
+    BulkReadRequest,
+    BulkReadResponse,
+    Notification,
+    NotificationPage,
+    SegmentNotificationJob,
+    SegmentNotificationRequest,
+    UnreadCount,
+)
 
 router = APIRouter(prefix="/notifications", tags=["notifications"])
 
-@router.get("/", response_model=List[Notification])
-def get_my_notifications(user: GenericUser = Depends(get_current_user)):
-    """Lista as notificações do utilizador autenticado."""
-    return _notif_repo.list_by_user(user.id)
+def segment_member(user: GenericUser) -> CurrentUser:
+    """Quem consulta a caixa entra no segmento (tenant, papel) dos anúncios."""
+    directory = notification_service.fanout.directory if notification_service.fanout else None
+    if directory is not None:
+        if user.is_active:
+            directory.register(user.id, user.tenant_id, user.role)
+        else:
+            directory.unregister(user.id)
+    return user
+
+InboxUser = Annotated[CurrentUser, Depends(segment_member)]
+
+@router.get("/", response_model=NotificationPage)
+def get_my_notifications(
+    user: InboxUser,
+    limit: int = Query(50, ge=1, le=200),
+    cursor: Optional[str] = Query(None),
+):
+    """Lista as notificações do utilizador autenticado (paginação por cursor)."""
+    try:
+        items, next_cursor = _notif_repo.list_by_user(user.id, limit=limit, cursor=cursor)
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+    return NotificationPage(items=items, next_cursor=next_cursor, unread_count=_notif_repo.unread_count(user.id))
+
+@router.get("/unread-count", response_model=UnreadCount)
+def get_unread_count(user: InboxUser):
+    """Número de notificações por ler (contador mantido, O(1))."""
+    return UnreadCount(unread_count=_notif_repo.unread_count(user.id))
 
 @router.patch("/{notif_id}/read", response_model=Notification)
-def mark_read(notif_id: str, user: GenericUser = Depends(get_current_user)):
+def mark_read(notif_id: str, user: InboxUser):
     """Marca uma notificação como lida."""
-    notif = _notif_repo.mark_as_read(notif_id)
+    notif = _notif_repo.mark_as_read(notif_id, user_id=user.id)
     if not notif:
         raise HTTPException(status_code=404, detail="Notificação não encontrada.")
     return notif
+
+@router.post("/read", response_model=BulkReadResponse)
+def mark_many_read(payload: BulkReadRequest, user: InboxUser):
+    """Marca como lidas várias notificações (`ids`) ou todas (`all: true`) num só pedido."""
+    if not payload.all and not payload.ids:
+        raise HTTPException(status_code=422, detail="Indique 'ids' ou 'all': true.")
+    updated = _notif_repo.mark_many_read(user.id, None if payload.all else payload.ids)
+    return BulkReadResponse(updated=updated, unread_count=_notif_repo.unread_count(user.id))
+
+@router.post("/segments", response_model=SegmentNotificationJob, status_code=status.HTTP_202_ACCEPTED)
+def notify_segment(payload: SegmentNotificationRequest, admin: AdminUser):
+    """Anúncio para um segmento (tenant + papel); a entrega corre em background."""
+    job = notification_service.notify_segment(
+        payload.tenant_id, payload.role, payload.title, payload.content,
+        type=payload.type, metadata=payload.metadata,
+    )
+    return SegmentNotificationJob(job_id=job.job_id, audience=job.audience)
+
+@router.get("/segments/{job_id}", response_model=SegmentNotificationJob)
+def get_segment_job(job_id: int, admin: AdminUser):
+    """Estado de um fan-out por segmento."""
+    job = notification_service.fanout.get_job(job_id)
+    if not job:
+        raise HTTPException(status_code=404, detail="Job de notificação não encontrado.")
+    return SegmentNotificationJob(
+        job_id=job.job_id, audience=job.audience, delivered=job.delivered,
+        done=job.done, failed=job.failed, error=job.error,
+    )
@@ -1,24 +1,65 @@
 
+import os
 from pathlib import Path
-from fastapi import APIRouter, HTTPException, status
+from typing import Optional
+from fastapi import APIRouter, HTTPException, Query, status
 from app.core.security import AdminUser
-from app.orders.bridge_service import BridgePartnerNotFound, BridgeService, InMemoryOrderRepository
+from app.domain.orders.models import OrderStatus
+from app.orders.bridge_service import BridgePartnerNotFound, BridgeService
+from app.orders.repository import get_order_repository
 from app.orders.schemas import CreateOrderRequest, ManualBridgeResponse
 
 router = APIRouter(prefix="/orders", tags=["orders"])
 
-# Persistência em memória para MVP
-_ORDER_REPO = InMemoryOrderRepository()
-_CONFIG_PATH = Path("config/partners_bridge.json")
-_BRIDGE_SERVICE = BridgeService(order_repo=_ORDER_REPO, config_path=_CONFIG_PATH)
+# Repositório partilhado com checkout e webhooks (memória + SQLite opcional)
+_ORDER_REPO = get_order_repository()
+_CONFIG_PATH = Path(os.getenv("BRIDGE_PARTNERS_PATH", "config/partners_bridge.json"))
+_BRIDGE_SERVICE = BridgeService(
+    order_repo=_ORDER_REPO,
+    config_path=_CONFIG_PATH,
+    compact=os.getenv("BRIDGE_PARTNERS_COMPACT", "0") == "1",
+)
+
+# Hot-reload do partners_bridge.json sem reiniciar workers (0 desativa)
+_CONFIG_RELOAD_SECONDS = float(os.getenv("BRIDGE_CONFIG_RELOAD_SECONDS", "5"))
+if _CONFIG_RELOAD_SECONDS > 0:
+    _BRIDGE_SERVICE.start_config_watcher(interval_seconds=_CONFIG_RELOAD_SECONDS)
 
 @router.post("/", response_model=dict)
 def create_order(payload: CreateOrderRequest):
     order = _BRIDGE_SERVICE.create_order(
-        category=payload.category, area=payload.area, client_id=payload.client_id
+        category=payload.category,
+        area=payload.area,
+        client_id=payload.client_id,
+        lat=payload.lat,
+        lon=payload.lon,
     )
     return {"order": order.model_dump()}
 
+@router.get("/", response_model=dict)
+def list_orders(
+    current_admin: AdminUser,
+    client_id: Optional[int] = Query(None),
+    order_status: Optional[OrderStatus] = Query(None, alias="status"),
+    category: Optional[str] = Query(None),
+    area: Optional[str] = Query(None),
+    limit: int = Query(50, ge=1, le=500),
+    offset: int = Query(0, ge=0),
+):
+    """Listagem filtrada de pedidos via índices secundários (Admin)."""
+    try:
+        orders = _ORDER_REPO.list(
+            client_id=client_id,
+            status=order_status,
+            category=category,
+            area=area,
+            limit=limit,
+            offset=offset,
+        )
+    except ValueError as exc:
+        raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail=str(exc))
+    return {"orders": [o.model_dump() for o in orders], "limit": limit, "offset": offset}
+
 @router.post(
     "/manual-bridge/{order_id}",
     response_model=ManualBridgeResponse,
@@ -42,3 +83,8 @@ def manual_bridge(order_id: int, current_admin: AdminUser):
             status_code=status.HTTP_404_NOT_FOUND,
             detail=str(exc),
         )
+
+@router.get("/manual-bridge/config-metrics", response_model=dict)
+def bridge_config_metrics(current_admin: AdminUser):
+    """Métricas de recarregamento da lista de parceiros Bridge (Sentinel)."""
+    return _BRIDGE_SERVICE.config_metrics.as_dict()
@@ -0,0 +1,38 @@
+
+import itertools
+import threading
+from typing import Hashable, List
+
+
+class IdAllocator:
+    """
+    Gerador de ids inteiros crescentes partilhável entre threads.
+    `next_id` não usa lock: `next()` sobre `itertools.count` é uma única
+    operação atómica no CPython (implementada em C, sob o GIL).
+    """
+
+    def __init__(self, start: int = 1) -> None:
+        self._count = itertools.count(start)
+        self._advance_lock = threading.Lock()
+
+    def next_id(self) -> int:
+        return next(self._count)
+
+    def advance_to(self, minimum: int) -> None:
+        """
+        Garante que o próximo id é >= `minimum` (ex.: após recarregar dados
+        persistidos). Usar no arranque, antes de partilhar o alocador.
+        """
+        with self._advance_lock:
+            current = next(self._count)
+            self._count = itertools.count(max(current, minimum))
+
+
+class StripedLocks:
+    """Locks por chave com número fixo de stripes (contenção só entre chaves da mesma stripe)."""
+
+    def __init__(self, stripes: int = 64) -> None:
+        self._locks: List[threading.Lock] = [threading.Lock() for _ in range(stripes)]
+
+    def for_key(self, key: Hashable) -> threading.Lock:
+        return self._locks[hash(key) % len(self._locks)]
@@ -18,6 +18,7 @@ class CurrentUser(BaseModel):
     email: str
     role: Role
     is_active: bool = True
+    tenant_id: int = 1  # MVP: tenant único por omissão
 
 
 def get_current_user() -> CurrentUser:
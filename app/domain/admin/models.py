@@ -1,6 +1,6 @@
 
 from datetime import datetime
-from typing import Optional
+from typing import Any, Dict, List, Optional
 from pydantic import BaseModel, Field
 
 
@@ -26,8 +26,30 @@ class AuditLogEntry(BaseModel):
     timestamp: datetime = Field(default_factory=datetime.utcnow)
 
 
+class SentinelBusMetrics(BaseModel):
+    backend: str
+    pending: int
+    max_buffer: int
+    buffer_utilization: float
+    published: int
+    delivered: int
+    dropped: int
+    failed: int
+    batches: int
+    high_water: int
+
+
 class SentinelStatus(BaseModel):
     api_latency_ms: int
     system_health_percent: int
     active_connections: int
     last_critical_alert: Optional[str] = None
+    event_bus: Optional[SentinelBusMetrics] = None
+    events_by_type: Dict[str, int] = Field(default_factory=dict)
+
+
+class SentinelEventRecord(BaseModel):
+    seq: int
+    event_type: str
+    payload: Dict[str, Any]
+    timestamp: datetime
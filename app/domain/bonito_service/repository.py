@@ -1,6 +1,8 @@
+import threading
 from datetime import datetime, timezone
 from typing import Dict, List, Optional
 
+from app.core.concurrency import IdAllocator
 from .models import (
     BonitoPack,
     BonitoPackCreate,
@@ -16,12 +18,14 @@ class BonitoPackRepository:
 
     def __init__(self) -> None:
         self._storage: Dict[int, BonitoPack] = {}
-        self._next_id: int = 1
+        self._ids = IdAllocator()
+        self._lock = threading.Lock()
 
     def list_all(self, include_inactive: bool = True) -> List[BonitoPack]:
-        if include_inactive:
-            return list(self._storage.values())
-        return [p for p in self._storage.values() if p.status == BonitoPackStatus.ACTIVE]
+        with self._lock:
+            if include_inactive:
+                return list(self._storage.values())
+            return [p for p in self._storage.values() if p.status == BonitoPackStatus.ACTIVE]
 
     def get(self, pack_id: int) -> Optional[BonitoPack]:
         return self._storage.get(pack_id)
@@ -29,32 +33,32 @@ class BonitoPackRepository:
     def create(self, data: BonitoPackCreate) -> BonitoPack:
         now = datetime.now(timezone.utc)
         pack = BonitoPack(
-            id=self._next_id,
+            id=self._ids.next_id(),
             criado_em=now,
             atualizado_em=now,
             status=BonitoPackStatus.ACTIVE,
             **data.model_dump(),
         )
-        self._storage[self._next_id] = pack
-        self._next_id += 1
+        with self._lock:
+            self._storage[pack.id] = pack
         return pack
 
     def update(self, pack_id: int, data: BonitoPackUpdate) -> Optional[BonitoPack]:
-        existing = self._storage.get(pack_id)
-        if not existing:
-            return None
         update_data = data.model_dump(exclude_unset=True)
-        for field, value in update_data.items():
-            setattr(existing, field, value)
-        existing.atualizado_em = datetime.now(timezone.utc)
-        self._storage[pack_id] = existing
-        return existing
+        with self._lock:
+            existing = self._storage.get(pack_id)
+            if not existing:
+                return None
+            for field, value in update_data.items():
+                setattr(existing, field, value)
+            existing.atualizado_em = datetime.now(timezone.utc)
+            return existing
 
     def set_status(self, pack_id: int, status: BonitoPackStatus) -> Optional[BonitoPack]:
-        existing = self._storage.get(pack_id)
-        if not existing:
-            return None
-        existing.status = status
-        existing.atualizado_em = datetime.now(timezone.utc)
-        self._storage[pack_id] = existing
-        return existing
+        with self._lock:
+            existing = self._storage.get(pack_id)
+            if not existing:
+                return None
+            existing.status = status
+            existing.atualizado_em = datetime.now(timezone.utc)
+            return existing
@@ -1,8 +1,9 @@
 
 from enum import Enum
 from datetime import datetime
-from typing import Optional, Dict, Any
+from typing import Optional, Dict, Any, List
 from pydantic import BaseModel, Field
+from app.core.security import Role
 
 class NotificationType(str, Enum):
     ORDER_STATUS = "ORDER_STATUS"
@@ -19,3 +20,35 @@ class Notification(BaseModel):
     metadata: Dict[str, Any] = {} # ex: {"order_id": 123}
     is_read: bool = False
     created_at: datetime = Field(default_factory=datetime.utcnow)
+
+class NotificationPage(BaseModel):
+    items: List[Notification]
+    next_cursor: Optional[str] = None # id da última notificação; reenviar como `cursor`
+    unread_count: int
+
+class UnreadCount(BaseModel):
+    unread_count: int
+
+class BulkReadRequest(BaseModel):
+    ids: Optional[List[str]] = None
+    all: bool = False # True: marca todas as não lidas do utilizador
+
+class BulkReadResponse(BaseModel):
+    updated: int
+    unread_count: int
+
+class SegmentNotificationRequest(BaseModel):
+    tenant_id: int
+    role: Role
+    title: str
+    content: str
+    type: NotificationType = NotificationType.SYSTEM
+    metadata: Dict[str, Any] = {}
+
+class SegmentNotificationJob(BaseModel):
+    job_id: int
+    audience: int # tamanho do segmento no momento do pedido
+    delivered: int = 0
+    done: bool = False
+    failed: bool = False
+    error: Optional[str] = None
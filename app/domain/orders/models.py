@@ -22,3 +22,6 @@ class Order(BaseModel):
     client_id: int
     manual_pro_contact: Optional[ManualProContact] = None
     manual_bridge_commission: float = 0.0  # 0.10 na 1ª vez
+    # Localização do pedido (opcional): ativa o matching por proximidade
+    lat: Optional[float] = None
+    lon: Optional[float] = None
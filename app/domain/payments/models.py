@@ -21,3 +21,17 @@ class CheckoutRequest(BaseModel):
 class CheckoutResponse(BaseModel):
     client_secret: str
     split: PaymentSplit
+
+class TaxaSOSBreakdown(BaseModel):
+    basePeriodo: float
+    acrescimoImediato: float
+    acrescimoDistancia: float
+    acrescimoSegundaVisita: float
+
+class TaxaSOSQuote(BaseModel):
+    """Espelha `TaxaSOSResponse` do frontend (valores em euros)."""
+    taxaSOS: float
+    valorTotal: float
+    ganhoApp: float
+    colaboradorRecebe: float
+    breakdown: TaxaSOSBreakdown
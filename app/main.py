@@ -5,6 +5,7 @@ from fastapi.middleware.cors import CORSMiddleware
 from app.api.v1 import bonito_packs, admin, orders, support, support_chat, notifications, legal, ux247verse
 from app.payments import router as payments_router
 from app.payments import webhooks as payments_webhooks
+from app.support.event_bus import get_event_bus
 
 app = FastAPI(
     title="Fix.it x247 API v3.1",
@@ -32,6 +33,11 @@ app.include_router(ux247verse.router)
 app.include_router(payments_router.router)
 app.include_router(payments_webhooks.router)
 
+@app.on_event("startup")
+async def start_sentinel_event_bus():
+    # Fixa o loop da aplicação: eventos publicados em rotas síncronas (threadpool) são entregues nele
+    get_event_bus().start()
+
 @app.get("/health")
 def health_check():
     return {"status": "online", "engine": "Fix.it x247 v3.1", "sentinel": "active"}
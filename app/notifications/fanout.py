@@ -0,0 +1,169 @@
+
+import queue
+import threading
+from collections import OrderedDict, deque
+from dataclasses import dataclass, field
+from typing import Callable, Deque, Dict, Iterable, Iterator, List, Optional, Tuple
+from app.core.concurrency import IdAllocator
+from app.core.security import Role
+from app.domain.notifications.models import Notification, NotificationType
+
+SegmentKey = Tuple[int, Role]
+DeliveryListener = Callable[[List[Notification]], None]
+
+
+class SegmentDirectory:
+    """
+    Diretório de audiências para fan-out: utilizadores por (tenant, papel).
+    Cada segmento é um dict ordenado por inserção usado como conjunto.
+    """
+
+    def __init__(self) -> None:
+        self._segments: Dict[SegmentKey, Dict[int, None]] = {}
+        self._membership: Dict[int, SegmentKey] = {}
+        self._lock = threading.Lock()
+
+    def register(self, user_id: int, tenant_id: int, role: Role) -> None:
+        key = (tenant_id, Role(role))
+        with self._lock:
+            previous = self._membership.get(user_id)
+            if previous is not None and previous != key:
+                self._segments[previous].pop(user_id, None)
+            self._segments.setdefault(key, {})[user_id] = None
+            self._membership[user_id] = key
+
+    def load(self, members: Iterable[Tuple[int, int, Role]]) -> int:
+        """Carga em bloco a partir do diretório de utilizadores: (user_id, tenant_id, papel)."""
+        count = 0
+        for user_id, tenant_id, role in members:
+            self.register(user_id, tenant_id, role)
+            count += 1
+        return count
+
+    def unregister(self, user_id: int) -> None:
+        with self._lock:
+            key = self._membership.pop(user_id, None)
+            if key is not None:
+                self._segments[key].pop(user_id, None)
+
+    def size(self, tenant_id: int, role: Role) -> int:
+        return len(self._segments.get((tenant_id, Role(role)), {}))
+
+    def iter_batches(self, tenant_id: int, role: Role, batch_size: int) -> Iterator[List[int]]:
+        """Ids do segmento em lotes (cópia sob lock, para não bloquear registos)."""
+        with self._lock:
+            user_ids = list(self._segments.get((tenant_id, Role(role)), {}))
+        for start in range(0, len(user_ids), batch_size):
+            yield user_ids[start:start + batch_size]
+
+
+@dataclass
+class FanoutJob:
+    job_id: int
+    tenant_id: int
+    role: Role
+    type: NotificationType
+    title: str
+    content: str
+    metadata: dict = field(default_factory=dict)
+    audience: int = 0
+    delivered: int = 0
+    done: bool = False
+    failed: bool = False
+    error: Optional[str] = None
+
+    @property
+    def finished(self) -> bool:
+        return self.done or self.failed
+
+
+class NotificationFanout:
+    """
+    Fan-out de notificações por segmento em background. O pedido HTTP só
+    enfileira o job; a thread de fan-out resolve a audiência, escreve as
+    notificações em lotes (`create_many`) e entrega cada lote aos listeners
+    registados (canais de push).
+
+    `done` só fica True quando todos os lotes foram escritos; uma falha
+    marca `failed` (com `error`). Só os últimos `max_finished_jobs` jobs
+    terminados ficam consultáveis.
+    """
+
+    def __init__(
+        self, repo, directory: SegmentDirectory, batch_size: int = 1000, max_finished_jobs: int = 1000
+    ) -> None:
+        self._repo = repo
+        self._directory = directory
+        self._batch_size = batch_size
+        self._max_finished = max_finished_jobs
+        self._queue: "queue.Queue[FanoutJob]" = queue.Queue()
+        self._jobs: "OrderedDict[int, FanoutJob]" = OrderedDict()
+        self._finished: Deque[int] = deque()
+        self._jobs_lock = threading.Lock()
+        self._job_ids = IdAllocator()
+        self._listeners: List[DeliveryListener] = []
+        self._thread: Optional[threading.Thread] = None
+        self._start_lock = threading.Lock()
+
+    @property
+    def directory(self) -> SegmentDirectory:
+        return self._directory
+
+    def add_listener(self, listener: DeliveryListener) -> None:
+        self._listeners.append(listener)
+
+    def submit(
+        self, tenant_id: int, role: Role, type: NotificationType, title: str, content: str, metadata: dict
+    ) -> FanoutJob:
+        job = FanoutJob(self._job_ids.next_id(), tenant_id, Role(role), type, title, content, metadata)
+        job.audience = self._directory.size(tenant_id, role)
+        with self._jobs_lock:
+            self._jobs[job.job_id] = job
+        self._start()
+        self._queue.put(job)
+        return job
+
+    def get_job(self, job_id: int) -> Optional[FanoutJob]:
+        with self._jobs_lock:
+            return self._jobs.get(job_id)
+
+    def join(self) -> None:
+        """Bloqueia até todos os jobs enfileirados estarem entregues (testes e shutdown)."""
+        self._queue.join()
+
+    def _start(self) -> None:
+        if self._thread is not None:
+            return
+        with self._start_lock:
+            if self._thread is None:
+                self._thread = threading.Thread(target=self._run, name="notification-fanout", daemon=True)
+                self._thread.start()
+
+    def _run(self) -> None:
+        while True:
+            job = self._queue.get()
+            try:
+                self._deliver(job)
+                job.done = True
+            except Exception as exc:
+                job.failed, job.error = True, str(exc)
+                print(f"[SENTINEL ALERT] Falha no fan-out de notificações (job {job.job_id}): {exc}")
+            finally:
+                self._retire(job)
+                self._queue.task_done()
+
+    def _retire(self, job: FanoutJob) -> None:
+        with self._jobs_lock:
+            self._finished.append(job.job_id)
+            while len(self._finished) > self._max_finished:
+                self._jobs.pop(self._finished.popleft(), None)
+
+    def _deliver(self, job: FanoutJob) -> None:
+        for user_ids in self._directory.iter_batches(job.tenant_id, job.role, self._batch_size):
+            batch = self._repo.create_many(user_ids, job.type, job.title, job.content, job.metadata)
+            job.delivered += len(batch)
+            for listener in self._listeners:
+                try:
+                    listener(batch)
+                except Exception as exc:
+                    print(f"[SENTINEL ALERT] Listener de notificações falhou: {exc}")
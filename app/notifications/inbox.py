@@ -0,0 +1,83 @@
+
+from bisect import bisect_left
+from datetime import datetime
+from typing import Dict, List, Optional, Tuple
+from app.domain.notifications.models import Notification
+
+
+class UserInbox:
+    """
+    Caixa de notificações de um utilizador, append-only e ordenada por
+    criação (sequência crescente = created_at crescente). Mantém um índice
+    por id e o conjunto das não lidas (contagem O(1), "marcar todas" em
+    O(não lidas)); a paginação por cursor é uma pesquisa binária sobre as
+    sequências. Não é thread-safe: o repositório serializa.
+    """
+
+    __slots__ = ("_seqs", "_items", "_by_id", "_unread")
+
+    def __init__(self) -> None:
+        self._seqs: List[int] = []
+        self._items: List[Notification] = []
+        self._by_id: Dict[str, Notification] = {}
+        self._unread: Dict[str, None] = {}
+
+    def __len__(self) -> int:
+        return len(self._items)
+
+    @property
+    def unread(self) -> int:
+        return len(self._unread)
+
+    def append(self, seq: int, notif: Notification) -> None:
+        self._seqs.append(seq)
+        self._items.append(notif)
+        self._by_id[notif.id] = notif
+        if not notif.is_read:
+            self._unread[notif.id] = None
+
+    def get(self, notif_id: str) -> Optional[Notification]:
+        return self._by_id.get(notif_id)
+
+    def mark_read(self, notif: Notification) -> bool:
+        """Marca como lida; devolve True se estava por ler."""
+        if notif.is_read:
+            return False
+        notif.is_read = True
+        self._unread.pop(notif.id, None)
+        return True
+
+    def mark_all_read(self) -> int:
+        """Marca todas as não lidas; devolve quantas mudaram."""
+        count = len(self._unread)
+        for notif_id in self._unread:
+            self._by_id[notif_id].is_read = True
+        self._unread.clear()
+        return count
+
+    def page(self, limit: int, before_seq: Optional[int] = None) -> Tuple[List[Notification], bool]:
+        """
+        Até `limit` notificações, mais recentes primeiro, anteriores a
+        `before_seq` (exclusivo). Devolve também se há mais páginas.
+        """
+        end = len(self._seqs) if before_seq is None else bisect_left(self._seqs, before_seq)
+        start = max(0, end - limit)
+        return self._items[start:end][::-1], start > 0
+
+    def evict_read_before(self, cutoff: datetime) -> List[str]:
+        """
+        Retenção: remove notificações lidas criadas antes de `cutoff`. As não
+        lidas ficam, mesmo antigas. Só o prefixo antigo é reconstruído.
+        """
+        old = bisect_left(self._items, cutoff, key=lambda n: n.created_at)
+        if old == 0:
+            return []
+        evicted = [n.id for n in self._items[:old] if n.is_read]
+        if not evicted:
+            return []
+        kept = [(s, n) for s, n in zip(self._seqs[:old], self._items[:old]) if not n.is_read]
+        self._seqs[:old] = [s for s, _ in kept]
+        self._items[:old] = [n for _, n in kept]
+        for notif_id in evicted:
+            del self._by_id[notif_id]
+        return evicted
@@ -1,46 +1,174 @@
 
-from typing import List, Dict, Optional
-from datetime import datetime
+import os
+import threading
+from typing import Dict, Iterable, List, Optional, Tuple
+from datetime import datetime, timedelta
+from app.core.concurrency import IdAllocator
 from app.domain.notifications.models import Notification, NotificationType
+from app.core.security import Role
+from app.notifications.fanout import FanoutJob, NotificationFanout, SegmentDirectory
+from app.notifications.inbox import UserInbox
 
 class NotificationRepository:
-    def __init__(self):
-        self._notifications: Dict[str, Notification] = {}
-        self._counter = 1
+    """
+    Notificações organizadas em caixas por utilizador (`UserInbox`): listar,
+    paginar e contar não lidas só toca na caixa do próprio utilizador.
+    Notificações lidas com mais de `retention_days` são removidas (verificado
+    no máximo uma vez por `eviction_interval` em cada caixa).
+    """
+
+    def __init__(self, retention_days: int = 90, eviction_interval: timedelta = timedelta(hours=1)):
+        self._inboxes: Dict[int, UserInbox] = {}
+        self._owners: Dict[str, int] = {}
+        self._last_eviction: Dict[int, datetime] = {}
+        self._retention = timedelta(days=retention_days)
+        self._eviction_interval = eviction_interval
+        self._ids = IdAllocator()
+        self._lock = threading.Lock()
 
     def create(self, user_id: int, type: NotificationType, title: str, content: str, metadata: dict) -> Notification:
-        notif_id = f"N-{self._counter:06d}"
-        notif = Notification(
-            id=notif_id,
-            user_id=user_id,
-            type=type,
-            title=title,
-            content=content,
-            metadata=metadata
-        )
-        self._notifications[notif_id] = notif
-        self._counter += 1
+        with self._lock:
+            # Sequência e created_at atribuídos sob o lock: a caixa fica ordenada
+            seq = self._ids.next_id()
+            notif = Notification(
+                id=f"N-{seq:06d}",
+                user_id=user_id,
+                type=type,
+                title=title,
+                content=content,
+                metadata=metadata
+            )
+            self._inbox(user_id).append(seq, notif)
+            self._owners[notif.id] = user_id
+            self._maybe_evict(user_id, notif.created_at)
         return notif
 
-    def list_by_user(self, user_id: int) -> List[Notification]:
-        return sorted(
-            [n for n in self._notifications.values() if n.user_id == user_id],
-            key=lambda x: x.created_at,
-            reverse=True
-        )
+    def create_many(
+        self, user_ids: Iterable[int], type: NotificationType, title: str, content: str, metadata: dict
+    ) -> List[Notification]:
+        """Mesma notificação para vários utilizadores, numa única aquisição do lock."""
+        created = []
+        with self._lock:
+            for user_id in user_ids:
+                seq = self._ids.next_id()
+                notif = Notification(
+                    id=f"N-{seq:06d}",
+                    user_id=user_id,
+                    type=type,
+                    title=title,
+                    content=content,
+                    metadata=dict(metadata)
+                )
+                self._inbox(user_id).append(seq, notif)
+                self._owners[notif.id] = user_id
+                created.append(notif)
+        return created
+
+    def list_by_user(self, user_id: int, limit: int = 50, cursor: Optional[str] = None) -> Tuple[List[Notification], Optional[str]]:
+        """
+        Página da caixa do utilizador (mais recentes primeiro) e o cursor da
+        seguinte. O cursor é o id da última notificação devolvida.
+        """
+        before_seq = _seq_of(cursor) if cursor else None
+        with self._lock:
+            inbox = self._inboxes.get(user_id)
+            if inbox is None:
+                return [], None
+            items, has_more = inbox.page(limit, before_seq)
+        return items, (items[-1].id if has_more and items else None)
+
+    def unread_count(self, user_id: int) -> int:
+        inbox = self._inboxes.get(user_id)
+        return inbox.unread if inbox is not None else 0
 
-    def mark_as_read(self, notif_id: str) -> Optional[Notification]:
-        if notif_id in self._notifications:
-            self._notifications[notif_id].is_read = True
-            return self._notifications[notif_id]
-        return None
+    def mark_as_read(self, notif_id: str, user_id: Optional[int] = None) -> Optional[Notification]:
+        """Marca como lida. Com `user_id`, só encontra notificações desse utilizador."""
+        with self._lock:
+            owner = self._owners.get(notif_id)
+            if owner is None or (user_id is not None and owner != user_id):
+                return None
+            inbox = self._inboxes[owner]
+            notif = inbox.get(notif_id)
+            inbox.mark_read(notif)
+            return notif
 
-# Singleton
-_notif_repo = NotificationRepository()
+    def mark_many_read(self, user_id: int, notif_ids: Optional[Iterable[str]] = None) -> int:
+        """
+        Marca como lidas as notificações indicadas do utilizador (ids de
+        outros utilizadores ou desconhecidos são ignorados), ou todas se
+        `notif_ids` for None. Devolve quantas passaram a lidas.
+        """
+        with self._lock:
+            inbox = self._inboxes.get(user_id)
+            if inbox is None:
+                return 0
+            if notif_ids is None:
+                return inbox.mark_all_read()
+            changed = 0
+            for notif_id in notif_ids:
+                notif = inbox.get(notif_id)
+                if notif is not None and inbox.mark_read(notif):
+                    changed += 1
+            return changed
+
+    def evict_expired(self, now: Optional[datetime] = None) -> int:
+        """Retenção global (job periódico): remove lidas mais antigas que a retenção."""
+        cutoff = (now or datetime.utcnow()) - self._retention
+        with self._lock:
+            removed = 0
+            for inbox in self._inboxes.values():
+                for notif_id in inbox.evict_read_before(cutoff):
+                    del self._owners[notif_id]
+                    removed += 1
+            return removed
+
+    def _inbox(self, user_id: int) -> UserInbox:
+        inbox = self._inboxes.get(user_id)
+        if inbox is None:
+            inbox = self._inboxes[user_id] = UserInbox()
+        return inbox
+
+    def _maybe_evict(self, user_id: int, now: datetime) -> None:
+        last = self._last_eviction.get(user_id)
+        if last is not None and now - last < self._eviction_interval:
+            return
+        self._last_eviction[user_id] = now
+        for notif_id in self._inboxes[user_id].evict_read_before(now - self._retention):
+            del self._owners[notif_id]
+
+def _seq_of(notif_id: str) -> int:
+    """Sequência codificada no id ("N-000123" -> 123). ValueError se inválido."""
+    prefix, _, number = notif_id.partition("-")
+    if prefix != "N" or not number.isdigit():
+        raise ValueError("Cursor de notificações inválido.")
+    return int(number)
+
+# Singleton (NOTIFICATION_RETENTION_DAYS controla a retenção das lidas)
+_notif_repo = NotificationRepository(retention_days=int(os.getenv("NOTIFICATION_RETENTION_DAYS", "90")))
+segment_directory = SegmentDirectory()
+_fanout = NotificationFanout(_notif_repo, segment_directory)
 
 class NotificationService:
-    def __init__(self, repo: NotificationRepository):
+    def __init__(self, repo: NotificationRepository, fanout: Optional[NotificationFanout] = None):
         self.repo = repo
+        self.fanout = fanout
+
+    def notify_segment(
+        self,
+        tenant_id: int,
+        role: Role,
+        title: str,
+        content: str,
+        type: NotificationType = NotificationType.SYSTEM,
+        metadata: Optional[dict] = None,
+    ) -> FanoutJob:
+        """
+        Anúncio para todos os utilizadores de um papel num tenant. Só
+        enfileira o job: a escrita por utilizador acontece no fan-out.
+        """
+        if self.fanout is None:
+            raise RuntimeError("NotificationService sem fan-out configurado.")
+        return self.fanout.submit(tenant_id, role, type, title, content, metadata or {})
 
     def notify_order_update(self, user_id: int, order_id: int, status: str):
         return self.repo.create(
@@ -60,4 +188,4 @@ class NotificationService:
             metadata={"order_id": order_id}
         )
 
-notification_service = NotificationService(_notif_repo)
+notification_service = NotificationService(_notif_repo, _fanout)
@@ -1,18 +1,62 @@
 
 import json
+import time
 from pathlib import Path
-from typing import Any, Optional, Dict, List
+from typing import Any, Optional, Dict, List, Tuple, Union
+from app.core.geo import GeoGridIndex
 from app.domain.orders.models import Order, OrderStatus, ManualProContact
 from app.orders.repository import OrderRepository
+from app.orders.partner_config import FileSignature, PartnerConfigMetrics, PartnerConfigWatcher, file_signature
+from app.orders.partner_index import PartnerIndex, RoundRobinPolicy, SelectionPolicy, normalize_key
+from app.orders.partner_stream import CompactPartnerIndex
 
 class BridgePartnerNotFound(Exception):
     pass
 
+class PartnerSnapshot:
+    """
+    Índices imutáveis de parceiros (por área e espacial, por categoria);
+    trocados em bloco por uma única atribuição. `signature` é a assinatura
+    do ficheiro lida antes do parse (base do watcher).
+    """
+
+    __slots__ = ("index", "geo", "signature")
+
+    def __init__(
+        self, index: Union[PartnerIndex, CompactPartnerIndex], signature: Optional[FileSignature] = None
+    ) -> None:
+        self.index = index
+        self.signature = signature
+        self.geo: Dict[str, GeoGridIndex] = {}
+        for (category, _area), pro in index.iter_geo_pros():
+            self.geo.setdefault(category, GeoGridIndex()).upsert(
+                pro["phone"],
+                float(pro["lat"]),
+                float(pro["lon"]),
+                payload=pro,
+                available=pro.get("available", True),
+            )
+
 class BridgeService:
-    def __init__(self, order_repo: OrderRepository, config_path: Path) -> None:
+    def __init__(
+        self,
+        order_repo: OrderRepository,
+        config_path: Path,
+        selection_policy: Optional[SelectionPolicy] = None,
+        compact: bool = False,
+        match_radius_km: float = 15.0,
+    ) -> None:
         self._order_repo = order_repo
         self._config_path = config_path
-        self._partners_config = self._load_partners_config()
+        self._selection_policy = selection_policy or RoundRobinPolicy()
+        # compact=True: ingestão em streaming (JSON array ou NDJSON) para
+        # diretórios de parceiros grandes, sem manter os dicts em memória.
+        self._compact = compact
+        # Raio de matching geográfico (default = raio_km_sugerido dos packs)
+        self._match_radius_km = match_radius_km
+        self._snapshot = self._build_snapshot()
+        self._watcher: Optional[PartnerConfigWatcher] = None
+        self.config_metrics = PartnerConfigMetrics()
 
     def _load_partners_config(self) -> List[Dict[str, Any]]:
         if not self._config_path.exists():
@@ -20,20 +64,80 @@ class BridgeService:
         with self._config_path.open("r", encoding="utf-8") as f:
             return json.load(f)
 
+    def _build_snapshot(self) -> PartnerSnapshot:
+        # Stat antes do parse: uma escrita durante a leitura volta a ser detetada
+        signature = file_signature(self._config_path)
+        if self._compact:
+            return PartnerSnapshot(CompactPartnerIndex.from_file(self._config_path), signature)
+        return PartnerSnapshot(PartnerIndex(self._load_partners_config()), signature)
+
+    def reload_partners_config(self) -> float:
+        """
+        Relê o ficheiro e troca o snapshot atomicamente. Leitores em curso
+        continuam com o snapshot anterior. Devolve o tempo de parse em ms.
+        """
+        started = time.perf_counter()
+        snapshot = self._build_snapshot()
+        parse_ms = (time.perf_counter() - started) * 1000
+        self._snapshot = snapshot
+        return parse_ms
+
+    def start_config_watcher(self, interval_seconds: float = 5.0) -> PartnerConfigWatcher:
+        if self._watcher is None:
+            self._watcher = PartnerConfigWatcher(
+                self._config_path,
+                reload=self.reload_partners_config,
+                interval_seconds=interval_seconds,
+                metrics=self.config_metrics,
+                signature=self._snapshot.signature,
+            )
+            self._watcher.start()
+        return self._watcher
+
+    def stop_config_watcher(self) -> None:
+        if self._watcher is not None:
+            self._watcher.stop()
+            self._watcher = None
+
     def _find_bridge_partner(self, category: str, area: str) -> Optional[Dict[str, str]]:
-        for entry in self._partners_config:
-            if entry.get("category") == category and entry.get("area") == area:
-                pros = entry.get("pros", [])
-                return pros[0] if pros else None
-        return None
+        return self._snapshot.index.find(category, area, self._selection_policy)
+
+    def nearest_partners(
+        self, category: str, lat: float, lon: float, k: int = 5, radius_km: Optional[float] = None
+    ) -> List[Tuple[float, Dict[str, Any]]]:
+        """k parceiros disponíveis mais próximos da categoria, como (distância_km, pro)."""
+        geo = self._snapshot.geo.get(normalize_key(category))
+        if geo is None:
+            return []
+        radius = self._match_radius_km if radius_km is None else radius_km
+        return [(distance, pro) for distance, _, pro in geo.nearest(lat, lon, k=k, radius_km=radius)]
 
-    def create_order(self, category: str, area: str, client_id: int) -> Order:
-        return self._order_repo.create(category=category, area=area, client_id=client_id)
+    def create_order(
+        self,
+        category: str,
+        area: str,
+        client_id: int,
+        lat: Optional[float] = None,
+        lon: Optional[float] = None,
+    ) -> Order:
+        return self._order_repo.create(
+            category=category, area=area, client_id=client_id, lat=lat, lon=lon
+        )
 
     def manual_bridge(self, order_id: int) -> Dict[str, Any]:
         order = self._order_repo.get(order_id)
-        partner = self._find_bridge_partner(order.category, order.area)
-        
+        partner, distance_km = None, None
+
+        # 1. Proximidade (se o pedido e os parceiros tiverem coordenadas)
+        if order.lat is not None and order.lon is not None:
+            nearest = self.nearest_partners(order.category, order.lat, order.lon, k=1)
+            if nearest:
+                distance_km, partner = nearest[0]
+
+        # 2. Fallback: correspondência por área
+        if not partner:
+            partner = self._find_bridge_partner(order.category, order.area)
+
         if not partner:
             raise BridgePartnerNotFound(
                 f"Nenhum parceiro Bridge manual para {order.category} em {order.area}"
@@ -61,6 +165,7 @@ class BridgeService:
                 "phone": contact.phone,
                 "whatsapp": whatsapp_link,
                 "source": contact.source,
+                "distanceKm": round(distance_km, 2) if distance_km is not None else None,
             },
             "commission": "10% primeira utilização",
             "paymentLink": f"stripe://checkout/order/{order.id}",
@@ -0,0 +1,113 @@
+
+import os
+import threading
+import time
+from pathlib import Path
+from typing import Any, Callable, Dict, Optional, Tuple
+
+# Assinatura do ficheiro: (inode, tamanho, mtime em ns). Qualquer alteração
+# (incluindo substituição atómica via rename) muda pelo menos um dos campos.
+FileSignature = Tuple[int, int, int]
+
+# `PartnerConfigWatcher(signature=...)` omitido: assinatura lida na construção
+_STAT_NOW = object()
+
+
+def file_signature(path: Path) -> Optional[FileSignature]:
+    try:
+        st = os.stat(path)
+    except FileNotFoundError:
+        return None
+    return (st.st_ino, st.st_size, st.st_mtime_ns)
+
+
+class PartnerConfigMetrics:
+    """Métricas de recarregamento do partners_bridge.json (expostas ao Sentinel)."""
+
+    def __init__(self) -> None:
+        self.reload_count = 0
+        self.reload_errors = 0
+        self.last_parse_ms = 0.0
+        self.last_reload_latency_ms = 0.0
+        self.last_reload_at: Optional[float] = None
+        self.last_error: Optional[str] = None
+
+    def as_dict(self) -> Dict[str, object]:
+        return {
+            "reload_count": self.reload_count,
+            "reload_errors": self.reload_errors,
+            "last_parse_ms": round(self.last_parse_ms, 3),
+            "last_reload_latency_ms": round(self.last_reload_latency_ms, 3),
+            "last_reload_at": self.last_reload_at,
+            "last_error": self.last_error,
+        }
+
+
+class PartnerConfigWatcher:
+    """
+    Watcher em background que verifica o stat do ficheiro de parceiros e só
+    chama `reload` quando a assinatura muda. O `reload` é responsável por
+    construir o novo índice e trocá-lo atomicamente; se falhar (ex.: JSON
+    a meio de ser escrito) a versão anterior mantém-se e tenta-se no próximo tick.
+
+    `signature` é a assinatura do ficheiro que deu origem ao índice em uso;
+    uma alteração feita entre essa leitura e o arranque do watcher é assim
+    recarregada no primeiro tick.
+    """
+
+    def __init__(
+        self,
+        config_path: Path,
+        reload: Callable[[], float],
+        interval_seconds: float = 5.0,
+        metrics: Optional[PartnerConfigMetrics] = None,
+        signature: Any = _STAT_NOW,
+    ) -> None:
+        self._config_path = config_path
+        self._reload = reload
+        self._interval = interval_seconds
+        self.metrics = metrics or PartnerConfigMetrics()
+        self._signature = file_signature(config_path) if signature is _STAT_NOW else signature
+        self._stop = threading.Event()
+        self._thread: Optional[threading.Thread] = None
+
+    def check(self) -> bool:
+        """Verifica o ficheiro uma vez. Devolve True se houve recarregamento."""
+        signature = file_signature(self._config_path)
+        if signature == self._signature:
+            return False
+
+        started = time.perf_counter()
+        try:
+            parse_ms = self._reload()
+        except Exception as exc:
+            self.metrics.reload_errors += 1
+            self.metrics.last_error = str(exc)
+            print(f"[SENTINEL WARNING] Falha ao recarregar {self._config_path}: {exc}")
+            return False
+
+        self._signature = signature
+        self.metrics.reload_count += 1
+        self.metrics.last_parse_ms = parse_ms
+        self.metrics.last_reload_latency_ms = (time.perf_counter() - started) * 1000
+        self.metrics.last_reload_at = time.time()
+        self.metrics.last_error = None
+        return True
+
+    def start(self) -> None:
+        if self._thread is not None:
+            return
+        self._thread = threading.Thread(
+            target=self._run, name="partner-config-watcher", daemon=True
+        )
+        self._thread.start()
+
+    def stop(self) -> None:
+        self._stop.set()
+        if self._thread is not None:
+            self._thread.join(timeout=self._interval + 1)
+            self._thread = None
+
+    def _run(self) -> None:
+        while not self._stop.wait(self._interval):
+            self.check()
@@ -0,0 +1,160 @@
+
+import random
+import threading
+import time
+import unicodedata
+from abc import ABC, abstractmethod
+from bisect import bisect_right
+from itertools import accumulate
+from typing import Any, Dict, Iterable, Iterator, List, Optional, Sequence, Tuple
+
+PartnerKey = Tuple[str, str]
+
+
+def normalize_key(value: str) -> str:
+    """
+    Normaliza categoria/área para lookup: remove acentos, espaços extra e caixa.
+    Ex.: "  Canalização " -> "canalizacao", "SETÚBAL" -> "setubal".
+    """
+    decomposed = unicodedata.normalize("NFKD", value or "")
+    stripped = "".join(c for c in decomposed if not unicodedata.combining(c))
+    return " ".join(stripped.casefold().split())
+
+
+class PartnerBucket:
+    """Parceiros de um par (categoria, área), com pesos acumulados pré-calculados."""
+
+    __slots__ = ("key", "pros", "cumulative_weights")
+
+    def __init__(
+        self,
+        key: PartnerKey,
+        pros: Sequence[Dict[str, Any]],
+        cumulative_weights: Optional[List[float]] = None,
+    ) -> None:
+        self.key = key
+        self.pros = pros
+        if cumulative_weights is None:
+            # Parceiros indisponíveis ficam com peso 0 (nunca sorteados)
+            weights = [
+                max(float(p.get("weight", 1.0)), 0.0) if p.get("available", True) else 0.0 for p in pros
+            ]
+            cumulative_weights = list(accumulate(weights))
+        self.cumulative_weights = cumulative_weights
+
+
+# --- Políticas de seleção ---
+
+class SelectionPolicy(ABC):
+    """Contrato: escolhe um parceiro de um bucket não vazio."""
+
+    @abstractmethod
+    def select(self, bucket: PartnerBucket) -> Dict[str, Any]:
+        ...
+
+
+class FirstPartnerPolicy(SelectionPolicy):
+    """Comportamento legado: devolve sempre o primeiro parceiro da lista."""
+
+    def select(self, bucket: PartnerBucket) -> Dict[str, Any]:
+        return bucket.pros[0]
+
+
+class RoundRobinPolicy(SelectionPolicy):
+    """Distribui os pedidos ciclicamente pelos parceiros de cada par."""
+
+    def __init__(self) -> None:
+        self._cursors: Dict[PartnerKey, int] = {}
+        self._lock = threading.Lock()
+
+    def select(self, bucket: PartnerBucket) -> Dict[str, Any]:
+        with self._lock:
+            cursor = self._cursors.get(bucket.key, 0)
+            self._cursors[bucket.key] = cursor + 1
+        return bucket.pros[cursor % len(bucket.pros)]
+
+
+class LeastRecentlyAssignedPolicy(SelectionPolicy):
+    """Escolhe o parceiro há mais tempo sem atribuição (por telefone)."""
+
+    def __init__(self) -> None:
+        self._last_assigned: Dict[str, float] = {}
+        self._lock = threading.Lock()
+
+    def select(self, bucket: PartnerBucket) -> Dict[str, Any]:
+        with self._lock:
+            chosen = min(bucket.pros, key=lambda p: self._last_assigned.get(p["phone"], 0.0))
+            self._last_assigned[chosen["phone"]] = time.monotonic()
+        return chosen
+
+
+class WeightedPolicy(SelectionPolicy):
+    """
+    Seleção aleatória ponderada pelo campo opcional `weight` de cada parceiro
+    (default 1.0). Usa os pesos acumulados do bucket: O(log n) por escolha.
+    """
+
+    def __init__(self, rng: Optional[random.Random] = None) -> None:
+        self._rng = rng or random.Random()
+
+    def select(self, bucket: PartnerBucket) -> Dict[str, Any]:
+        total = bucket.cumulative_weights[-1]
+        if total <= 0:
+            return bucket.pros[0]
+        pick = self._rng.random() * total
+        return bucket.pros[min(bisect_right(bucket.cumulative_weights, pick), len(bucket.pros) - 1)]
+
+
+SELECTION_POLICIES = {
+    "first": FirstPartnerPolicy,
+    "round_robin": RoundRobinPolicy,
+    "least_recent": LeastRecentlyAssignedPolicy,
+    "weighted": WeightedPolicy,
+}
+
+
+def get_selection_policy(name: str) -> SelectionPolicy:
+    if name not in SELECTION_POLICIES:
+        raise ValueError(f"Política de seleção desconhecida: {name}")
+    return SELECTION_POLICIES[name]()
+
+
+# --- Índice ---
+
+class PartnerIndex:
+    """
+    Índice (categoria, área) -> parceiros, construído uma vez no carregamento
+    do `partners_bridge.json`. Lookup O(1) independente do tamanho do ficheiro.
+    Entradas repetidas para o mesmo par são fundidas por ordem de aparição.
+    """
+
+    def __init__(self, entries: Iterable[Dict[str, Any]]) -> None:
+        grouped: Dict[PartnerKey, List[Dict[str, Any]]] = {}
+        for entry in entries:
+            pros = entry.get("pros") or []
+            if not pros:
+                continue
+            key = (normalize_key(entry.get("category", "")), normalize_key(entry.get("area", "")))
+            grouped.setdefault(key, []).extend(pros)
+        self._buckets: Dict[PartnerKey, PartnerBucket] = {
+            key: PartnerBucket(key, pros) for key, pros in grouped.items()
+        }
+
+    def __len__(self) -> int:
+        return len(self._buckets)
+
+    def bucket(self, category: str, area: str) -> Optional[PartnerBucket]:
+        return self._buckets.get((normalize_key(category), normalize_key(area)))
+
+    def find(self, category: str, area: str, policy: SelectionPolicy) -> Optional[Dict[str, Any]]:
+        bucket = self.bucket(category, area)
+        if bucket is None:
+            return None
+        return policy.select(bucket)
+
+    def iter_geo_pros(self) -> Iterator[Tuple[PartnerKey, Dict[str, Any]]]:
+        """Pros com coordenadas (`lat`/`lon`), para o índice espacial."""
+        for key, bucket in self._buckets.items():
+            for pro in bucket.pros:
+                if pro.get("lat") is not None and pro.get("lon") is not None:
+                    yield key, pro
@@ -0,0 +1,266 @@
+
+import json
+import math
+import sys
+from array import array
+from pathlib import Path
+from typing import Any, Dict, Iterator, Optional, Sequence, TextIO, Tuple
+
+from app.orders.partner_index import PartnerBucket, PartnerKey, SelectionPolicy, normalize_key
+
+NDJSON_SUFFIXES = (".ndjson", ".jsonl")
+_CHUNK_SIZE = 1 << 16
+_decoder = json.JSONDecoder()
+
+
+# --- Parsing incremental ---
+
+def iter_json_array(fp: TextIO, chunk_size: int = _CHUNK_SIZE) -> Iterator[Dict[str, Any]]:
+    """
+    Itera os elementos de um array JSON de topo lendo o ficheiro por blocos.
+    Só o elemento corrente (e o bloco lido) está em memória.
+    """
+    buffer = ""
+    pos = 0
+    started = False
+    eof = False
+
+    while True:
+        # Saltar whitespace, '[' inicial e vírgulas entre elementos
+        while pos < len(buffer):
+            char = buffer[pos]
+            if char == "[" and not started:
+                started = True
+            elif not (char.isspace() or char == ","):
+                break
+            pos += 1
+
+        if pos < len(buffer):
+            if not started:
+                raise ValueError("O ficheiro de parceiros deve conter um array JSON")
+            if buffer[pos] == "]":
+                return
+            try:
+                item, end = _decoder.raw_decode(buffer, pos)
+            except json.JSONDecodeError:
+                if eof:
+                    raise
+            else:
+                yield item
+                pos = end
+                continue
+
+        if eof:
+            if started:
+                raise ValueError("Array JSON de parceiros incompleto")
+            return
+        chunk = fp.read(chunk_size)
+        eof = not chunk
+        buffer = buffer[pos:] + chunk
+        pos = 0
+
+
+def iter_ndjson(fp: TextIO) -> Iterator[Dict[str, Any]]:
+    """Uma entrada de parceiro por linha (linhas vazias são ignoradas)."""
+    for line in fp:
+        line = line.strip()
+        if line:
+            yield json.loads(line)
+
+
+def iter_partner_entries(path: Path) -> Iterator[Dict[str, Any]]:
+    with path.open("r", encoding="utf-8") as fp:
+        if path.suffix in NDJSON_SUFFIXES:
+            yield from iter_ndjson(fp)
+        else:
+            yield from iter_json_array(fp)
+
+
+# --- Representação compacta ---
+
+class _StringTable:
+    """
+    Strings UTF-8 concatenadas num único bytearray, endereçadas por offsets
+    de 32 bits (limite de 4 GiB por tabela, muito acima do diretório atual).
+    """
+
+    __slots__ = ("blob", "offsets")
+
+    def __init__(self) -> None:
+        self.blob = bytearray()
+        self.offsets = array("I", [0])
+
+    def append(self, value: str) -> None:
+        self.blob.extend(value.encode("utf-8"))
+        self.offsets.append(len(self.blob))
+
+    def __getitem__(self, row: int) -> str:
+        return self.blob[self.offsets[row]:self.offsets[row + 1]].decode("utf-8")
+
+    def scattered(self, dest: array) -> "_StringTable":
+        """Nova tabela em que a linha `row` passa para a posição `dest[row]`."""
+        lengths = array("I", bytes(4 * len(dest)))
+        for row, target in enumerate(dest):
+            lengths[target] = self.offsets[row + 1] - self.offsets[row]
+        table = _StringTable()
+        for length in lengths:
+            table.offsets.append(table.offsets[-1] + length)
+        table.blob = bytearray(len(self.blob))
+        for row, target in enumerate(dest):
+            table.blob[table.offsets[target]:table.offsets[target + 1]] = \
+                self.blob[self.offsets[row]:self.offsets[row + 1]]
+        return table
+
+
+class CompactProList(Sequence):
+    """Vista só-de-leitura sobre as linhas [start, end) das tabelas de pros."""
+
+    __slots__ = ("_index", "_start", "_end")
+
+    def __init__(self, index: "CompactPartnerIndex", start: int, end: int) -> None:
+        self._index = index
+        self._start = start
+        self._end = end
+
+    def __len__(self) -> int:
+        return self._end - self._start
+
+    def __getitem__(self, i):
+        if isinstance(i, slice):
+            return [self[j] for j in range(*i.indices(len(self)))]
+        if i < 0:
+            i += len(self)
+        if not 0 <= i < len(self):
+            raise IndexError(i)
+        return self._index.pro_at(self._start + i)
+
+
+class CompactPartnerIndex:
+    """
+    Índice de parceiros com o mesmo contrato de `PartnerIndex`, mas sem manter
+    dicts por pro: chaves (categoria, área) internadas, nomes e telefones em
+    tabelas de bytes, pesos em array('f'), disponibilidade em array('b') e
+    coordenadas em array('d') (NaN quando ausentes). Os pesos acumulados por
+    bucket são calculados uma vez na construção; `bucket` devolve apenas uma
+    vista sobre eles. Os dicts devolvidos por `find` são materializados
+    apenas para o parceiro escolhido.
+    """
+
+    def __init__(self) -> None:
+        self._bucket_ids: Dict[PartnerKey, int] = {}
+        self._starts = array("I")
+        self._names = _StringTable()
+        self._phones = _StringTable()
+        self._weights = array("f")
+        self._available = array("b")
+        self._lats = array("d")
+        self._lons = array("d")
+        self._cumulative = memoryview(array("d"))
+
+    @classmethod
+    def from_entries(cls, entries: Iterator[Dict[str, Any]]) -> "CompactPartnerIndex":
+        index = cls()
+        row_buckets = array("I")
+        for entry in entries:
+            pros = entry.get("pros") or []
+            if not pros:
+                continue
+            key = (
+                sys.intern(normalize_key(entry.get("category", ""))),
+                sys.intern(normalize_key(entry.get("area", ""))),
+            )
+            bucket_id = index._bucket_ids.setdefault(key, len(index._bucket_ids))
+            for pro in pros:
+                index._names.append(pro["name"])
+                index._phones.append(pro["phone"])
+                index._weights.append(max(float(pro.get("weight", 1.0)), 0.0))
+                index._available.append(1 if pro.get("available", True) else 0)
+                index._lats.append(float(pro.get("lat", math.nan)))
+                index._lons.append(float(pro.get("lon", math.nan)))
+                row_buckets.append(bucket_id)
+        index._group_rows(row_buckets)
+        return index
+
+    @classmethod
+    def from_file(cls, path: Path) -> "CompactPartnerIndex":
+        if not path.exists():
+            return cls()
+        return cls.from_entries(iter_partner_entries(path))
+
+    def _group_rows(self, row_buckets: array) -> None:
+        # Entradas do mesmo par podem estar dispersas no ficheiro: counting sort
+        # estável das linhas por bucket para que cada bucket ocupe um intervalo
+        # contíguo, usando apenas arrays (sem listas de ints Python).
+        counts = array("I", bytes(4 * len(self._bucket_ids)))
+        for bucket_id in row_buckets:
+            counts[bucket_id] += 1
+        self._starts = array("I", [0])
+        for count in counts:
+            self._starts.append(self._starts[-1] + count)
+
+        cursors = self._starts[:-1]
+        dest = array("I", bytes(4 * len(row_buckets)))
+        grouped = True
+        for row, bucket_id in enumerate(row_buckets):
+            dest[row] = cursors[bucket_id]
+            cursors[bucket_id] += 1
+            grouped = grouped and dest[row] == row
+        if not grouped:
+            self._names = self._names.scattered(dest)
+            self._phones = self._phones.scattered(dest)
+            self._weights = _scatter(self._weights, dest)
+            self._available = _scatter(self._available, dest)
+            self._lats = _scatter(self._lats, dest)
+            self._lons = _scatter(self._lons, dest)
+        self._cumulative = memoryview(_accumulate(self._weights, self._available, self._starts))
+
+    def __len__(self) -> int:
+        return len(self._bucket_ids)
+
+    def pro_at(self, row: int) -> Dict[str, Any]:
+        pro: Dict[str, Any] = {"name": self._names[row], "phone": self._phones[row]}
+        if not self._available[row]:
+            pro["available"] = False
+        if not math.isnan(self._lats[row]):
+            pro["lat"], pro["lon"] = self._lats[row], self._lons[row]
+        return pro
+
+    def iter_geo_pros(self) -> Iterator[Tuple[PartnerKey, Dict[str, Any]]]:
+        """Pros com coordenadas; só estes são materializados como dict."""
+        for key, bucket_id in self._bucket_ids.items():
+            for row in range(self._starts[bucket_id], self._starts[bucket_id + 1]):
+                if not math.isnan(self._lats[row]):
+                    yield key, self.pro_at(row)
+
+    def bucket(self, category: str, area: str) -> Optional[PartnerBucket]:
+        key = (normalize_key(category), normalize_key(area))
+        bucket_id = self._bucket_ids.get(key)
+        if bucket_id is None:
+            return None
+        start, end = self._starts[bucket_id], self._starts[bucket_id + 1]
+        return PartnerBucket(key, CompactProList(self, start, end), self._cumulative[start:end])
+
+    def find(self, category: str, area: str, policy: SelectionPolicy) -> Optional[Dict[str, Any]]:
+        bucket = self.bucket(category, area)
+        if bucket is None:
+            return None
+        return policy.select(bucket)
+
+
+def _accumulate(weights: array, available: array, starts: array) -> array:
+    """Somas prefixas dos pesos, recomeçadas em cada bucket; indisponíveis pesam 0."""
+    cumulative = array("d", bytes(8 * len(weights)))
+    for bucket_id in range(len(starts) - 1):
+        total = 0.0
+        for row in range(starts[bucket_id], starts[bucket_id + 1]):
+            if available[row]:
+                total += weights[row]
+            cumulative[row] = total
+    return cumulative
+
+
+def _scatter(values: array, dest: array) -> array:
+    scattered = array(values.typecode, bytes(values.itemsize * len(dest)))
+    for row, target in enumerate(dest):
+        scattered[target] = values[row]
+    return scattered
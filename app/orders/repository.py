@@ -1,35 +1,192 @@
 
-from typing import Dict
+import os
+import json
+import sqlite3
+import threading
+from itertools import islice
+from pathlib import Path
+from typing import Dict, Iterable, Iterator, List, Optional, Tuple
+from app.core.concurrency import IdAllocator
 from app.domain.orders.models import Order, OrderStatus
+from app.orders.partner_index import normalize_key
+
+# Chaves indexadas de cada pedido: (client_id, status, (categoria, área) normalizadas)
+IndexKeys = Tuple[int, OrderStatus, Tuple[str, str]]
+
+class SQLiteOrderPersistence:
+    """
+    Persistência local write-through dos pedidos (SQLite em modo WAL).
+    A fonte de leitura continua a ser a memória; o ficheiro serve para
+    sobreviver a reinícios e é relido no arranque do repositório.
+    """
+
+    def __init__(self, path: Path) -> None:
+        self._conn = sqlite3.connect(str(path), check_same_thread=False, isolation_level=None)
+        self._lock = threading.Lock()
+        with self._lock:
+            self._conn.execute("PRAGMA journal_mode=WAL")
+            self._conn.execute("PRAGMA synchronous=NORMAL")
+            self._conn.execute(
+                "CREATE TABLE IF NOT EXISTS orders ("
+                " id INTEGER PRIMARY KEY,"
+                " client_id INTEGER NOT NULL,"
+                " status TEXT NOT NULL,"
+                " category TEXT NOT NULL,"
+                " area TEXT NOT NULL,"
+                " data TEXT NOT NULL)"
+            )
+            self._conn.execute("CREATE INDEX IF NOT EXISTS idx_orders_client ON orders (client_id)")
+            self._conn.execute("CREATE INDEX IF NOT EXISTS idx_orders_status ON orders (status)")
+            self._conn.execute("CREATE INDEX IF NOT EXISTS idx_orders_category_area ON orders (category, area)")
+
+    def upsert(self, order: Order) -> None:
+        with self._lock:
+            self._conn.execute(
+                "INSERT INTO orders (id, client_id, status, category, area, data) VALUES (?, ?, ?, ?, ?, ?)"
+                " ON CONFLICT(id) DO UPDATE SET client_id=excluded.client_id, status=excluded.status,"
+                " category=excluded.category, area=excluded.area, data=excluded.data",
+                (order.id, order.client_id, order.status.value, order.category, order.area, order.model_dump_json()),
+            )
+
+    def load_all(self) -> Iterator[Order]:
+        with self._lock:
+            rows = self._conn.execute("SELECT data FROM orders ORDER BY id").fetchall()
+        for (data,) in rows:
+            yield Order(**json.loads(data))
+
+    def close(self) -> None:
+        with self._lock:
+            self._conn.close()
 
 class OrderRepository:
-    def __init__(self) -> None:
+    """
+    Repositório de pedidos com índices secundários por cliente, estado e
+    (categoria, área). Cada índice é um dict ordenado por inserção usado como
+    conjunto: listagens filtradas percorrem só o índice mais seletivo.
+
+    Thread-safe: ids vêm de um `IdAllocator`; escritas e leituras dos
+    índices são serializadas pelo lock do repositório.
+    """
+
+    def __init__(self, persistence: Optional[SQLiteOrderPersistence] = None) -> None:
         self._orders: Dict[int, Order] = {}
-        self._counter: int = 1
+        self._ids = IdAllocator()
+        self._lock = threading.RLock()
+        self._persistence = persistence
+        self._indexed: Dict[int, IndexKeys] = {}
+        self._by_client: Dict[int, Dict[int, None]] = {}
+        self._by_status: Dict[OrderStatus, Dict[int, None]] = {}
+        self._by_category_area: Dict[Tuple[str, str], Dict[int, None]] = {}
+        if persistence is not None:
+            for order in persistence.load_all():
+                self._orders[order.id] = order
+                self._index(order)
+            self._ids.advance_to(max(self._orders, default=0) + 1)
 
-    def create(self, category: str, area: str, client_id: int) -> Order:
+    def create(
+        self,
+        category: str,
+        area: str,
+        client_id: int,
+        lat: Optional[float] = None,
+        lon: Optional[float] = None,
+    ) -> Order:
         order = Order(
-            id=self._counter,
+            id=self._ids.next_id(),
             category=category,
             area=area,
             status=OrderStatus.PENDING,
             client_id=client_id,
+            lat=lat,
+            lon=lon,
         )
-        self._orders[self._counter] = order
-        self._counter += 1
-        return order
+        return self.save(order)
 
     def get(self, order_id: int) -> Order:
-        if order_id not in self._orders:
+        order = self._orders.get(order_id)
+        if order is None:
             raise KeyError(f"Order {order_id} not found")
-        return self._orders[order_id]
+        return order
 
     def save(self, order: Order) -> Order:
-        self._orders[order.id] = order
+        with self._lock:
+            self._orders[order.id] = order
+            self._index(order)
+            if self._persistence is not None:
+                self._persistence.upsert(order)
         return order
 
+    def list(
+        self,
+        client_id: Optional[int] = None,
+        status: Optional[OrderStatus] = None,
+        category: Optional[str] = None,
+        area: Optional[str] = None,
+        limit: int = 50,
+        offset: int = 0,
+    ) -> List[Order]:
+        """
+        Lista pedidos que satisfazem todos os filtros, por ordem de criação
+        (com filtro por estado: pela ordem de entrada nesse estado).
+        `category` e `area` filtram em conjunto (índice composto).
+        """
+        candidates: List[Dict[int, None]] = []
+        if client_id is not None:
+            candidates.append(self._by_client.get(client_id, {}))
+        if status is not None:
+            candidates.append(self._by_status.get(OrderStatus(status), {}))
+        if category is not None and area is not None:
+            key = (normalize_key(category), normalize_key(area))
+            candidates.append(self._by_category_area.get(key, {}))
+        elif category is not None or area is not None:
+            raise ValueError("Os filtros category e area devem ser usados em conjunto.")
+
+        with self._lock:
+            if not candidates:
+                ids: Iterable[int] = self._orders.keys()
+            else:
+                candidates.sort(key=len)
+                smallest, others = candidates[0], candidates[1:]
+                ids = (i for i in smallest if all(i in other for other in others))
+            return [self._orders[i] for i in islice(ids, offset, offset + limit)]
+
+    def count(self, status: Optional[OrderStatus] = None) -> int:
+        with self._lock:
+            if status is None:
+                return len(self._orders)
+            return len(self._by_status.get(OrderStatus(status), {}))
+
+    def _index(self, order: Order) -> None:
+        keys: IndexKeys = (
+            order.client_id,
+            order.status,
+            (normalize_key(order.category), normalize_key(order.area)),
+        )
+        previous = self._indexed.get(order.id)
+        if previous == keys:
+            return
+        # Só os índices cuja chave mudou são tocados (preserva a ordem nos outros)
+        for index, old_key, new_key in zip(
+            (self._by_client, self._by_status, self._by_category_area),
+            previous or (None, None, None),
+            keys,
+        ):
+            if old_key == new_key:
+                continue
+            if old_key is not None:
+                index.get(old_key, {}).pop(order.id, None)
+            index.setdefault(new_key, {})[order.id] = None
+        self._indexed[order.id] = keys
+
+def _build_order_repository() -> OrderRepository:
+    # ORDER_STORE_PATH=/data/orders.db ativa a persistência local (SQLite/WAL)
+    store_path = os.getenv("ORDER_STORE_PATH")
+    if store_path:
+        return OrderRepository(persistence=SQLiteOrderPersistence(Path(store_path)))
+    return OrderRepository()
+
 # Singleton instance for the system
-order_repo = OrderRepository()
+order_repo = _build_order_repository()
 
 def get_order_repository() -> OrderRepository:
     return order_repo
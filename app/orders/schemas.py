@@ -1,16 +1,20 @@
 
+from typing import Optional
 from pydantic import BaseModel, Field
 
 class CreateOrderRequest(BaseModel):
     category: str = Field(..., example="Canalização")
     area: str = Field(..., example="Almada")
     client_id: int = Field(..., ge=1, example=123)
+    lat: Optional[float] = Field(None, ge=-90, le=90, example=38.6790)
+    lon: Optional[float] = Field(None, ge=-180, le=180, example=-9.1569)
 
 class ManualBridgeResponseProContact(BaseModel):
     name: str
     phone: str
     whatsapp: str
     source: str
+    distanceKm: Optional[float] = None
 
 class ManualBridgeResponse(BaseModel):
     orderId: int
@@ -1,12 +1,37 @@
 
+from typing import Dict, Sequence
+
+import numpy as np
+
 from app.domain.payments.models import PaymentSplit, CommissionModel
 
+# Taxas de comissão convertidas para partes por milhão: o cálculo da parte da
+# plataforma é feito só com inteiros, idêntico no caminho escalar e no bulk.
+RATE_SCALE = 1_000_000
+# Maior |montante| em cêntimos cujo produto por RATE_SCALE cabe em int64
+MAX_AMOUNT_CENTS = np.iinfo(np.int64).max // RATE_SCALE
+
+_VALID_MODELS = np.array([m.value for m in CommissionModel])
+
+
+def rate_to_ppm(commission_rate: float) -> int:
+    if not 0 <= commission_rate <= 1:
+        raise ValueError(f"Taxa de comissão inválida: {commission_rate} (esperado entre 0 e 1).")
+    return round(commission_rate * RATE_SCALE)
+
+
+def _platform_cents(total_amount: int, rate_ppm: int) -> int:
+    # Trunca em direção a zero (como int()), também para montantes negativos
+    share = abs(total_amount) * rate_ppm // RATE_SCALE
+    return share if total_amount >= 0 else -share
+
+
 def calculate_split(total_amount: int, commission_rate: float, model: CommissionModel) -> PaymentSplit:
     """
     Calcula a divisão do valor total entre a plataforma e o profissional.
     Valores processados em cêntimos para evitar erros de floating point.
     """
-    platform_amount = int(total_amount * commission_rate)
+    platform_amount = _platform_cents(total_amount, rate_to_ppm(commission_rate))
     pro_amount = total_amount - platform_amount
     
     return PaymentSplit(
@@ -16,3 +41,43 @@ def calculate_split(total_amount: int, commission_rate: float, model: Commission
         commission_rate=commission_rate,
         model=model
     )
+
+
+def calculate_splits_bulk(
+    total_amounts: Sequence[int],
+    commission_rates: Sequence[float],
+    models: Sequence[str],
+) -> Dict[str, np.ndarray]:
+    """
+    Versão colunar de `calculate_split` para reconciliação em massa.
+    Recebe colunas do mesmo comprimento e devolve colunas int64 em cêntimos,
+    com arredondamento idêntico ao caminho escalar e sem modelos pydantic.
+    Taxas fora de [0, 1] e montantes acima de MAX_AMOUNT_CENTS (o produto
+    intermédio transbordaria int64) levantam ValueError.
+    """
+    try:
+        totals = np.asarray(total_amounts, dtype=np.int64)
+    except OverflowError:
+        raise ValueError(f"Montante fora do limite suportado (±{MAX_AMOUNT_CENTS} cêntimos).")
+    rates = np.asarray(commission_rates, dtype=np.float64)
+    model_values = np.asarray([getattr(m, "value", m) for m in models])
+
+    if not (len(totals) == len(rates) == len(model_values)):
+        raise ValueError("As colunas amounts, rates e models devem ter o mesmo comprimento.")
+    if len(model_values) and not np.isin(model_values, _VALID_MODELS).all():
+        raise ValueError(f"Modelo de comissão inválido (esperado: {', '.join(_VALID_MODELS)}).")
+    if len(rates) and not ((rates >= 0) & (rates <= 1)).all():
+        raise ValueError("Taxas de comissão devem estar entre 0 e 1.")
+    if len(totals) and ((totals > MAX_AMOUNT_CENTS) | (totals < -MAX_AMOUNT_CENTS)).any():
+        raise ValueError(f"Montante fora do limite suportado (±{MAX_AMOUNT_CENTS} cêntimos).")
+
+    rates_ppm = np.rint(rates * RATE_SCALE).astype(np.int64)
+    platform = np.abs(totals) * rates_ppm // RATE_SCALE
+    platform = np.where(totals >= 0, platform, -platform)
+
+    return {
+        "total_amounts": totals,
+        "platform_amounts": platform,
+        "pro_amounts": totals - platform,
+        "models": model_values,
+    }
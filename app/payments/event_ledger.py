@@ -0,0 +1,77 @@
+
+from __future__ import annotations
+import sqlite3
+import threading
+import time
+from collections import OrderedDict
+from pathlib import Path
+from typing import Optional
+
+class WebhookEventLedger:
+    """
+    Ledger de deduplicação de eventos Stripe por `event.id`.
+
+    `claim` é atómico: só a primeira entrega de cada evento recebe True,
+    mesmo com entregas concorrentes. Um LRU em memória responde às repetições
+    recentes; o conjunto persistente (SQLite, chave primária) garante a
+    deduplicação entre reinícios. Um claim só fica definitivo com `complete`;
+    claims persistidos que nunca completaram (processo morto a meio) são
+    libertados ao fim de `stale_after_seconds`, na abertura do ledger.
+    """
+
+    def __init__(
+        self, capacity: int = 100_000, path: Optional[Path] = None, stale_after_seconds: float = 300.0
+    ) -> None:
+        self._capacity = capacity
+        self._recent: OrderedDict[str, None] = OrderedDict()
+        self._lock = threading.Lock()
+        self._conn: Optional[sqlite3.Connection] = None
+        if path is not None:
+            self._conn = sqlite3.connect(str(path), check_same_thread=False, isolation_level=None)
+            self._conn.execute("PRAGMA journal_mode=WAL")
+            self._conn.execute(
+                "CREATE TABLE IF NOT EXISTS processed_events (event_id TEXT PRIMARY KEY)"
+            )
+            columns = {row[1] for row in self._conn.execute("PRAGMA table_info(processed_events)")}
+            if "claimed_at" not in columns:
+                # Ledgers antigos: as linhas existentes já estavam processadas
+                self._conn.execute("ALTER TABLE processed_events ADD COLUMN done INTEGER NOT NULL DEFAULT 1")
+                self._conn.execute("ALTER TABLE processed_events ADD COLUMN claimed_at REAL")
+            self._conn.execute(
+                "DELETE FROM processed_events WHERE done = 0 AND claimed_at < ?",
+                (time.time() - stale_after_seconds,),
+            )
+
+    def claim(self, event_id: str) -> bool:
+        with self._lock:
+            if event_id in self._recent:
+                self._recent.move_to_end(event_id)
+                return False
+            if self._conn is not None:
+                cursor = self._conn.execute(
+                    "INSERT OR IGNORE INTO processed_events (event_id, done, claimed_at) VALUES (?, 0, ?)",
+                    (event_id, time.time()),
+                )
+                if cursor.rowcount == 0:
+                    self._remember(event_id)
+                    return False
+            self._remember(event_id)
+            return True
+
+    def complete(self, event_id: str) -> None:
+        """Efeitos aplicados: o claim passa a definitivo."""
+        if self._conn is not None:
+            with self._lock:
+                self._conn.execute("UPDATE processed_events SET done = 1 WHERE event_id = ?", (event_id,))
+
+    def release(self, event_id: str) -> None:
+        """Liberta um evento cujo processamento falhou, para aceitar o retry do Stripe."""
+        with self._lock:
+            self._recent.pop(event_id, None)
+            if self._conn is not None:
+                self._conn.execute("DELETE FROM processed_events WHERE event_id = ?", (event_id,))
+
+    def _remember(self, event_id: str) -> None:
+        self._recent[event_id] = None
+        if len(self._recent) > self._capacity:
+            self._recent.popitem(last=False)
@@ -1,11 +1,14 @@
 
 from __future__ import annotations
+from datetime import datetime
+from typing import List
 from fastapi import APIRouter, HTTPException, status, Depends
 from pydantic import BaseModel, Field
-from app.payments.domain import calculate_split
+from app.payments.domain import calculate_split, calculate_splits_bulk
+from app.payments.sos_pricing import calculate_taxa_sos
 from app.orders.repository import OrderRepository, get_order_repository
 from app.domain.orders.models import OrderStatus
-from app.domain.payments.models import CommissionModel
+from app.domain.payments.models import CommissionModel, TaxaSOSQuote
 
 router = APIRouter(prefix="/payments", tags=["payments"])
 
@@ -19,6 +22,26 @@ class CheckoutResponse(BaseModel):
     client_secret: str
     split: dict
 
+class SplitsBatchRequest(BaseModel):
+    """Entrada colunar: a linha i é (amounts[i], rates[i], models[i])."""
+    amounts: List[int]
+    rates: List[float]
+    models: List[CommissionModel]
+
+class SplitsBatchResponse(BaseModel):
+    count: int
+    platform_amounts: List[int]
+    pro_amounts: List[int]
+    platform_total: int
+    pro_total: int
+
+class SOSQuoteRequest(BaseModel):
+    serviceBaseValue: float = Field(..., ge=0)
+    requestedAt: datetime
+    distanceKm: float = Field(..., ge=0)
+    isImmediate: bool = False
+    hasSecondVisit: bool = False
+
 @router.post("/checkout", response_model=CheckoutResponse)
 def create_checkout_session(
     payload: CheckoutRequest, 
@@ -66,3 +89,39 @@ def create_checkout_session(
             "metadata": metadata
         }
     )
+
+@router.post("/splits/batch", response_model=SplitsBatchResponse)
+def calculate_splits_batch(payload: SplitsBatchRequest) -> SplitsBatchResponse:
+    """
+    Split 90/10 ou 85/15 em massa para reconciliação de fim de dia.
+    Aritmética inteira em cêntimos, idêntica a `calculate_split`.
+    """
+    try:
+        result = calculate_splits_bulk(payload.amounts, payload.rates, payload.models)
+    except ValueError as exc:
+        raise HTTPException(status_code=status.HTTP_422_UNPROCESSABLE_ENTITY, detail=str(exc))
+
+    # Totais somados com ints Python: a soma em int64 poderia transbordar
+    platform_amounts = result["platform_amounts"].tolist()
+    pro_amounts = result["pro_amounts"].tolist()
+    return SplitsBatchResponse(
+        count=len(payload.amounts),
+        platform_amounts=platform_amounts,
+        pro_amounts=pro_amounts,
+        platform_total=sum(platform_amounts),
+        pro_total=sum(pro_amounts),
+    )
+
+@router.post("/sos-quote", response_model=TaxaSOSQuote)
+def quote_sos(payload: SOSQuoteRequest) -> TaxaSOSQuote:
+    """
+    Cotação canónica da Taxa SOS (Modelo B) calculada no servidor.
+    Mesmo contrato que `calculateTaxaSOS` no frontend.
+    """
+    return calculate_taxa_sos(
+        service_base_value=payload.serviceBaseValue,
+        requested_at=payload.requestedAt,
+        distance_km=payload.distanceKm,
+        is_immediate=payload.isImmediate,
+        has_second_visit=payload.hasSecondVisit,
+    )
@@ -0,0 +1,119 @@
+
+from __future__ import annotations
+from datetime import datetime
+from typing import Dict
+from zoneinfo import ZoneInfo
+
+import numpy as np
+
+from app.domain.payments.models import TaxaSOSBreakdown, TaxaSOSQuote
+
+# Port canónico de utils/sos-calculations.ts::calculateTaxaSOS (Modelo B).
+# Qualquer alteração de regra deve ser feita nos dois lados.
+BASE_DIA = 30.00
+BASE_NOITE = 40.00          # 18h-22h
+BASE_MADRUGADA = 50.00      # 22h-8h (inclui a hora 8, como no frontend)
+ACRESCIMO_IMEDIATO = 20.00
+ACRESCIMO_SEGUNDA_VISITA = 25.00
+DISTANCIA_INCLUIDA_KM = 15.0
+EUR_POR_KM_EXTRA = 0.5
+COMISSAO_APP = 0.15
+
+SOS_TIMEZONE = ZoneInfo("Europe/Lisbon")
+
+
+def local_hour(requested_at: datetime) -> int:
+    """Hora local (Lisboa) do pedido; datetimes naive já são considerados locais."""
+    if requested_at.tzinfo is not None:
+        requested_at = requested_at.astimezone(SOS_TIMEZONE)
+    return requested_at.hour
+
+
+def base_periodo(hour: int) -> float:
+    if 18 <= hour < 22:
+        return BASE_NOITE
+    if hour >= 22 or hour <= 8:
+        return BASE_MADRUGADA
+    return BASE_DIA
+
+
+# Tabela hora -> base (lookup vetorizado em vez de máscaras encadeadas)
+_BASE_POR_HORA = np.array([base_periodo(h) for h in range(24)], dtype=np.float64)
+
+
+def calculate_taxa_sos(
+    service_base_value: float,
+    requested_at: datetime,
+    distance_km: float,
+    is_immediate: bool,
+    has_second_visit: bool,
+) -> TaxaSOSQuote:
+    """
+    Calcula a Taxa SOS e o split 85/15 de um pedido (valores em euros).
+    """
+    base = base_periodo(local_hour(requested_at))
+    imediato = ACRESCIMO_IMEDIATO if is_immediate else 0.0
+    distancia = EUR_POR_KM_EXTRA * max(0.0, distance_km - DISTANCIA_INCLUIDA_KM)
+    segunda_visita = ACRESCIMO_SEGUNDA_VISITA if has_second_visit else 0.0
+
+    taxa_sos = base + imediato + distancia + segunda_visita
+    valor_total = service_base_value + taxa_sos
+    ganho_app = valor_total * COMISSAO_APP
+
+    return TaxaSOSQuote(
+        taxaSOS=taxa_sos,
+        valorTotal=valor_total,
+        ganhoApp=ganho_app,
+        colaboradorRecebe=valor_total - ganho_app,
+        breakdown=TaxaSOSBreakdown(
+            basePeriodo=base,
+            acrescimoImediato=imediato,
+            acrescimoDistancia=distancia,
+            acrescimoSegundaVisita=segunda_visita,
+        ),
+    )
+
+
+def calculate_taxa_sos_batch(
+    service_base_values: np.ndarray,
+    hours: np.ndarray,
+    distances_km: np.ndarray,
+    is_immediate: np.ndarray,
+    has_second_visit: np.ndarray,
+) -> Dict[str, np.ndarray]:
+    """
+    Versão vetorizada para re-quotar pedidos em massa. Recebe colunas com o
+    mesmo comprimento (`hours` = hora local 0-23, ver `local_hour`) e devolve
+    colunas float64 com as mesmas chaves do `TaxaSOSQuote` + breakdown.
+    Resultados idênticos ao caminho escalar (mesma ordem de operações).
+    Horas fora de 0-23 ou não inteiras levantam ValueError (um índice
+    negativo seria aceite em silêncio pela tabela).
+    """
+    service = np.asarray(service_base_values, dtype=np.float64)
+    raw_hours = np.asarray(hours)
+    if raw_hours.size and (
+        ((raw_hours < 0) | (raw_hours >= 24)).any() or (raw_hours != np.floor(raw_hours)).any()
+    ):
+        raise ValueError("As horas devem ser inteiros entre 0 e 23 (hora local).")
+    hours = raw_hours.astype(np.intp)
+    distances = np.asarray(distances_km, dtype=np.float64)
+
+    base = _BASE_POR_HORA[hours]
+    imediato = np.where(np.asarray(is_immediate, dtype=bool), ACRESCIMO_IMEDIATO, 0.0)
+    distancia = EUR_POR_KM_EXTRA * np.maximum(0.0, distances - DISTANCIA_INCLUIDA_KM)
+    segunda_visita = np.where(np.asarray(has_second_visit, dtype=bool), ACRESCIMO_SEGUNDA_VISITA, 0.0)
+
+    taxa_sos = base + imediato + distancia + segunda_visita
+    valor_total = service + taxa_sos
+    ganho_app = valor_total * COMISSAO_APP
+
+    return {
+        "taxaSOS": taxa_sos,
+        "valorTotal": valor_total,
+        "ganhoApp": ganho_app,
+        "colaboradorRecebe": valor_total - ganho_app,
+        "basePeriodo": base,
+        "acrescimoImediato": imediato,
+        "acrescimoDistancia": distancia,
+        "acrescimoSegundaVisita": segunda_visita,
+    }
@@ -1,13 +1,71 @@
 
 from __future__ import annotations
+import os
+from pathlib import Path
+from typing import Optional
 from fastapi import APIRouter, HTTPException, Request, status, Depends
+from fastapi.concurrency import run_in_threadpool
 from app.orders.repository import OrderRepository, get_order_repository
 from app.domain.orders.models import OrderStatus
+from app.core.concurrency import StripedLocks
+from app.payments.event_ledger import WebhookEventLedger
 from app.wallet.service import WalletService, get_wallet_service
 from app.wallet.models import WalletTransactionType
 
 router = APIRouter(prefix="/payments/webhooks", tags=["payments-webhooks"])
 
+# Deduplicação por event.id (WEBHOOK_LEDGER_PATH ativa o conjunto persistente)
+_ledger_path = os.getenv("WEBHOOK_LEDGER_PATH")
+event_ledger = WebhookEventLedger(path=Path(_ledger_path) if _ledger_path else None)
+order_locks = StripedLocks()
+
+def apply_payment_succeeded(
+    *,
+    event_id: str,
+    order_id: int,
+    amount: int,
+    model: Optional[str],
+    commission_rate: Optional[float],
+    order_repo: OrderRepository,
+    wallet_service: WalletService,
+) -> bool:
+    """
+    Efeitos de um pagamento confirmado: Ordem -> ASSIGNED e entrada em Escrow.
+    Serializado por ordem; devolve False se a ordem já tinha sido processada.
+    Tudo-ou-nada: se a escrita na wallet falhar, a ordem volta ao estado
+    anterior e o claim do evento é libertado (o Stripe volta a entregá-lo).
+    """
+    try:
+        with order_locks.for_key(order_id):
+            order = order_repo.get(order_id)
+            # Idempotência (2ª linha de defesa: eventos distintos para a mesma ordem)
+            if order.status not in (OrderStatus.PENDING, OrderStatus.MANUAL_FORWARDING):
+                event_ledger.complete(event_id)
+                return False
+
+            # No canon, após pagamento é Assigned. Cópia: a instância guardada
+            # só é substituída; o original serve para repor em caso de falha.
+            order_repo.save(order.model_copy(update={"status": OrderStatus.ASSIGNED}))
+            try:
+                wallet_service.add_transaction(
+                    order_id=order.id,
+                    user_id=order.client_id,
+                    amount_cents=amount,
+                    tx_type=WalletTransactionType.ESCROW_IN,
+                    model=model or "INTERNAL",
+                    commission_rate=commission_rate if commission_rate is not None else 0.15
+                )
+            except Exception:
+                order_repo.save(order)
+                raise
+            event_ledger.complete(event_id)
+    except Exception:
+        event_ledger.release(event_id)
+        raise
+
+    print(f"[SENTINEL] Payment Confirmed: Order #{order_id} | Escrow Locked: {amount/100}€")
+    return True
+
 @router.post("/stripe", status_code=status.HTTP_200_OK)
 async def stripe_webhook(
     request: Request,
@@ -16,8 +74,10 @@ async def stripe_webhook(
 ) -> dict:
     """
     Handler de sucesso do Stripe.
-    - Atualiza Ordem para o estado de pagamento confirmado.
-    - Regista entrada em Escrow na Wallet do sistema.
+    - Deduplica por event.id (retries do Stripe são confirmados sem efeitos).
+    - Atualiza Ordem e regista Escrow na Wallet antes de responder (numa
+      thread, fora do event loop). Se falhar, responde 500 sem ficar com o
+      claim, e o Stripe volta a entregar o evento.
     """
     payload = await request.json()
     event_type = payload.get("type")
@@ -38,27 +98,27 @@ async def stripe_webhook(
     amount = data_object.get("amount_received")
 
     try:
-        order = order_repo.get(order_id)
+        order_repo.get(order_id)
     except KeyError:
         return {"received": True, "error": "Order not found during webhook"}
 
-    # Idempotência
-    if order.status not in (OrderStatus.PENDING, OrderStatus.MANUAL_FORWARDING):
+    # Eventos sem id (testes/manuais) caem para o id do PaymentIntent
+    event_id = payload.get("id") or f"{event_type}:{data_object.get('id', order_id)}"
+    if not event_ledger.claim(event_id):
         return {"received": True, "status": "already_processed"}
 
-    # Atualizar Order
-    order.status = OrderStatus.ASSIGNED # No canon, após pagamento é Assigned
-    order_repo.save(order)
-
-    # Wallet Entry
-    wallet_service.add_transaction(
-        order_id=order.id,
-        user_id=order.client_id,
-        amount_cents=amount,
-        tx_type=WalletTransactionType.ESCROW_IN,
-        model=model or "INTERNAL",
-        commission_rate=float(commission_rate_str) if commission_rate_str else 0.15
-    )
-
-    print(f"[SENTINEL] Payment Confirmed: Order #{order_id} | Escrow Locked: {amount/100}€")
-    return {"received": True, "order_id": order_id, "escrow": "active"}
+    try:
+        applied = await run_in_threadpool(
+            apply_payment_succeeded,
+            event_id=event_id,
+            order_id=order_id,
+            amount=amount,
+            model=model,
+            commission_rate=float(commission_rate_str) if commission_rate_str else None,
+            order_repo=order_repo,
+            wallet_service=wallet_service,
+        )
+    except Exception as e:
+        print(f"[SENTINEL ALERT] Falha no processamento de webhook {event_id}: {str(e)}")
+        raise HTTPException(status_code=500, detail="Falha ao aplicar o pagamento; o Stripe vai reenviar.")
+    return {"received": True, "order_id": order_id, "escrow": "locked" if applied else "already_applied"}
@@ -0,0 +1,338 @@
+
+import asyncio
+import json
+import os
+import threading
+from abc import ABC, abstractmethod
+from collections import Counter, deque
+from dataclasses import dataclass, field
+from datetime import datetime
+from typing import Any, Callable, Deque, Dict, List, Optional
+
+BatchObserver = Callable[[List["SentinelEvent"]], None]
+
+# Tipos de evento que o painel Sentinel trata como alerta crítico
+CRITICAL_EVENT_TYPES = {"SupportTicketEscalated", "KillswitchToggled", "PaymentFailed"}
+
+
+@dataclass
+class SentinelEvent:
+    seq: int
+    event_type: str
+    payload: Dict[str, Any]
+    timestamp: datetime = field(default_factory=datetime.utcnow)
+
+    def to_fields(self) -> Dict[str, str]:
+        """Campos planos para XADD (Redis Streams só aceita strings/bytes/números)."""
+        return {
+            "seq": str(self.seq),
+            "type": self.event_type,
+            "ts": self.timestamp.isoformat(),
+            "payload": json.dumps(self.payload, default=str),
+        }
+
+
+@dataclass
+class EventBusMetrics:
+    published: int = 0
+    delivered: int = 0
+    dropped: int = 0
+    failed: int = 0
+    batches: int = 0
+    high_water: int = 0
+
+
+class EventBus(ABC):
+    """
+    Base do barramento de eventos do Sentinel. `publish` nunca bloqueia: o
+    evento entra num buffer limitado e é entregue em lotes pelo backend
+    (loop asyncio ou thread). Com o buffer cheio o evento é descartado e
+    contado em `dropped`; `publish` devolve False para o produtor poder
+    reagir (backpressure).
+    """
+
+    backend = "base"
+
+    def __init__(self, max_buffer: int = 10_000, batch_size: int = 256) -> None:
+        self.max_buffer = max_buffer
+        self.batch_size = batch_size
+        self.metrics = EventBusMetrics()
+        self._buffer: Deque[SentinelEvent] = deque()
+        self._lock = threading.Lock()
+        self._seq = 0
+        self._observers: List[BatchObserver] = []
+
+    @property
+    def pending(self) -> int:
+        return len(self._buffer)
+
+    def add_observer(self, observer: BatchObserver) -> None:
+        """Observadores locais (ex.: painel) recebem cada lote após a entrega."""
+        self._observers.append(observer)
+
+    def publish(self, event_type: str, payload: Dict[str, Any]) -> bool:
+        with self._lock:
+            if len(self._buffer) >= self.max_buffer:
+                self.metrics.dropped += 1
+                return False
+            self._seq += 1
+            self._buffer.append(SentinelEvent(self._seq, event_type, dict(payload)))
+            self.metrics.published += 1
+            size = len(self._buffer)
+            if size > self.metrics.high_water:
+                self.metrics.high_water = size
+        self._wake(size == 1)
+        return True
+
+    def stats(self) -> Dict[str, Any]:
+        return {
+            "backend": self.backend,
+            "pending": self.pending,
+            "max_buffer": self.max_buffer,
+            "buffer_utilization": round(self.pending / self.max_buffer, 4),
+            **vars(self.metrics),
+        }
+
+    def _take_batch(self) -> List[SentinelEvent]:
+        with self._lock:
+            count = min(self.batch_size, len(self._buffer))
+            return [self._buffer.popleft() for _ in range(count)]
+
+    def _delivered(self, batch: List[SentinelEvent]) -> None:
+        self.metrics.delivered += len(batch)
+        self.metrics.batches += 1
+        for observer in self._observers:
+            try:
+                observer(batch)
+            except Exception as exc:
+                print(f"[SENTINEL ALERT] Observador do event bus falhou: {exc}")
+
+    def start(self) -> None:
+        """Arranque da aplicação (chamado no startup); por omissão não faz nada."""
+
+    @abstractmethod
+    def _wake(self, first: bool) -> None:
+        """Agenda a entrega do buffer (`first`: o buffer estava vazio)."""
+
+
+class InProcessEventBus(EventBus):
+    """
+    Backend em processo sobre asyncio (testes e desenvolvimento). Cada
+    subscritor tem uma `asyncio.Queue` limitada; um subscritor lento perde
+    eventos (contados em `dropped`) em vez de travar os restantes. A tarefa
+    de entrega corre no loop da aplicação, capturado por `start()` no
+    startup (ou no primeiro `publish` feito dentro de um loop). Publicações
+    vindas de outras threads (rotas síncronas no threadpool) acordam-na com
+    `call_soon_threadsafe`; sem loop conhecido os eventos ficam no buffer
+    até `drain()`.
+    """
+
+    backend = "memory"
+
+    def __init__(self, max_buffer: int = 10_000, batch_size: int = 256) -> None:
+        super().__init__(max_buffer, batch_size)
+        self._subscribers: List[asyncio.Queue] = []
+        self._loop: Optional[asyncio.AbstractEventLoop] = None
+        self._ready: Optional[asyncio.Event] = None
+        self._task: Optional[asyncio.Task] = None
+
+    def subscribe(self, maxsize: int = 1000) -> asyncio.Queue:
+        queue: asyncio.Queue = asyncio.Queue(maxsize=maxsize)
+        self._subscribers.append(queue)
+        return queue
+
+    def unsubscribe(self, queue: asyncio.Queue) -> None:
+        if queue in self._subscribers:
+            self._subscribers.remove(queue)
+
+    async def drain(self) -> int:
+        """Entrega tudo o que está no buffer; devolve o número de eventos."""
+        total = 0
+        while True:
+            batch = self._take_batch()
+            if not batch:
+                return total
+            self._dispatch(batch)
+            total += len(batch)
+
+    async def run(self) -> None:
+        """Ciclo de entrega: acorda quando o buffer deixa de estar vazio."""
+        self._bind(asyncio.get_running_loop())
+        while True:
+            await self._ready.wait()
+            self._ready.clear()
+            await self.drain()
+
+    def _dispatch(self, batch: List[SentinelEvent]) -> None:
+        for queue in self._subscribers:
+            for event in batch:
+                try:
+                    queue.put_nowait(event)
+                except asyncio.QueueFull:
+                    self.metrics.dropped += 1
+        self._delivered(batch)
+
+    def start(self, loop: Optional[asyncio.AbstractEventLoop] = None) -> None:
+        """Fixa o loop de entrega (por omissão o loop em execução) e arranca a tarefa."""
+        self._bind(loop or asyncio.get_running_loop())
+        self._loop.call_soon_threadsafe(self._ensure_running)
+
+    def _bind(self, loop: asyncio.AbstractEventLoop) -> None:
+        if self._loop is not loop:
+            self._loop = loop
+            self._ready = asyncio.Event()
+            self._ready.set()
+            self._task = None
+
+    def _ensure_running(self) -> None:
+        # Corre sempre no loop de entrega
+        if self._task is None or self._task.done():
+            self._task = self._loop.create_task(self.run())
+        else:
+            self._ready.set()
+
+    def _wake(self, first: bool) -> None:
+        try:
+            running = asyncio.get_running_loop()
+        except RuntimeError:
+            running = None
+        if running is not None and running is not self._loop and (
+            self._loop is None or self._loop.is_closed() or self._task is None or self._task.done()
+        ):
+            self._bind(running)
+        loop = self._loop
+        if loop is None or loop.is_closed():
+            return
+        if loop is running:
+            if first or self._task is None or self._task.done():
+                self._ensure_running()
+        elif first:
+            # Só a transição vazio -> não vazio acorda o loop (evita um callback por evento)
+            loop.call_soon_threadsafe(self._ensure_running)
+
+
+class RedisStreamsEventBus(EventBus):
+    """
+    Backend de produção: uma thread de flush escreve os lotes num Redis
+    Stream com um único round-trip por lote (pipeline sem MULTI, XADD com
+    MAXLEN aproximado para limitar memória no Redis). Falhas do Redis não
+    chegam ao produtor: o lote é contado em `failed` e segue-se em frente.
+    """
+
+    backend = "redis"
+
+    def __init__(
+        self,
+        client,
+        stream: str = "sentinel:events",
+        stream_maxlen: int = 100_000,
+        max_buffer: int = 10_000,
+        batch_size: int = 256,
+        flush_interval: float = 0.05,
+    ) -> None:
+        super().__init__(max_buffer, batch_size)
+        self._client = client
+        self.stream = stream
+        self.stream_maxlen = stream_maxlen
+        self.flush_interval = flush_interval
+        self._ready = threading.Event()
+        self._thread: Optional[threading.Thread] = None
+        self._start_lock = threading.Lock()
+        # Retirar + escrever é serializado: preserva a ordem no stream e garante
+        # que `flush()` só devolve depois de o lote em curso estar escrito
+        self._flush_lock = threading.Lock()
+
+    @classmethod
+    def from_url(cls, url: str, **kwargs) -> "RedisStreamsEventBus":
+        import redis  # dependência opcional: só necessária com este backend
+
+        return cls(redis.Redis.from_url(url), **kwargs)
+
+    def flush(self) -> int:
+        """Escreve no Redis tudo o que está no buffer (shutdown e testes)."""
+        total = 0
+        while True:
+            with self._flush_lock:
+                batch = self._take_batch()
+                if not batch:
+                    return total
+                self._write(batch)
+            total += len(batch)
+
+    def _write(self, batch: List[SentinelEvent]) -> None:
+        try:
+            pipe = self._client.pipeline(transaction=False)
+            for event in batch:
+                pipe.xadd(self.stream, event.to_fields(), maxlen=self.stream_maxlen, approximate=True)
+            pipe.execute()
+        except Exception as exc:
+            self.metrics.failed += len(batch)
+            print(f"[SENTINEL ALERT] Falha a publicar {len(batch)} eventos no Redis: {exc}")
+            return
+        self._delivered(batch)
+
+    def _wake(self, first: bool) -> None:
+        if self._thread is None:
+            with self._start_lock:
+                if self._thread is None:
+                    self._thread = threading.Thread(target=self._run, name="sentinel-event-bus", daemon=True)
+                    self._thread.start()
+        if self.pending >= self.batch_size:
+            self._ready.set()
+
+    def _run(self) -> None:
+        while True:
+            # Lote cheio acorda logo; caso contrário junta eventos durante `flush_interval`
+            self._ready.wait(self.flush_interval)
+            self._ready.clear()
+            self.flush()
+
+
+class SentinelDashboard:
+    """
+    Agregado em memória alimentado pelo bus para o painel Sentinel do
+    admin: contagens por tipo, eventos recentes e último alerta crítico.
+    """
+
+    def __init__(self, recent: int = 200) -> None:
+        self.counts: Counter = Counter()
+        self.recent: Deque[SentinelEvent] = deque(maxlen=recent)
+        self.last_critical_alert: Optional[str] = None
+        self._lock = threading.Lock()
+
+    def __call__(self, batch: List[SentinelEvent]) -> None:
+        with self._lock:
+            for event in batch:
+                self.counts[event.event_type] += 1
+                self.recent.append(event)
+                if event.event_type in CRITICAL_EVENT_TYPES:
+                    self.last_critical_alert = f"{event.timestamp.isoformat()} {event.event_type}"
+
+    def snapshot(self, limit: int = 50) -> List[SentinelEvent]:
+        with self._lock:
+            return list(self.recent)[-limit:][::-1]
+
+
+def build_event_bus() -> EventBus:
+    """
+    Escolhe o backend por `SENTINEL_EVENT_BUS` (memory|redis); por omissão
+    usa Redis quando `REDIS_URL` está definido.
+    """
+    redis_url = os.getenv("REDIS_URL")
+    kind = os.getenv("SENTINEL_EVENT_BUS", "redis" if redis_url else "memory")
+    max_buffer = int(os.getenv("SENTINEL_EVENT_BUFFER", "10000"))
+    if kind == "redis":
+        return RedisStreamsEventBus.from_url(redis_url or "redis://localhost:6379/0", max_buffer=max_buffer)
+    return InProcessEventBus(max_buffer=max_buffer)
+
+
+_bus: Optional[EventBus] = None
+sentinel_dashboard = SentinelDashboard()
+
+
+def get_event_bus() -> EventBus:
+    global _bus
+    if _bus is None:
+        _bus = build_event_bus()
+        _bus.add_observer(sentinel_dashboard)
+    return _bus
@@ -1,13 +1,15 @@
 
 from __future__ import annotations
-from datetime import datetime
-from typing import Any
+from typing import Any, Optional
+from .event_bus import EventBus, get_event_bus
 
 class SentinelEventEmitter:
-    def emit(self, event_type: str, payload: dict[str, Any]) -> None:
+    def __init__(self, bus: Optional[EventBus] = None) -> None:
+        self._bus = bus or get_event_bus()
+
+    def emit(self, event_type: str, payload: dict[str, Any]) -> bool:
         """
-        MVP: Log em console para telemetria inicial.
-        Futuro: Publicação em Event Mesh (Redis/Kafka) para dashboards em tempo real.
+        Publica no event bus do Sentinel (Redis Streams em produção) sem
+        bloquear. Devolve False se o evento foi descartado por buffer cheio.
         """
-        timestamp = datetime.utcnow().isoformat()
-        print(f"[SENTINEL EVENT] {timestamp} | {event_type} | Payload: {payload}")
+        return self._bus.publish(event_type, payload)
@@ -1,16 +1,18 @@
 
+import threading
 from datetime import datetime, timedelta, timezone
 from typing import List, Dict, Optional
+from app.core.concurrency import IdAllocator
 from app.domain.support.models import SupportTicket, SupportCategory, TicketStatus, ChatLogEntry
 
 class SupportTicketRepository:
     def __init__(self):
         self._tickets: Dict[str, SupportTicket] = {}
-        self._counter = 1
+        self._ids = IdAllocator()
+        self._lock = threading.Lock()
 
     def create(self, user_id: int, role: str, category: SupportCategory, ai_summary: str, chat_log: List[ChatLogEntry], escalated: bool) -> SupportTicket:
-        ticket_id = f"T-{datetime.now().year}-{self._counter:05d}"
-        self._counter += 1
+        ticket_id = f"T-{datetime.now().year}-{self._ids.next_id():05d}"
         
         # Regra de Compliance: 5 anos de retenção
         retention_date = datetime.now(timezone.utc) + timedelta(days=5*365)
@@ -26,23 +28,26 @@ class SupportTicketRepository:
             escalated=escalated,
             retention_until=retention_date
         )
-        self._tickets[ticket_id] = ticket
+        with self._lock:
+            self._tickets[ticket_id] = ticket
         return ticket
 
     def get(self, ticket_id: str) -> Optional[SupportTicket]:
         return self._tickets.get(ticket_id)
 
     def list_pending_escalated(self) -> List[SupportTicket]:
-        return [t for t in self._tickets.values() if t.escalated and t.status == TicketStatus.OPEN]
+        with self._lock:
+            return [t for t in self._tickets.values() if t.escalated and t.status == TicketStatus.OPEN]
 
     def update_status(self, ticket_id: str, new_status: TicketStatus) -> Optional[SupportTicket]:
-        if ticket_id not in self._tickets:
-            return None
-        ticket = self._tickets[ticket_id]
-        ticket.status = new_status
-        if new_status in [TicketStatus.IA_RESOLVED, TicketStatus.HUMAN_RESOLVED, TicketStatus.CLOSED]:
-            ticket.resolved_at = datetime.now(timezone.utc)
-        return ticket
+        with self._lock:
+            ticket = self._tickets.get(ticket_id)
+            if ticket is None:
+                return None
+            ticket.status = new_status
+            if new_status in [TicketStatus.IA_RESOLVED, TicketStatus.HUMAN_RESOLVED, TicketStatus.CLOSED]:
+                ticket.resolved_at = datetime.now(timezone.utc)
+            return ticket
 
 class SupportService:
     def __init__(self, repo: SupportTicketRepository):
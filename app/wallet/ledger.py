@@ -0,0 +1,185 @@
+
+from __future__ import annotations
+from datetime import datetime
+from typing import Dict, List, Optional
+import numpy as np
+from .models import WalletTransaction, WalletTransactionType
+
+# Códigos compactos (int8) dos tipos de movimento, pela ordem do enum
+TX_TYPES: List[WalletTransactionType] = list(WalletTransactionType)
+TX_TYPE_CODES: Dict[WalletTransactionType, int] = {t: i for i, t in enumerate(TX_TYPES)}
+
+# Sinal de cada tipo no saldo líquido do utilizador (entrada em escrow soma,
+# libertação, reembolso e taxa subtraem)
+TX_TYPE_SIGNS = np.array(
+    [1 if t == WalletTransactionType.ESCROW_IN else -1 for t in TX_TYPES], dtype=np.int64
+)
+
+_INITIAL_CAPACITY = 1024
+# Nome público da coluna -> atributo interno
+_COLUMNS = {
+    "id": "_ids", "order_id": "_order_ids", "user_id": "_user_ids",
+    "amount_cents": "_amounts", "tx_type": "_types", "model": "_models",
+    "commission_rate": "_rates", "created_at": "_created_at",
+}
+_NO_RATE = np.nan
+_INT64_MIN, _INT64_MAX = int(np.iinfo(np.int64).min), int(np.iinfo(np.int64).max)
+
+
+class _StringInterner:
+    """Tabela de strings internadas (ex.: model INTERNAL/BRIDGE) com códigos int16."""
+
+    __slots__ = ("values", "codes")
+
+    def __init__(self) -> None:
+        self.values: List[str] = []
+        self.codes: Dict[str, int] = {}
+
+    def code(self, value: str) -> int:
+        code = self.codes.get(value)
+        if code is None:
+            code = len(self.values)
+            if code > np.iinfo(np.int16).max:
+                raise ValueError("Demasiados valores distintos para a tabela de strings")
+            self.values.append(value)
+            self.codes[value] = code
+        return code
+
+
+class ColumnarLedger:
+    """
+    Ledger de movimentos em colunas numpy de tipo fixo (~51 bytes por linha,
+    contra ~1 KB por `WalletTransaction` pydantic). As colunas crescem por
+    duplicação de capacidade; ids são estritamente crescentes, pelo que a
+    procura por id é uma pesquisa binária.
+
+    Saldos por utilizador: `balance` é O(1) (totais acumulados no append);
+    `scan_balance` recalcula com máscaras vetorizadas sobre as colunas.
+    """
+
+    def __init__(self, capacity: int = _INITIAL_CAPACITY) -> None:
+        self._size = 0
+        self._ids = np.empty(capacity, dtype=np.int64)
+        self._order_ids = np.empty(capacity, dtype=np.int64)
+        self._user_ids = np.empty(capacity, dtype=np.int64)
+        self._amounts = np.empty(capacity, dtype=np.int64)
+        self._types = np.empty(capacity, dtype=np.int8)
+        self._models = np.empty(capacity, dtype=np.int16)
+        self._rates = np.empty(capacity, dtype=np.float64)
+        self._created_at = np.empty(capacity, dtype="datetime64[us]")
+        self._model_table = _StringInterner()
+        self._balances: Dict[int, int] = {}
+
+    def __len__(self) -> int:
+        return self._size
+
+    @property
+    def nbytes(self) -> int:
+        """Memória ocupada pelas colunas (capacidade reservada incluída)."""
+        return sum(getattr(self, name).nbytes for name in _COLUMNS.values())
+
+    def _grow(self) -> None:
+        capacity = max(len(self._ids) * 2, _INITIAL_CAPACITY)
+        for name in _COLUMNS.values():
+            column = getattr(self, name)
+            grown = np.empty(capacity, dtype=column.dtype)
+            grown[:self._size] = column[:self._size]
+            setattr(self, name, grown)
+
+    def append(
+        self,
+        *,
+        tx_id: int,
+        order_id: int,
+        user_id: int,
+        amount_cents: int,
+        tx_type: WalletTransactionType,
+        model: str,
+        commission_rate: Optional[float] = None,
+        created_at: Optional[datetime] = None,
+    ) -> int:
+        """
+        Acrescenta um movimento e devolve a linha. Os ids têm de ser crescentes.
+        Valida e converte tudo antes de escrever; `_size` só avança no fim, pelo
+        que um movimento inválido não deixa linha parcial nem saldo alterado.
+        """
+        if self._size and tx_id <= self._ids[self._size - 1]:
+            raise ValueError(f"Id de transação {tx_id} fora de ordem no ledger")
+        for name, value in (("tx_id", tx_id), ("order_id", order_id), ("user_id", user_id), ("amount_cents", amount_cents)):
+            if not isinstance(value, (int, np.integer)) or isinstance(value, bool):
+                raise ValueError(f"{name} deve ser inteiro, recebido {value!r}")
+            if not _INT64_MIN <= value <= _INT64_MAX:
+                raise ValueError(f"{name} fora do intervalo int64: {value}")
+        type_code = TX_TYPE_CODES[WalletTransactionType(tx_type)]
+        rate = _NO_RATE if commission_rate is None else float(commission_rate)
+        if not (np.isnan(rate) or 0.0 <= rate <= 1.0):
+            raise ValueError(f"Taxa de comissão inválida: {commission_rate}")
+        created = np.datetime64(created_at or datetime.utcnow(), "us")
+        model_code = self._model_table.code(model)
+
+        if self._size == len(self._ids):
+            self._grow()
+        row = self._size
+        self._ids[row] = tx_id
+        self._order_ids[row] = order_id
+        self._user_ids[row] = user_id
+        self._amounts[row] = amount_cents
+        self._types[row] = type_code
+        self._models[row] = model_code
+        self._rates[row] = rate
+        self._created_at[row] = created
+        self._balances[user_id] = self._balances.get(user_id, 0) + int(TX_TYPE_SIGNS[type_code]) * int(amount_cents)
+        self._size += 1
+        return row
+
+    def row_of(self, tx_id: int) -> int:
+        row = int(np.searchsorted(self._ids[:self._size], tx_id))
+        if row == self._size or self._ids[row] != tx_id:
+            raise KeyError(f"Transaction {tx_id} not found")
+        return row
+
+    def get(self, tx_id: int) -> WalletTransaction:
+        """Materializa uma linha como `WalletTransaction` (sem revalidar)."""
+        row = self.row_of(tx_id)
+        rate = float(self._rates[row])
+        return WalletTransaction.model_construct(
+            id=int(self._ids[row]),
+            order_id=int(self._order_ids[row]),
+            user_id=int(self._user_ids[row]),
+            amount_cents=int(self._amounts[row]),
+            tx_type=TX_TYPES[self._types[row]],
+            model=self._model_table.values[self._models[row]],
+            commission_rate=None if np.isnan(rate) else rate,
+            created_at=self._created_at[row].astype(datetime),
+        )
+
+    def balance(self, user_id: int) -> int:
+        """Saldo líquido acumulado do utilizador, O(1)."""
+        return self._balances.get(user_id, 0)
+
+    def scan_balance(self, user_id: int) -> int:
+        """Mesmo saldo, recalculado a partir das colunas (máscara vetorizada)."""
+        n = self._size
+        mask = self._user_ids[:n] == user_id
+        return int((self._amounts[:n][mask] * TX_TYPE_SIGNS[self._types[:n][mask]]).sum())
+
+    def totals_by_type(self, user_id: Optional[int] = None) -> Dict[WalletTransactionType, int]:
+        """Soma dos montantes por tipo (de um utilizador, ou de todo o ledger)."""
+        n = self._size
+        types, amounts = self._types[:n], self._amounts[:n]
+        if user_id is not None:
+            mask = self._user_ids[:n] == user_id
+            types, amounts = types[mask], amounts[mask]
+        sums = np.bincount(types, weights=amounts, minlength=len(TX_TYPES))
+        return {t: int(sums[i]) for i, t in enumerate(TX_TYPES)}
+
+    def column(self, name: str) -> np.ndarray:
+        """Vista só-de-leitura de uma coluna (análises vetorizadas)."""
+        view = getattr(self, _COLUMNS[name])[:self._size]
+        view.flags.writeable = False
+        return view
+
+    @property
+    def model_values(self) -> List[str]:
+        """Tabela de strings de `model`: o código na coluna é o índice nesta lista."""
+        return list(self._model_table.values)
@@ -1,22 +1,56 @@
-
 from __future__ import annotations
-from datetime import datetime
-from typing import List, Dict
+import threading
+from app.core.concurrency import IdAllocator
+from .ledger import ColumnarLedger
 from .models import WalletTransaction, WalletTransactionType
 
 class WalletRepository:
+    """
+    Repositório em memória sobre o ledger colunar (ver `ColumnarLedger`).
+    Fonte única de ids das transações; o id é atribuído dentro do lock para
+    que as linhas do ledger fiquem por ordem crescente de id.
+    """
+
     def __init__(self):
-        self._transactions: Dict[int, WalletTransaction] = {}
-        self._counter = 1
+        self.ledger = ColumnarLedger()
+        self._ids = IdAllocator()
+        self._lock = threading.Lock()
+
+    def __len__(self) -> int:
+        return len(self.ledger)
+
+    def append(self, **fields) -> int:
+        """Regista um movimento (campos de `ColumnarLedger.append` sem `tx_id`) e devolve o id."""
+        with self._lock:
+            tx_id = self._ids.next_id()
+            self.ledger.append(tx_id=tx_id, **fields)
+        return tx_id
 
     def create(self, tx: WalletTransaction) -> WalletTransaction:
-        self._transactions[tx.id] = tx
+        with self._lock:
+            self.ledger.append(
+                tx_id=tx.id,
+                order_id=tx.order_id,
+                user_id=tx.user_id,
+                amount_cents=tx.amount_cents,
+                tx_type=tx.tx_type,
+                model=tx.model,
+                commission_rate=tx.commission_rate,
+                created_at=tx.created_at,
+            )
+            self._ids.advance_to(tx.id + 1)
         return tx
 
+    def get(self, tx_id: int) -> WalletTransaction:
+        with self._lock:
+            return self.ledger.get(tx_id)
+
+    def balance(self, user_id: int) -> int:
+        return self.ledger.balance(user_id)
+
 class WalletService:
     def __init__(self, repo: WalletRepository):
         self._repo = repo
-        self._counter = 1
 
     def add_transaction(
         self,
@@ -28,17 +62,19 @@ class WalletService:
         model: str,
         commission_rate: float | None,
     ) -> WalletTransaction:
-        tx = WalletTransaction(
-            id=self._counter,
+        # Escrita direta nas colunas: sem construir/validar um modelo pydantic por movimento
+        tx_id = self._repo.append(
             order_id=order_id,
             user_id=user_id,
             amount_cents=amount_cents,
             tx_type=tx_type,
             model=model,
-            commission_rate=commission_rate
+            commission_rate=commission_rate,
         )
-        self._counter += 1
-        return self._repo.create(tx)
+        return self._repo.get(tx_id)
+
+    def get_balance(self, user_id: int) -> int:
+        return self._repo.balance(user_id)
 
 # Singleton Instance
 _wallet_repo = WalletRepository()
@@ -1,10 +1,15 @@
 
+from typing import Annotated
 from fastapi import APIRouter, Depends, HTTPException, status
 from sqlalchemy.orm import Session
 from sqlalchemy import select
 from app.db.session import get_db
-from app.core.security import get_password_hash, verify_password, create_access_token
+from app.core.security import (
+    get_password_hash, verify_password, create_access_token, decode_access_token, oauth2_scheme, revoke_token,
+    revoke_user_tokens,
+)
 from app.models.database import User, Tenant, UserRole, TenantStatus
+from app.realtime.radar_aggregator import radar_aggregator
 from pydantic import BaseModel, EmailStr
 
 router = APIRouter(prefix="/auth", tags=["authentication"])
@@ -65,6 +70,9 @@ def login_for_access_token(payload: LoginRequest, db: Session = Depends(get_db))
             "role": user.role.value
         }
     )
+    if user.role == UserRole.PRO:
+        # Presença no radar; mantida pelos pings de localização (`PUT /pros/me/location`)
+        radar_aggregator.pro_seen(user.tenant_id, user.id)
     
     return {
         "access_token": access_token,
@@ -76,3 +84,21 @@ def login_for_access_token(payload: LoginRequest, db: Session = Depends(get_db))
             "tenant_id": user.tenant_id
         }
     }
+
+@router.post("/logout")
+def logout(token: Annotated[str, Depends(oauth2_scheme)]):
+    """Revoga o token atual (deixa de ser aceite, mesmo em cache, até expirar)."""
+    claims, _ = decode_access_token(token)
+    revoke_token(token)
+    if claims.role == UserRole.PRO:
+        radar_aggregator.pro_seen(claims.tenant_id, claims.user_id, online=False)
+    return {"status": "success"}
+
+@router.post("/logout-all")
+def logout_all(token: Annotated[str, Depends(oauth2_scheme)]):
+    """Revoga todas as sessões do utilizador (ex.: dispositivo perdido); um novo login volta a ser aceite."""
+    claims, _ = decode_access_token(token)
+    revoke_user_tokens(claims.user_id)
+    if claims.role == UserRole.PRO:
+        radar_aggregator.pro_seen(claims.tenant_id, claims.user_id, online=False)
+    return {"status": "success"}
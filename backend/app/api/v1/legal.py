@@ -22,11 +22,5 @@ def get_legal_document(doc_type: LegalDocumentType):
 
 @router.post("/", response_model=LegalDocument)
 def create_legal_document(payload: LegalDocument, admin: AdminUser):
-    """Cria uma nova versão de um documento legal (Admin)."""
-    # Desativa versões anteriores do mesmo tipo
-    for doc in legal_repo._docs.values():
-        if doc.type == payload.type:
-            doc.is_active = False
-            
-    payload.is_active = True
-    return legal_repo.create(payload)
+    """Cria uma nova versão de um documento legal (Admin); desativa as anteriores do mesmo tipo."""
+    return legal_repo.publish(payload)
@@ -1,11 +1,17 @@
 import os
+import json
 import stripe
+from pathlib import Path
 from fastapi import APIRouter, Request, Header, HTTPException, Depends
-from sqlalchemy.orm import Session
+from fastapi.concurrency import run_in_threadpool
+from sqlalchemy.ext.asyncio import AsyncSession
 from sqlalchemy import select
-from app.db.session import get_db
-from app.models.database import Order, OrderStatus, WalletTransaction, TxType
-from app.core.security import UserClaims, get_current_user_claims
+from app.db.session import SessionLocal, get_async_db
+from app.models.database import Order, OrderStatus
+from app.core.security import UserClaims
+from app.payments.webhook_queue import WebhookIngestQueue
+from app.payments.webhook_spool import WebhookSpool
+from app.realtime.hub import realtime_hub
 
 # Configuração Stripe - Regra: Variáveis de Ambiente
 stripe.api_key = os.getenv("STRIPE_SECRET_KEY") or "sk_test_51PK_FIXIT_MOCK"
@@ -13,11 +19,36 @@ endpoint_secret = os.getenv("STRIPE_WEBHOOK_SECRET") or "whsec_FIXIT_MOCK"
 
 router = APIRouter(prefix="/payments", tags=["billing"])
 
+def publish_paid_orders(paid) -> None:
+    """Pedidos pagos -> stream SSE do tenant (chamado na thread de ingestão)."""
+    for order_id, tenant_id, client_id in paid:
+        realtime_hub.publish_threadsafe(
+            tenant_id, "ORDER_UPDATE", {"id": order_id, "status": OrderStatus.PAID.value, "client_id": client_id}
+        )
+
+# Ingestão assíncrona: o webhook valida, grava no spool local e enfileira; a DB é escrita em lotes
+webhook_queue = WebhookIngestQueue(
+    SessionLocal,
+    batch_size=int(os.getenv("WEBHOOK_BATCH_SIZE", "500")),
+    max_wait_seconds=float(os.getenv("WEBHOOK_BATCH_WAIT_MS", "50")) / 1000,
+    on_paid=publish_paid_orders,
+    spool=WebhookSpool(Path(os.getenv("WEBHOOK_SPOOL_PATH", "webhook_spool.db"))),
+)
+
+def start_webhook_ingest() -> None:
+    """Arranque: repõe o que ficou no spool e liga a consumidora."""
+    webhook_queue.start()
+
+def stop_webhook_ingest() -> None:
+    """Encerramento: recusa novos webhooks (503) e drena a fila; o resto fica no spool."""
+    if not webhook_queue.close(timeout=float(os.getenv("WEBHOOK_DRAIN_TIMEOUT", "20"))):
+        print(f"[SENTINEL ALERT] Fila de webhooks não drenou no encerramento: {webhook_queue.stats()}")
+
 @router.post("/create-intent")
 async def create_payment_intent(
     payload: dict, # payload: { order_id: str, amount: int }
-    user: UserClaims = Depends(get_current_user_claims),
-    db: Session = Depends(get_db)
+    user: UserClaims,
+    db: AsyncSession = Depends(get_async_db)
 ):
     """
     Gera um Client Secret do Stripe para o frontend.
@@ -33,7 +64,7 @@ async def create_payment_intent(
         return {"client_secret": f"pi_mock_{order_id}_secret_{payload.get('amount', 0)}", "status": "simulated"}
 
     stmt = select(Order).where(Order.id == numeric_id, Order.tenant_id == user.tenant_id)
-    order = db.execute(stmt).scalar_one_or_none()
+    order = (await db.execute(stmt)).scalar_one_or_none()
     
     if not order:
         # Para Demo/MVP v3.1, se o DB estiver vazio, retornamos um secret mockado estável
@@ -57,9 +88,16 @@ async def create_payment_intent(
         raise HTTPException(status_code=500, detail=f"Erro Stripe Gateway: {str(e)}")
 
 @router.post("/webhook")
-async def stripe_webhook(request: Request, stripe_signature: str = Header(None), db: Session = Depends(get_db)):
+async def stripe_webhook(
+    request: Request,
+    stripe_signature: str = Header(None),
+):
     """
     Webhook Stealth de alta segurança para reconciliação financeira.
+    Valida a assinatura, grava o evento no spool local e enfileira: a
+    latência do ack não depende da DB e um evento com ack sobrevive a um
+    reinício. Os efeitos são aplicados em lote, com deduplicação por
+    event.id (ver `process_payment_batch`).
     """
     payload = await request.body()
     try:
@@ -70,29 +108,10 @@ async def stripe_webhook(request: Request, stripe_signature: str = Header(None),
         raise HTTPException(status_code=400, detail="Assinatura Webhook Inválida.")
 
     if event['type'] == 'payment_intent.succeeded':
-        intent = event['data']['object']
-        order_id_raw = intent['metadata'].get('order_id')
-        tenant_id = int(intent['metadata'].get('tenant_id', 1))
-        
-        if order_id_raw:
-            order_id = int(order_id_raw)
-            # 1. Confirmar Pedido no DB Central
-            stmt = select(Order).where(Order.id == order_id)
-            order = db.execute(stmt).scalar_one_or_none()
-            
-            if order:
-                order.status = OrderStatus.PAID
-                
-                # 2. Registar Transação em Escrow na Wallet HQ
-                tx = WalletTransaction(
-                    order_id=order.id,
-                    tenant_id=tenant_id,
-                    user_id=order.client_id,
-                    amount_cents=intent['amount'],
-                    tx_type=TxType.ESCROW_IN
-                )
-                db.add(tx)
-                db.commit()
-                print(f"[X247 FINANCE] OK: Pedido #{order_id} reconciliado via Webhook.")
-            
-    return {"status": "success", "protocol": "x247-v3.1"}
\ No newline at end of file
+        # Fila guarda o payload já validado como dict simples (independente do SDK)
+        # Gravação síncrona (fsync) do spool fora do event loop
+        if not await run_in_threadpool(webhook_queue.enqueue, json.loads(payload)):
+            # Fila cheia ou a encerrar: 503 faz o Stripe repetir a entrega mais tarde
+            raise HTTPException(status_code=503, detail="Fila de webhooks saturada.")
+
+    return {"status": "success", "protocol": "x247-v3.1"}
@@ -1,25 +1,40 @@
 
 from typing import List, Optional
-from fastapi import APIRouter, Depends, Query
-from app.core.security import GenericUserClaims, UserClaims
+from fastapi import APIRouter, Depends, HTTPException, Query
+from pydantic import BaseModel, Field
+from app.core.security import UserClaims
+from app.models.database import UserRole
 from app.db.session import get_db
 from sqlalchemy.orm import Session
 from app.repositories.pro_repository import ProRepository
 
 router = APIRouter(prefix="/pros", tags=["professionals"])
 
+class LocationUpdate(BaseModel):
+    lat: float = Field(..., ge=-90, le=90)
+    lon: float = Field(..., ge=-180, le=180)
+    available: bool = True
+
 @router.get("/search")
 def search_professionals(
+    user: UserClaims,
     q: Optional[str] = Query(None),
     category: Optional[str] = Query(None),
-    user: UserClaims = Depends(GenericUserClaims),
+    lat: Optional[float] = Query(None, ge=-90, le=90),
+    lon: Optional[float] = Query(None, ge=-180, le=180),
+    radius_km: float = Query(15.0, gt=0, le=50.0),
+    limit: int = Query(20, ge=1, le=100),
     db: Session = Depends(get_db)
 ):
     """
     Endpoint real para procura de profissionais por tenant.
+    Com `lat`/`lon`, devolve os PROs mais próximos no raio (índice espacial).
     """
     repo = ProRepository(db, user.tenant_id)
-    pros = repo.search_pros(q=q, category=category)
+    if lat is not None and lon is not None:
+        results = repo.search_nearby(lat, lon, radius_km=radius_km, limit=limit, q=q, category=category)
+    else:
+        results = [(p, None) for p in repo.search_pros(q=q, category=category)]
     
     # Mapping para o DTO esperado pelo Frontend
     return [
@@ -33,11 +48,24 @@ def search_professionals(
             "totalEstimatedPrice": 34.50,
             "languages": ["pt"],
             "entityType": "INDIVIDUAL",
-            "distanceKm": 2.5,
+            "distanceKm": round(distance, 2) if distance is not None else 2.5,
             "averageRating": 4.5,
             "totalReviews": 10,
             "canShowPlanBadge": True,
             "planBadgeLabel": "Verificado",
             "proBudgetFee": 0
-        } for p in pros
+        } for p, distance in results
     ]
+
+@router.put("/me/location", status_code=204)
+def update_my_location(
+    payload: LocationUpdate,
+    user: UserClaims,
+    db: Session = Depends(get_db)
+):
+    """Ping de localização do PRO: atualiza o DB, o índice espacial e a presença no radar."""
+    if user.role != UserRole.PRO:
+        raise HTTPException(status_code=403, detail="Apenas profissionais partilham localização.")
+    ProRepository(db, user.tenant_id).update_location(
+        user.user_id, payload.lat, payload.lon, available=payload.available
+    )
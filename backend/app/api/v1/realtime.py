@@ -1,84 +1,71 @@
 
-import asyncio
-import json
-from fastapi import APIRouter, Request, Depends, WebSocket, WebSocketDisconnect
+import os
+from fastapi import APIRouter, HTTPException, Request, Header, Query, WebSocket, WebSocketDisconnect, status
 from fastapi.responses import StreamingResponse
 from app.core.security import UserClaims, get_current_user_claims
-from datetime import datetime, timezone
-from typing import Generator, Set
+from typing import Optional
+from app.realtime.hub import realtime_hub, sse_frames
+from app.db.session import SessionLocal
+from app.realtime.radar import radar_manager
+from app.realtime.radar_aggregator import radar_aggregator
 
 router = APIRouter(prefix="/realtime", tags=["events"])
 
-class RadarManager:
-    def __init__(self):
-        self.active_connections: Set[WebSocket] = set()
-
-    async def connect(self, websocket: WebSocket):
-        await websocket.accept()
-        self.active_connections.add(websocket)
-
-    def disconnect(self, websocket: WebSocket):
-        self.active_connections.remove(websocket)
-
-    async def broadcast(self, message: dict):
-        for connection in self.active_connections:
-            try:
-                await connection.send_json(message)
-            except:
-                continue
-
-radar_manager = RadarManager()
+RADAR_RECOMPUTE_SECONDS = float(os.getenv("RADAR_RECOMPUTE_SECONDS", "60"))
 
 @router.websocket("/sos-radar/{tenant_id}")
-async def sos_radar_socket(websocket: WebSocket, tenant_id: int):
+async def sos_radar_socket(
+    websocket: WebSocket,
+    tenant_id: int,
+    token: Optional[str] = Query(None),
+    authorization: Optional[str] = Header(None),
+):
     """
-    WebSocket Radar: Updates de 50ms (simulados) para telemetria de Pros e SOS ativos.
+    WebSocket Radar: telemetria de Pros e SOS ativos do tenant.
+    Exige o JWT (`?token=`, já que o browser não envia headers no upgrade, ou
+    `Authorization: Bearer`); o tenant difundido é o do token e o do path
+    tem de coincidir.
+    Os updates são difundidos pelo `RadarManager` (um cálculo por tenant por tick)
+    a partir dos contadores incrementais do `radar_aggregator`.
     """
-    await radar_manager.connect(websocket)
+    if token is None and authorization and authorization.lower().startswith("bearer "):
+        token = authorization[7:]
+    try:
+        if not token:
+            raise HTTPException(status_code=status.HTTP_401_UNAUTHORIZED)
+        user = get_current_user_claims(token)
+    except HTTPException:
+        await websocket.close(code=status.WS_1008_POLICY_VIOLATION)
+        return
+    if user.tenant_id != tenant_id:
+        await websocket.close(code=status.WS_1008_POLICY_VIOLATION)
+        return
+
+    # A 1ª ligação arranca a correção periódica contra o SQL (e aquece os contadores)
+    radar_aggregator.start_recompute_loop(SessionLocal, RADAR_RECOMPUTE_SECONDS)
+    await radar_manager.connect(websocket, user.tenant_id)
     try:
         while True:
-            # Em produção: Queries SQL agregadas com cache Redis
-            radar_data = {
-                "type": "RADAR_SYNC",
-                "payload": {
-                    "pros_online": 23,
-                    "sos_active": 4,
-                    "eta_avg": "6.5 min",
-                    "system_load": "LOW"
-                }
-            }
-            await websocket.send_json(radar_data)
-            await asyncio.sleep(2) # Intervalo de atualização do Radar
+            # Só mantém a ligação aberta; a desconexão chega como exceção
+            await websocket.receive_text()
     except WebSocketDisconnect:
-        radar_manager.disconnect(websocket)
+        pass
+    finally:
+        radar_manager.disconnect(websocket, user.tenant_id)
 
 @router.get("/stream")
 async def stream_events(
     request: Request, 
-    user: UserClaims = Depends(get_current_user_claims)
+    user: UserClaims,
+    last_event_id: Optional[str] = Header(None, alias="Last-Event-ID"),
 ):
     """
-    SSE Stream: Eventos de mudança de estado de pedidos e notificações globais.
+    SSE Stream: Eventos de mudança de estado de pedidos e notificações do tenant.
+    Suporta retoma com `Last-Event-ID` a partir do buffer de replay do hub.
     """
-    async def event_generator():
-        try:
-            while True:
-                if await request.is_disconnected():
-                    break
-                
-                # Mock de eventos reativos do ecossistema
-                events = [
-                    {
-                        "type": "ORDER_UPDATE",
-                        "payload": {"id": "sos-123", "status": "ASSIGNED", "pro": "Mário Canalizador"}
-                    }
-                ]
-                
-                for event in events:
-                    yield f"data: {json.dumps(event)}\n\n"
-                
-                await asyncio.sleep(5)
-        except asyncio.CancelledError:
-            pass
-
-    return StreamingResponse(event_generator(), media_type="text/event-stream")
+    resume_from = int(last_event_id) if last_event_id and last_event_id.isdigit() else None
+    return StreamingResponse(
+        sse_frames(realtime_hub, user.tenant_id, resume_from),
+        media_type="text/event-stream",
+        headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"},
+    )
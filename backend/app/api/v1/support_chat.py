@@ -1,7 +1,7 @@
 from fastapi import APIRouter, Depends, HTTPException
-from sqlalchemy.orm import Session
-from app.db.session import get_db
-from app.core.security import UserClaims, get_current_user_claims
+from sqlalchemy.ext.asyncio import AsyncSession
+from app.db.session import get_async_db
+from app.core.security import UserClaims
 from app.support.gemini_client import gemini_engine
 from app.models.database import SupportTicket
 from datetime import datetime, timedelta, timezone
@@ -12,8 +12,8 @@ router = APIRouter(prefix="/support/chat", tags=["flix-ai"])
 @router.post("/")
 async def flix_chat_proxy(
     payload: dict,
-    user: UserClaims = Depends(get_current_user_claims),
-    db: Session = Depends(get_db)
+    user: UserClaims,
+    db: AsyncSession = Depends(get_async_db)
 ):
     """
     Proxy Seguro Flix AI v3.1.
@@ -62,7 +62,7 @@ async def flix_chat_proxy(
     )
     
     db.add(new_ticket)
-    db.commit()
+    await db.commit()
 
     if escalated:
         print(f"[SENTINEL ALERT] Suporte Escalonado: Ticket {ticket_id} para Utilizador {user.user_id}")
@@ -0,0 +1,92 @@
+import csv
+import io
+import json
+from typing import Iterable, Iterator, Optional, Tuple
+from fastapi import APIRouter, Depends, HTTPException, Query
+from fastapi.responses import StreamingResponse
+from sqlalchemy.orm import Session
+from app.core.security import UserClaims
+from app.db.session import SessionLocal, get_db
+from app.repositories.wallet_repository import WalletRepository, decode_cursor, encode_cursor
+
+router = APIRouter(prefix="/wallet", tags=["wallet"])
+
+STATEMENT_FIELDS = ("id", "created_at", "order_id", "tx_type", "amount_cents")
+
+def _statement_record(row: Tuple) -> dict:
+    record = dict(zip(STATEMENT_FIELDS, row))
+    record["created_at"] = record["created_at"].isoformat()
+    record["tx_type"] = record["tx_type"].value
+    return record
+
+def csv_lines(rows: Iterable[Tuple]) -> Iterator[str]:
+    buffer = io.StringIO()
+    writer = csv.writer(buffer)
+    writer.writerow(STATEMENT_FIELDS)
+    for row in rows:
+        record = _statement_record(row)
+        writer.writerow(record[field] for field in STATEMENT_FIELDS)
+        yield buffer.getvalue()
+        buffer.seek(0)
+        buffer.truncate()
+    yield buffer.getvalue()
+
+def ndjson_lines(rows: Iterable[Tuple]) -> Iterator[str]:
+    for row in rows:
+        yield json.dumps(_statement_record(row)) + "\n"
+
+@router.get("/history")
+def wallet_history(
+    user: UserClaims,
+    limit: int = Query(50, ge=1, le=200),
+    cursor: Optional[str] = Query(None),
+    db: Session = Depends(get_db)
+):
+    """
+    Extrato paginado por keyset (mais recentes primeiro).
+    `next_cursor` é opaco e deve ser reenviado como `cursor`.
+    """
+    try:
+        after = decode_cursor(cursor) if cursor else None
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+
+    repo = WalletRepository(db, user.tenant_id)
+    items = repo.list_user_history(user.user_id, limit=limit, after=after)
+    next_cursor = encode_cursor(items[-1].created_at, items[-1].id) if len(items) == limit else None
+    return {
+        "items": [
+            {
+                "id": tx.id,
+                "createdAt": tx.created_at.isoformat(),
+                "orderId": tx.order_id,
+                "txType": tx.tx_type.value,
+                "amountCents": tx.amount_cents,
+            } for tx in items
+        ],
+        "next_cursor": next_cursor,
+    }
+
+@router.get("/history/export")
+def export_wallet_history(
+    user: UserClaims,
+    format: str = Query("csv", pattern="^(csv|ndjson)$"),
+):
+    """
+    Exportação integral do extrato em streaming (CSV ou NDJSON).
+    A sessão pertence ao gerador: vive enquanto a resposta é enviada.
+    """
+    tenant_id, user_id = user.tenant_id, user.user_id
+
+    def stream() -> Iterator[str]:
+        with SessionLocal() as db:
+            rows = WalletRepository(db, tenant_id).iter_user_history(user_id)
+            yield from (csv_lines(rows) if format == "csv" else ndjson_lines(rows))
+
+    media_type = "text/csv" if format == "csv" else "application/x-ndjson"
+    filename = f"extrato-{user_id}.{'csv' if format == 'csv' else 'ndjson'}"
+    return StreamingResponse(
+        stream(),
+        media_type=media_type,
+        headers={"Content-Disposition": f'attachment; filename="{filename}"'},
+    )
@@ -0,0 +1,150 @@
+
+import heapq
+import math
+import threading
+from typing import Any, Callable, Dict, Hashable, List, Optional, Tuple
+
+EARTH_RADIUS_KM = 6371.0088
+KM_PER_DEGREE_LAT = 111.32
+
+
+def haversine_km(lat1: float, lon1: float, lat2: float, lon2: float) -> float:
+    """Distância ortodrómica em km entre dois pontos (graus decimais)."""
+    phi1, phi2 = math.radians(lat1), math.radians(lat2)
+    dphi = phi2 - phi1
+    dlmb = math.radians(lon2 - lon1)
+    a = math.sin(dphi / 2) ** 2 + math.cos(phi1) * math.cos(phi2) * math.sin(dlmb / 2) ** 2
+    return 2 * EARTH_RADIUS_KM * math.asin(min(1.0, math.sqrt(a)))
+
+
+class GeoItem:
+    __slots__ = ("item_id", "lat", "lon", "payload", "available")
+
+    def __init__(self, item_id: Hashable, lat: float, lon: float, payload: Any, available: bool) -> None:
+        self.item_id = item_id
+        self.lat = lat
+        self.lon = lon
+        self.payload = payload
+        self.available = available
+
+
+class GeoGridIndex:
+    """
+    Índice espacial em grelha uniforme (células de `cell_km` em latitude).
+    Responde a "k mais próximos disponíveis num raio de R km" visitando apenas
+    os anéis de células em torno do ponto, em vez de percorrer todos os itens.
+
+    Thread-safe: escritas sob lock; leituras trabalham sobre cópias das células.
+    """
+
+    def __init__(self, cell_km: float = 1.0) -> None:
+        self._cell_deg = cell_km / KM_PER_DEGREE_LAT
+        self._cells: Dict[Tuple[int, int], Dict[Hashable, GeoItem]] = {}
+        self._items: Dict[Hashable, GeoItem] = {}
+        self._lock = threading.Lock()
+
+    def __len__(self) -> int:
+        return len(self._items)
+
+    def _cell(self, lat: float, lon: float) -> Tuple[int, int]:
+        return (math.floor(lat / self._cell_deg), math.floor(lon / self._cell_deg))
+
+    def upsert(self, item_id: Hashable, lat: float, lon: float, payload: Any = None, available: bool = True) -> None:
+        item = GeoItem(item_id, lat, lon, payload, available)
+        with self._lock:
+            self._discard(item_id)
+            self._items[item_id] = item
+            self._cells.setdefault(self._cell(lat, lon), {})[item_id] = item
+
+    def remove(self, item_id: Hashable) -> None:
+        with self._lock:
+            self._discard(item_id)
+
+    def set_available(self, item_id: Hashable, available: bool) -> None:
+        item = self._items.get(item_id)
+        if item is not None:
+            item.available = available
+
+    def _discard(self, item_id: Hashable) -> None:
+        old = self._items.pop(item_id, None)
+        if old is None:
+            return
+        cell_key = self._cell(old.lat, old.lon)
+        cell = self._cells.get(cell_key)
+        if cell is not None:
+            cell.pop(item_id, None)
+            if not cell:
+                del self._cells[cell_key]
+
+    def nearest(
+        self,
+        lat: float,
+        lon: float,
+        k: int = 5,
+        radius_km: float = 15.0,
+        predicate: Optional[Callable[[Any], bool]] = None,
+    ) -> List[Tuple[float, Hashable, Any]]:
+        """
+        Devolve até `k` tuplos (distância_km, item_id, payload) ordenados por
+        distância, apenas para itens disponíveis dentro de `radius_km`.
+        """
+        if k <= 0 or not self._items:
+            return []
+
+        ci, cj = self._cell(lat, lon)
+        cell_km_lat = self._cell_deg * KM_PER_DEGREE_LAT
+        cell_km_lon = max(cell_km_lat * math.cos(math.radians(lat)), 1e-6)
+        max_ring_i = math.ceil(radius_km / cell_km_lat)
+        max_ring_j = math.ceil(radius_km / cell_km_lon)
+
+        # Candidatos medidos com a aproximação equirretangular (erro desprezável
+        # a escalas urbanas, sem trigonometria por item); a distância devolvida
+        # é recalculada com haversine só para os k finais.
+        km_per_deg_lon = KM_PER_DEGREE_LAT * math.cos(math.radians(lat))
+        # Max-heap (distâncias negadas) com os k melhores candidatos
+        best: List[Tuple[float, int, Hashable, Any]] = []
+        seq = 0
+        for ring in range(max(max_ring_i, max_ring_j) + 1):
+            # Qualquer item num anel >= ring está a pelo menos (ring - 1) células
+            if len(best) == k and (ring - 1) * min(cell_km_lat, cell_km_lon) > -best[0][0]:
+                break
+            for cell_key in self._ring_cells(ci, cj, ring, max_ring_i, max_ring_j):
+                cell = self._cells.get(cell_key)
+                if not cell:
+                    continue
+                for item in list(cell.values()):
+                    if not item.available or (predicate is not None and not predicate(item.payload)):
+                        continue
+                    distance = math.hypot(
+                        (item.lat - lat) * KM_PER_DEGREE_LAT, (item.lon - lon) * km_per_deg_lon
+                    )
+                    if distance > radius_km:
+                        continue
+                    seq += 1
+                    entry = (-distance, seq, item.item_id, item.payload)
+                    if len(best) < k:
+                        heapq.heappush(best, entry)
+                    elif distance < -best[0][0]:
+                        heapq.heapreplace(best, entry)
+
+        results = []
+        for _, _, item_id, payload in sorted(best, reverse=True):
+            item = self._items.get(item_id)
+            distance = haversine_km(lat, lon, item.lat, item.lon) if item else 0.0
+            results.append((distance, item_id, payload))
+        return results
+
+    @staticmethod
+    def _ring_cells(ci: int, cj: int, ring: int, max_i: int, max_j: int):
+        """Perímetro do anel `ring` (distância de Chebyshev), limitado ao raio."""
+        if ring == 0:
+            yield (ci, cj)
+            return
+        span_i, span_j = min(ring, max_i), min(ring, max_j)
+        for di in range(-span_i, span_i + 1):
+            if abs(di) == ring:
+                for dj in range(-span_j, span_j + 1):
+                    yield (ci + di, cj + dj)
+            elif ring <= max_j:
+                yield (ci + di, cj - ring)
+                yield (ci + di, cj + ring)
@@ -1,12 +1,13 @@
 
 import os
 from datetime import datetime, timedelta, timezone
-from typing import Optional, Annotated, List
+from typing import Optional, Annotated, Tuple
 from jose import JWTError, jwt
 from passlib.context import CryptContext
 from fastapi import Depends, HTTPException, status
 from fastapi.security import OAuth2PasswordBearer
-from pydantic import BaseModel
+from pydantic import BaseModel, ConfigDict
+from app.core.token_cache import VerifiedTokenCache
 from app.models.database import UserRole
 
 # Configurações de Produção (Regra: Carregar de env)
@@ -18,6 +19,9 @@ pwd_context = CryptContext(schemes=["bcrypt"], deprecated="auto")
 oauth2_scheme = OAuth2PasswordBearer(tokenUrl="auth/login")
 
 class TokenData(BaseModel):
+    # Imutável: a mesma instância é partilhada entre pedidos pela cache de tokens
+    model_config = ConfigDict(frozen=True)
+
     user_id: int
     tenant_id: int
     role: UserRole
@@ -30,11 +34,19 @@ def get_password_hash(password: str) -> str:
 
 def create_access_token(data: dict, expires_delta: Optional[timedelta] = None):
     to_encode = data.copy()
-    expire = datetime.now(timezone.utc) + (expires_delta or timedelta(minutes=ACCESS_TOKEN_EXPIRE_MINUTES))
-    to_encode.update({"exp": expire})
+    now = datetime.now(timezone.utc)
+    expire = now + (expires_delta or timedelta(minutes=ACCESS_TOKEN_EXPIRE_MINUTES))
+    # `iat` com fração de segundo: um login logo após `revoke_user` tem de ficar depois do corte
+    to_encode.update({"exp": expire, "iat": now.timestamp()})
     return jwt.encode(to_encode, SECRET_KEY, algorithm=ALGORITHM)
 
-def get_current_user_claims(token: Annotated[str, Depends(oauth2_scheme)]) -> TokenData:
+# Claims verificadas por hash do token, válidas até ao `exp` (poupa o decode em cada pedido/reconexão)
+token_cache: VerifiedTokenCache[TokenData] = VerifiedTokenCache(
+    maxsize=int(os.getenv("JWT_CACHE_SIZE", "10000"))
+)
+
+def decode_access_token(token: str) -> Tuple[TokenData, dict]:
+    """Verificação completa do JWT (assinatura, `exp`, claims obrigatórias)."""
     credentials_exception = HTTPException(
         status_code=status.HTTP_401_UNAUTHORIZED,
         detail="Credenciais X247 inválidas ou expiradas.",
@@ -49,13 +61,36 @@ def get_current_user_claims(token: Annotated[str, Depends(oauth2_scheme)]) -> To
         if user_id_str is None or tenant_id is None or role_str is None:
             raise credentials_exception
             
-        return TokenData(
+        claims = TokenData(
             user_id=int(user_id_str),
             tenant_id=tenant_id,
             role=UserRole(role_str)
         )
+        return claims, payload
     except (JWTError, ValueError, KeyError):
         raise credentials_exception
 
+def get_current_user_claims(token: Annotated[str, Depends(oauth2_scheme)]) -> TokenData:
+    claims = token_cache.get(token)
+    if claims is not None:
+        return claims
+    claims, payload = decode_access_token(token)
+    if not token_cache.put(token, claims, claims.user_id, payload["exp"], payload.get("iat")):
+        raise HTTPException(
+            status_code=status.HTTP_401_UNAUTHORIZED,
+            detail="Sessão revogada.",
+            headers={"WWW-Authenticate": "Bearer"},
+        )
+    return claims
+
+def revoke_token(token: str) -> None:
+    """Logout: o token deixa de ser aceite neste worker até expirar."""
+    _, payload = decode_access_token(token)
+    token_cache.revoke(token, payload["exp"])
+
+def revoke_user_tokens(user_id: int) -> None:
+    """Logout global: todos os tokens do utilizador emitidos até agora deixam de ser aceites neste worker."""
+    token_cache.revoke_user(user_id)
+
 # Dep injetável para rotas genéricas
 UserClaims = Annotated[TokenData, Depends(get_current_user_claims)]
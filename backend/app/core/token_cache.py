@@ -0,0 +1,135 @@
+
+import hashlib
+import threading
+import time
+from collections import OrderedDict
+from typing import Callable, Dict, Generic, List, Optional, Set, TypeVar
+
+C = TypeVar("C")
+RevocationListener = Callable[[str, object], None]  # ("token" | "user", hash ou user_id)
+
+
+def token_key(token: str) -> bytes:
+    """Chave da cache: sha256 do token (o JWT em claro nunca fica em memória como chave)."""
+    return hashlib.sha256(token.encode()).digest()
+
+
+class VerifiedTokenCache(Generic[C]):
+    """
+    Cache LRU de claims já verificadas, indexada pelo hash do token. Cada
+    entrada vale até ao `exp` do próprio token; um hit evita o `jwt.decode`
+    (HMAC + parse JSON) e a construção das claims.
+
+    Revogação: `revoke` põe o hash numa deny-list até ao `exp` e
+    `revoke_user` rejeita todos os tokens do utilizador emitidos até esse
+    instante (`iat`). Ambos valem por processo; os listeners registados em
+    `add_revocation_listener` servem para propagar a outros workers.
+    """
+
+    def __init__(self, maxsize: int = 10_000, clock: Callable[[], float] = time.time):
+        self.maxsize = maxsize
+        self._clock = clock
+        self._entries: "OrderedDict[bytes, tuple[C, float, int]]" = OrderedDict()
+        self._by_user: Dict[int, Set[bytes]] = {}
+        self._denied: Dict[bytes, float] = {}
+        self._user_cutoff: Dict[int, float] = {}
+        self._listeners: List[RevocationListener] = []
+        self._lock = threading.Lock()
+        self._stats = {"hits": 0, "misses": 0, "evictions": 0, "expired": 0, "revoked": 0}
+
+    def get(self, token: str) -> Optional[C]:
+        key = token_key(token)
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None:
+                self._stats["misses"] += 1
+                return None
+            claims, exp, user_id = entry
+            if exp <= self._clock():
+                self._drop(key, user_id)
+                self._stats["expired"] += 1
+                self._stats["misses"] += 1
+                return None
+            self._entries.move_to_end(key)
+            self._stats["hits"] += 1
+            return claims
+
+    def put(self, token: str, claims: C, user_id: int, exp: float, issued_at: Optional[float] = None) -> bool:
+        """Guarda claims verificadas; devolve False (sem guardar) se o token estiver revogado."""
+        key = token_key(token)
+        with self._lock:
+            if self._is_revoked(key, user_id, issued_at):
+                self._stats["revoked"] += 1
+                return False
+            if exp <= self._clock() or self.maxsize <= 0:
+                return True
+            self._entries[key] = (claims, exp, user_id)
+            self._entries.move_to_end(key)
+            self._by_user.setdefault(user_id, set()).add(key)
+            while len(self._entries) > self.maxsize:
+                old_key, (_, _, old_user) = self._entries.popitem(last=False)
+                self._unindex(old_key, old_user)
+                self._stats["evictions"] += 1
+            return True
+
+    def revoke(self, token: str, exp: float) -> None:
+        """Revoga um token (ex.: logout) até ao seu `exp`."""
+        key = token_key(token)
+        with self._lock:
+            now = self._clock()
+            self._denied = {k: e for k, e in self._denied.items() if e > now}
+            self._denied[key] = exp
+            entry = self._entries.get(key)
+            if entry is not None:
+                self._drop(key, entry[2])
+        self._notify("token", key)
+
+    def revoke_user(self, user_id: int) -> None:
+        """Revoga todos os tokens do utilizador emitidos até agora (password alterada, conta suspensa)."""
+        with self._lock:
+            self._user_cutoff[user_id] = self._clock()
+            for key in self._by_user.pop(user_id, set()):
+                self._entries.pop(key, None)
+        self._notify("user", user_id)
+
+    def add_revocation_listener(self, listener: RevocationListener) -> None:
+        self._listeners.append(listener)
+
+    def stats(self) -> Dict[str, float]:
+        with self._lock:
+            lookups = self._stats["hits"] + self._stats["misses"]
+            return {
+                **self._stats,
+                "size": len(self._entries),
+                "hit_rate": round(self._stats["hits"] / lookups, 4) if lookups else 0.0,
+            }
+
+    def clear(self) -> None:
+        with self._lock:
+            self._entries.clear()
+            self._by_user.clear()
+
+    def _is_revoked(self, key: bytes, user_id: int, issued_at: Optional[float]) -> bool:
+        if key in self._denied:
+            return True
+        cutoff = self._user_cutoff.get(user_id)
+        # Sem `iat` (tokens antigos) não há como provar que é posterior à revogação
+        return cutoff is not None and (issued_at is None or issued_at <= cutoff)
+
+    def _drop(self, key: bytes, user_id: int) -> None:
+        self._entries.pop(key, None)
+        self._unindex(key, user_id)
+
+    def _unindex(self, key: bytes, user_id: int) -> None:
+        keys = self._by_user.get(user_id)
+        if keys is not None:
+            keys.discard(key)
+            if not keys:
+                del self._by_user[user_id]
+
+    def _notify(self, kind: str, value: object) -> None:
+        for listener in self._listeners:
+            try:
+                listener(kind, value)
+            except Exception as e:
+                print(f"[SENTINEL ALERT] Listener de revogação falhou: {str(e)}")
@@ -0,0 +1,151 @@
+
+import os
+import threading
+import time
+from collections import deque
+from dataclasses import dataclass
+from typing import Any, Deque, Dict, Optional, Type
+from uuid import uuid4
+from sqlalchemy import event, exc
+from sqlalchemy.engine import Engine, make_url
+from sqlalchemy.pool import AsyncAdaptedQueuePool, QueuePool
+
+
+def _env_flag(name: str) -> bool:
+    return os.getenv(name, "").lower() in ("1", "true", "yes", "on")
+
+
+@dataclass(frozen=True)
+class PoolSettings:
+    """Dimensionamento do pool vindo do ambiente (DB_POOL_*)."""
+
+    size: int = 10
+    max_overflow: int = 20
+    recycle_seconds: int = 1800
+    timeout_seconds: float = 30.0
+    pgbouncer: bool = False
+
+    @classmethod
+    def from_env(cls) -> "PoolSettings":
+        return cls(
+            size=int(os.getenv("DB_POOL_SIZE", cls.size)),
+            max_overflow=int(os.getenv("DB_MAX_OVERFLOW", cls.max_overflow)),
+            recycle_seconds=int(os.getenv("DB_POOL_RECYCLE", cls.recycle_seconds)),
+            timeout_seconds=float(os.getenv("DB_POOL_TIMEOUT", cls.timeout_seconds)),
+            pgbouncer=_env_flag("DB_PGBOUNCER"),
+        )
+
+
+class PoolMetrics:
+    """
+    Telemetria de um pool: tempo de espera no checkout, uso de overflow,
+    timeouts, invalidações e desconexões. `snapshot` junta o estado vivo
+    do pool (tamanho, ligações em uso) aos contadores acumulados.
+    """
+
+    def __init__(self, window: int = 1024):
+        self._lock = threading.Lock()
+        self._waits: Deque[float] = deque(maxlen=window)
+        self.pool: Optional[QueuePool] = None
+        self.counters = {
+            "checkouts": 0, "connects": 0, "overflow_checkouts": 0, "timeouts": 0,
+            "invalidations": 0, "disconnects": 0,
+        }
+        self.wait_max = 0.0
+        self.overflow_peak = 0
+
+    def record_checkout(self, pool: QueuePool, wait: float) -> None:
+        self.pool = pool
+        overflow = pool.overflow()
+        with self._lock:
+            self.counters["checkouts"] += 1
+            self._waits.append(wait)
+            self.wait_max = max(self.wait_max, wait)
+            if overflow > 0:
+                self.counters["overflow_checkouts"] += 1
+                self.overflow_peak = max(self.overflow_peak, overflow)
+
+    def incr(self, name: str) -> None:
+        with self._lock:
+            self.counters[name] += 1
+
+    def snapshot(self) -> Dict[str, Any]:
+        with self._lock:
+            waits = sorted(self._waits)
+            data: Dict[str, Any] = dict(self.counters)
+            data["wait_ms_p50"] = round(waits[len(waits) // 2] * 1e3, 3) if waits else 0.0
+            data["wait_ms_p95"] = round(waits[int(len(waits) * 0.95)] * 1e3, 3) if waits else 0.0
+            data["wait_ms_max"] = round(self.wait_max * 1e3, 3)
+            data["overflow_peak"] = self.overflow_peak
+        if self.pool is not None:
+            data.update(size=self.pool.size(), checked_out=self.pool.checkedout(), overflow=max(self.pool.overflow(), 0))
+        return data
+
+
+def instrumented_pool_class(base: Type[QueuePool], metrics: PoolMetrics) -> Type[QueuePool]:
+    """
+    Subclasse do pool que mede a espera no checkout. A classe (e não a
+    instância) leva as métricas, porque `recreate()` após uma invalidação
+    cria o novo pool com `self.__class__`.
+    """
+
+    def _do_get(self):
+        started = time.perf_counter()
+        try:
+            record = base._do_get(self)
+        except exc.TimeoutError:
+            metrics.incr("timeouts")
+            print(f"[SENTINEL ALERT] Pool de DB esgotado: checkout excedeu {self._timeout}s")
+            raise
+        metrics.record_checkout(self, time.perf_counter() - started)
+        return record
+
+    return type(f"Instrumented{base.__name__}", (base,), {"_do_get": _do_get})
+
+
+def attach_pool_metrics(engine: Engine, metrics: PoolMetrics) -> None:
+    """Contadores de ligações novas, invalidações e desconexões detetadas pelo dialeto."""
+
+    @event.listens_for(engine, "connect")
+    def _connect(dbapi_connection, record):
+        metrics.incr("connects")
+
+    @event.listens_for(engine, "invalidate")
+    def _invalidate(dbapi_connection, record, exception):
+        metrics.incr("invalidations")
+
+    @event.listens_for(engine, "handle_error")
+    def _handle_error(context):
+        if context.is_disconnect:
+            metrics.incr("disconnects")
+            print(f"[SENTINEL ALERT] Ligação à DB perdida, pool invalidado: {str(context.original_exception)}")
+
+
+def engine_options(url: str, settings: PoolSettings, metrics: PoolMetrics, is_async: bool = False) -> Dict[str, Any]:
+    """
+    Argumentos de `create_engine` para o URL. Sem `pool_pre_ping`: a
+    estratégia é otimista. Um erro de desconexão invalida a ligação e
+    todas as do pool com idade anterior ao erro (comportamento do
+    SQLAlchemy), e `pool_recycle` reforma ligações antes dos timeouts de
+    inatividade do servidor/PgBouncer. SQLite (testes) fica com o pool
+    por omissão do dialeto.
+    """
+    parsed = make_url(url)
+    if parsed.get_backend_name() == "sqlite":
+        return {}
+    options: Dict[str, Any] = {
+        "poolclass": instrumented_pool_class(AsyncAdaptedQueuePool if is_async else QueuePool, metrics),
+        "pool_size": settings.size,
+        "max_overflow": settings.max_overflow,
+        "pool_recycle": settings.recycle_seconds,
+        "pool_timeout": settings.timeout_seconds,
+    }
+    if settings.pgbouncer and parsed.get_driver_name() == "asyncpg":
+        # Transaction pooling: sem prepared statements nomeados/cacheados no servidor,
+        # que ficariam numa ligação física que a transação seguinte já não usa
+        options["connect_args"] = {
+            "statement_cache_size": 0,
+            "prepared_statement_cache_size": 0,
+            "prepared_statement_name_func": lambda: f"__asyncpg_{uuid4()}__",
+        }
+    return options
@@ -1,24 +1,38 @@
 
+import threading
 from typing import List, Dict, Optional
 from .models import LegalDocument, LegalDocumentType
 
 class LegalRepository:
     def __init__(self):
         self._docs: Dict[str, LegalDocument] = {}
-        self._counter = 1
+        self._lock = threading.Lock()
 
     def list_active(self) -> List[LegalDocument]:
-        return [doc for doc in self._docs.values() if doc.is_active]
+        with self._lock:
+            return [doc for doc in self._docs.values() if doc.is_active]
 
     def get_by_type(self, doc_type: LegalDocumentType) -> Optional[LegalDocument]:
         # Retorna o documento ativo mais recente para aquele tipo
-        matches = [doc for doc in self._docs.values() if doc.type == doc_type and doc.is_active]
+        with self._lock:
+            matches = [doc for doc in self._docs.values() if doc.type == doc_type and doc.is_active]
         if not matches:
             return None
         return sorted(matches, key=lambda x: x.effective_from, reverse=True)[0]
 
     def create(self, doc: LegalDocument) -> LegalDocument:
-        self._docs[doc.id] = doc
+        with self._lock:
+            self._docs[doc.id] = doc
+        return doc
+
+    def publish(self, doc: LegalDocument) -> LegalDocument:
+        """Nova versão ativa: desativa as anteriores do mesmo tipo de forma atómica."""
+        with self._lock:
+            for existing in self._docs.values():
+                if existing.type == doc.type:
+                    existing.is_active = False
+            doc.is_active = True
+            self._docs[doc.id] = doc
         return doc
 
 # Singleton
@@ -5,10 +5,13 @@ from fastapi.middleware.cors import CORSMiddleware
 from app.api.v1 import (
     bonito_packs, admin, orders, support, 
     support_chat, notifications, legal, 
-    ux247verse, pros, realtime
+    ux247verse, pros, realtime, wallet
 )
+from app.api.v1 import payments as payments_v1
 from app.payments import router as payments_router
 from app.payments import webhooks as payments_webhooks
+from app.db.session import pool_stats
+from app.repositories.cache import repository_cache
 
 app = FastAPI(
     title="Fix.it x247 API v3.1",
@@ -35,9 +38,29 @@ app.include_router(legal.router)
 app.include_router(ux247verse.router)
 app.include_router(pros.router)
 app.include_router(realtime.router)
+app.include_router(wallet.router)
 app.include_router(payments_router.router)
 app.include_router(payments_webhooks.router)
 
+@app.on_event("startup")
+def start_background_workers():
+    payments_v1.start_webhook_ingest()
+
+@app.on_event("shutdown")
+def drain_background_workers():
+    # Webhooks com ack ainda por aplicar: drenar antes de sair (o que faltar fica no spool)
+    payments_v1.stop_webhook_ingest()
+
 @app.get("/health")
 def health_check():
     return {"status": "online", "engine": "Fix.it x247 v3.1", "sentinel": "active"}
+
+@app.get("/health/db")
+def db_pool_health():
+    # Telemetria dos pools (sync e async): espera no checkout, overflow, invalidações
+    return pool_stats()
+
+@app.get("/health/cache")
+def repository_cache_health():
+    # Hits/misses por modelo da cache dos repositórios
+    return repository_cache.stats()
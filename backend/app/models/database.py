@@ -50,6 +50,11 @@ class TxType(str, enum.Enum):
     REFUND = "REFUND"
     FEE = "FEE"
 
+class BalanceBucket(str, enum.Enum):
+    ESCROW = "ESCROW"
+    AVAILABLE = "AVAILABLE"
+    FEE = "FEE"
+
 # --- CORE TABLES ---
 
 class Tenant(Base):
@@ -74,6 +79,9 @@ class User(Base):
     client_plan: Mapped[Optional[ClientPlan]] = mapped_column(Enum(ClientPlan), nullable=True)
     pro_plan: Mapped[Optional[ProPlan]] = mapped_column(Enum(ProPlan), nullable=True)
     is_active: Mapped[bool] = mapped_column(Boolean, default=True)
+    # Última localização conhecida (PROs): alimenta o índice espacial de matching
+    lat: Mapped[Optional[float]] = mapped_column(Float, nullable=True)
+    lon: Mapped[Optional[float]] = mapped_column(Float, nullable=True)
     created_at: Mapped[datetime] = mapped_column(DateTime, default=lambda: datetime.now(timezone.utc))
 
     tenant = relationship("Tenant", back_populates="users")
@@ -108,8 +116,9 @@ class Order(Base):
     updated_at: Mapped[datetime] = mapped_column(DateTime, default=lambda: datetime.now(timezone.utc), onupdate=lambda: datetime.now(timezone.utc))
 
     __table_args__ = (
-        Index('idx_orders_tenant_client', 'tenant_id', 'client_id', 'status'),
-        Index('idx_orders_tenant_pro', 'tenant_id', 'pro_id', 'status'),
+        # Listagens por keyset: um range scan por estado, já ordenado por (created_at, id)
+        Index('idx_orders_tenant_client_status_date', 'tenant_id', 'client_id', 'status', 'created_at', 'id'),
+        Index('idx_orders_tenant_pro_status_date', 'tenant_id', 'pro_id', 'status', 'created_at', 'id'),
     )
 
 class WalletTransaction(Base):
@@ -127,6 +136,37 @@ class WalletTransaction(Base):
         Index('idx_wallet_tenant_user', 'tenant_id', 'user_id', 'created_at'),
     )
 
+class WalletBalance(Base):
+    """Saldo materializado por (tenant, utilizador, bucket), mantido na transação de cada movimento."""
+    __tablename__ = "wallet_balances"
+
+    tenant_id: Mapped[int] = mapped_column(ForeignKey("tenants.id"), primary_key=True)
+    user_id: Mapped[int] = mapped_column(ForeignKey("users.id"), primary_key=True)
+    bucket: Mapped[BalanceBucket] = mapped_column(Enum(BalanceBucket), primary_key=True)
+    amount_cents: Mapped[int] = mapped_column(Integer, default=0)
+    updated_at: Mapped[datetime] = mapped_column(DateTime, default=lambda: datetime.now(timezone.utc))
+
+class StripeWebhookEvent(Base):
+    """Ledger de eventos Stripe já processados (PK = event.id, deduplicação)."""
+    __tablename__ = "stripe_webhook_events"
+
+    event_id: Mapped[str] = mapped_column(String(255), primary_key=True)
+    event_type: Mapped[str] = mapped_column(String(100))
+    order_id: Mapped[Optional[int]] = mapped_column(Integer, nullable=True)
+    received_at: Mapped[datetime] = mapped_column(DateTime, default=lambda: datetime.now(timezone.utc))
+
+class StripeWebhookDeadLetter(Base):
+    """Eventos Stripe que esgotaram as tentativas de ingestão (para replay manual)."""
+    __tablename__ = "stripe_webhook_dead_letters"
+
+    id: Mapped[int] = mapped_column(primary_key=True)
+    event_id: Mapped[str] = mapped_column(String(255), index=True)
+    event_type: Mapped[Optional[str]] = mapped_column(String(100), nullable=True)
+    payload: Mapped[Dict[str, Any]] = mapped_column(JSON)
+    error: Mapped[str] = mapped_column(Text)
+    attempts: Mapped[int] = mapped_column(Integer)
+    created_at: Mapped[datetime] = mapped_column(DateTime, default=lambda: datetime.now(timezone.utc))
+
 class SupportTicket(Base):
     __tablename__ = "support_tickets"
     
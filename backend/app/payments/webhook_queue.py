@@ -0,0 +1,331 @@
+
+import heapq
+import itertools
+import queue
+import threading
+import time
+from datetime import datetime, timezone
+from typing import Callable, Dict, List, Optional, Tuple
+from sqlalchemy import insert, update
+from sqlalchemy.orm import Session
+from app.models.database import Order, OrderStatus, WalletTransaction, TxType
+from app.repositories.cache import repository_cache
+from app.repositories.wallet_repository import apply_balance_deltas
+from app.repositories.webhook_event_repository import WebhookEventRepository
+from app.payments.webhook_spool import WebhookSpool
+
+PAYABLE_STATUSES = (OrderStatus.PENDING, OrderStatus.MANUAL_FORWARDING)
+
+PaidListener = Callable[[List[Tuple[int, int, int]]], None]  # [(order_id, tenant_id, client_id)]
+
+def process_payment_batch(
+    db: Session, events: List[dict], on_paid: Optional[PaidListener] = None
+) -> Dict[str, int]:
+    """
+    Aplica um lote de `payment_intent.succeeded` numa única transação:
+    1. claim multi-linha dos event.id no ledger (duplicados ficam de fora);
+    2. UPDATE orders ... WHERE id IN (...) AND status pagável, com RETURNING;
+    3. INSERT em bloco das transações de Escrow apenas para os pedidos transitados,
+       com os saldos materializados atualizados na mesma transação.
+    Após o commit, `on_paid` recebe os pedidos transitados (eventos em tempo real).
+    """
+    counts = {"processed": 0, "duplicates": 0, "ignored": 0}
+    by_event: Dict[str, Tuple[int, int]] = {}
+    for event in events:
+        intent = event['data']['object']
+        order_id_raw = (intent.get('metadata') or {}).get('order_id')
+        if event.get('type') != 'payment_intent.succeeded' or not order_id_raw:
+            counts["ignored"] += 1
+            continue
+        if event['id'] in by_event:
+            counts["duplicates"] += 1
+            continue
+        by_event[event['id']] = (int(order_id_raw), intent['amount'])
+    if not by_event:
+        return counts
+
+    try:
+        claimed = WebhookEventRepository(db).claim_many(
+            (event_id, 'payment_intent.succeeded', order_id)
+            for event_id, (order_id, _) in by_event.items()
+        )
+        counts["duplicates"] += len(by_event) - len(claimed)
+
+        # Primeiro evento de cada pedido define o montante (os seguintes são repetições)
+        amounts: Dict[int, int] = {}
+        for event_id in claimed:
+            order_id, amount = by_event[event_id]
+            amounts.setdefault(order_id, amount)
+
+        paid = []
+        if amounts:
+            stmt = (
+                update(Order)
+                .where(Order.id.in_(list(amounts)), Order.status.in_(PAYABLE_STATUSES))
+                .values(status=OrderStatus.PAID, updated_at=datetime.now(timezone.utc))
+                .returning(Order.id, Order.tenant_id, Order.client_id)
+                .execution_options(synchronize_session=False)
+            )
+            paid = db.execute(stmt).all()
+
+        if paid:
+            rows = [
+                {
+                    "order_id": order_id,
+                    "tenant_id": tenant_id,
+                    "user_id": client_id,
+                    "amount_cents": amounts[order_id],
+                    "tx_type": TxType.ESCROW_IN,
+                }
+                for order_id, tenant_id, client_id in paid
+            ]
+            db.execute(insert(WalletTransaction), rows)
+            apply_balance_deltas(db, rows)
+        db.commit()
+    except Exception:
+        db.rollback()
+        raise
+
+    # Escritas em bloco não passam pelos repositórios: invalidar a cache de leitura aqui
+    for tenant_id in {tenant_id for _, tenant_id, _ in paid}:
+        for table in (Order.__tablename__, WalletTransaction.__tablename__):
+            if repository_cache.ttl_for(table) is not None:
+                repository_cache.invalidate(table, tenant_id)
+
+    counts["processed"] = len(paid)
+    if paid and on_paid is not None:
+        try:
+            on_paid([tuple(row) for row in paid])
+        except Exception as e:
+            print(f"[SENTINEL ALERT] Listener de pedidos pagos falhou: {str(e)}")
+    return counts
+
+class WebhookIngestQueue:
+    """
+    Fila entre o webhook e a base de dados. O handler só valida a assinatura
+    e enfileira (`enqueue` nunca toca na DB); uma thread consumidora drena a
+    fila em lotes de até `batch_size` eventos, esperando no máximo
+    `max_wait_seconds` para completar um lote.
+
+    Com `spool`, cada evento é gravado em disco antes do ack e só sai de lá
+    depois do commit do lote (ou da dead letter); `start` repõe na fila o
+    que um processo anterior deixou por aplicar. Sem spool a fila vive só
+    em memória (testes).
+
+    Se um lote falhar, os eventos são reprocessados um a um para isolar o
+    evento problemático. Um evento que falha volta a ser tentado com backoff
+    exponencial (`retry_backoff_seconds`, 2x por tentativa, até
+    `max_backoff_seconds`); ao fim de `max_attempts` tentativas vai para a
+    tabela de dead letters (`stripe_webhook_dead_letters`) para replay. Se a
+    própria dead letter falhar (DB em baixo), o evento continua agendado com
+    o backoff máximo até a aplicação ou a dead letter terem commit.
+    """
+
+    def __init__(
+        self,
+        session_factory: Callable[[], Session],
+        batch_size: int = 500,
+        max_wait_seconds: float = 0.05,
+        max_pending: int = 50_000,
+        max_attempts: int = 3,
+        retry_backoff_seconds: float = 0.5,
+        max_backoff_seconds: float = 30.0,
+        on_paid: Optional[PaidListener] = None,
+        spool: Optional[WebhookSpool] = None,
+    ):
+        self._session_factory = session_factory
+        self._spool = spool
+        self._closed = False
+        self._on_paid = on_paid
+        self._batch_size = batch_size
+        self._max_wait = max_wait_seconds
+        self._max_attempts = max_attempts
+        self._retry_backoff = retry_backoff_seconds
+        self._max_backoff = max_backoff_seconds
+        self._queue: "queue.Queue[Tuple[dict, int]]" = queue.Queue(maxsize=max_pending)
+        # Retries agendados: heap de (instante, seq, evento, tentativa), só tocado pela consumidora
+        self._retries: List[Tuple[float, int, dict, int]] = []
+        self._retry_seq = itertools.count()
+        self._thread: Optional[threading.Thread] = None
+        self._start_lock = threading.Lock()
+        self._stats_lock = threading.Lock()
+        # Eventos aceites ainda sem desfecho (aplicados ou em dead letter), para `join`
+        self._outstanding = 0
+        self._idle = threading.Condition()
+        self._stats = {
+            "enqueued": 0, "rejected": 0, "batches": 0, "processed": 0,
+            "duplicates": 0, "ignored": 0, "retried": 0, "failed": 0, "replayed": 0,
+        }
+
+    def enqueue(self, event: dict) -> bool:
+        """
+        Grava no spool e enfileira sem esperar pela DB. False se a fila
+        estiver cheia, a encerrar ou o spool falhar (o Stripe volta a tentar).
+        """
+        if self._closed:
+            self._count("rejected")
+            return False
+        self.start()
+        if self._spool is not None:
+            try:
+                if not self._spool.append(event):
+                    return True  # reentrega de um evento ainda por aplicar: já está a caminho
+            except Exception as e:
+                print(f"[SENTINEL ALERT] Spool de webhooks indisponível: {str(e)}")
+                self._count("rejected")
+                return False
+        with self._idle:
+            self._outstanding += 1
+        try:
+            self._queue.put_nowait((event, 1))
+        except queue.Full:
+            self._release_spool([event])
+            self._settle(1)
+            self._count("rejected")
+            return False
+        self._count("enqueued")
+        return True
+
+    def start(self) -> None:
+        if self._thread is not None:
+            return
+        with self._start_lock:
+            if self._thread is None:
+                self._replay_spool()
+                self._thread = threading.Thread(target=self._run, name="webhook-ingest", daemon=True)
+                self._thread.start()
+
+    def close(self, timeout: Optional[float] = None) -> bool:
+        """
+        Encerramento: novos eventos passam a ser recusados (503) e espera-se
+        pelo desfecho dos aceites. O que não drenar a tempo fica no spool.
+        """
+        self._closed = True
+        return self.join(timeout)
+
+    def join(self, timeout: Optional[float] = None) -> bool:
+        """Bloqueia até todos os eventos aceites terem desfecho (incluindo retries agendados)."""
+        with self._idle:
+            return self._idle.wait_for(lambda: self._outstanding == 0, timeout)
+
+    def stats(self) -> Dict[str, int]:
+        with self._stats_lock:
+            return {**self._stats, "pending": self._queue.qsize(), "scheduled_retries": len(self._retries)}
+
+    def _count(self, key: str, amount: int = 1) -> None:
+        with self._stats_lock:
+            self._stats[key] += amount
+
+    def _settle(self, amount: int) -> None:
+        with self._idle:
+            self._outstanding -= amount
+            if self._outstanding == 0:
+                self._idle.notify_all()
+
+    def _replay_spool(self) -> None:
+        # Eventos aceites por um processo anterior: vencidos já, sem ocupar a fila do webhook
+        if self._spool is None:
+            return
+        events = self._spool.pending()
+        if not events:
+            return
+        with self._idle:
+            self._outstanding += len(events)
+        now = time.monotonic()
+        for event in events:
+            heapq.heappush(self._retries, (now, next(self._retry_seq), event, 1))
+        self._count("replayed", len(events))
+        print(f"[SENTINEL ALERT] {len(events)} webhooks do spool repostos na fila")
+
+    def _release_spool(self, events: List[dict]) -> None:
+        if self._spool is None:
+            return
+        try:
+            self._spool.remove(event['id'] for event in events)
+        except Exception as e:
+            # Ficam no spool e são reaplicados no próximo arranque (deduplicados por event.id)
+            print(f"[SENTINEL ALERT] Falha ao limpar o spool de webhooks: {str(e)}")
+
+    def _due_retries(self) -> List[Tuple[dict, int]]:
+        due = []
+        now = time.monotonic()
+        while self._retries and self._retries[0][0] <= now and len(due) < self._batch_size:
+            _, _, event, attempt = heapq.heappop(self._retries)
+            due.append((event, attempt))
+        return due
+
+    def _next_batch(self) -> List[Tuple[dict, int]]:
+        batch = self._due_retries()
+        if not batch:
+            # Sem retries vencidos: espera por um evento novo ou pelo próximo retry
+            timeout = max(self._retries[0][0] - time.monotonic(), 0.0) if self._retries else None
+            try:
+                batch.append(self._queue.get(timeout=timeout))
+            except queue.Empty:
+                return self._due_retries()
+        deadline = time.monotonic() + self._max_wait
+        while len(batch) < self._batch_size:
+            remaining = deadline - time.monotonic()
+            try:
+                batch.append(self._queue.get(timeout=remaining) if remaining > 0 else self._queue.get_nowait())
+            except queue.Empty:
+                break
+        return batch
+
+    def _run(self) -> None:
+        while True:
+            batch = self._next_batch()
+            if not batch:
+                continue
+            try:
+                self._apply([event for event, _ in batch])
+            except Exception as e:
+                print(f"[SENTINEL ALERT] Lote de {len(batch)} webhooks falhou, a isolar: {str(e)}")
+                for item in batch:
+                    self._apply_single(*item)
+            else:
+                self._release_spool([event for event, _ in batch])
+                self._settle(len(batch))
+
+    def _apply(self, events: List[dict]) -> None:
+        db = self._session_factory()
+        try:
+            counts = process_payment_batch(db, events, self._on_paid)
+        finally:
+            db.close()
+        with self._stats_lock:
+            self._stats["batches"] += 1
+            for key, value in counts.items():
+                self._stats[key] += value
+
+    def _apply_single(self, event: dict, attempt: int) -> None:
+        try:
+            self._apply([event])
+        except Exception as e:
+            # Sem commit (nem da aplicação nem da dead letter) o evento nunca é largado
+            if attempt < self._max_attempts or not self._dead_letter(event, attempt, str(e)):
+                delay = min(self._retry_backoff * 2 ** (attempt - 1), self._max_backoff)
+                heapq.heappush(self._retries, (time.monotonic() + delay, next(self._retry_seq), event, attempt + 1))
+                self._count("retried")
+                return
+            self._count("failed")
+        self._release_spool([event])
+        self._settle(1)
+
+    def _dead_letter(self, event: dict, attempts: int, error: str) -> bool:
+        """True só com a dead letter gravada (commit)."""
+        print(f"[SENTINEL ALERT] Evento {event.get('id')} falhou {attempts} vezes, enviado para dead letter: {error}")
+        try:
+            db = self._session_factory()
+        except Exception as e:
+            print(f"[SENTINEL ALERT] Dead letter do evento {event.get('id')} falhou, a reagendar: {str(e)}")
+            return False
+        try:
+            WebhookEventRepository(db).dead_letter(event, attempts, error)
+            return True
+        except Exception as e:
+            db.rollback()
+            print(f"[SENTINEL ALERT] Dead letter do evento {event.get('id')} falhou, a reagendar: {str(e)}")
+            return False
+        finally:
+            db.close()
@@ -0,0 +1,51 @@
+import json
+import sqlite3
+import threading
+import time
+from pathlib import Path
+from typing import Iterable, List
+
+class WebhookSpool:
+    """
+    Spool local (SQLite em WAL, `synchronous=FULL`) dos eventos Stripe já
+    validados. O webhook só responde 200 depois de `append` gravar o evento;
+    a linha sai com `remove` quando o lote foi aplicado (ou o evento ficou
+    em dead letter) com commit na DB. O que sobrar de um processo morto é
+    reposto na fila com `pending` no arranque seguinte; reaplicar é seguro
+    porque `process_payment_batch` deduplica por event.id.
+    """
+
+    def __init__(self, path: Path):
+        self._lock = threading.Lock()
+        self._conn = sqlite3.connect(str(path), check_same_thread=False, isolation_level=None)
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.execute("PRAGMA synchronous=FULL")
+        self._conn.execute(
+            "CREATE TABLE IF NOT EXISTS spooled_events ("
+            "event_id TEXT PRIMARY KEY, payload TEXT NOT NULL, spooled_at REAL NOT NULL)"
+        )
+
+    def append(self, event: dict) -> bool:
+        """Grava o evento; False se já estava no spool (reentrega ainda por aplicar)."""
+        with self._lock:
+            cursor = self._conn.execute(
+                "INSERT OR IGNORE INTO spooled_events (event_id, payload, spooled_at) VALUES (?, ?, ?)",
+                (str(event['id']), json.dumps(event), time.time()),
+            )
+            return cursor.rowcount == 1
+
+    def remove(self, event_ids: Iterable[str]) -> None:
+        with self._lock:
+            self._conn.executemany(
+                "DELETE FROM spooled_events WHERE event_id = ?", [(str(event_id),) for event_id in event_ids]
+            )
+
+    def pending(self) -> List[dict]:
+        """Eventos aceites que ainda não tiveram desfecho, por ordem de chegada."""
+        with self._lock:
+            rows = self._conn.execute("SELECT payload FROM spooled_events ORDER BY spooled_at").fetchall()
+        return [json.loads(payload) for (payload,) in rows]
+
+    def __len__(self) -> int:
+        with self._lock:
+            return self._conn.execute("SELECT COUNT(*) FROM spooled_events").fetchone()[0]
@@ -0,0 +1,139 @@
+
+import asyncio
+import json
+from collections import deque
+from typing import AsyncIterator, Deque, Dict, List, Optional, Set, Tuple
+
+SourceEvent = Tuple[int, str, dict]  # (tenant_id, type, payload)
+
+
+class SSEClient:
+    """Ligação SSE de um cliente: fila limitada de frames já serializados."""
+
+    __slots__ = ("tenant_id", "queue", "evicted")
+
+    def __init__(self, tenant_id: int, max_queue: int) -> None:
+        self.tenant_id = tenant_id
+        self.queue: "asyncio.Queue[str]" = asyncio.Queue(maxsize=max_queue)
+        self.evicted = False
+
+
+class TenantBroadcastHub:
+    """
+    Hub de broadcast SSE por tenant. Cada evento é serializado uma única vez
+    (frame `id:`/`data:`) e colocado, sem bloquear, na fila de cada cliente
+    do tenant. Um cliente com a fila cheia é expulso em vez de atrasar os
+    restantes; ao reconectar com `Last-Event-ID` recupera o que perdeu a
+    partir do buffer de replay do tenant (últimos `replay_size` eventos).
+
+    Todo o estado vive no event loop: produtores noutras threads usam
+    `publish_threadsafe`.
+    """
+
+    def __init__(self, max_queue: int = 256, replay_size: int = 512) -> None:
+        self.max_queue = max_queue
+        self.replay_size = replay_size
+        self._clients: Dict[int, Set[SSEClient]] = {}
+        self._replay: Dict[int, Deque[Tuple[int, str]]] = {}
+        self._last_id: Dict[int, int] = {}
+        self._loop: Optional[asyncio.AbstractEventLoop] = None
+        self._stats = {"published": 0, "delivered": 0, "evicted": 0}
+
+    def subscribe(self, tenant_id: int) -> SSEClient:
+        self._loop = asyncio.get_running_loop()
+        client = SSEClient(tenant_id, self.max_queue)
+        self._clients.setdefault(tenant_id, set()).add(client)
+        return client
+
+    def unsubscribe(self, client: SSEClient) -> None:
+        clients = self._clients.get(client.tenant_id)
+        if clients is not None:
+            clients.discard(client)
+            if not clients:
+                del self._clients[client.tenant_id]
+
+    def replay(self, tenant_id: int, last_event_id: int) -> List[str]:
+        """Frames do tenant posteriores a `last_event_id` ainda no buffer."""
+        return [frame for event_id, frame in self._replay.get(tenant_id, ()) if event_id > last_event_id]
+
+    def publish(self, tenant_id: int, event_type: str, payload: dict) -> int:
+        """Difunde para o tenant (chamar no event loop); devolve o id do evento."""
+        event_id = self._last_id.get(tenant_id, 0) + 1
+        self._last_id[tenant_id] = event_id
+        frame = f"id: {event_id}\ndata: {json.dumps({'type': event_type, 'payload': payload}, default=str)}\n\n"
+        replay = self._replay.get(tenant_id)
+        if replay is None:
+            replay = self._replay[tenant_id] = deque(maxlen=self.replay_size)
+        replay.append((event_id, frame))
+        self._stats["published"] += 1
+
+        slow = []
+        for client in self._clients.get(tenant_id, ()):
+            try:
+                client.queue.put_nowait(frame)
+                self._stats["delivered"] += 1
+            except asyncio.QueueFull:
+                slow.append(client)
+        for client in slow:
+            client.evicted = True
+            self.unsubscribe(client)
+            self._stats["evicted"] += 1
+        return event_id
+
+    def publish_threadsafe(self, tenant_id: int, event_type: str, payload: dict) -> None:
+        """Publicação a partir de threads (ex.: consumidor de webhooks)."""
+        loop = self._loop
+        if loop is None or loop.is_closed():
+            # Sem loop ainda não há clientes: basta alimentar o buffer de replay
+            self.publish(tenant_id, event_type, payload)
+        else:
+            loop.call_soon_threadsafe(self.publish, tenant_id, event_type, payload)
+
+    async def pump(self, source: AsyncIterator[SourceEvent]) -> None:
+        """Única subscrição à fonte de eventos; faz fan-out para todos os tenants."""
+        async for tenant_id, event_type, payload in source:
+            self.publish(tenant_id, event_type, payload)
+
+    def stats(self) -> Dict[str, int]:
+        return {
+            **self._stats,
+            "tenants": len(self._clients),
+            "connections": sum(len(c) for c in self._clients.values()),
+        }
+
+
+async def sse_frames(
+    hub: TenantBroadcastHub,
+    tenant_id: int,
+    last_event_id: Optional[int] = None,
+    keepalive_seconds: float = 15.0,
+) -> AsyncIterator[str]:
+    """
+    Gerador do stream SSE de um cliente: replay desde `Last-Event-ID`,
+    depois eventos em direto e comentários de keep-alive. Termina se o
+    cliente for expulso por ser lento (o browser reconecta com o último id
+    recebido e recupera o resto pelo replay).
+    """
+    client = hub.subscribe(tenant_id)
+    try:
+        # Subscrever e ler o replay sem `await` pelo meio: nenhum evento se perde nem duplica
+        backlog = hub.replay(tenant_id, last_event_id) if last_event_id is not None else []
+        for frame in backlog:
+            yield frame
+        # Expulso: entrega o que já está na fila e termina (deixa de receber novos)
+        while not (client.evicted and client.queue.empty()):
+            if not client.queue.empty():
+                # Caminho rápido: `wait_for` cria uma task por chamada, só vale a pena com a fila vazia
+                yield client.queue.get_nowait()
+                continue
+            try:
+                frame = await asyncio.wait_for(client.queue.get(), keepalive_seconds)
+            except asyncio.TimeoutError:
+                yield ": keep-alive\n\n"
+                continue
+            yield frame
+    finally:
+        hub.unsubscribe(client)
+
+
+realtime_hub = TenantBroadcastHub()
@@ -0,0 +1,116 @@
+
+import asyncio
+import json
+from typing import Callable, Dict, List, Optional, Set
+from fastapi import WebSocket
+from app.realtime.radar_aggregator import radar_aggregator
+
+RadarSource = Callable[[int], dict]
+
+
+def default_radar_payload(tenant_id: int) -> dict:
+    # Valores fixos de referência (benchmarks); em produção a fonte é o `radar_aggregator`
+    return {
+        "pros_online": 23,
+        "sos_active": 4,
+        "eta_avg": "6.5 min",
+        "system_load": "LOW",
+    }
+
+
+class RadarManager:
+    """
+    Ligações do radar SOS agrupadas por tenant. Um único ciclo de ticks
+    calcula o radar de cada tenant uma vez, serializa-o uma vez e envia o
+    mesmo texto a todos os sockets do tenant em paralelo (`asyncio.gather`),
+    com timeout por envio. Sockets que falham ou excedem o timeout são
+    removidos. O ciclo pára sozinho quando não há ligações.
+    """
+
+    def __init__(
+        self,
+        source: RadarSource = default_radar_payload,
+        interval_seconds: float = 2.0,
+        send_timeout: float = 1.0,
+    ):
+        self.source = source
+        self.interval_seconds = interval_seconds
+        self.send_timeout = send_timeout
+        self._tenants: Dict[int, Set[WebSocket]] = {}
+        self._last_frame: Dict[int, str] = {}
+        self._ticker: Optional[asyncio.Task] = None
+        self._closing: Set[asyncio.Task] = set()
+        self.pruned = 0
+
+    def connection_count(self, tenant_id: Optional[int] = None) -> int:
+        if tenant_id is not None:
+            return len(self._tenants.get(tenant_id, ()))
+        return sum(len(sockets) for sockets in self._tenants.values())
+
+    async def connect(self, websocket: WebSocket, tenant_id: int):
+        await websocket.accept()
+        self._tenants.setdefault(tenant_id, set()).add(websocket)
+        # Recém-chegado recebe logo o último radar do tenant, sem esperar pelo próximo tick
+        frame = self._last_frame.get(tenant_id)
+        if frame is not None and not await self._send(websocket, frame):
+            self.disconnect(websocket, tenant_id)
+        if self._ticker is None or self._ticker.done():
+            self._ticker = asyncio.create_task(self._run())
+
+    def disconnect(self, websocket: WebSocket, tenant_id: int):
+        sockets = self._tenants.get(tenant_id)
+        if sockets is None:
+            return
+        sockets.discard(websocket)
+        if not sockets:
+            del self._tenants[tenant_id]
+            self._last_frame.pop(tenant_id, None)
+
+    async def broadcast(self, tenant_id: int, message: dict) -> int:
+        """Envia `message` a todos os sockets do tenant; devolve quantos receberam."""
+        sockets: List[WebSocket] = list(self._tenants.get(tenant_id, ()))
+        if not sockets:
+            return 0
+        frame = json.dumps(message)
+        self._last_frame[tenant_id] = frame
+        results = await asyncio.gather(*(self._send(ws, frame) for ws in sockets))
+        for websocket, ok in zip(sockets, results):
+            if not ok:
+                self.disconnect(websocket, tenant_id)
+                self.pruned += 1
+                # Fecho em background: um socket encravado não atrasa o tick
+                task = asyncio.create_task(self._close(websocket))
+                self._closing.add(task)
+                task.add_done_callback(self._closing.discard)
+        return sum(results)
+
+    async def tick(self) -> None:
+        """Um radar por tenant com ligações, todos os tenants em paralelo."""
+        await asyncio.gather(*(
+            self.broadcast(tenant_id, {"type": "RADAR_SYNC", "payload": self.source(tenant_id)})
+            for tenant_id in list(self._tenants)
+        ))
+
+    async def _send(self, websocket: WebSocket, frame: str) -> bool:
+        try:
+            await asyncio.wait_for(websocket.send_text(frame), self.send_timeout)
+            return True
+        except Exception:
+            return False
+
+    async def _close(self, websocket: WebSocket) -> None:
+        try:
+            await asyncio.wait_for(websocket.close(code=1011), self.send_timeout)
+        except Exception:
+            pass
+
+    async def _run(self) -> None:
+        while self._tenants:
+            try:
+                await self.tick()
+            except Exception as e:
+                print(f"[SENTINEL ALERT] Tick do radar falhou: {str(e)}")
+            await asyncio.sleep(self.interval_seconds)
+
+
+radar_manager = RadarManager(source=radar_aggregator.snapshot)
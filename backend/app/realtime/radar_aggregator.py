@@ -0,0 +1,188 @@
+
+import threading
+import time
+from collections import deque
+from dataclasses import dataclass, field
+from datetime import datetime, timezone
+from typing import Callable, Deque, Dict, List, Optional, Set, Tuple
+from sqlalchemy import func, select
+from sqlalchemy.orm import Session
+from app.models.database import Order, OrderStatus
+
+SOS_CATEGORY = "SOS"
+# Estados em que um SOS conta como ativo no radar
+ACTIVE_SOS_STATUSES = frozenset({
+    OrderStatus.PENDING, OrderStatus.MANUAL_FORWARDING, OrderStatus.PAID,
+    OrderStatus.ASSIGNED, OrderStatus.IN_ESCROW,
+})
+
+
+def is_sos(category: Optional[str]) -> bool:
+    return (category or "").upper() == SOS_CATEGORY
+
+
+@dataclass
+class TenantRadar:
+    """Contadores de um tenant; `eta_sum` acompanha a janela para a média ser O(1)."""
+
+    active_sos: Set[int] = field(default_factory=set)
+    pros_seen: Dict[int, float] = field(default_factory=dict)  # pro_id -> último sinal (monotonic)
+    etas: Deque[float] = field(default_factory=deque)
+    eta_sum: float = 0.0
+
+
+class RadarAggregator:
+    """
+    Agregação incremental do radar SOS por tenant. Eventos de pedidos e de
+    presença dos PROs atualizam contadores em memória; `snapshot` só lê
+    (O(1)), sem queries a `orders` por tick. Os SOS ativos são guardados
+    por id, pelo que eventos repetidos são idempotentes.
+
+    `recompute` corrige a deriva contra o SQL (eventos perdidos, outros
+    workers). Eventos que chegam durante a query ficam num diário e são
+    reaplicados sobre o resultado antes da troca, para não se perderem.
+    """
+
+    def __init__(self, eta_window: int = 50, presence_ttl_seconds: float = 120.0):
+        self.eta_window = eta_window
+        self.presence_ttl_seconds = presence_ttl_seconds
+        self._tenants: Dict[int, TenantRadar] = {}
+        self._lock = threading.Lock()
+        self._journal: Optional[List[Tuple[int, int, bool]]] = None
+        self._thread: Optional[threading.Thread] = None
+        self.stats = {"events": 0, "recomputes": 0, "corrections": 0}
+
+    def _tenant(self, tenant_id: int) -> TenantRadar:
+        radar = self._tenants.get(tenant_id)
+        if radar is None:
+            radar = self._tenants[tenant_id] = TenantRadar()
+        return radar
+
+    # --- Eventos ---
+
+    def order_changed(
+        self,
+        tenant_id: int,
+        order_id: int,
+        category: Optional[str],
+        status: OrderStatus,
+        eta_minutes: Optional[float] = None,
+    ) -> None:
+        if not is_sos(category):
+            return
+        active = status in ACTIVE_SOS_STATUSES
+        with self._lock:
+            self.stats["events"] += 1
+            radar = self._tenant(tenant_id)
+            if active:
+                radar.active_sos.add(order_id)
+            else:
+                radar.active_sos.discard(order_id)
+            if self._journal is not None:
+                self._journal.append((tenant_id, order_id, active))
+            if eta_minutes is not None:
+                radar.etas.append(eta_minutes)
+                radar.eta_sum += eta_minutes
+                if len(radar.etas) > self.eta_window:
+                    radar.eta_sum -= radar.etas.popleft()
+
+    def pro_seen(self, tenant_id: int, pro_id: int, online: bool = True) -> None:
+        with self._lock:
+            self.stats["events"] += 1
+            pros = self._tenant(tenant_id).pros_seen
+            if online:
+                pros[pro_id] = time.monotonic()
+            else:
+                pros.pop(pro_id, None)
+
+    # --- Leitura ---
+
+    def snapshot(self, tenant_id: int) -> dict:
+        radar = self._tenants.get(tenant_id)
+        if radar is None:
+            return {"pros_online": 0, "sos_active": 0, "eta_avg": "--", "system_load": "LOW"}
+        pros, sos, count = len(radar.pros_seen), len(radar.active_sos), len(radar.etas)
+        ratio = sos / pros if pros else (1.0 if sos else 0.0)
+        return {
+            "pros_online": pros,
+            "sos_active": sos,
+            "eta_avg": f"{radar.eta_sum / count:.1f} min" if count else "--",
+            "system_load": "LOW" if ratio < 0.5 else "MEDIUM" if ratio < 1.0 else "HIGH",
+        }
+
+    # --- Correção periódica ---
+
+    def recompute(self, session: Session) -> int:
+        """Reconstrói os SOS ativos a partir do SQL e expira presenças; devolve as correções."""
+        with self._lock:
+            self._journal = []
+        try:
+            stmt = select(Order.tenant_id, Order.id).where(
+                func.upper(Order.category) == SOS_CATEGORY,
+                Order.status.in_(ACTIVE_SOS_STATUSES),
+            )
+            fresh: Dict[int, Set[int]] = {}
+            for tenant_id, order_id in session.execute(stmt):
+                fresh.setdefault(tenant_id, set()).add(order_id)
+        except Exception:
+            with self._lock:
+                self._journal = None
+            raise
+
+        cutoff = time.monotonic() - self.presence_ttl_seconds
+        with self._lock:
+            for tenant_id, order_id, active in self._journal:
+                target = fresh.setdefault(tenant_id, set())
+                if active:
+                    target.add(order_id)
+                else:
+                    target.discard(order_id)
+            self._journal = None
+            corrections = 0
+            for tenant_id in set(fresh) | set(self._tenants):
+                radar = self._tenant(tenant_id)
+                new_ids = fresh.get(tenant_id, set())
+                corrections += len(radar.active_sos ^ new_ids)
+                radar.active_sos = new_ids
+                stale = [pro_id for pro_id, seen in radar.pros_seen.items() if seen < cutoff]
+                for pro_id in stale:
+                    del radar.pros_seen[pro_id]
+            self.stats["recomputes"] += 1
+            self.stats["corrections"] += corrections
+        return corrections
+
+    def start_recompute_loop(self, session_factory: Callable[[], Session], interval_seconds: float = 60.0) -> None:
+        """Thread de correção periódica (uma por worker)."""
+        if self._thread is not None:
+            return
+        self._thread = threading.Thread(
+            target=self._recompute_loop, args=(session_factory, interval_seconds),
+            name="radar-recompute", daemon=True,
+        )
+        self._thread.start()
+
+    def _recompute_loop(self, session_factory: Callable[[], Session], interval_seconds: float) -> None:
+        warm = False  # a primeira passagem é o aquecimento, não deriva
+        while True:
+            db = session_factory()
+            try:
+                corrections = self.recompute(db)
+                if corrections and warm:
+                    print(f"[SENTINEL ALERT] Radar corrigido após recompute SQL: {corrections} SOS")
+            except Exception as e:
+                print(f"[SENTINEL ALERT] Recompute do radar falhou: {str(e)}")
+            finally:
+                db.close()
+            warm = True
+            time.sleep(interval_seconds)
+
+
+def assignment_minutes(order: Order) -> float:
+    """Minutos entre a criação do pedido e agora (amostra de ETA na atribuição)."""
+    created = order.created_at
+    if created.tzinfo is None:
+        created = created.replace(tzinfo=timezone.utc)
+    return (datetime.now(timezone.utc) - created).total_seconds() / 60
+
+
+radar_aggregator = RadarAggregator()
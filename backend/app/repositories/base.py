@@ -1,44 +1,324 @@
-from typing import TypeVar, Generic, Type, List, Optional, Any
+import asyncio
+from typing import TypeVar, Generic, Type, Iterable, Iterator, List, Mapping, Optional, Any, Sequence, Tuple
+from sqlalchemy.ext.asyncio import AsyncSession
 from sqlalchemy.orm import Session
-from sqlalchemy import select
-from ...app.models.database import Base
+from sqlalchemy import bindparam, cast, column, insert, select, update, values
+from sqlalchemy.dialects import postgresql, sqlite
+from app.models.database import Base
+from .cache import RepositoryCache, from_row, query_fingerprint, repository_cache, to_row
 
 T = TypeVar("T", bound=Base)
 
+# Linhas por statement nas operações bulk: 1000 x ~10 colunas fica longe dos
+# limites de parâmetros do Postgres (65535) e do SQLite (32766)
+BULK_CHUNK_SIZE = 1000
+
+def chunked_rows(rows: Iterable[dict], size: int) -> Iterator[List[dict]]:
+    """Blocos de até `size` linhas com as mesmas colunas (exigência do INSERT multi-linha), pela ordem de entrada."""
+    chunk: List[dict] = []
+    for row in rows:
+        if chunk and (len(chunk) >= size or row.keys() != chunk[0].keys()):
+            yield chunk
+            chunk = []
+        chunk.append(row)
+    if chunk:
+        yield chunk
+
+def bulk_insert_statement(model):
+    """
+    INSERT ... RETURNING id para executar com a lista de linhas: o SQLAlchemy
+    envia-o como INSERT multi-linha ("insertmanyvalues") com o statement
+    compilado uma só vez, e devolve os ids pela ordem dos parâmetros.
+    """
+    table = model.__table__
+    return insert(table).returning(table.c.id, sort_by_parameter_order=True)
+
+def upsert_statement(dialect: str, model, columns: Sequence[str], index_elements: Sequence[str], tenant_id: int,
+                     update_columns: Optional[Sequence[str]] = None):
+    """
+    INSERT ... ON CONFLICT DO UPDATE ... RETURNING id (multi-linha como em
+    `bulk_insert_statement`). O UPDATE só se aplica a linhas existentes do
+    mesmo tenant: um conflito com linha de outro tenant não a altera nem
+    aparece no RETURNING.
+    """
+    table = model.__table__
+    dialect_insert = postgresql.insert if dialect == "postgresql" else sqlite.insert
+    stmt = dialect_insert(table)
+    if update_columns is None:
+        update_columns = [name for name in columns if name not in index_elements and name not in ("id", "tenant_id")]
+    return stmt.on_conflict_do_update(
+        index_elements=list(index_elements),
+        set_={name: stmt.excluded[name] for name in update_columns},
+        where=table.c.tenant_id == tenant_id,
+    ).returning(table.c.id, sort_by_parameter_order=True)
+
+def bulk_update_statement(dialect: str, model, rows: List[dict], tenant_id: int) -> Tuple[Any, Optional[List[dict]]]:
+    """
+    UPDATE por id restrito ao tenant. Postgres: um único UPDATE ... FROM
+    (VALUES ...) por bloco. SQLite (testes): executemany com o mesmo
+    statement. Devolve (statement, parâmetros do executemany ou None).
+    """
+    table = model.__table__
+    names = [key for key in rows[0] if key != "id"]
+    if dialect == "postgresql":
+        data = values(
+            column("id", table.c.id.type), *(column(name, table.c[name].type) for name in names), name="data"
+        ).data([(row["id"], *(row[name] for name in names)) for row in rows])
+        stmt = update(table).where(table.c.id == data.c.id, table.c.tenant_id == tenant_id).values(
+            # VALUES chega sem tipos ao servidor (ex.: enums como texto): cast explícito
+            {name: cast(data.c[name], table.c[name].type) for name in names}
+        )
+        return stmt, None
+    stmt = update(table).where(table.c.id == bindparam("_id"), table.c.tenant_id == tenant_id).values(
+        {name: bindparam(name) for name in names}
+    )
+    return stmt, [{"_id": row["id"], **{name: row[name] for name in names}} for row in rows]
+
 class BaseRepository(Generic[T]):
-    def __init__(self, model: Type[T], session: Session, tenant_id: int):
+    """
+    Repositório com isolamento por tenant. `get`/`list` (e as queries de
+    subclasses via `_cached_scalars`) passam pela cache read-through
+    quando o modelo tem TTL configurado; `create`/`update` invalidam-na.
+    Escritas feitas fora destes métodos devem chamar `invalidate_cache`.
+    """
+
+    def __init__(self, model: Type[T], session: Session, tenant_id: int, cache: Optional[RepositoryCache] = None):
         self.model = model
         self.session = session
         self.tenant_id = tenant_id
+        self.cache = cache if cache is not None else repository_cache
 
-    def get(self, id: Any) -> Optional[T]:
-        """Obtém entidade filtrando pelo tenant_id do contexto."""
-        query = select(self.model).where(
+    def _get_query(self, id: Any):
+        return select(self.model).where(
             self.model.id == id,
             self.model.tenant_id == self.tenant_id
         )
-        return self.session.execute(query).scalar_one_or_none()
+
+    def _cached_scalars(self, query, kind: str = "q", ident: Optional[str] = None) -> List[T]:
+        table = self.model.__tablename__
+        if self.cache.ttl_for(table) is None:
+            return list(self.session.execute(query).scalars().all())
+        ident = ident if ident is not None else query_fingerprint(query)
+        gen = self.cache.generation(table, self.tenant_id)
+        rows = self.cache.lookup(table, self.tenant_id, gen, kind, ident)
+        if rows is not None:
+            # merge(load=False): reentra na sessão sem SQL (ou devolve a instância já no identity map)
+            return [self.session.merge(from_row(self.model, row), load=False) for row in rows]
+        instances = list(self.session.execute(query).scalars().all())
+        self.cache.store(table, self.tenant_id, gen, kind, ident, [to_row(i) for i in instances])
+        return instances
+
+    def invalidate_cache(self) -> None:
+        if self.cache.ttl_for(self.model.__tablename__) is not None:
+            self.cache.invalidate(self.model.__tablename__, self.tenant_id)
+
+    def get(self, id: Any) -> Optional[T]:
+        """Obtém entidade filtrando pelo tenant_id do contexto."""
+        found = self._cached_scalars(self._get_query(id), kind="get", ident=repr(id))
+        return found[0] if found else None
 
     def list(self) -> List[T]:
         """Lista todas as entidades pertencentes ao tenant."""
         query = select(self.model).where(self.model.tenant_id == self.tenant_id)
-        return list(self.session.execute(query).scalars().all())
+        return self._cached_scalars(query, kind="list", ident="*")
 
     def create(self, **kwargs) -> T:
         """Cria nova entidade forçando o tenant_id do contexto."""
         instance = self.model(tenant_id=self.tenant_id, **kwargs)
         self.session.add(instance)
         self.session.commit()
+        self.invalidate_cache()
         self.session.refresh(instance)
         return instance
 
+    def _tenant_rows(self, rows: Iterable[Mapping]) -> Iterator[dict]:
+        """Força o tenant do contexto; linhas com outro tenant_id são um erro, não uma escrita."""
+        for row in rows:
+            row = dict(row)
+            if row.setdefault("tenant_id", self.tenant_id) != self.tenant_id:
+                raise ValueError("Operação bulk com linha de outro tenant.")
+            yield row
+
+    def _update_rows(self, rows: Iterable[Mapping]) -> Iterator[dict]:
+        # Como em `update`: o tenant_id nunca é alterado
+        for row in rows:
+            yield {key: value for key, value in row.items() if key != "tenant_id"}
+
+    def bulk_create(self, rows: Iterable[Mapping], chunk_size: int = BULK_CHUNK_SIZE) -> List[int]:
+        """
+        Insere muitas linhas numa única transação (INSERT multi-linha por
+        bloco, RETURNING id) e devolve os ids pela ordem de entrada. Não
+        cria objetos ORM nem corre hooks por linha dos subclasses.
+        """
+        ids: List[int] = []
+        try:
+            for chunk in chunked_rows(self._tenant_rows(rows), chunk_size):
+                ids.extend(self.session.execute(bulk_insert_statement(self.model), chunk).scalars())
+            self.session.commit()
+        except Exception:
+            self.session.rollback()
+            raise
+        self.invalidate_cache()
+        return ids
+
+    def bulk_update(self, rows: Iterable[Mapping], chunk_size: int = BULK_CHUNK_SIZE) -> int:
+        """Atualiza por `id` (cada linha traz o id e as colunas a alterar); devolve as linhas do tenant atualizadas."""
+        dialect = self.session.get_bind().dialect.name
+        updated = 0
+        try:
+            for chunk in chunked_rows(self._update_rows(rows), chunk_size):
+                stmt, params = bulk_update_statement(dialect, self.model, chunk, self.tenant_id)
+                updated += self.session.execute(stmt, params).rowcount
+            self.session.commit()
+        except Exception:
+            self.session.rollback()
+            raise
+        self.invalidate_cache()
+        return updated
+
+    def upsert_many(
+        self,
+        rows: Iterable[Mapping],
+        index_elements: Sequence[str] = ("id",),
+        update_columns: Optional[Sequence[str]] = None,
+        chunk_size: int = BULK_CHUNK_SIZE,
+    ) -> List[int]:
+        """Insere ou atualiza (ON CONFLICT sobre `index_elements`); devolve os ids inseridos/atualizados."""
+        dialect = self.session.get_bind().dialect.name
+        ids: List[int] = []
+        try:
+            for chunk in chunked_rows(self._tenant_rows(rows), chunk_size):
+                stmt = upsert_statement(dialect, self.model, list(chunk[0]), index_elements, self.tenant_id, update_columns)
+                ids.extend(self.session.execute(stmt, chunk).scalars())
+            self.session.commit()
+        except Exception:
+            self.session.rollback()
+            raise
+        self.invalidate_cache()
+        return ids
+
     def update(self, id: Any, **kwargs) -> Optional[T]:
-        instance = self.get(id)
+        # Leitura direta: a escrita parte sempre da linha atual, nunca da cache
+        query = self._get_query(id).execution_options(populate_existing=True)
+        instance = self.session.execute(query).scalar_one_or_none()
         if not instance:
             return None
         for key, value in kwargs.items():
             if hasattr(instance, key) and key != 'tenant_id':
                 setattr(instance, key, value)
         self.session.commit()
+        self.invalidate_cache()
         self.session.refresh(instance)
-        return instance
\ No newline at end of file
+        return instance
+
+class AsyncBaseRepository(Generic[T]):
+    """Versão assíncrona de `BaseRepository` (AsyncSession), com as mesmas regras de tenant e de cache."""
+
+    def __init__(self, model: Type[T], session: AsyncSession, tenant_id: int, cache: Optional[RepositoryCache] = None):
+        self.model = model
+        self.session = session
+        self.tenant_id = tenant_id
+        self.cache = cache if cache is not None else repository_cache
+
+    _get_query = BaseRepository._get_query
+
+    async def _cache_call(self, fn, *args):
+        # O cliente Redis (L2) é síncrono: fora do event loop; o L1 é só memória
+        if self.cache.l2 is None:
+            return fn(*args)
+        return await asyncio.to_thread(fn, *args)
+
+    async def _cached_scalars(self, query, kind: str = "q", ident: Optional[str] = None) -> List[T]:
+        table = self.model.__tablename__
+        if self.cache.ttl_for(table) is None:
+            return list((await self.session.execute(query)).scalars().all())
+        ident = ident if ident is not None else query_fingerprint(query)
+        gen = await self._cache_call(self.cache.generation, table, self.tenant_id)
+        rows = await self._cache_call(self.cache.lookup, table, self.tenant_id, gen, kind, ident)
+        if rows is not None:
+            return [await self.session.merge(from_row(self.model, row), load=False) for row in rows]
+        instances = list((await self.session.execute(query)).scalars().all())
+        await self._cache_call(self.cache.store, table, self.tenant_id, gen, kind, ident, [to_row(i) for i in instances])
+        return instances
+
+    async def invalidate_cache(self) -> None:
+        if self.cache.ttl_for(self.model.__tablename__) is not None:
+            await self._cache_call(self.cache.invalidate, self.model.__tablename__, self.tenant_id)
+
+    async def get(self, id: Any) -> Optional[T]:
+        found = await self._cached_scalars(self._get_query(id), kind="get", ident=repr(id))
+        return found[0] if found else None
+
+    async def list(self) -> List[T]:
+        query = select(self.model).where(self.model.tenant_id == self.tenant_id)
+        return await self._cached_scalars(query, kind="list", ident="*")
+
+    async def create(self, **kwargs) -> T:
+        instance = self.model(tenant_id=self.tenant_id, **kwargs)
+        self.session.add(instance)
+        await self.session.commit()
+        await self.invalidate_cache()
+        await self.session.refresh(instance)
+        return instance
+
+    _tenant_rows = BaseRepository._tenant_rows
+    _update_rows = BaseRepository._update_rows
+
+    async def bulk_create(self, rows: Iterable[Mapping], chunk_size: int = BULK_CHUNK_SIZE) -> List[int]:
+        ids: List[int] = []
+        try:
+            for chunk in chunked_rows(self._tenant_rows(rows), chunk_size):
+                ids.extend((await self.session.execute(bulk_insert_statement(self.model), chunk)).scalars())
+            await self.session.commit()
+        except Exception:
+            await self.session.rollback()
+            raise
+        await self.invalidate_cache()
+        return ids
+
+    async def bulk_update(self, rows: Iterable[Mapping], chunk_size: int = BULK_CHUNK_SIZE) -> int:
+        dialect = self.session.get_bind().dialect.name
+        updated = 0
+        try:
+            for chunk in chunked_rows(self._update_rows(rows), chunk_size):
+                stmt, params = bulk_update_statement(dialect, self.model, chunk, self.tenant_id)
+                updated += (await self.session.execute(stmt, params)).rowcount
+            await self.session.commit()
+        except Exception:
+            await self.session.rollback()
+            raise
+        await self.invalidate_cache()
+        return updated
+
+    async def upsert_many(
+        self,
+        rows: Iterable[Mapping],
+        index_elements: Sequence[str] = ("id",),
+        update_columns: Optional[Sequence[str]] = None,
+        chunk_size: int = BULK_CHUNK_SIZE,
+    ) -> List[int]:
+        dialect = self.session.get_bind().dialect.name
+        ids: List[int] = []
+        try:
+            for chunk in chunked_rows(self._tenant_rows(rows), chunk_size):
+                stmt = upsert_statement(dialect, self.model, list(chunk[0]), index_elements, self.tenant_id, update_columns)
+                ids.extend((await self.session.execute(stmt, chunk)).scalars())
+            await self.session.commit()
+        except Exception:
+            await self.session.rollback()
+            raise
+        await self.invalidate_cache()
+        return ids
+
+    async def update(self, id: Any, **kwargs) -> Optional[T]:
+        query = self._get_query(id).execution_options(populate_existing=True)
+        instance = (await self.session.execute(query)).scalar_one_or_none()
+        if not instance:
+            return None
+        for key, value in kwargs.items():
+            if hasattr(instance, key) and key != 'tenant_id':
+                setattr(instance, key, value)
+        await self.session.commit()
+        await self.invalidate_cache()
+        await self.session.refresh(instance)
+        return instance
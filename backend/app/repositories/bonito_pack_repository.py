@@ -1,5 +1,6 @@
 
-from typing import List, Optional
+from typing import Any, List, Optional
+from sqlalchemy.ext.asyncio import AsyncSession
 from sqlalchemy.orm import Session
 from sqlalchemy import select
 from app.models.database import Order # Placeholder até BonitoPack ser migrado
@@ -19,3 +20,16 @@ class BonitoPackRepository:
     def get_by_id(self, pack_id: int) -> Optional[Any]:
         # stmt = select(BonitoPackModel).where(pack_id == pack_id, tenant_id == self.tenant_id)
         return None
+
+class AsyncBonitoPackRepository:
+    """Versão assíncrona (mesmo placeholder até o modelo BonitoPack existir)."""
+
+    def __init__(self, session: AsyncSession, tenant_id: int):
+        self.session = session
+        self.tenant_id = tenant_id
+
+    async def list_all(self) -> List[Any]:
+        return []
+
+    async def get_by_id(self, pack_id: int) -> Optional[Any]:
+        return None
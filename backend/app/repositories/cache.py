@@ -0,0 +1,189 @@
+
+import hashlib
+import os
+import pickle
+import threading
+import time
+from collections import OrderedDict
+from typing import Any, Callable, Dict, List, Optional, Tuple
+from sqlalchemy import inspect
+from sqlalchemy.orm import make_transient_to_detached
+
+Rows = List[Dict[str, Any]]
+
+
+def query_fingerprint(stmt) -> str:
+    """Impressão digital de uma query: SQL compilado + parâmetros ligados."""
+    compiled = stmt.compile()
+    params = sorted((key, repr(value)) for key, value in compiled.params.items())
+    return hashlib.sha1(f"{compiled}|{params}".encode()).hexdigest()
+
+
+def to_row(instance) -> Dict[str, Any]:
+    return {attr.key: getattr(instance, attr.key) for attr in inspect(instance).mapper.column_attrs}
+
+
+def from_row(model, row: Dict[str, Any]):
+    """Instância destacada (detached) a partir das colunas, pronta para `merge(load=False)`."""
+    instance = model(**row)
+    make_transient_to_detached(instance)
+    return instance
+
+
+class RepositoryCache:
+    """
+    Cache read-through dos repositórios: LRU em processo (L1) e, opcional,
+    Redis partilhado entre workers (L2). Guarda linhas como dicts de
+    colunas, nunca instâncias ORM, para não partilhar objetos entre
+    sessões.
+
+    Só cacheia modelos com TTL configurado (`enable`). As chaves levam
+    (tabela, tenant_id, geração, tipo, id/fingerprint); qualquer escrita
+    do tenant no modelo avança a geração, pelo que entradas antigas
+    deixam de ser alcançáveis. Uma leitura que começou antes da escrita
+    grava sob a geração antiga e nunca é servida. Escritas noutros
+    workers só chegam ao L1 local pelo TTL; o L2 vê-as logo (geração no
+    Redis).
+    """
+
+    def __init__(self, maxsize: int = 10_000, l2=None, clock: Callable[[], float] = time.monotonic):
+        self.maxsize = maxsize
+        self.l2 = l2
+        self._clock = clock
+        self._ttls: Dict[str, float] = {}
+        self._entries: "OrderedDict[Tuple[Any, ...], Tuple[Rows, float]]" = OrderedDict()
+        self._generations: Dict[Tuple[str, int], int] = {}
+        self._stats: Dict[str, Dict[str, int]] = {}
+        self._lock = threading.Lock()
+
+    def enable(self, table: str, ttl_seconds: float) -> None:
+        self._ttls[table] = ttl_seconds
+        self._stats.setdefault(table, {"hits": 0, "l2_hits": 0, "misses": 0, "invalidations": 0, "rejected": 0})
+
+    def ttl_for(self, table: str) -> Optional[float]:
+        return self._ttls.get(table)
+
+    def generation(self, table: str, tenant_id: int) -> Tuple[int, Optional[int]]:
+        """Geração local (L1) e, com L2, a geração partilhada no Redis."""
+        local = self._generations.get((table, tenant_id), 0)
+        if self.l2 is None:
+            return local, None
+        try:
+            return local, int(self.l2.get(self._l2_gen_key(table, tenant_id)) or 0)
+        except Exception as e:
+            # Sem Redis a leitura segue só com o L1 (e a DB)
+            print(f"[SENTINEL ALERT] Cache L2 indisponível (geração): {str(e)}")
+            return local, None
+
+    def lookup(self, table: str, tenant_id: int, gen: Tuple[int, Optional[int]], kind: str, ident: str) -> Optional[Rows]:
+        """Linhas cacheadas (lista vazia é um resultado válido) ou None. Rejeita linhas de outro tenant."""
+        rows = self._lookup(table, tenant_id, gen, kind, ident)
+        if rows is None:
+            return None
+        if any(row.get("tenant_id") != tenant_id for row in rows):
+            self._count(table, "rejected")
+            self.invalidate(table, tenant_id)
+            return None
+        return rows
+
+    def store(self, table: str, tenant_id: int, gen: Tuple[int, Optional[int]], kind: str, ident: str, rows: Rows) -> None:
+        ttl = self._ttls[table]
+        with self._lock:
+            key = (table, tenant_id, gen[0], kind, ident)
+            self._entries[key] = (rows, self._clock() + ttl)
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.maxsize:
+                self._entries.popitem(last=False)
+        if self.l2 is not None and gen[1] is not None:
+            try:
+                self.l2.set(self._l2_key(table, tenant_id, gen[1], kind, ident), pickle.dumps(rows), ex=max(int(ttl), 1))
+            except Exception as e:
+                print(f"[SENTINEL ALERT] Cache L2 indisponível (escrita): {str(e)}")
+
+    def invalidate(self, table: str, tenant_id: int) -> None:
+        """Avança a geração do (modelo, tenant): todas as entradas anteriores ficam órfãs."""
+        with self._lock:
+            key = (table, tenant_id)
+            self._generations[key] = self._generations.get(key, 0) + 1
+        self._count(table, "invalidations")
+        if self.l2 is not None:
+            try:
+                self.l2.incr(self._l2_gen_key(table, tenant_id))
+            except Exception as e:
+                print(f"[SENTINEL ALERT] Cache L2 indisponível (invalidação): {str(e)}")
+
+    def stats(self) -> Dict[str, Any]:
+        with self._lock:
+            models = {}
+            for table, counters in self._stats.items():
+                lookups = counters["hits"] + counters["l2_hits"] + counters["misses"]
+                hits = counters["hits"] + counters["l2_hits"]
+                models[table] = {
+                    **counters, "ttl_seconds": self._ttls.get(table),
+                    "hit_rate": round(hits / lookups, 4) if lookups else 0.0,
+                }
+            return {"size": len(self._entries), "l2": self.l2 is not None, "models": models}
+
+    def clear(self) -> None:
+        with self._lock:
+            self._entries.clear()
+            self._generations.clear()
+
+    def _lookup(self, table: str, tenant_id: int, gen: Tuple[int, Optional[int]], kind: str, ident: str) -> Optional[Rows]:
+        key = (table, tenant_id, gen[0], kind, ident)
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is not None:
+                rows, expires = entry
+                if expires > self._clock():
+                    self._entries.move_to_end(key)
+                    self._stats[table]["hits"] += 1
+                    return rows
+                del self._entries[key]
+        if self.l2 is not None and gen[1] is not None:
+            try:
+                raw = self.l2.get(self._l2_key(table, tenant_id, gen[1], kind, ident))
+            except Exception as e:
+                print(f"[SENTINEL ALERT] Cache L2 indisponível (leitura): {str(e)}")
+                raw = None
+            if raw is not None:
+                rows = pickle.loads(raw)
+                with self._lock:
+                    self._entries[key] = (rows, self._clock() + self._ttls[table])
+                    self._stats[table]["l2_hits"] += 1
+                return rows
+        self._count(table, "misses")
+        return None
+
+    def _count(self, table: str, name: str) -> None:
+        with self._lock:
+            self._stats[table][name] += 1
+
+    @staticmethod
+    def _l2_gen_key(table: str, tenant_id: int) -> str:
+        return f"repo:{table}:{tenant_id}:gen"
+
+    @staticmethod
+    def _l2_key(table: str, tenant_id: int, gen: int, kind: str, ident: str) -> str:
+        return f"repo:{table}:{tenant_id}:{gen}:{kind}:{ident}"
+
+
+def build_repository_cache() -> RepositoryCache:
+    """
+    `REPO_CACHE_TTLS="orders=15,bonito_packs=300"` liga a cache por tabela
+    (sem a variável nada é cacheado). `REPO_CACHE_L2=1` acrescenta o Redis
+    de `REDIS_URL` como L2.
+    """
+    l2 = None
+    if os.getenv("REPO_CACHE_L2", "").lower() in ("1", "true", "yes", "on"):
+        import redis  # dependência opcional: só necessária com o L2
+
+        l2 = redis.Redis.from_url(os.getenv("REDIS_URL", "redis://localhost:6379/0"))
+    cache = RepositoryCache(maxsize=int(os.getenv("REPO_CACHE_SIZE", "10000")), l2=l2)
+    for item in filter(None, os.getenv("REPO_CACHE_TTLS", "").split(",")):
+        table, _, ttl = item.partition("=")
+        cache.enable(table.strip(), float(ttl))
+    return cache
+
+
+repository_cache = build_repository_cache()
@@ -1,30 +1,215 @@
 
-from typing import List
-from sqlalchemy.orm import Session
-from sqlalchemy import select
-from backend.app.models.database import Order, OrderStatus
-from .base import BaseRepository
+from dataclasses import dataclass
+from datetime import datetime
+from functools import lru_cache
+from typing import List, Literal, Optional, Sequence, Tuple
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy.orm import Session, aliased
+from sqlalchemy import DateTime, Integer, bindparam, select, tuple_, union_all
+from app.models.database import Order, OrderStatus
+from app.realtime.radar_aggregator import assignment_minutes, radar_aggregator
+from .base import AsyncBaseRepository, BaseRepository
+
+# Posição na listagem (created_at, id): ordem total, alinhada com idx_orders_tenant_*_status_date
+OrderCursor = Tuple[datetime, int]
+# "summary": OrderSummary; "row": tuplos com ORDER_LIST_COLUMNS; "entity": Order completo
+Projection = Literal["summary", "row", "entity"]
+
+# Colunas das vistas de lista (sem hidratar entidades ORM)
+ORDER_LIST_COLUMNS = (
+    Order.id,
+    Order.status,
+    Order.category,
+    Order.amount_cents,
+    Order.client_id,
+    Order.pro_id,
+    Order.created_at,
+)
+
+@dataclass(frozen=True)
+class OrderSummary:
+    id: int
+    status: OrderStatus
+    category: str
+    amount_cents: int
+    client_id: int
+    pro_id: Optional[int]
+    created_at: datetime
+
+    @property
+    def cursor(self) -> OrderCursor:
+        return self.created_at, self.id
+
+@lru_cache(maxsize=128)
+def order_page_query(
+    owner: Literal["client_id", "pro_id"],
+    statuses: Tuple[OrderStatus, ...],
+    keyset: bool,
+    projection: Projection = "summary",
+):
+    """
+    Página por keyset, mais recentes primeiro. Cada estado é um range scan
+    em idx_orders_tenant_*_status_date (tenant, dono, status, created_at,
+    id) que já sai ordenado e pára em `limit`; vários estados (todos, sem
+    filtro) são juntos com UNION ALL e cortados no fim, em vez de ordenar
+    todos os pedidos do dono. A estrutura é construída uma vez por forma
+    (cache) e os valores entram por `order_page_params`.
+    """
+    owner_column = getattr(Order, owner)
+    columns = (Order,) if projection == "entity" else ORDER_LIST_COLUMNS
+    limit = bindparam("limit", type_=Integer)
+    branches = []
+    for status in statuses:
+        branch = select(*columns).where(
+            Order.tenant_id == bindparam("tenant_id", type_=Integer),
+            owner_column == bindparam("owner_id", type_=Integer),
+            Order.status == status,
+        )
+        if keyset:
+            branch = branch.where(tuple_(Order.created_at, Order.id) < tuple_(
+                bindparam("after_created_at", type_=DateTime), bindparam("after_id", type_=Integer)
+            ))
+        branches.append(branch.order_by(Order.created_at.desc(), Order.id.desc()).limit(limit))
+    if len(branches) == 1:
+        return branches[0]
+    merged = union_all(*(select(branch.subquery()) for branch in branches)).subquery()
+    if projection == "entity":
+        entity = aliased(Order, merged)
+        return select(entity).order_by(entity.created_at.desc(), entity.id.desc()).limit(limit)
+    return select(*merged.c).order_by(merged.c.created_at.desc(), merged.c.id.desc()).limit(limit)
+
+def order_page_params(
+    owner: Literal["client_id", "pro_id"],
+    tenant_id: int,
+    owner_id: int,
+    limit: int,
+    after: Optional[OrderCursor],
+    statuses: Optional[Sequence[OrderStatus]],
+    projection: Projection,
+):
+    """(statement, parâmetros) de uma página; partilhado pelas versões sync e async."""
+    query = order_page_query(owner, tuple(dict.fromkeys(statuses or OrderStatus)), after is not None, projection)
+    params = {"tenant_id": tenant_id, "owner_id": owner_id, "limit": limit}
+    if after is not None:
+        params.update(after_created_at=after[0], after_id=after[1])
+    return query, params
+
+def order_page_rows(result, projection: Projection) -> list:
+    if projection == "entity":
+        return list(result.scalars().all())
+    if projection == "row":
+        return [tuple(row) for row in result]
+    return [OrderSummary(*row) for row in result]
 
 class OrderRepository(BaseRepository[Order]):
     def __init__(self, session: Session, tenant_id: int):
         super().__init__(Order, session, tenant_id)
 
-    def list_by_client(self, client_id: int) -> List[Order]:
-        """Lista pedidos de um cliente específico no tenant."""
-        query = select(self.model).where(
+    def _by_client_query(self, client_id: int):
+        return select(self.model).where(
             self.model.tenant_id == self.tenant_id,
             self.model.client_id == client_id
         ).order_by(self.model.created_at.desc())
-        return list(self.session.execute(query).scalars().all())
 
-    def list_by_pro(self, pro_id: int) -> List[Order]:
-        """Lista pedidos atribuídos a um profissional no tenant."""
-        query = select(self.model).where(
+    def _by_pro_query(self, pro_id: int):
+        return select(self.model).where(
             self.model.tenant_id == self.tenant_id,
             self.model.pro_id == pro_id
         ).order_by(self.model.created_at.desc())
-        return list(self.session.execute(query).scalars().all())
+
+    def list_by_client(self, client_id: int) -> List[Order]:
+        """Lista pedidos de um cliente específico no tenant (todos; para vistas de lista usar `page_by_client`)."""
+        return self._cached_scalars(self._by_client_query(client_id))
+
+    def list_by_pro(self, pro_id: int) -> List[Order]:
+        """Lista pedidos atribuídos a um profissional no tenant (todos; para vistas de lista usar `page_by_pro`)."""
+        return self._cached_scalars(self._by_pro_query(pro_id))
+
+    def page_by_client(
+        self,
+        client_id: int,
+        limit: int = 50,
+        after: Optional[OrderCursor] = None,
+        statuses: Optional[Sequence[OrderStatus]] = None,
+        projection: Projection = "summary",
+    ) -> list:
+        """
+        Página de pedidos do cliente (mais recentes primeiro). `after` é o
+        cursor (created_at, id) do último item da página anterior.
+        """
+        query, params = order_page_params("client_id", self.tenant_id, client_id, limit, after, statuses, projection)
+        return order_page_rows(self.session.execute(query, params), projection)
+
+    def page_by_pro(
+        self,
+        pro_id: int,
+        limit: int = 50,
+        after: Optional[OrderCursor] = None,
+        statuses: Optional[Sequence[OrderStatus]] = None,
+        projection: Projection = "summary",
+    ) -> list:
+        """Como `page_by_client`, para os pedidos atribuídos a um profissional."""
+        query, params = order_page_params("pro_id", self.tenant_id, pro_id, limit, after, statuses, projection)
+        return order_page_rows(self.session.execute(query, params), projection)
+
+    def create(self, **kwargs) -> Order:
+        order = super().create(**kwargs)
+        radar_aggregator.order_changed(self.tenant_id, order.id, order.category, order.status)
+        return order
 
     def update_status(self, order_id: int, new_status: OrderStatus) -> Order | None:
-        """Atualiza estado do pedido garantindo o contexto do tenant."""
-        return self.update(order_id, status=new_status)
+        """Atualiza estado do pedido garantindo o contexto do tenant (e o radar SOS)."""
+        order = self.update(order_id, status=new_status)
+        if order is not None:
+            eta = assignment_minutes(order) if new_status == OrderStatus.ASSIGNED else None
+            radar_aggregator.order_changed(self.tenant_id, order.id, order.category, new_status, eta)
+        return order
+
+class AsyncOrderRepository(AsyncBaseRepository[Order]):
+    """Versão assíncrona de `OrderRepository` (mesmas queries, mesmo radar)."""
+
+    def __init__(self, session: AsyncSession, tenant_id: int):
+        super().__init__(Order, session, tenant_id)
+
+    _by_client_query = OrderRepository._by_client_query
+    _by_pro_query = OrderRepository._by_pro_query
+
+    async def create(self, **kwargs) -> Order:
+        order = await super().create(**kwargs)
+        radar_aggregator.order_changed(self.tenant_id, order.id, order.category, order.status)
+        return order
+
+    async def list_by_client(self, client_id: int) -> List[Order]:
+        return await self._cached_scalars(self._by_client_query(client_id))
+
+    async def list_by_pro(self, pro_id: int) -> List[Order]:
+        return await self._cached_scalars(self._by_pro_query(pro_id))
+
+    async def page_by_client(
+        self,
+        client_id: int,
+        limit: int = 50,
+        after: Optional[OrderCursor] = None,
+        statuses: Optional[Sequence[OrderStatus]] = None,
+        projection: Projection = "summary",
+    ) -> list:
+        query, params = order_page_params("client_id", self.tenant_id, client_id, limit, after, statuses, projection)
+        return order_page_rows(await self.session.execute(query, params), projection)
+
+    async def page_by_pro(
+        self,
+        pro_id: int,
+        limit: int = 50,
+        after: Optional[OrderCursor] = None,
+        statuses: Optional[Sequence[OrderStatus]] = None,
+        projection: Projection = "summary",
+    ) -> list:
+        query, params = order_page_params("pro_id", self.tenant_id, pro_id, limit, after, statuses, projection)
+        return order_page_rows(await self.session.execute(query, params), projection)
+
+    async def update_status(self, order_id: int, new_status: OrderStatus) -> Order | None:
+        order = await self.update(order_id, status=new_status)
+        if order is not None:
+            eta = assignment_minutes(order) if new_status == OrderStatus.ASSIGNED else None
+            radar_aggregator.order_changed(self.tenant_id, order.id, order.category, new_status, eta)
+        return order
@@ -1,8 +1,40 @@
 
-from typing import List, Optional
+import os
+import time
+from typing import Dict, List, Optional, Set, Tuple
+from sqlalchemy.ext.asyncio import AsyncSession
 from sqlalchemy.orm import Session
 from sqlalchemy import select, or_, func
+from app.core.geo import GeoGridIndex
 from app.models.database import User, UserRole
+from app.realtime.radar_aggregator import radar_aggregator
+
+# Índice espacial de PROs por tenant, aquecido a partir do DB no 1º pedido
+# e mantido por `update_location`. Partilhado entre pedidos do worker; é
+# reconstruído ao fim de PRO_GEO_INDEX_TTL segundos para apanhar escritas
+# feitas noutros workers (e PROs desativados).
+PRO_GEO_INDEX_TTL = float(os.getenv("PRO_GEO_INDEX_TTL", "300"))
+_PRO_GEO_INDEXES: Dict[int, Tuple[GeoGridIndex, float]] = {}
+
+def _build_index(rows) -> GeoGridIndex:
+    index = GeoGridIndex()
+    for pro_id, lat, lon in rows:
+        index.upsert(pro_id, lat, lon, payload=pro_id)
+    return index
+
+def _cached_index(tenant_id: int) -> Optional[GeoGridIndex]:
+    entry = _PRO_GEO_INDEXES.get(tenant_id)
+    if entry is None or entry[1] <= time.monotonic():
+        return None
+    return entry[0]
+
+def _store_index(tenant_id: int, index: GeoGridIndex) -> GeoGridIndex:
+    _PRO_GEO_INDEXES[tenant_id] = (index, time.monotonic() + PRO_GEO_INDEX_TTL)
+    return index
+
+def invalidate_geo_index(tenant_id: int) -> None:
+    """Descarta o índice do tenant (ex.: PRO desativado); o próximo pedido reconstrói-o."""
+    _PRO_GEO_INDEXES.pop(tenant_id, None)
 
 class ProRepository:
     def __init__(self, session: Session, tenant_id: int):
@@ -18,6 +50,9 @@ class ProRepository:
         """
         Pesquisa profissionais no tenant seguindo o scoring canónico.
         """
+        return list(self.session.execute(self._search_query(q, category, min_rating)).scalars().all())
+
+    def _search_query(self, q: Optional[str], category: Optional[str], min_rating: float):
         stmt = select(User).where(
             User.tenant_id == self.tenant_id,
             User.role == UserRole.PRO,
@@ -34,4 +69,136 @@ class ProRepository:
         # No MVP v3.1, filtramos por rating mínimo como exemplo de scoring
         # stmt = stmt.where(User.rating >= min_rating)
 
-        return list(self.session.execute(stmt).scalars().all())
+        return stmt
+
+    def _located_pros_query(self):
+        return select(User.id, User.lat, User.lon).where(
+            User.tenant_id == self.tenant_id,
+            User.role == UserRole.PRO,
+            User.is_active == True,
+            User.lat.is_not(None),
+            User.lon.is_not(None),
+        )
+
+    def _pros_by_id_query(self, ids: List[int]):
+        return select(User).where(
+            User.tenant_id == self.tenant_id,
+            User.role == UserRole.PRO,
+            User.is_active == True,
+            User.id.in_(ids),
+        )
+
+    def _eligible_ids_query(self, q: Optional[str], category: Optional[str]):
+        return self._search_query(q, category, 0.0).with_only_columns(User.id)
+
+    def _pro_query(self, pro_id: int):
+        return select(User).where(
+            User.id == pro_id,
+            User.tenant_id == self.tenant_id,
+            User.role == UserRole.PRO,
+            User.is_active == True,
+        )
+
+    def _geo_index(self) -> GeoGridIndex:
+        index = _cached_index(self.tenant_id)
+        if index is None:
+            index = _store_index(self.tenant_id, _build_index(self.session.execute(self._located_pros_query())))
+        return index
+
+    def search_nearby(
+        self,
+        lat: float,
+        lon: float,
+        radius_km: float = 15.0,
+        limit: int = 20,
+        q: Optional[str] = None,
+        category: Optional[str] = None,
+    ) -> List[Tuple[User, float]]:
+        """
+        k PROs ativos mais próximos de (lat, lon) no raio, via índice espacial,
+        com os mesmos filtros (`q`, `category`) de `search_pros`. Só os
+        vencedores são carregados do DB. Devolve (User, distância_km).
+        """
+        eligible: Optional[Set[int]] = None
+        if q or category:
+            eligible = set(self.session.execute(self._eligible_ids_query(q, category)).scalars())
+        hits = self._geo_index().nearest(
+            lat, lon, k=limit, radius_km=radius_km,
+            predicate=None if eligible is None else eligible.__contains__,
+        )
+        if not hits:
+            return []
+        ids = [pro_id for _, pro_id, _ in hits]
+        users = {u.id: u for u in self.session.execute(self._pros_by_id_query(ids)).scalars().all()}
+        return [(users[pro_id], distance) for distance, pro_id, _ in hits if pro_id in users]
+
+    def update_location(self, pro_id: int, lat: float, lon: float, available: bool = True) -> None:
+        """Atualiza a localização do PRO no DB e no índice espacial do tenant."""
+        pro = self.session.execute(self._pro_query(pro_id)).scalar_one_or_none()
+        if pro is None:
+            return
+        pro.lat, pro.lon = lat, lon
+        self.session.commit()
+        self._geo_index().upsert(pro_id, lat, lon, payload=pro_id, available=available)
+        radar_aggregator.pro_seen(self.tenant_id, pro_id, online=available)
+
+class AsyncProRepository:
+    """Versão assíncrona de `ProRepository`; partilha o índice espacial do worker."""
+
+    def __init__(self, session: AsyncSession, tenant_id: int):
+        self.session = session
+        self.tenant_id = tenant_id
+
+    _search_query = ProRepository._search_query
+    _located_pros_query = ProRepository._located_pros_query
+    _pros_by_id_query = ProRepository._pros_by_id_query
+    _eligible_ids_query = ProRepository._eligible_ids_query
+    _pro_query = ProRepository._pro_query
+
+    async def search_pros(
+        self, q: Optional[str] = None, category: Optional[str] = None, min_rating: float = 0.0
+    ) -> List[User]:
+        result = await self.session.execute(self._search_query(q, category, min_rating))
+        return list(result.scalars().all())
+
+    async def _geo_index(self) -> GeoGridIndex:
+        index = _cached_index(self.tenant_id)
+        if index is None:
+            rows = (await self.session.execute(self._located_pros_query())).all()
+            # Outra corrotina pode ter aquecido o índice durante o await: fica o primeiro
+            index = _cached_index(self.tenant_id)
+            if index is None:
+                index = _store_index(self.tenant_id, _build_index(rows))
+        return index
+
+    async def search_nearby(
+        self,
+        lat: float,
+        lon: float,
+        radius_km: float = 15.0,
+        limit: int = 20,
+        q: Optional[str] = None,
+        category: Optional[str] = None,
+    ) -> List[Tuple[User, float]]:
+        eligible: Optional[Set[int]] = None
+        if q or category:
+            eligible = set((await self.session.execute(self._eligible_ids_query(q, category))).scalars())
+        hits = (await self._geo_index()).nearest(
+            lat, lon, k=limit, radius_km=radius_km,
+            predicate=None if eligible is None else eligible.__contains__,
+        )
+        if not hits:
+            return []
+        ids = [pro_id for _, pro_id, _ in hits]
+        result = await self.session.execute(self._pros_by_id_query(ids))
+        users = {u.id: u for u in result.scalars().all()}
+        return [(users[pro_id], distance) for distance, pro_id, _ in hits if pro_id in users]
+
+    async def update_location(self, pro_id: int, lat: float, lon: float, available: bool = True) -> None:
+        pro = (await self.session.execute(self._pro_query(pro_id))).scalar_one_or_none()
+        if pro is None:
+            return
+        pro.lat, pro.lon = lat, lon
+        await self.session.commit()
+        (await self._geo_index()).upsert(pro_id, lat, lon, payload=pro_id, available=available)
+        radar_aggregator.pro_seen(self.tenant_id, pro_id, online=available)
@@ -1,17 +1,29 @@
 
+from sqlalchemy.ext.asyncio import AsyncSession
 from sqlalchemy.orm import Session
 from sqlalchemy import select
-from backend.app.models.database import User
-from .base import BaseRepository
+from app.models.database import User
+from .base import AsyncBaseRepository, BaseRepository
 
 class UserRepository(BaseRepository[User]):
     def __init__(self, session: Session, tenant_id: int):
         super().__init__(User, session, tenant_id)
 
-    def get_by_email(self, email: str) -> User | None:
-        """Busca utilizador por email dentro do tenant."""
-        query = select(self.model).where(
+    def _by_email_query(self, email: str):
+        return select(self.model).where(
             self.model.email == email,
             self.model.tenant_id == self.tenant_id
         )
-        return self.session.execute(query).scalar_one_or_none()
+
+    def get_by_email(self, email: str) -> User | None:
+        """Busca utilizador por email dentro do tenant."""
+        return self.session.execute(self._by_email_query(email)).scalar_one_or_none()
+
+class AsyncUserRepository(AsyncBaseRepository[User]):
+    def __init__(self, session: AsyncSession, tenant_id: int):
+        super().__init__(User, session, tenant_id)
+
+    _by_email_query = UserRepository._by_email_query
+
+    async def get_by_email(self, email: str) -> User | None:
+        return (await self.session.execute(self._by_email_query(email))).scalar_one_or_none()
@@ -1,29 +1,230 @@
-
-from typing import List
+import base64
+from collections import defaultdict
+from datetime import datetime, timezone
+from typing import AsyncIterator, Dict, Iterable, Iterator, List, Mapping, Optional, Tuple
+from sqlalchemy.ext.asyncio import AsyncSession
 from sqlalchemy.orm import Session
-from sqlalchemy import select, func
-from backend.app.models.database import WalletTransaction, TxType
-from .base import BaseRepository
+from sqlalchemy import select, func, case, tuple_
+from sqlalchemy.dialects import postgresql, sqlite
+from app.models.database import WalletTransaction, WalletBalance, TxType, BalanceBucket
+from .base import AsyncBaseRepository, BaseRepository
+
+# Efeito de cada tipo de movimento nos buckets do utilizador da transação:
+# - ESCROW_IN trava o valor em escrow;
+# - ESCROW_OUT liberta-o do escrow para o saldo disponível;
+# - REFUND devolve ao meio de pagamento o que estava em escrow;
+# - FEE é acumulada no bucket de taxas e sai do saldo disponível.
+BUCKET_DELTAS: Dict[TxType, Tuple[Tuple[BalanceBucket, int], ...]] = {
+    TxType.ESCROW_IN: ((BalanceBucket.ESCROW, 1),),
+    TxType.ESCROW_OUT: ((BalanceBucket.ESCROW, -1), (BalanceBucket.AVAILABLE, 1)),
+    TxType.REFUND: ((BalanceBucket.ESCROW, -1),),
+    TxType.FEE: ((BalanceBucket.FEE, 1), (BalanceBucket.AVAILABLE, -1)),
+}
+
+BalanceKey = Tuple[int, int, BalanceBucket]
+# Posição no extrato (created_at, id): ordem total, alinhada com idx_wallet_tenant_user
+HistoryCursor = Tuple[datetime, int]
+
+# Colunas exportadas no extrato (sem materializar objetos ORM)
+STATEMENT_COLUMNS = (
+    WalletTransaction.id,
+    WalletTransaction.created_at,
+    WalletTransaction.order_id,
+    WalletTransaction.tx_type,
+    WalletTransaction.amount_cents,
+)
+
+def encode_cursor(created_at: datetime, tx_id: int) -> str:
+    raw = f"{created_at.isoformat()}|{tx_id}".encode()
+    return base64.urlsafe_b64encode(raw).decode().rstrip("=")
+
+def decode_cursor(cursor: str) -> HistoryCursor:
+    """Inverso de `encode_cursor`. ValueError se o cursor for inválido."""
+    try:
+        raw = base64.urlsafe_b64decode(cursor + "=" * (-len(cursor) % 4)).decode()
+        created_at, tx_id = raw.rsplit("|", 1)
+        return datetime.fromisoformat(created_at), int(tx_id)
+    except (ValueError, UnicodeDecodeError) as e:
+        raise ValueError("Cursor de extrato inválido.") from e
+
+def balance_deltas(transactions: Iterable[Mapping]) -> Dict[BalanceKey, int]:
+    """Agrega movimentos (dicts com tenant_id, user_id, amount_cents, tx_type) em deltas por bucket."""
+    deltas: Dict[BalanceKey, int] = defaultdict(int)
+    for tx in transactions:
+        for bucket, sign in BUCKET_DELTAS[TxType(tx["tx_type"])]:
+            deltas[(tx["tenant_id"], tx["user_id"], bucket)] += sign * tx["amount_cents"]
+    return deltas
+
+def balance_upsert_statement(dialect: str, transactions: Iterable[Mapping]):
+    """
+    Upsert multi-linha dos deltas por bucket: `amount_cents = amount_cents + delta`
+    (None se não houver deltas). Partilhado pelas versões sync e async.
+    """
+    deltas = balance_deltas(transactions)
+    if not deltas:
+        return None
+    now = datetime.now(timezone.utc)
+    rows = [
+        {"tenant_id": tenant_id, "user_id": user_id, "bucket": bucket, "amount_cents": delta, "updated_at": now}
+        # Ordem determinística das chaves: evita deadlocks entre upserts concorrentes
+        for (tenant_id, user_id, bucket), delta in sorted(deltas.items(), key=lambda item: (item[0][0], item[0][1], item[0][2].value))
+    ]
+    insert = postgresql.insert if dialect == "postgresql" else sqlite.insert
+    stmt = insert(WalletBalance).values(rows)
+    return stmt.on_conflict_do_update(
+        index_elements=["tenant_id", "user_id", "bucket"],
+        set_={
+            "amount_cents": WalletBalance.amount_cents + stmt.excluded.amount_cents,
+            "updated_at": stmt.excluded.updated_at,
+        },
+    )
+
+def apply_balance_deltas(session: Session, transactions: Iterable[Mapping]) -> None:
+    """
+    Atualiza os saldos materializados na transação corrente (sem commit),
+    com um único upsert multi-linha. Chamar sempre na mesma transação que
+    insere os `WalletTransaction`.
+    """
+    stmt = balance_upsert_statement(session.get_bind().dialect.name, transactions)
+    if stmt is not None:
+        session.execute(stmt)
+
+async def apply_balance_deltas_async(session: AsyncSession, transactions: Iterable[Mapping]) -> None:
+    """Versão assíncrona de `apply_balance_deltas`."""
+    stmt = balance_upsert_statement(session.get_bind().dialect.name, transactions)
+    if stmt is not None:
+        await session.execute(stmt)
+
+def ledger_bucket_columns():
+    """Expressões SUM(CASE ...) que recalculam cada bucket a partir do ledger."""
+    columns = []
+    for bucket in BalanceBucket:
+        whens = [
+            (WalletTransaction.tx_type == tx_type, sign * WalletTransaction.amount_cents)
+            for tx_type, effects in BUCKET_DELTAS.items()
+            for effect_bucket, sign in effects
+            if effect_bucket == bucket
+        ]
+        columns.append(func.coalesce(func.sum(case(*whens, else_=0)), 0).label(bucket.value))
+    return columns
 
 class WalletRepository(BaseRepository[WalletTransaction]):
     def __init__(self, session: Session, tenant_id: int):
         super().__init__(WalletTransaction, session, tenant_id)
 
-    def get_user_balance(self, user_id: int) -> int:
-        """Calcula o saldo disponível (cêntimos) de um utilizador no tenant."""
-        # Nota: Lógica simplificada. Realidade: soma de IN - OUT, considerando Escrow em separado.
-        query_in = select(func.sum(self.model.amount_cents)).where(
-            self.model.tenant_id == self.tenant_id,
-            self.model.user_id == user_id,
-            self.model.tx_type.in_([TxType.ESCROW_OUT, TxType.FEE]) == False # Simplificação
+    def _new_transaction(self, order_id: int, user_id: int, amount_cents: int, tx_type: TxType):
+        tx = WalletTransaction(
+            tenant_id=self.tenant_id,
+            order_id=order_id,
+            user_id=user_id,
+            amount_cents=amount_cents,
+            tx_type=tx_type,
+        )
+        delta = {"tenant_id": self.tenant_id, "user_id": user_id, "amount_cents": amount_cents, "tx_type": tx_type}
+        return tx, delta
+
+    def _balances_query(self, user_id: int):
+        return select(WalletBalance.bucket, WalletBalance.amount_cents).where(
+            WalletBalance.tenant_id == self.tenant_id,
+            WalletBalance.user_id == user_id,
+        )
+
+    def _available_query(self, user_id: int):
+        return select(WalletBalance.amount_cents).where(
+            WalletBalance.tenant_id == self.tenant_id,
+            WalletBalance.user_id == user_id,
+            WalletBalance.bucket == BalanceBucket.AVAILABLE,
         )
-        # Em produção: usar agregação robusta por tipo de transação
-        return self.session.execute(query_in).scalar() or 0
 
-    def list_user_history(self, user_id: int) -> List[WalletTransaction]:
-        """Extrato de transações do utilizador no tenant."""
-        query = select(self.model).where(
+    def _history_query(self, user_id: int, *columns):
+        return select(*columns).where(
             self.model.tenant_id == self.tenant_id,
             self.model.user_id == user_id
-        ).order_by(self.model.created_at.desc())
-        return list(self.session.execute(query).scalars().all())
+        ).order_by(self.model.created_at.desc(), self.model.id.desc())
+
+    def _history_page_query(self, user_id: int, limit: int, after: Optional[HistoryCursor]):
+        query = self._history_query(user_id, self.model)
+        if after is not None:
+            query = query.where(tuple_(self.model.created_at, self.model.id) < tuple_(*after))
+        return query.limit(limit)
+
+    def add_transaction(self, order_id: int, user_id: int, amount_cents: int, tx_type: TxType) -> WalletTransaction:
+        """Regista o movimento e atualiza os saldos materializados no mesmo commit."""
+        tx, delta = self._new_transaction(order_id, user_id, amount_cents, tx_type)
+        self.session.add(tx)
+        apply_balance_deltas(self.session, [delta])
+        self.session.commit()
+        self.invalidate_cache()
+        self.session.refresh(tx)
+        return tx
+
+    def get_user_balances(self, user_id: int) -> Dict[BalanceBucket, int]:
+        """Saldos materializados (cêntimos) por bucket; leitura por chave primária."""
+        balances = {bucket: 0 for bucket in BalanceBucket}
+        balances.update(dict(self.session.execute(self._balances_query(user_id)).all()))
+        return balances
+
+    def get_user_balance(self, user_id: int) -> int:
+        """Saldo disponível (cêntimos) de um utilizador no tenant; escrow e taxas à parte."""
+        return self.session.execute(self._available_query(user_id)).scalar() or 0
+
+    def list_user_history(
+        self, user_id: int, limit: int = 50, after: Optional[HistoryCursor] = None
+    ) -> List[WalletTransaction]:
+        """
+        Página do extrato (mais recentes primeiro), paginada por keyset:
+        `after` é a posição (created_at, id) do último item da página anterior.
+        """
+        return list(self.session.execute(self._history_page_query(user_id, limit, after)).scalars().all())
+
+    def iter_user_history(self, user_id: int, batch_size: int = 1000) -> Iterator[Tuple]:
+        """
+        Extrato completo em streaming (cursor do servidor + `yield_per`):
+        memória constante, independentemente do tamanho do histórico.
+        Devolve tuplos com as colunas de `STATEMENT_COLUMNS`.
+        """
+        query = self._history_query(user_id, *STATEMENT_COLUMNS).execution_options(yield_per=batch_size)
+        for row in self.session.execute(query):
+            yield tuple(row)
+
+class AsyncWalletRepository(AsyncBaseRepository[WalletTransaction]):
+    """Versão assíncrona de `WalletRepository` (mesmas queries e regras de saldo)."""
+
+    def __init__(self, session: AsyncSession, tenant_id: int):
+        super().__init__(WalletTransaction, session, tenant_id)
+
+    _new_transaction = WalletRepository._new_transaction
+    _balances_query = WalletRepository._balances_query
+    _available_query = WalletRepository._available_query
+    _history_query = WalletRepository._history_query
+    _history_page_query = WalletRepository._history_page_query
+
+    async def add_transaction(self, order_id: int, user_id: int, amount_cents: int, tx_type: TxType) -> WalletTransaction:
+        tx, delta = self._new_transaction(order_id, user_id, amount_cents, tx_type)
+        self.session.add(tx)
+        await apply_balance_deltas_async(self.session, [delta])
+        await self.session.commit()
+        await self.invalidate_cache()
+        await self.session.refresh(tx)
+        return tx
+
+    async def get_user_balances(self, user_id: int) -> Dict[BalanceBucket, int]:
+        balances = {bucket: 0 for bucket in BalanceBucket}
+        balances.update(dict((await self.session.execute(self._balances_query(user_id))).all()))
+        return balances
+
+    async def get_user_balance(self, user_id: int) -> int:
+        return (await self.session.execute(self._available_query(user_id))).scalar() or 0
+
+    async def list_user_history(
+        self, user_id: int, limit: int = 50, after: Optional[HistoryCursor] = None
+    ) -> List[WalletTransaction]:
+        result = await self.session.execute(self._history_page_query(user_id, limit, after))
+        return list(result.scalars().all())
+
+    async def iter_user_history(self, user_id: int, batch_size: int = 1000) -> AsyncIterator[Tuple]:
+        """Extrato completo em streaming assíncrono (`AsyncSession.stream` + `yield_per`)."""
+        query = self._history_query(user_id, *STATEMENT_COLUMNS).execution_options(yield_per=batch_size)
+        result = await self.session.stream(query)
+        async for row in result:
+            yield tuple(row)
@@ -0,0 +1,75 @@
+
+from typing import Iterable, Set, Tuple
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy.orm import Session
+from sqlalchemy.dialects import postgresql, sqlite
+from app.models.database import StripeWebhookDeadLetter, StripeWebhookEvent
+
+def claim_statement(dialect: str, events: Iterable[Tuple[str, str, int | None]]):
+    """INSERT multi-linha ... ON CONFLICT DO NOTHING RETURNING event_id (None se vazio)."""
+    rows = [
+        {"event_id": event_id, "event_type": event_type, "order_id": order_id}
+        for event_id, event_type, order_id in events
+    ]
+    if not rows:
+        return None
+    insert = postgresql.insert if dialect == "postgresql" else sqlite.insert
+    return (
+        insert(StripeWebhookEvent)
+        .values(rows)
+        .on_conflict_do_nothing(index_elements=["event_id"])
+        .returning(StripeWebhookEvent.event_id)
+    )
+
+class WebhookEventRepository:
+    """
+    Ledger global (não tenant-scoped) de eventos Stripe processados.
+    A deduplicação assenta na chave primária `event_id`: sob entregas
+    concorrentes só uma transação consegue inserir o evento.
+    """
+
+    def __init__(self, session: Session):
+        self.session = session
+
+    def claim(self, event_id: str, event_type: str, order_id: int | None = None) -> bool:
+        """
+        Regista o evento na transação corrente. Devolve False se já existia.
+        Se a transação fizer rollback, o evento volta a ficar disponível.
+        """
+        return bool(self.claim_many([(event_id, event_type, order_id)]))
+
+    def claim_many(self, events: Iterable[Tuple[str, str, int | None]]) -> Set[str]:
+        """
+        Versão em lote de `claim` (um único INSERT multi-linha).
+        Devolve os event_ids efetivamente registados, i.e. vistos pela primeira vez.
+        """
+        stmt = claim_statement(self.session.get_bind().dialect.name, events)
+        if stmt is None:
+            return set()
+        return set(self.session.execute(stmt).scalars().all())
+
+    def dead_letter(self, event: dict, attempts: int, error: str) -> None:
+        """Guarda (e faz commit de) um evento que esgotou as tentativas de ingestão."""
+        self.session.add(StripeWebhookDeadLetter(
+            event_id=str(event.get('id')),
+            event_type=event.get('type'),
+            payload=event,
+            error=error,
+            attempts=attempts,
+        ))
+        self.session.commit()
+
+class AsyncWebhookEventRepository:
+    """Versão assíncrona de `WebhookEventRepository` (mesma semântica transacional)."""
+
+    def __init__(self, session: AsyncSession):
+        self.session = session
+
+    async def claim(self, event_id: str, event_type: str, order_id: int | None = None) -> bool:
+        return bool(await self.claim_many([(event_id, event_type, order_id)]))
+
+    async def claim_many(self, events: Iterable[Tuple[str, str, int | None]]) -> Set[str]:
+        stmt = claim_statement(self.session.get_bind().dialect.name, events)
+        if stmt is None:
+            return set()
+        return set((await self.session.execute(stmt)).scalars().all())
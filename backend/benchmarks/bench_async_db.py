@@ -0,0 +1,136 @@
+"""
+Benchmark: rotas `async def` mistas (uma com query de DB, outra sem I/O) sob
+carga concorrente, com a sessão síncrona (psycopg2, bloqueia o event loop
+durante a query) e com a `AsyncSession` (o loop continua livre). Usa SQLite
+para não depender de Postgres; a latência do servidor é simulada por uma
+função `pg_sleep(ms)` registada na ligação, que espera sem ocupar CPU como
+uma ida à rede.
+
+Uso (a partir de backend/): python -m benchmarks.bench_async_db [pedidos] [concorrência] [latência ms]
+"""
+import asyncio
+import os
+import sys
+import tempfile
+import time
+
+import httpx
+from fastapi import Depends, FastAPI
+from sqlalchemy import create_engine, event, text
+from sqlalchemy.ext.asyncio import AsyncSession, async_sessionmaker, create_async_engine
+from sqlalchemy.orm import Session, sessionmaker
+
+SLOW_QUERY = text("SELECT pg_sleep(:ms)")
+DB_RATIO = 5  # 1 em cada 5 pedidos vai à base de dados
+
+
+def register_pg_sleep(engine) -> None:
+    @event.listens_for(engine, "connect")
+    def connect(dbapi_connection, _record):
+        dbapi_connection.create_function("pg_sleep", 1, lambda ms: time.sleep(ms / 1000) or ms)
+
+
+def build_app(path: str, latency_ms: int, mode: str, pool_size: int) -> FastAPI:
+    app = FastAPI()
+
+    if mode == "sync":
+        # Pool do tamanho da concorrência: com pool esgotado, o checkout bloqueia o
+        # loop que teria de correr o fecho das outras sessões (deadlock até ao timeout)
+        engine = create_engine(
+            f"sqlite:///{path}", connect_args={"check_same_thread": False},
+            pool_size=pool_size, max_overflow=0,
+        )
+        register_pg_sleep(engine)
+        factory = sessionmaker(bind=engine)
+
+        def get_db():
+            db = factory()
+            try:
+                yield db
+            finally:
+                db.close()
+
+        @app.get("/orders/count")
+        async def count_orders(db: Session = Depends(get_db)):
+            return {"count": db.execute(SLOW_QUERY, {"ms": latency_ms}).scalar_one()}
+    else:
+        async_engine = create_async_engine(f"sqlite+aiosqlite:///{path}")
+        register_pg_sleep(async_engine.sync_engine)
+        factory = async_sessionmaker(async_engine, expire_on_commit=False)
+
+        async def get_db():
+            async with factory() as db:
+                yield db
+
+        @app.get("/orders/count")
+        async def count_orders(db: AsyncSession = Depends(get_db)):
+            return {"count": (await db.execute(SLOW_QUERY, {"ms": latency_ms})).scalar_one()}
+
+    @app.get("/radar")
+    async def radar():
+        return {"pros_online": 23, "sos_active": 4}
+
+    return app
+
+
+async def run_mode(path: str, mode: str, requests: int, concurrency: int, latency_ms: int) -> dict:
+    app = build_app(path, latency_ms, mode, pool_size=concurrency + 1)
+    latencies = {"/orders/count": [], "/radar": []}
+    lags = []
+    queue: asyncio.Queue = asyncio.Queue()
+    for i in range(requests):
+        queue.put_nowait("/orders/count" if i % DB_RATIO == 0 else "/radar")
+
+    async with httpx.AsyncClient(transport=httpx.ASGITransport(app=app), base_url="http://bench") as client:
+        await client.get("/orders/count")  # aquecimento (primeira ligação)
+
+        async def worker():
+            while not queue.empty():
+                route = queue.get_nowait()
+                t0 = time.perf_counter()
+                response = await client.get(route)
+                response.raise_for_status()
+                latencies[route].append(time.perf_counter() - t0)
+
+        async def probe():
+            # Atraso do loop: quanto um timer de 5 ms chega tarde (o que qualquer
+            # outra rota ou WebSocket do worker sente durante as queries)
+            while True:
+                t0 = time.perf_counter()
+                await asyncio.sleep(0.005)
+                lags.append(time.perf_counter() - t0 - 0.005)
+
+        lag_task = asyncio.create_task(probe())
+        started = time.perf_counter()
+        await asyncio.gather(*(worker() for _ in range(concurrency)))
+        elapsed = time.perf_counter() - started
+        lag_task.cancel()
+
+    db_times = sorted(latencies["/orders/count"])
+    lags.sort()
+    return {
+        "rps": requests / elapsed,
+        "db_p50": db_times[len(db_times) // 2],
+        "lag_p99": lags[int(len(lags) * 0.99)],
+        "lag_max": lags[-1],
+    }
+
+
+def main() -> None:
+    requests = int(sys.argv[1]) if len(sys.argv) > 1 else 1_000
+    concurrency = int(sys.argv[2]) if len(sys.argv) > 2 else 50
+    latency_ms = int(sys.argv[3]) if len(sys.argv) > 3 else 20
+
+    with tempfile.TemporaryDirectory() as tmp:
+        path = os.path.join(tmp, "bench.db")
+        print(f"pedidos: {requests} | concorrência: {concurrency} | 1 em {DB_RATIO} com query de {latency_ms} ms")
+        for mode, label in (("sync", "Session síncrona"), ("async", "AsyncSession")):
+            result = asyncio.run(run_mode(path, mode, requests, concurrency, latency_ms))
+            print(
+                f"{label:>17}: {result['rps']:,.0f} req/s | query p50 {result['db_p50'] * 1e3:.0f} ms "
+                f"| atraso do loop p99 {result['lag_p99'] * 1e3:.1f} ms, máx {result['lag_max'] * 1e3:.1f} ms"
+            )
+
+
+if __name__ == "__main__":
+    main()
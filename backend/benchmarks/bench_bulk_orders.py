@@ -0,0 +1,77 @@
+"""
+Benchmark: importação de pedidos com `create` linha a linha (commit +
+refresh por linha) versus `bulk_create` (INSERT multi-linha em blocos,
+uma transação), e `bulk_update`/`upsert_many` sobre o mesmo volume.
+Corre em SQLite num ficheiro temporário; em Postgres a vantagem cresce
+com a latência de rede, porque o custo do `create` é dominado por idas
+e voltas.
+
+Uso (a partir de backend/): python -m benchmarks.bench_bulk_orders [tamanhos separados por vírgula]
+"""
+import os
+import sys
+import tempfile
+import time
+
+from sqlalchemy import create_engine, delete
+from sqlalchemy.orm import sessionmaker
+
+from app.models.database import Base, Order, OrderStatus, Tenant, User, UserRole
+from app.repositories.order_repository import OrderRepository
+
+BASELINE_ROWS = 2_000  # o create linha a linha é extrapolado a partir desta amostra
+
+
+def order_rows(count: int):
+    return ({"client_id": 1, "amount_cents": 1000 + i % 500, "category": "canalizacao"} for i in range(count))
+
+
+def rate(rows: int, seconds: float) -> str:
+    return f"{rows / seconds:>10,.0f} linhas/s ({seconds:.2f}s)"
+
+
+def main() -> None:
+    sizes = [int(n) for n in sys.argv[1].split(",")] if len(sys.argv) > 1 else [10_000, 100_000, 1_000_000]
+
+    with tempfile.TemporaryDirectory() as tmp:
+        engine = create_engine(f"sqlite:///{os.path.join(tmp, 'bulk.db')}")
+        Base.metadata.create_all(engine)
+        db = sessionmaker(bind=engine)()
+        db.add(Tenant(id=1, name="Bench", slug="bench"))
+        db.add(User(id=1, tenant_id=1, email="bench@x247.pt", password_hash="h", role=UserRole.CLIENT))
+        db.commit()
+        repo = OrderRepository(db, tenant_id=1)
+
+        started = time.perf_counter()
+        for row in order_rows(BASELINE_ROWS):
+            repo.create(**row)
+        baseline = time.perf_counter() - started
+        print(f"create (1 linha/commit):  {rate(BASELINE_ROWS, baseline)}")
+
+        for size in sizes:
+            db.execute(delete(Order))
+            db.commit()
+            started = time.perf_counter()
+            ids = repo.bulk_create(order_rows(size))
+            created = time.perf_counter() - started
+
+            started = time.perf_counter()
+            repo.bulk_update({"id": order_id, "status": OrderStatus.PAID} for order_id in ids)
+            updated = time.perf_counter() - started
+
+            started = time.perf_counter()
+            repo.upsert_many(
+                {"id": order_id, "client_id": 1, "amount_cents": 1, "category": "canalizacao"} for order_id in ids
+            )
+            upserted = time.perf_counter() - started
+
+            print(f"\n{size:,} pedidos")
+            print(f"  bulk_create:  {rate(size, created)} | create estimado: {size * baseline / BASELINE_ROWS:,.0f}s")
+            print(f"  bulk_update:  {rate(size, updated)}")
+            print(f"  upsert_many:  {rate(size, upserted)}")
+        db.close()
+        engine.dispose()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,93 @@
+"""
+Benchmark: listagens de pedidos com 1M de pedidos num tenant (SQLite em
+ficheiro temporário). Compara `list_by_client` (todos os pedidos do
+cliente, entidades ORM completas) com `page_by_client` por keyset
+(primeira página, página profunda, filtro por estados) nas várias
+projeções, e com queries ingénuas (`ORDER BY created_at LIMIT`, com e
+sem `status IN`) que obrigam a ordenar todos os pedidos do cliente.
+
+Uso (a partir de backend/): python -m benchmarks.bench_order_pages [pedidos] [clientes] [repetições]
+"""
+import os
+import sys
+import tempfile
+import time
+from datetime import datetime, timedelta
+
+from sqlalchemy import create_engine, select
+from sqlalchemy.orm import sessionmaker
+
+from app.models.database import Base, Order, OrderStatus, Tenant, User, UserRole
+from app.repositories.order_repository import ORDER_LIST_COLUMNS, OrderRepository
+
+STATUSES = list(OrderStatus)
+PAGE = 50
+
+
+def seed(db, orders: int, clients: int) -> None:
+    db.add(Tenant(id=1, name="Bench", slug="bench"))
+    for client_id in range(1, clients + 1):
+        db.add(User(id=client_id, tenant_id=1, email=f"c{client_id}@x247.pt", password_hash="h", role=UserRole.CLIENT))
+    db.commit()
+    start = datetime(2025, 1, 1)
+    OrderRepository(db, 1).bulk_create(
+        {
+            "client_id": i % clients + 1, "amount_cents": 1000 + i % 700, "category": "canalizacao",
+            # Cada cliente percorre todos os estados
+            "status": STATUSES[(i // clients) % len(STATUSES)], "created_at": start + timedelta(seconds=i * 30),
+        }
+        for i in range(orders)
+    )
+
+
+def timed(fn, repeat: int) -> float:
+    fn()  # aquecimento (cache de páginas do SQLite, statement compilado)
+    samples = []
+    for _ in range(repeat):
+        started = time.perf_counter()
+        fn()
+        samples.append(time.perf_counter() - started)
+    return sorted(samples)[len(samples) // 2]
+
+
+def main() -> None:
+    orders = int(sys.argv[1]) if len(sys.argv) > 1 else 1_000_000
+    clients = int(sys.argv[2]) if len(sys.argv) > 2 else 100
+    repeat = int(sys.argv[3]) if len(sys.argv) > 3 else 20
+
+    with tempfile.TemporaryDirectory() as tmp:
+        engine = create_engine(f"sqlite:///{os.path.join(tmp, 'orders.db')}")
+        Base.metadata.create_all(engine)
+        db = sessionmaker(bind=engine)()
+        started = time.perf_counter()
+        seed(db, orders, clients)
+        print(f"{orders:,} pedidos no tenant, {orders // clients:,} por cliente (seed em {time.perf_counter() - started:.0f}s)")
+
+        repo = OrderRepository(db, 1)
+        middle = repo.page_by_client(1, limit=orders // clients // 2)[-1].cursor
+        wanted = [OrderStatus.PAID, OrderStatus.ASSIGNED]
+        naive = (
+            select(*ORDER_LIST_COLUMNS)
+            .where(Order.tenant_id == 1, Order.client_id == 1)
+            .order_by(Order.created_at.desc(), Order.id.desc()).limit(PAGE)
+        )
+
+        cases = [
+            ("list_by_client (todos, ORM)", lambda: (repo.list_by_client(1), db.expunge_all())),
+            ("page_by_client 1ª página, summary", lambda: repo.page_by_client(1, limit=PAGE)),
+            ("page_by_client 1ª página, row", lambda: repo.page_by_client(1, limit=PAGE, projection="row")),
+            ("page_by_client 1ª página, entity", lambda: (repo.page_by_client(1, limit=PAGE, projection="entity"), db.expunge_all())),
+            ("page_by_client página profunda", lambda: repo.page_by_client(1, limit=PAGE, after=middle)),
+            ("page_by_client 2 estados", lambda: repo.page_by_client(1, limit=PAGE, statuses=wanted)),
+            ("1 estado", lambda: repo.page_by_client(1, limit=PAGE, statuses=[OrderStatus.PAID])),
+            ("ingénua: sem filtro + ORDER BY", lambda: db.execute(naive).all()),
+            ("ingénua: status IN + ORDER BY", lambda: db.execute(naive.where(Order.status.in_(wanted))).all()),
+        ]
+        for label, fn in cases:
+            print(f"  {label:<36} p50 {timed(fn, repeat) * 1e3:8.2f} ms")
+        db.close()
+        engine.dispose()
+
+
+if __name__ == "__main__":
+    main()
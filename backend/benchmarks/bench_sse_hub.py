@@ -0,0 +1,77 @@
+"""
+Benchmark: 10k streams SSE concorrentes num único worker (um event loop).
+Cada ligação é o gerador real do endpoint (`sse_frames`) consumido por uma
+task, como faz o StreamingResponse; mede o fan-out por evento e a memória
+por ligação. Não inclui o custo de sockets/kernel.
+
+Uso (a partir de backend/): python -m benchmarks.bench_sse_hub [ligações] [tenants] [eventos]
+"""
+import asyncio
+import sys
+import time
+import tracemalloc
+
+from app.realtime.hub import TenantBroadcastHub, sse_frames
+
+
+async def consume(hub: TenantBroadcastHub, tenant_id: int, expected: int, done: asyncio.Event, counter: list):
+    received = 0
+    async for frame in sse_frames(hub, tenant_id, keepalive_seconds=60):
+        received += 1
+        if received == expected:
+            break
+    counter[0] -= 1
+    if counter[0] == 0:
+        done.set()
+
+
+async def run(connections: int, tenants: int, events: int) -> None:
+    hub = TenantBroadcastHub(max_queue=events + 1)
+    done = asyncio.Event()
+    remaining = [connections]
+
+    tracemalloc.start()
+    before = tracemalloc.take_snapshot()
+    tasks = [
+        asyncio.create_task(consume(hub, i % tenants + 1, events, done, remaining))
+        for i in range(connections)
+    ]
+    await asyncio.sleep(0.1)  # todas as ligações subscritas
+    held = tracemalloc.take_snapshot().compare_to(before, "filename")
+    tracemalloc.stop()
+    per_conn = sum(stat.size_diff for stat in held) / connections
+    assert hub.stats()["connections"] == connections
+
+    publish_times = []
+    started = time.perf_counter()
+    for n in range(events):
+        for tenant_id in range(1, tenants + 1):
+            t0 = time.perf_counter()
+            hub.publish(tenant_id, "ORDER_UPDATE", {"id": n, "status": "ASSIGNED"})
+            publish_times.append(time.perf_counter() - t0)
+        await asyncio.sleep(0)
+    await done.wait()
+    elapsed = time.perf_counter() - started
+    await asyncio.gather(*tasks)
+
+    publish_times.sort()
+    frames = connections * events
+    stats = hub.stats()
+    print(f"ligações: {connections} | tenants: {tenants} | eventos/tenant: {events}")
+    print(f"memória por ligação: {per_conn / 1024:.1f} KiB")
+    print(f"publish (fan-out para {connections // tenants} clientes): "
+          f"p50 {publish_times[len(publish_times) // 2] * 1e3:.2f} ms | "
+          f"p99 {publish_times[int(len(publish_times) * 0.99)] * 1e3:.2f} ms")
+    print(f"frames entregues: {frames} em {elapsed:.2f}s ({frames / elapsed:,.0f} frames/s)")
+    print(f"expulsos: {stats['evicted']} | ligações abertas no fim: {stats['connections']}")
+
+
+def main() -> None:
+    connections = int(sys.argv[1]) if len(sys.argv) > 1 else 10_000
+    tenants = int(sys.argv[2]) if len(sys.argv) > 2 else 20
+    events = int(sys.argv[3]) if len(sys.argv) > 3 else 50
+    asyncio.run(run(connections, tenants, events))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,113 @@
+"""
+Load test do radar SOS: 5k WebSockets simulados em 50 tenants. Compara o
+broadcast sequencial antigo (um `send_json` de cada vez, serialização por
+socket, sem timeout) com o `RadarManager` por tenant (um cálculo e uma
+serialização por tenant, envios em paralelo com timeout). Uma fração dos
+sockets está morta e outra encravada, como em redes móveis reais.
+
+Uso (a partir de backend/): python -m benchmarks.load_radar_broadcast [sockets] [tenants] [ticks]
+"""
+import asyncio
+import json
+import random
+import sys
+import time
+
+from app.realtime.radar import RadarManager, default_radar_payload
+
+SEND_LATENCY = 0.002   # escrita no transporte (s)
+STALL_SECONDS = 5.0    # socket encravado (cliente sem rede)
+DEAD_RATIO = 0.01
+STALLED_RATIO = 0.002
+
+
+class SimulatedSocket:
+    def __init__(self, state: str):
+        self.state = state
+        self.received = 0
+
+    async def accept(self):
+        pass
+
+    async def send_text(self, frame: str):
+        if self.state == "dead":
+            raise ConnectionResetError()
+        await asyncio.sleep(STALL_SECONDS if self.state == "stalled" else SEND_LATENCY)
+        self.received += 1
+
+    async def send_json(self, message: dict):
+        await self.send_text(json.dumps(message))
+
+    async def close(self, code: int = 1000):
+        pass
+
+
+def build_sockets(count: int, tenants: int):
+    rng = random.Random(42)
+    sockets = []
+    for i in range(count):
+        roll = rng.random()
+        state = "dead" if roll < DEAD_RATIO else "stalled" if roll < DEAD_RATIO + STALLED_RATIO else "ok"
+        sockets.append((i % tenants + 1, SimulatedSocket(state)))
+    return sockets
+
+
+async def sequential_tick(sockets, budget: float) -> float:
+    """Broadcast antigo: um socket de cada vez, erros ignorados, mortos nunca saem."""
+    started = time.perf_counter()
+    for tenant_id, ws in sockets:
+        message = {"type": "RADAR_SYNC", "payload": default_radar_payload(tenant_id)}
+        try:
+            await ws.send_json(message)
+        except:
+            continue
+        if time.perf_counter() - started > budget:
+            return float("inf")
+    return time.perf_counter() - started
+
+
+async def run(count: int, tenants: int, ticks: int) -> None:
+    sockets = build_sockets(count, tenants)
+    dead = sum(ws.state == "dead" for _, ws in sockets)
+    stalled = sum(ws.state == "stalled" for _, ws in sockets)
+    print(f"sockets: {count} | tenants: {tenants} | mortos: {dead} | encravados: {stalled}")
+
+    budget = 30.0
+    elapsed = await sequential_tick(sockets, budget)
+    label = f"> {budget:.0f}s (abortado)" if elapsed == float("inf") else f"{elapsed:.2f}s"
+    print(f"sequencial (antes): 1 tick em {label}")
+
+    computed = []
+
+    def source(tenant_id: int) -> dict:
+        computed.append(tenant_id)
+        return default_radar_payload(tenant_id)
+
+    manager = RadarManager(source=source, interval_seconds=3600, send_timeout=0.5)
+    for tenant_id, ws in build_sockets(count, tenants):
+        await manager.connect(ws, tenant_id)
+    manager._ticker.cancel()
+
+    durations = []
+    for _ in range(ticks):
+        started = time.perf_counter()
+        await manager.tick()
+        durations.append(time.perf_counter() - started)
+    print(
+        f"RadarManager (depois): {ticks} ticks | 1º {durations[0] * 1e3:.0f} ms | "
+        f"seguintes p50 {sorted(durations[1:])[len(durations[1:]) // 2] * 1e3:.0f} ms"
+        if ticks > 1 else f"RadarManager (depois): 1 tick em {durations[0] * 1e3:.0f} ms"
+    )
+    print(f"cálculos de radar por tick: {len(computed) // ticks} (1 por tenant)")
+    print(f"sockets removidos: {manager.pruned} | ligados no fim: {manager.connection_count()}")
+
+
+def main() -> None:
+    count = int(sys.argv[1]) if len(sys.argv) > 1 else 5_000
+    tenants = int(sys.argv[2]) if len(sys.argv) > 2 else 50
+    ticks = int(sys.argv[3]) if len(sys.argv) > 3 else 10
+    asyncio.run(run(count, tenants, ticks))
+
+
+if __name__ == "__main__":
+    main()
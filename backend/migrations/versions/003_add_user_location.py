@@ -0,0 +1,23 @@
+
+"""add user location
+
+Revision ID: 003
+Revises: 002
+Create Date: 2026-10-18 10:00:00.000000
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+revision = '003'
+down_revision = '002'
+branch_labels = None
+depends_on = None
+
+def upgrade() -> None:
+    op.add_column('users', sa.Column('lat', sa.Float(), nullable=True))
+    op.add_column('users', sa.Column('lon', sa.Float(), nullable=True))
+
+def downgrade() -> None:
+    op.drop_column('users', 'lon')
+    op.drop_column('users', 'lat')
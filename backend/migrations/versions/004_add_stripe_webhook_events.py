@@ -0,0 +1,28 @@
+
+"""add stripe webhook events ledger
+
+Revision ID: 004
+Revises: 003
+Create Date: 2026-10-18 11:00:00.000000
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+revision = '004'
+down_revision = '003'
+branch_labels = None
+depends_on = None
+
+def upgrade() -> None:
+    op.create_table(
+        'stripe_webhook_events',
+        sa.Column('event_id', sa.String(length=255), nullable=False),
+        sa.Column('event_type', sa.String(length=100), nullable=False),
+        sa.Column('order_id', sa.Integer(), nullable=True),
+        sa.Column('received_at', sa.DateTime(), nullable=False),
+        sa.PrimaryKeyConstraint('event_id')
+    )
+
+def downgrade() -> None:
+    op.drop_table('stripe_webhook_events')
@@ -0,0 +1,49 @@
+"""add materialised wallet balances
+
+Revision ID: 005
+Revises: 004
+Create Date: 2026-10-18 12:00:00.000000
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+revision = '005'
+down_revision = '004'
+branch_labels = None
+depends_on = None
+
+def upgrade() -> None:
+    op.create_table(
+        'wallet_balances',
+        sa.Column('tenant_id', sa.Integer(), nullable=False),
+        sa.Column('user_id', sa.Integer(), nullable=False),
+        sa.Column('bucket', sa.Enum('ESCROW', 'AVAILABLE', 'FEE', name='balancebucket'), nullable=False),
+        sa.Column('amount_cents', sa.Integer(), nullable=False),
+        sa.Column('updated_at', sa.DateTime(), nullable=False),
+        sa.ForeignKeyConstraint(['tenant_id'], ['tenants.id'], ),
+        sa.ForeignKeyConstraint(['user_id'], ['users.id'], ),
+        sa.PrimaryKeyConstraint('tenant_id', 'user_id', 'bucket')
+    )
+    # Backfill a partir do ledger existente (mesmas regras de BUCKET_DELTAS)
+    op.execute("""
+        INSERT INTO wallet_balances (tenant_id, user_id, bucket, amount_cents, updated_at)
+        SELECT tenant_id, user_id, CAST(bucket AS balancebucket), SUM(delta), now()
+        FROM (
+            SELECT tenant_id, user_id, 'ESCROW' AS bucket,
+                   CASE WHEN tx_type = 'ESCROW_IN' THEN amount_cents ELSE -amount_cents END AS delta
+            FROM wallet_transactions WHERE tx_type IN ('ESCROW_IN', 'ESCROW_OUT', 'REFUND')
+            UNION ALL
+            SELECT tenant_id, user_id, 'AVAILABLE',
+                   CASE WHEN tx_type = 'ESCROW_OUT' THEN amount_cents ELSE -amount_cents END
+            FROM wallet_transactions WHERE tx_type IN ('ESCROW_OUT', 'FEE')
+            UNION ALL
+            SELECT tenant_id, user_id, 'FEE', amount_cents
+            FROM wallet_transactions WHERE tx_type = 'FEE'
+        ) deltas
+        GROUP BY tenant_id, user_id, bucket
+    """)
+
+def downgrade() -> None:
+    op.drop_table('wallet_balances')
+    op.execute("DROP TYPE IF EXISTS balancebucket")
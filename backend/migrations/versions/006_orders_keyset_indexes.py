@@ -0,0 +1,29 @@
+"""orders keyset indexes (tenant, client|pro, status, created_at, id)
+
+Revision ID: 006
+Revises: 005
+Create Date: 2026-10-18 18:00:00.000000
+
+"""
+from alembic import op
+
+revision = '006'
+down_revision = '005'
+branch_labels = None
+depends_on = None
+
+def upgrade() -> None:
+    # Bases criadas pelo schema inicial antigo têm os índices sem data
+    op.execute("DROP INDEX IF EXISTS idx_orders_tenant_client")
+    op.execute("DROP INDEX IF EXISTS idx_orders_tenant_pro")
+    # `id` no fim: desempate do keyset (created_at, id) servido pelo próprio índice
+    op.execute("DROP INDEX IF EXISTS idx_orders_tenant_client_status_date")
+    op.execute("DROP INDEX IF EXISTS idx_orders_tenant_pro_status_date")
+    op.create_index('idx_orders_tenant_client_status_date', 'orders', ['tenant_id', 'client_id', 'status', 'created_at', 'id'])
+    op.create_index('idx_orders_tenant_pro_status_date', 'orders', ['tenant_id', 'pro_id', 'status', 'created_at', 'id'])
+
+def downgrade() -> None:
+    op.drop_index('idx_orders_tenant_pro_status_date', table_name='orders')
+    op.drop_index('idx_orders_tenant_client_status_date', table_name='orders')
+    op.create_index('idx_orders_tenant_client_status_date', 'orders', ['tenant_id', 'client_id', 'status', 'created_at'])
+    op.create_index('idx_orders_tenant_pro_status_date', 'orders', ['tenant_id', 'pro_id', 'status', 'created_at'])
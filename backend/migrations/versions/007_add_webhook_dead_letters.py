@@ -0,0 +1,32 @@
+"""add stripe webhook dead letters
+
+Revision ID: 007
+Revises: 006
+Create Date: 2026-10-18 19:00:00.000000
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+revision = '007'
+down_revision = '006'
+branch_labels = None
+depends_on = None
+
+def upgrade() -> None:
+    op.create_table(
+        'stripe_webhook_dead_letters',
+        sa.Column('id', sa.Integer(), nullable=False),
+        sa.Column('event_id', sa.String(length=255), nullable=False),
+        sa.Column('event_type', sa.String(length=100), nullable=True),
+        sa.Column('payload', sa.JSON(), nullable=False),
+        sa.Column('error', sa.Text(), nullable=False),
+        sa.Column('attempts', sa.Integer(), nullable=False),
+        sa.Column('created_at', sa.DateTime(), nullable=False),
+        sa.PrimaryKeyConstraint('id')
+    )
+    op.create_index('ix_stripe_webhook_dead_letters_event_id', 'stripe_webhook_dead_letters', ['event_id'])
+
+def downgrade() -> None:
+    op.drop_index('ix_stripe_webhook_dead_letters_event_id', table_name='stripe_webhook_dead_letters')
+    op.drop_table('stripe_webhook_dead_letters')
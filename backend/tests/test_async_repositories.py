@@ -0,0 +1,143 @@
+import asyncio
+import pytest
+from fastapi import FastAPI
+from fastapi.testclient import TestClient
+from sqlalchemy.ext.asyncio import async_sessionmaker, create_async_engine
+from sqlalchemy.pool import StaticPool
+from app.api.v1 import payments as payments_api
+from app.core.security import create_access_token
+from app.db.session import get_async_db, to_async_url
+from app.models.database import (
+    Base, BalanceBucket, Order, OrderStatus, Tenant, TxType, User, UserRole,
+)
+from app.repositories import order_repository, pro_repository
+from app.repositories.order_repository import AsyncOrderRepository
+from app.repositories.pro_repository import AsyncProRepository
+from app.repositories.user_repository import AsyncUserRepository
+from app.repositories.wallet_repository import AsyncWalletRepository
+from app.repositories.webhook_event_repository import AsyncWebhookEventRepository
+from app.realtime.radar_aggregator import RadarAggregator
+
+@pytest.fixture
+def session_factory():
+    engine = create_async_engine("sqlite+aiosqlite://", poolclass=StaticPool)
+
+    async def setup():
+        async with engine.begin() as conn:
+            await conn.run_sync(Base.metadata.create_all)
+        factory = async_sessionmaker(engine, expire_on_commit=False)
+        async with factory() as db:
+            for tenant_id in (1, 2):
+                db.add(Tenant(id=tenant_id, name=f"T{tenant_id}", slug=f"t{tenant_id}"))
+                db.add(User(id=tenant_id, tenant_id=tenant_id, email=f"c{tenant_id}@x247.pt",
+                            password_hash="h", role=UserRole.CLIENT))
+            await db.commit()
+        return factory
+
+    factory = asyncio.run(setup())
+    yield factory
+    asyncio.run(engine.dispose())
+
+def test_async_url_maps_drivers():
+    assert to_async_url("postgresql://u:p@db:5432/x") == "postgresql+asyncpg://u:p@db:5432/x"
+    assert to_async_url("sqlite:///./test.db") == "sqlite+aiosqlite:///./test.db"
+
+def test_async_order_repository_is_tenant_scoped(session_factory, monkeypatch):
+    monkeypatch.setattr(order_repository, "radar_aggregator", RadarAggregator())
+
+    async def scenario():
+        async with session_factory() as db:
+            repo = AsyncOrderRepository(db, tenant_id=1)
+            order = await repo.create(client_id=1, amount_cents=5000, category="SOS")
+            await AsyncOrderRepository(db, tenant_id=2).create(client_id=2, amount_cents=1, category="SOS")
+            listed = await repo.list_by_client(1)
+            updated = await repo.update_status(order.id, OrderStatus.ASSIGNED)
+            foreign = await AsyncOrderRepository(db, tenant_id=2).get(order.id)
+            return order, listed, updated, foreign
+
+    order, listed, updated, foreign = asyncio.run(scenario())
+    assert [o.id for o in listed] == [order.id]
+    assert updated.status == OrderStatus.ASSIGNED and foreign is None
+    assert order_repository.radar_aggregator.snapshot(1)["sos_active"] == 1
+
+def test_async_wallet_repository_matches_sync_semantics(session_factory):
+    async def scenario():
+        async with session_factory() as db:
+            db.add(Order(id=1, tenant_id=1, client_id=1, amount_cents=1000, category="canalizacao"))
+            await db.commit()
+            repo = AsyncWalletRepository(db, tenant_id=1)
+            await repo.add_transaction(1, 1, 1000, TxType.ESCROW_IN)
+            await repo.add_transaction(1, 1, 600, TxType.ESCROW_OUT)
+            await repo.add_transaction(1, 1, 100, TxType.FEE)
+            balances = await repo.get_user_balances(1)
+            available = await repo.get_user_balance(1)
+            page = await repo.list_user_history(1, limit=2)
+            streamed = [row async for row in repo.iter_user_history(1, batch_size=2)]
+            return balances, available, page, streamed
+
+    balances, available, page, streamed = asyncio.run(scenario())
+    assert balances == {BalanceBucket.ESCROW: 400, BalanceBucket.AVAILABLE: 500, BalanceBucket.FEE: 100}
+    assert available == 500
+    assert [tx.tx_type for tx in page] == [TxType.FEE, TxType.ESCROW_OUT]
+    assert [row[3] for row in streamed] == [TxType.FEE, TxType.ESCROW_OUT, TxType.ESCROW_IN]
+
+def test_async_webhook_claims_are_exactly_once(session_factory):
+    async def scenario():
+        async with session_factory() as db:
+            repo = AsyncWebhookEventRepository(db)
+            first = await repo.claim_many([("evt_1", "payment_intent.succeeded", None), ("evt_2", "x", None)])
+            again = await repo.claim("evt_1", "payment_intent.succeeded")
+            await db.commit()
+            return first, again
+
+    first, again = asyncio.run(scenario())
+    assert first == {"evt_1", "evt_2"} and again is False
+
+def test_async_pro_and_user_repositories(session_factory, monkeypatch):
+    monkeypatch.setattr(pro_repository, "_PRO_GEO_INDEXES", {})
+    monkeypatch.setattr(pro_repository, "radar_aggregator", RadarAggregator())
+
+    async def scenario():
+        async with session_factory() as db:
+            db.add(User(id=10, tenant_id=1, email="pro@x247.pt", password_hash="h", role=UserRole.PRO,
+                        lat=38.68, lon=-9.16))
+            db.add(User(id=11, tenant_id=1, email="far@x247.pt", password_hash="h", role=UserRole.PRO,
+                        lat=41.15, lon=-8.61))
+            await db.commit()
+            pros = AsyncProRepository(db, tenant_id=1)
+            before = await pros.search_nearby(38.68, -9.16, radius_km=10)
+            await pros.update_location(11, 38.681, -9.161)
+            after = await pros.search_nearby(38.68, -9.16, radius_km=10)
+            user = await AsyncUserRepository(db, tenant_id=1).get_by_email("pro@x247.pt")
+            other_tenant = await AsyncUserRepository(db, tenant_id=2).get_by_email("pro@x247.pt")
+            return before, after, user, other_tenant, len(await pros.search_pros())
+
+    before, after, user, other_tenant, pro_count = asyncio.run(scenario())
+    assert [u.id for u, _ in before] == [10]
+    assert sorted(u.id for u, _ in after) == [10, 11]
+    assert user.id == 10 and other_tenant is None and pro_count == 2
+    assert pro_repository.radar_aggregator.snapshot(1)["pros_online"] == 1
+
+def test_create_intent_route_uses_the_async_session(session_factory):
+    async def seed():
+        async with session_factory() as db:
+            db.add(Order(id=77, tenant_id=2, client_id=2, amount_cents=1000, category="SOS"))
+            await db.commit()
+    asyncio.run(seed())
+
+    async def override():
+        async with session_factory() as db:
+            yield db
+
+    app = FastAPI()
+    app.include_router(payments_api.router)
+    app.dependency_overrides[get_async_db] = override
+    token = create_access_token({"sub": "1", "tenant_id": 1, "role": "CLIENT"})
+
+    # Pedido de outro tenant: não é encontrado (fallback de demo, sem chamar o Stripe)
+    response = TestClient(app).post(
+        "/payments/create-intent", json={"order_id": 77, "amount": 1000},
+        headers={"Authorization": f"Bearer {token}"},
+    )
+    assert response.status_code == 200
+    assert response.json()["client_secret"] == "pi_test_77_secret_x247"
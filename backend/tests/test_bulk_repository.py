@@ -0,0 +1,117 @@
+import asyncio
+import pytest
+from sqlalchemy import create_engine, func, select
+from sqlalchemy.dialects import postgresql
+from sqlalchemy.ext.asyncio import async_sessionmaker, create_async_engine
+from sqlalchemy.orm import sessionmaker
+from sqlalchemy.pool import StaticPool
+from app.models.database import Base, Order, OrderStatus, Tenant, User, UserRole
+from app.repositories import base as base_module
+from app.repositories.base import bulk_update_statement, chunked_rows, upsert_statement
+from app.repositories.cache import RepositoryCache
+from app.repositories.order_repository import AsyncOrderRepository, OrderRepository
+
+@pytest.fixture
+def db():
+    engine = create_engine("sqlite://", connect_args={"check_same_thread": False}, poolclass=StaticPool)
+    Base.metadata.create_all(engine)
+    session = sessionmaker(bind=engine)()
+    for tenant_id in (1, 2):
+        session.add(Tenant(id=tenant_id, name=f"T{tenant_id}", slug=f"t{tenant_id}"))
+        session.add(User(id=tenant_id, tenant_id=tenant_id, email=f"c{tenant_id}@x247.pt",
+                         password_hash="h", role=UserRole.CLIENT))
+    session.commit()
+    yield session
+    session.close()
+    Base.metadata.drop_all(engine)
+
+def orders(count, client_id=1, **extra):
+    return [{"client_id": client_id, "amount_cents": 100 + i, "category": "canalizacao", **extra} for i in range(count)]
+
+def test_chunks_keep_order_and_split_on_column_changes():
+    rows = [{"a": 1}, {"a": 2}, {"a": 3, "b": 1}, {"a": 4}]
+    assert [len(chunk) for chunk in chunked_rows(rows, 2)] == [2, 1, 1]
+
+def test_bulk_create_forces_tenant_and_returns_ids_in_order(db):
+    ids = OrderRepository(db, 1).bulk_create(orders(2500), chunk_size=1000)
+    assert len(ids) == 2500 and ids == sorted(ids)
+    stored = db.execute(select(Order.tenant_id, func.count(), func.min(Order.created_at)).group_by(Order.tenant_id)).all()
+    assert [(tenant_id, count) for tenant_id, count, _ in stored] == [(1, 2500)]
+    assert stored[0][2] is not None  # defaults Python aplicados por linha
+    assert db.get(Order, ids[-1]).amount_cents == 100 + 2499
+
+def test_bulk_create_is_one_transaction_and_rejects_other_tenants(db):
+    rows = orders(1500) + [{"client_id": 2, "amount_cents": 1, "category": "x", "tenant_id": 2}]
+    with pytest.raises(ValueError):
+        OrderRepository(db, 1).bulk_create(rows, chunk_size=1000)
+    assert db.execute(select(func.count()).select_from(Order)).scalar() == 0
+
+def test_bulk_update_only_touches_the_tenant_rows(db):
+    mine = OrderRepository(db, 1).bulk_create(orders(3))
+    theirs = OrderRepository(db, 2).bulk_create(orders(1, client_id=2))
+    updated = OrderRepository(db, 1).bulk_update(
+        [{"id": order_id, "status": OrderStatus.ASSIGNED, "tenant_id": 2} for order_id in mine + theirs]
+    )
+    db.expire_all()
+    assert updated == 3
+    assert {db.get(Order, i).status for i in mine} == {OrderStatus.ASSIGNED}
+    assert {db.get(Order, i).tenant_id for i in mine} == {1}
+    assert db.get(Order, theirs[0]).status == OrderStatus.PENDING
+
+def test_upsert_many_inserts_updates_and_never_crosses_tenants(db):
+    existing = OrderRepository(db, 1).bulk_create(orders(2))
+    foreign = OrderRepository(db, 2).bulk_create(orders(1, client_id=2))
+    rows = [
+        {"id": existing[0], "client_id": 1, "amount_cents": 999, "category": "canalizacao"},
+        {"id": foreign[0], "client_id": 1, "amount_cents": 999, "category": "canalizacao"},
+        {"id": 500, "client_id": 1, "amount_cents": 5, "category": "eletricidade"},
+    ]
+    touched = OrderRepository(db, 1).upsert_many(rows)
+    db.expire_all()
+    assert sorted(touched) == sorted([existing[0], 500])
+    assert db.get(Order, existing[0]).amount_cents == 999
+    assert db.get(Order, foreign[0]).amount_cents == 100 and db.get(Order, foreign[0]).tenant_id == 2
+    assert db.get(Order, 500).tenant_id == 1
+
+def test_bulk_writes_invalidate_the_repository_cache(db, monkeypatch):
+    cache = RepositoryCache()
+    cache.enable(Order.__tablename__, ttl_seconds=30)
+    monkeypatch.setattr(base_module, "repository_cache", cache)
+    repo = OrderRepository(db, 1)
+    assert repo.list_by_client(1) == []
+    repo.bulk_create(orders(2))
+    assert len(repo.list_by_client(1)) == 2
+
+def test_postgres_statements_are_single_round_trip_per_chunk():
+    dialect = postgresql.dialect()
+    rows = [{"id": 1, "status": OrderStatus.PAID}, {"id": 2, "status": OrderStatus.PAID}]
+    stmt, params = bulk_update_statement("postgresql", Order, rows, tenant_id=1)
+    sql = str(stmt.compile(dialect=dialect))
+    assert params is None
+    assert "FROM (VALUES" in sql and "CAST(data.status AS orderstatus)" in sql and "orders.tenant_id =" in sql
+    upsert = str(upsert_statement("postgresql", Order, ["id", "tenant_id", "amount_cents"], ["id"], 1)
+                 .compile(dialect=dialect))
+    assert "ON CONFLICT (id) DO UPDATE SET amount_cents = excluded.amount_cents WHERE orders.tenant_id =" in upsert
+    assert upsert.endswith("RETURNING orders.id")
+
+def test_async_bulk_create_and_update():
+    engine = create_async_engine("sqlite+aiosqlite://", poolclass=StaticPool)
+
+    async def scenario():
+        async with engine.begin() as conn:
+            await conn.run_sync(Base.metadata.create_all)
+        async with async_sessionmaker(engine, expire_on_commit=False)() as db:
+            db.add(Tenant(id=1, name="T1", slug="t1"))
+            db.add(User(id=1, tenant_id=1, email="c@x247.pt", password_hash="h", role=UserRole.CLIENT))
+            await db.commit()
+            repo = AsyncOrderRepository(db, 1)
+            ids = await repo.bulk_create(orders(1200))
+            updated = await repo.bulk_update([{"id": i, "amount_cents": 1} for i in ids[:10]])
+            upserted = await repo.upsert_many([{"id": ids[0], "client_id": 1, "amount_cents": 7, "category": "x"}])
+            total = (await db.execute(select(func.sum(Order.amount_cents)))).scalar()
+        await engine.dispose()
+        return ids, updated, upserted, total
+
+    ids, updated, upserted, total = asyncio.run(scenario())
+    assert len(ids) == 1200 and updated == 10 and upserted == [ids[0]]
+    assert total == sum(100 + i for i in range(10, 1200)) + 9 + 7
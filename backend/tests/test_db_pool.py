@@ -0,0 +1,60 @@
+import pytest
+from sqlalchemy import create_engine, exc, text
+from sqlalchemy.pool import QueuePool
+from app.db.pool import PoolMetrics, PoolSettings, attach_pool_metrics, engine_options, instrumented_pool_class
+
+@pytest.fixture
+def instrumented(tmp_path):
+    metrics = PoolMetrics()
+    engine = create_engine(
+        f"sqlite:///{tmp_path / 'pool.db'}",
+        poolclass=instrumented_pool_class(QueuePool, metrics),
+        pool_size=1, max_overflow=1, pool_timeout=0.05,
+    )
+    attach_pool_metrics(engine, metrics)
+    yield engine, metrics
+    engine.dispose()
+
+def test_settings_come_from_env(monkeypatch):
+    monkeypatch.setenv("DB_POOL_SIZE", "25")
+    monkeypatch.setenv("DB_MAX_OVERFLOW", "5")
+    monkeypatch.setenv("DB_POOL_RECYCLE", "300")
+    monkeypatch.setenv("DB_PGBOUNCER", "true")
+    settings = PoolSettings.from_env()
+    assert (settings.size, settings.max_overflow, settings.recycle_seconds, settings.pgbouncer) == (25, 5, 300, True)
+
+def test_engine_options_are_optimistic_and_pgbouncer_safe():
+    settings, metrics = PoolSettings(size=7, pgbouncer=True), PoolMetrics()
+    sync = engine_options("postgresql://u:p@db/x", settings, metrics)
+    assert sync["pool_size"] == 7 and "pool_pre_ping" not in sync
+    assert "connect_args" not in sync  # psycopg2 não usa prepared statements no servidor
+    async_opts = engine_options("postgresql+asyncpg://u:p@db/x", settings, metrics, is_async=True)
+    assert async_opts["connect_args"]["statement_cache_size"] == 0
+    assert async_opts["connect_args"]["prepared_statement_cache_size"] == 0
+    assert "connect_args" not in engine_options("postgresql+asyncpg://u:p@db/x", PoolSettings(), metrics, is_async=True)
+    assert engine_options("sqlite:///./test.db", settings, metrics) == {}
+
+def test_checkout_wait_overflow_and_timeouts_are_recorded(instrumented):
+    engine, metrics = instrumented
+    first, second = engine.connect(), engine.connect()  # a segunda já é overflow
+    with pytest.raises(exc.TimeoutError):
+        engine.connect()
+    first.close()
+    second.close()
+    stats = metrics.snapshot()
+    assert stats["checkouts"] == 2 and stats["overflow_checkouts"] == 1 and stats["overflow_peak"] == 1
+    assert stats["timeouts"] == 1 and stats["wait_ms_max"] >= 0
+    assert stats["size"] == 1 and stats["checked_out"] == 0
+
+def test_disconnect_invalidates_and_next_checkout_recovers(instrumented):
+    engine, metrics = instrumented
+    with engine.connect() as conn:
+        conn.connection.dbapi_connection.close()  # servidor fechou a ligação
+        with pytest.raises(exc.DBAPIError) as err:
+            conn.execute(text("SELECT 1"))
+        assert err.value.connection_invalidated
+    with engine.connect() as conn:
+        assert conn.execute(text("SELECT 1")).scalar() == 1
+    stats = metrics.snapshot()
+    assert stats["disconnects"] == 1 and stats["invalidations"] == 1 and stats["connects"] == 2
+    assert type(engine.pool.recreate()).__name__ == "InstrumentedQueuePool"
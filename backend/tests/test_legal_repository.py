@@ -0,0 +1,30 @@
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime
+from app.domain.legal.models import LegalDocument, LegalDocumentType
+from app.domain.legal.repository import LegalRepository
+
+THREADS = 32
+
+def _doc(doc_id: str, version: str) -> LegalDocument:
+    return LegalDocument(
+        id=doc_id, type=LegalDocumentType.TERMS_CLIENT, version=version,
+        title="Termos", content="...", effective_from=datetime(2026, 1, 1),
+    )
+
+def test_publish_keeps_single_active_version_under_contention():
+    repo = LegalRepository()
+    barrier = threading.Barrier(THREADS)
+
+    def worker(t):
+        barrier.wait()
+        for i in range(50):
+            repo.publish(_doc(f"terms-{t}-{i}", f"{t}.{i}"))
+            repo.list_active()
+
+    with ThreadPoolExecutor(max_workers=THREADS) as pool:
+        list(pool.map(worker, range(THREADS)))
+
+    active = [d for d in repo.list_active() if d.type == LegalDocumentType.TERMS_CLIENT]
+    assert len(active) == 1
+    assert len(repo._docs) == THREADS * 50
@@ -0,0 +1,118 @@
+import asyncio
+from datetime import datetime, timedelta
+import pytest
+from sqlalchemy import create_engine
+from sqlalchemy.ext.asyncio import async_sessionmaker, create_async_engine
+from sqlalchemy.orm import sessionmaker
+from sqlalchemy.pool import StaticPool
+from app.models.database import Base, Order, OrderStatus, Tenant, User, UserRole
+from app.repositories.order_repository import (
+    AsyncOrderRepository, OrderRepository, OrderSummary, order_page_params, order_page_query,
+)
+
+STATUSES = [OrderStatus.PENDING, OrderStatus.PAID, OrderStatus.ASSIGNED, OrderStatus.COMPLETED]
+T0 = datetime(2026, 10, 1, 12, 0, 0)
+
+def seed_rows(tenant_id, count=60):
+    # Pares com o mesmo created_at: o id tem de desempatar
+    return [
+        {"tenant_id": tenant_id, "client_id": tenant_id, "pro_id": 10 + tenant_id, "amount_cents": i,
+         "category": "canalizacao", "status": STATUSES[i % len(STATUSES)], "created_at": T0 + timedelta(minutes=i // 2)}
+        for i in range(count)
+    ]
+
+@pytest.fixture
+def db():
+    engine = create_engine("sqlite://", connect_args={"check_same_thread": False}, poolclass=StaticPool)
+    Base.metadata.create_all(engine)
+    session = sessionmaker(bind=engine)()
+    for tenant_id in (1, 2):
+        session.add(Tenant(id=tenant_id, name=f"T{tenant_id}", slug=f"t{tenant_id}"))
+        session.add(User(id=tenant_id, tenant_id=tenant_id, email=f"c{tenant_id}@x247.pt", password_hash="h", role=UserRole.CLIENT))
+        session.add(User(id=10 + tenant_id, tenant_id=tenant_id, email=f"p{tenant_id}@x247.pt", password_hash="h", role=UserRole.PRO))
+    session.commit()
+    for tenant_id in (1, 2):
+        OrderRepository(session, tenant_id).bulk_create(seed_rows(tenant_id))
+    yield session
+    session.close()
+    Base.metadata.drop_all(engine)
+
+def expected(db, tenant_id, statuses=None):
+    orders = [o for o in db.query(Order).filter(Order.tenant_id == tenant_id) if statuses is None or o.status in statuses]
+    return [o.id for o in sorted(orders, key=lambda o: (o.created_at, o.id), reverse=True)]
+
+def walk(fetch, limit):
+    seen, after = [], None
+    while True:
+        page = fetch(limit=limit, after=after)
+        seen.extend(item.id for item in page)
+        if len(page) < limit:
+            return seen
+        after = page[-1].cursor
+
+def test_keyset_walk_covers_every_order_once_in_order(db):
+    repo = OrderRepository(db, 1)
+    assert walk(lambda **kw: repo.page_by_client(1, **kw), limit=7) == expected(db, 1)
+    assert walk(lambda **kw: repo.page_by_pro(11, **kw), limit=9) == expected(db, 1)
+
+def test_status_filters(db):
+    repo = OrderRepository(db, 1)
+    wanted = [OrderStatus.PAID, OrderStatus.ASSIGNED]
+    assert walk(lambda **kw: repo.page_by_client(1, statuses=wanted, **kw), limit=4) == expected(db, 1, wanted)
+    single = repo.page_by_client(1, limit=100, statuses=[OrderStatus.COMPLETED])
+    assert {o.status for o in single} == {OrderStatus.COMPLETED} and len(single) == 15
+
+def test_projections(db):
+    repo = OrderRepository(db, 1)
+    summary = repo.page_by_client(1, limit=2)
+    rows = repo.page_by_client(1, limit=2, projection="row")
+    entities = repo.page_by_client(1, limit=2, projection="entity")
+    assert all(isinstance(item, OrderSummary) for item in summary)
+    assert isinstance(summary[0].created_at, datetime) and isinstance(summary[0].status, OrderStatus)
+    assert [row[0] for row in rows] == [o.id for o in summary] == [o.id for o in entities]
+    assert all(isinstance(o, Order) for o in entities) and entities[0] in db
+
+def test_pages_never_cross_tenants(db):
+    assert OrderRepository(db, 2).page_by_client(1, limit=100) == []
+    assert set(o.id for o in OrderRepository(db, 2).page_by_client(2, limit=100)).isdisjoint(expected(db, 1))
+
+def test_each_status_branch_is_an_ordered_index_range_scan(db):
+    query, params = order_page_params("client_id", 1, 1, 20, (T0, 10), [OrderStatus.PAID], "summary")
+    compiled = query.compile(dialect=db.get_bind().dialect)
+    values = {**compiled.params, **params}
+    plan = " ".join(str(row) for row in db.connection().exec_driver_sql(
+        f"EXPLAIN QUERY PLAN {compiled}", tuple(values[name] for name in compiled.positiontup)
+    ))
+    assert "idx_orders_tenant_client_status_date" in plan
+    assert "TEMP B-TREE" not in plan  # sem sort: a ordem vem do índice
+
+def test_statement_shapes_are_built_once():
+    first, _ = order_page_params("pro_id", 1, 11, 50, None, None, "row")
+    again, params = order_page_params("pro_id", 2, 12, 10, None, list(OrderStatus), "row")
+    assert first is again and params == {"tenant_id": 2, "owner_id": 12, "limit": 10}
+    assert order_page_query.cache_info().hits >= 1
+
+def test_async_pages_match_sync(db):
+    engine = create_async_engine("sqlite+aiosqlite://", poolclass=StaticPool)
+    rows = seed_rows(1, count=20)
+
+    async def scenario():
+        async with engine.begin() as conn:
+            await conn.run_sync(Base.metadata.create_all)
+        async with async_sessionmaker(engine, expire_on_commit=False)() as session:
+            session.add(Tenant(id=1, name="T1", slug="t1"))
+            session.add(User(id=1, tenant_id=1, email="c@x247.pt", password_hash="h", role=UserRole.CLIENT))
+            session.add(User(id=11, tenant_id=1, email="p@x247.pt", password_hash="h", role=UserRole.PRO))
+            await session.commit()
+            repo = AsyncOrderRepository(session, 1)
+            await repo.bulk_create(rows)
+            first = await repo.page_by_client(1, limit=5)
+            second = await repo.page_by_client(1, limit=5, after=first[-1].cursor, statuses=STATUSES)
+            pro = await repo.page_by_pro(11, limit=3, projection="row")
+        await engine.dispose()
+        return first, second, pro
+
+    first, second, pro = asyncio.run(scenario())
+    ids = [o.id for o in first + second]
+    assert ids == sorted(ids, reverse=True) and len(set(ids)) == 10
+    assert [row[0] for row in pro] == ids[:3]
@@ -0,0 +1,48 @@
+from fastapi import FastAPI
+from fastapi.testclient import TestClient
+from sqlalchemy import create_engine
+from sqlalchemy.orm import sessionmaker
+from sqlalchemy.pool import StaticPool
+from app.api.v1 import pros as pros_api
+from app.core.security import create_access_token
+from app.db.session import get_db
+from app.models.database import Base, Tenant, User, UserRole
+from app.realtime.radar_aggregator import RadarAggregator
+from app.repositories import pro_repository
+
+def _auth(user_id, role, tenant_id=1):
+    token = create_access_token({"sub": str(user_id), "tenant_id": tenant_id, "role": role})
+    return {"Authorization": f"Bearer {token}"}
+
+def test_location_ping_feeds_geo_search_and_radar(monkeypatch):
+    engine = create_engine("sqlite://", connect_args={"check_same_thread": False}, poolclass=StaticPool)
+    Base.metadata.create_all(bind=engine)
+    Session = sessionmaker(bind=engine)
+    with Session() as db:
+        db.add(Tenant(id=1, name="T1", slug="t1"))
+        db.add(User(id=10, tenant_id=1, email="canalizador@x247.pt", password_hash="h", role=UserRole.PRO))
+        db.add(User(id=11, tenant_id=1, email="eletricista@x247.pt", password_hash="h", role=UserRole.PRO))
+        db.add(User(id=20, tenant_id=1, email="cliente@x247.pt", password_hash="h", role=UserRole.CLIENT))
+        db.commit()
+
+    def override():
+        with Session() as db:
+            yield db
+
+    aggregator = RadarAggregator()
+    monkeypatch.setattr(pro_repository, "_PRO_GEO_INDEXES", {})
+    monkeypatch.setattr(pro_repository, "radar_aggregator", aggregator)
+    app = FastAPI()
+    app.include_router(pros_api.router)
+    app.dependency_overrides[get_db] = override
+    client = TestClient(app)
+
+    for pro_id in (10, 11):
+        resp = client.put("/pros/me/location", json={"lat": 38.68, "lon": -9.16}, headers=_auth(pro_id, "PRO"))
+        assert resp.status_code == 204
+    assert client.put("/pros/me/location", json={"lat": 38.68, "lon": -9.16},
+                      headers=_auth(20, "CLIENT")).status_code == 403
+    assert aggregator.snapshot(1)["pros_online"] == 2
+
+    found = client.get("/pros/search", params={"lat": 38.68, "lon": -9.16, "q": "eletri"}, headers=_auth(20, "CLIENT"))
+    assert [p["id"] for p in found.json()] == ["11"]
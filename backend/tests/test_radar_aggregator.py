@@ -0,0 +1,112 @@
+import pytest
+from sqlalchemy import create_engine
+from sqlalchemy.orm import sessionmaker
+from sqlalchemy.pool import StaticPool
+from app.models.database import Base, Order, OrderStatus, Tenant, User, UserRole
+from app.realtime.radar_aggregator import RadarAggregator
+from app.repositories import order_repository
+
+@pytest.fixture
+def db():
+    engine = create_engine("sqlite://", connect_args={"check_same_thread": False}, poolclass=StaticPool)
+    Base.metadata.create_all(bind=engine)
+    session = sessionmaker(bind=engine)()
+    for tenant_id in (1, 2):
+        session.add(Tenant(id=tenant_id, name=f"T{tenant_id}", slug=f"t{tenant_id}"))
+        session.add(User(id=tenant_id, tenant_id=tenant_id, email="c@x247.pt", password_hash="h", role=UserRole.CLIENT))
+    session.commit()
+    yield session
+    session.close()
+    Base.metadata.drop_all(bind=engine)
+
+def test_events_update_snapshot_idempotently():
+    agg = RadarAggregator()
+    agg.order_changed(1, 10, "SOS", OrderStatus.PENDING)
+    agg.order_changed(1, 10, "SOS", OrderStatus.PAID)  # repetido: continua a contar 1
+    agg.order_changed(1, 11, "sos", OrderStatus.ASSIGNED)
+    agg.order_changed(1, 12, "canalizacao", OrderStatus.PENDING)
+    agg.order_changed(2, 20, "SOS", OrderStatus.PENDING)
+    agg.pro_seen(1, 100)
+    agg.pro_seen(1, 101)
+    agg.pro_seen(1, 101, online=False)
+
+    assert agg.snapshot(1) == {"pros_online": 1, "sos_active": 2, "eta_avg": "--", "system_load": "HIGH"}
+    agg.order_changed(1, 10, "SOS", OrderStatus.COMPLETED)
+    assert agg.snapshot(1)["sos_active"] == 1 and agg.snapshot(1)["system_load"] == "HIGH"
+    assert agg.snapshot(2)["sos_active"] == 1
+    assert agg.snapshot(99) == {"pros_online": 0, "sos_active": 0, "eta_avg": "--", "system_load": "LOW"}
+
+def test_eta_is_a_rolling_average_over_the_window():
+    agg = RadarAggregator(eta_window=3)
+    for order_id, eta in enumerate([10.0, 2.0, 4.0, 6.0]):
+        agg.order_changed(1, order_id, "SOS", OrderStatus.ASSIGNED, eta_minutes=eta)
+    assert agg.snapshot(1)["eta_avg"] == "4.0 min"
+
+def test_recompute_corrects_drift_and_expires_presence(db):
+    db.add_all([
+        Order(id=1, tenant_id=1, client_id=1, amount_cents=100, category="SOS"),
+        Order(id=2, tenant_id=1, client_id=1, amount_cents=100, category="SOS", status=OrderStatus.COMPLETED),
+        Order(id=3, tenant_id=2, client_id=2, amount_cents=100, category="SOS", status=OrderStatus.ASSIGNED),
+        Order(id=4, tenant_id=2, client_id=2, amount_cents=100, category="eletricidade"),
+    ])
+    db.commit()
+    agg = RadarAggregator(presence_ttl_seconds=0)
+    agg.order_changed(1, 2, "SOS", OrderStatus.PENDING)  # evento de conclusão perdido
+    agg.pro_seen(1, 100)
+
+    assert agg.recompute(db) == 3  # +1 e +3 em falta, -2 obsoleto
+    assert agg.snapshot(1)["sos_active"] == 1 and agg.snapshot(2)["sos_active"] == 1
+    assert agg.snapshot(1)["pros_online"] == 0
+    assert agg.recompute(db) == 0
+
+def test_events_during_recompute_are_not_lost(db):
+    db.add(Order(id=1, tenant_id=1, client_id=1, amount_cents=100, category="SOS"))
+    db.commit()
+    agg = RadarAggregator()
+
+    class RacingSession:
+        """Um pedido novo e um concluído chegam enquanto a query corre."""
+        def execute(self, stmt):
+            rows = db.execute(stmt).all()
+            agg.order_changed(1, 5, "SOS", OrderStatus.PENDING)
+            agg.order_changed(1, 1, "SOS", OrderStatus.CANCELLED)
+            return rows
+
+    agg.recompute(RacingSession())
+    assert agg._tenants[1].active_sos == {5}
+
+def test_order_repository_feeds_the_aggregator(db, monkeypatch):
+    agg = RadarAggregator()
+    monkeypatch.setattr(order_repository, "radar_aggregator", agg)
+    repo = order_repository.OrderRepository(db, tenant_id=1)
+
+    order = repo.create(client_id=1, amount_cents=5000, category="SOS")
+    repo.create(client_id=1, amount_cents=5000, category="canalizacao")
+    assert agg.snapshot(1)["sos_active"] == 1
+
+    repo.update_status(order.id, OrderStatus.ASSIGNED)
+    assert agg.snapshot(1)["eta_avg"].endswith(" min")
+    repo.update_status(order.id, OrderStatus.COMPLETED)
+    assert agg.snapshot(1)["sos_active"] == 0
+
+def test_pro_login_and_logout_feed_presence(db, monkeypatch):
+    from fastapi import FastAPI
+    from fastapi.testclient import TestClient
+    from app.api.v1 import auth as auth_api
+    from app.db.session import get_db
+
+    agg = RadarAggregator()
+    monkeypatch.setattr(auth_api, "radar_aggregator", agg)
+    # Sem bcrypt no teste: a verificação de password não é o que está em causa
+    monkeypatch.setattr(auth_api, "verify_password", lambda plain, hashed: plain == hashed)
+    db.add(User(id=50, tenant_id=1, email="pro@x247.pt", password_hash="segredo", role=UserRole.PRO))
+    db.commit()
+    app = FastAPI()
+    app.include_router(auth_api.router)
+    app.dependency_overrides[get_db] = lambda: db
+    client = TestClient(app)
+
+    token = client.post("/auth/login", json={"email": "pro@x247.pt", "password": "segredo"}).json()["access_token"]
+    assert agg.snapshot(1)["pros_online"] == 1
+    assert client.post("/auth/logout", headers={"Authorization": f"Bearer {token}"}).status_code == 200
+    assert agg.snapshot(1)["pros_online"] == 0
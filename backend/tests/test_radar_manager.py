@@ -0,0 +1,120 @@
+import asyncio
+import pytest
+from fastapi import FastAPI
+from fastapi.testclient import TestClient
+from starlette.websockets import WebSocketDisconnect
+from sqlalchemy import create_engine
+from sqlalchemy.orm import sessionmaker
+from sqlalchemy.pool import StaticPool
+from app.api.v1 import realtime as realtime_api
+from app.core.security import create_access_token
+from app.models.database import Base
+from app.realtime.radar import RadarManager
+from app.realtime.radar_aggregator import RadarAggregator
+
+class FakeSocket:
+    """Socket mínimo: regista os frames recebidos; pode falhar ou encravar."""
+
+    def __init__(self, fail=False, stall=False):
+        self.frames = []
+        self.fail = fail
+        self.stall = stall
+        self.closed = False
+
+    async def accept(self):
+        pass
+
+    async def send_text(self, frame):
+        if self.fail:
+            raise RuntimeError("socket fechado")
+        if self.stall:
+            await asyncio.sleep(60)
+        self.frames.append(frame)
+
+    async def close(self, code=1000):
+        self.closed = True
+
+def test_tick_computes_once_per_tenant_and_shares_the_frame():
+    calls = []
+
+    def source(tenant_id):
+        calls.append(tenant_id)
+        return {"pros_online": tenant_id}
+
+    async def scenario():
+        manager = RadarManager(source=source, interval_seconds=60)
+        sockets = {1: [FakeSocket() for _ in range(3)], 2: [FakeSocket() for _ in range(2)]}
+        for tenant_id, group in sockets.items():
+            for ws in group:
+                await manager.connect(ws, tenant_id)
+        manager._ticker.cancel()
+        await manager.tick()
+        return sockets
+
+    sockets = asyncio.run(scenario())
+    assert sorted(calls) == [1, 2]
+    frames = [ws.frames[-1] for ws in sockets[1]]
+    assert all(f is frames[0] for f in frames)
+    assert '"pros_online": 2' in sockets[2][0].frames[-1]
+
+def test_dead_and_stalled_sockets_are_pruned_without_blocking_others():
+    async def scenario():
+        manager = RadarManager(interval_seconds=60, send_timeout=0.05)
+        ok, dead, stalled = FakeSocket(), FakeSocket(fail=True), FakeSocket(stall=True)
+        for ws in (ok, dead, stalled):
+            await manager.connect(ws, 7)
+        manager._ticker.cancel()
+        started = asyncio.get_running_loop().time()
+        sent = await manager.broadcast(7, {"type": "RADAR_SYNC"})
+        elapsed = asyncio.get_running_loop().time() - started
+        await asyncio.sleep(0.1)
+        return manager, sent, elapsed, ok, dead, stalled
+
+    manager, sent, elapsed, ok, dead, stalled = asyncio.run(scenario())
+    assert sent == 1 and elapsed < 0.5
+    assert manager.connection_count(7) == 1 and manager.pruned == 2
+    assert dead.closed and stalled.closed and not ok.closed
+
+def test_late_joiner_gets_last_frame_and_other_tenants_are_isolated():
+    async def scenario():
+        manager = RadarManager(interval_seconds=60)
+        first, other = FakeSocket(), FakeSocket()
+        await manager.connect(first, 1)
+        await manager.connect(other, 2)
+        manager._ticker.cancel()
+        await manager.broadcast(1, {"type": "RADAR_SYNC", "payload": {"sos_active": 9}})
+        late = FakeSocket()
+        await manager.connect(late, 1)
+        return first, other, late
+
+    first, other, late = asyncio.run(scenario())
+    assert late.frames == [first.frames[-1]]
+    assert not any("sos_active" in f for f in other.frames)
+
+def test_radar_socket_endpoint_streams_and_cleans_up(monkeypatch):
+    manager = RadarManager(source=lambda tenant_id: {"tenant": tenant_id}, interval_seconds=0.01)
+    monkeypatch.setattr(realtime_api, "radar_manager", manager)
+    engine = create_engine("sqlite://", connect_args={"check_same_thread": False}, poolclass=StaticPool)
+    Base.metadata.create_all(bind=engine)
+    aggregator = RadarAggregator()
+    monkeypatch.setattr(realtime_api, "radar_aggregator", aggregator)
+    monkeypatch.setattr(realtime_api, "SessionLocal", sessionmaker(bind=engine))
+    app = FastAPI()
+    app.include_router(realtime_api.router)
+
+    client = TestClient(app)
+    token = create_access_token({"sub": "1", "tenant_id": 3, "role": "CLIENT"})
+
+    with client.websocket_connect(f"/realtime/sos-radar/3?token={token}") as ws:
+        message = ws.receive_json()
+        assert message == {"type": "RADAR_SYNC", "payload": {"tenant": 3}}
+    assert manager.connection_count() == 0
+    assert aggregator._thread is not None
+
+    # Sem token, token inválido ou tenant de outro token: ligação recusada
+    for path in ("/realtime/sos-radar/3", "/realtime/sos-radar/3?token=lixo", f"/realtime/sos-radar/4?token={token}"):
+        with pytest.raises(WebSocketDisconnect) as refused:
+            with client.websocket_connect(path) as ws:
+                ws.receive_json()
+        assert refused.value.code == 1008
+    assert manager.connection_count() == 0
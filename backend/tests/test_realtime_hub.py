@@ -0,0 +1,122 @@
+import asyncio
+import pytest
+from fastapi import FastAPI
+from fastapi.testclient import TestClient
+from sqlalchemy import create_engine
+from sqlalchemy.orm import sessionmaker
+from sqlalchemy.pool import StaticPool
+from app.api.v1 import realtime as realtime_api
+from app.core.security import create_access_token, get_current_user_claims
+from app.models.database import Base, Order, Tenant, User, UserRole
+from app.payments.webhook_queue import process_payment_batch
+from app.realtime.hub import TenantBroadcastHub, sse_frames
+
+def _auth(tenant_id=1):
+    token = create_access_token({"sub": "1", "tenant_id": tenant_id, "role": "CLIENT"})
+    return {"Authorization": f"Bearer {token}"}
+
+def test_publish_fans_out_only_to_the_tenant():
+    async def scenario():
+        hub = TenantBroadcastHub()
+        a1, a2, b = hub.subscribe(1), hub.subscribe(1), hub.subscribe(2)
+        hub.publish(1, "ORDER_UPDATE", {"id": 7})
+        return [c.queue.qsize() for c in (a1, a2, b)], a1.queue.get_nowait(), a2.queue.get_nowait()
+
+    sizes, frame_a1, frame_a2 = asyncio.run(scenario())
+    assert sizes == [1, 1, 0]
+    # Serializado uma única vez e partilhado por todos os clientes do tenant
+    assert frame_a1 is frame_a2
+    assert frame_a1.startswith("id: 1\ndata: ") and '"ORDER_UPDATE"' in frame_a1
+
+def test_slow_consumer_is_evicted_without_affecting_others():
+    async def scenario():
+        hub = TenantBroadcastHub(max_queue=2)
+        slow, fast = hub.subscribe(1), hub.subscribe(1)
+        for i in range(3):
+            hub.publish(1, "ORDER_UPDATE", {"id": i})
+            fast.queue.get_nowait()
+        return hub, slow, fast
+
+    hub, slow, fast = asyncio.run(scenario())
+    assert slow.evicted and not fast.evicted
+    assert hub.stats() == {"published": 3, "delivered": 5, "evicted": 1, "tenants": 1, "connections": 1}
+
+def test_stream_replays_after_last_event_id_then_goes_live():
+    async def scenario():
+        hub = TenantBroadcastHub(replay_size=3)
+        for i in range(1, 6):
+            hub.publish(1, "ORDER_UPDATE", {"id": i})
+        stream = sse_frames(hub, 1, last_event_id=3)
+        frames = [await stream.__anext__(), await stream.__anext__()]
+        hub.publish(1, "ORDER_UPDATE", {"id": 6})
+        frames.append(await stream.__anext__())
+        await stream.aclose()
+        return hub, frames
+
+    hub, frames = asyncio.run(scenario())
+    assert [f.split("\n")[0] for f in frames] == ["id: 4", "id: 5", "id: 6"]
+    assert hub.stats()["connections"] == 0
+
+def test_evicted_stream_ends_and_can_resume():
+    async def scenario():
+        hub = TenantBroadcastHub(max_queue=1)
+        stream = sse_frames(hub, 1)
+        task = asyncio.ensure_future(stream.__anext__())
+        await asyncio.sleep(0)
+        hub.publish(1, "A", {})
+        hub.publish(1, "B", {})  # fila cheia: cliente expulso
+        assert (await task).startswith("id: 1\n")
+        with pytest.raises(StopAsyncIteration):
+            await stream.__anext__()
+        resumed = sse_frames(hub, 1, last_event_id=1)
+        return await resumed.__anext__()
+
+    assert asyncio.run(scenario()).startswith("id: 2\n")
+
+def test_sse_endpoint_resumes_from_last_event_id_header(monkeypatch):
+    hub = TenantBroadcastHub()
+    monkeypatch.setattr(realtime_api, "realtime_hub", hub)
+    for i in range(1, 4):
+        hub.publish(1, "ORDER_UPDATE", {"id": i})
+    hub.publish(2, "ORDER_UPDATE", {"id": 99})
+
+    app = FastAPI()
+    app.include_router(realtime_api.router)
+    client = TestClient(app)
+
+    assert client.get("/realtime/stream").status_code == 401
+
+    # O TestClient só devolve a resposta quando o corpo termina: o stream (infinito) é lido diretamente
+    async def scenario():
+        claims = get_current_user_claims(_auth(tenant_id=1)["Authorization"].split()[1])
+        response = await realtime_api.stream_events(None, claims, last_event_id="1")
+        body = response.body_iterator
+        frames = [await body.__anext__(), await body.__anext__()]
+        await body.aclose()
+        return response, frames
+
+    response, frames = asyncio.run(scenario())
+    assert response.media_type == "text/event-stream"
+    assert [f.split("\n")[0] for f in frames] == ["id: 2", "id: 3"]
+    assert '"id": 99' not in "".join(frames)
+
+def test_paid_orders_are_reported_to_the_listener():
+    engine = create_engine("sqlite://", connect_args={"check_same_thread": False}, poolclass=StaticPool)
+    Base.metadata.create_all(bind=engine)
+    db = sessionmaker(bind=engine)()
+    db.add(Tenant(id=1, name="Tenant Test", slug="test-tenant"))
+    db.add(User(id=1, tenant_id=1, email="c@x247.pt", password_hash="h", role=UserRole.CLIENT))
+    db.add(Order(id=5, tenant_id=1, client_id=1, amount_cents=1000, category="canalizacao"))
+    db.commit()
+    event = {
+        "id": "evt_rt", "type": "payment_intent.succeeded",
+        "data": {"object": {"amount": 1000, "metadata": {"order_id": "5"}}},
+    }
+    seen = []
+
+    process_payment_batch(db, [event], on_paid=seen.extend)
+    process_payment_batch(db, [event], on_paid=seen.extend)
+
+    assert seen == [(5, 1, 1)]
+    db.close()
+    Base.metadata.drop_all(bind=engine)
@@ -5,6 +5,9 @@ from sqlalchemy.orm import sessionmaker
 from app.models.database import Base, Tenant, User, UserRole
 from app.repositories.user_repository import UserRepository
 from app.repositories.bonito_pack_repository import BonitoPackRepository
+from app.repositories import pro_repository
+from app.repositories.pro_repository import ProRepository
+from app.realtime.radar_aggregator import RadarAggregator
 
 # Setup DB Test (SQLite in memory)
 SQLALCHEMY_DATABASE_URL = "sqlite:///./test.db"
@@ -42,3 +45,31 @@ def test_bonito_pack_repository_structure(db):
     repo = BonitoPackRepository(db, tenant_id=1)
     assert hasattr(repo, 'list_all')
     assert hasattr(repo, 'session') or hasattr(repo, 'db')
+
+def test_pro_nearby_search_filters_and_refresh(db, monkeypatch):
+    monkeypatch.setattr(pro_repository, "_PRO_GEO_INDEXES", {})
+    monkeypatch.setattr(pro_repository, "radar_aggregator", RadarAggregator())
+    db.add_all([
+        User(id=10, tenant_id=1, email="canalizador@x247.pt", password_hash="h", role=UserRole.PRO, lat=38.68, lon=-9.16),
+        User(id=11, tenant_id=1, email="eletricista@x247.pt", password_hash="h", role=UserRole.PRO, lat=38.681, lon=-9.161),
+        User(id=12, tenant_id=1, email="cliente@x247.pt", password_hash="h", role=UserRole.CLIENT, lat=38.68, lon=-9.16),
+    ])
+    db.commit()
+    repo = ProRepository(db, tenant_id=1)
+
+    assert sorted(u.id for u, _ in repo.search_nearby(38.68, -9.16)) == [10, 11]
+    assert [u.id for u, _ in repo.search_nearby(38.68, -9.16, q="eletri")] == [11]
+
+    # Desativado: nunca devolvido, mesmo ainda no índice
+    db.get(User, 11).is_active = False
+    db.commit()
+    assert [u.id for u, _ in repo.search_nearby(38.68, -9.16)] == [10]
+    repo.update_location(11, 38.68, -9.16)
+    assert pro_repository.radar_aggregator.snapshot(1)["pros_online"] == 0
+
+    # Índice expirado: reconstruído a partir do DB
+    db.add(User(id=13, tenant_id=1, email="novo@x247.pt", password_hash="h", role=UserRole.PRO, lat=38.68, lon=-9.16))
+    db.commit()
+    assert sorted(u.id for u, _ in repo.search_nearby(38.68, -9.16)) == [10]
+    pro_repository.invalidate_geo_index(1)
+    assert sorted(u.id for u, _ in repo.search_nearby(38.68, -9.16)) == [10, 13]
@@ -0,0 +1,185 @@
+import asyncio
+import pytest
+from sqlalchemy import create_engine, event
+from sqlalchemy.ext.asyncio import async_sessionmaker, create_async_engine
+from sqlalchemy.orm import sessionmaker
+from sqlalchemy.pool import StaticPool
+from app.models.database import Base, Order, OrderStatus, Tenant, User, UserRole
+from app.repositories import base as base_module, order_repository
+from app.repositories.cache import RepositoryCache
+from app.repositories.order_repository import AsyncOrderRepository, OrderRepository
+from app.realtime.radar_aggregator import RadarAggregator
+
+TABLE = Order.__tablename__
+
+class FakeRedis:
+    """Cliente Redis mínimo em memória (get/set/incr), partilhável entre 'workers'."""
+
+    def __init__(self):
+        self.data = {}
+
+    def get(self, key):
+        return self.data.get(key)
+
+    def set(self, key, value, ex=None):
+        self.data[key] = value
+
+    def incr(self, key):
+        self.data[key] = int(self.data.get(key, 0)) + 1
+        return self.data[key]
+
+class Clock:
+    def __init__(self):
+        self.now = 1000.0
+
+    def __call__(self):
+        return self.now
+
+@pytest.fixture(autouse=True)
+def quiet_radar(monkeypatch):
+    monkeypatch.setattr(order_repository, "radar_aggregator", RadarAggregator())
+
+@pytest.fixture
+def engine():
+    engine = create_engine("sqlite://", connect_args={"check_same_thread": False}, poolclass=StaticPool)
+    Base.metadata.create_all(engine)
+    with sessionmaker(bind=engine)() as db:
+        for tenant_id in (1, 2):
+            db.add(Tenant(id=tenant_id, name=f"T{tenant_id}", slug=f"t{tenant_id}"))
+            db.add(User(id=tenant_id, tenant_id=tenant_id, email=f"c{tenant_id}@x247.pt",
+                        password_hash="h", role=UserRole.CLIENT))
+        db.commit()
+    yield engine
+    Base.metadata.drop_all(engine)
+
+@pytest.fixture
+def statements(engine):
+    seen = []
+    event.listen(engine, "before_cursor_execute", lambda *args: seen.append(args[2]))
+    return seen
+
+def use_cache(monkeypatch, cache: RepositoryCache) -> RepositoryCache:
+    monkeypatch.setattr(base_module, "repository_cache", cache)
+    return cache
+
+def test_disabled_models_always_hit_the_database(engine, statements, monkeypatch):
+    cache = use_cache(monkeypatch, RepositoryCache())
+    with sessionmaker(bind=engine)() as db:
+        order = OrderRepository(db, 1).create(client_id=1, amount_cents=100, category="canalizacao")
+        db.expunge_all()
+        statements.clear()
+        OrderRepository(db, 1).list_by_client(1)
+        OrderRepository(db, 1).list_by_client(1)
+    assert len(statements) == 2 and cache.stats()["models"] == {}
+
+def test_get_and_lists_are_read_through_and_invalidated_by_writes(engine, statements, monkeypatch):
+    cache = use_cache(monkeypatch, RepositoryCache())
+    cache.enable(TABLE, ttl_seconds=30)
+    factory = sessionmaker(bind=engine)
+    with factory() as db:
+        order = OrderRepository(db, 1).create(client_id=1, amount_cents=100, category="canalizacao")
+
+    with factory() as db:
+        assert OrderRepository(db, 1).get(order.id).amount_cents == 100
+        assert [o.id for o in OrderRepository(db, 1).list_by_client(1)] == [order.id]
+    statements.clear()
+    with factory() as db:
+        cached = OrderRepository(db, 1).get(order.id)
+        listed = OrderRepository(db, 1).list_by_client(1)
+        assert cached in db and listed[0] is cached  # anexados à sessão, sem SQL
+        assert cached.status == OrderStatus.PENDING
+    assert statements == []
+
+    with factory() as db:
+        OrderRepository(db, 1).update_status(order.id, OrderStatus.ASSIGNED)
+        second = OrderRepository(db, 1).create(client_id=1, amount_cents=50, category="eletricidade")
+    with factory() as db:
+        assert OrderRepository(db, 1).get(order.id).status == OrderStatus.ASSIGNED
+        assert {o.id for o in OrderRepository(db, 1).list_by_client(1)} == {order.id, second.id}
+
+    stats = cache.stats()["models"][TABLE]
+    assert stats["hits"] == 2 and stats["invalidations"] == 3 and stats["misses"] == 4
+
+def test_tenants_never_share_entries(engine, monkeypatch):
+    cache = use_cache(monkeypatch, RepositoryCache())
+    cache.enable(TABLE, ttl_seconds=30)
+    with sessionmaker(bind=engine)() as db:
+        order = OrderRepository(db, 1).create(client_id=1, amount_cents=100, category="canalizacao")
+        assert OrderRepository(db, 1).get(order.id) is not None
+        assert OrderRepository(db, 2).get(order.id) is None
+        assert OrderRepository(db, 2).list() == []
+
+        # Entrada envenenada sob a chave do tenant 2: é rejeitada e a leitura vai à DB
+        gen = cache.generation(TABLE, 2)
+        cache.store(TABLE, 2, gen, "get", repr(order.id), [{"id": order.id, "tenant_id": 1}])
+        assert OrderRepository(db, 2).get(order.id) is None
+    assert cache.stats()["models"][TABLE]["rejected"] == 1
+
+def test_entries_expire_after_the_model_ttl(engine, statements, monkeypatch):
+    clock = Clock()
+    cache = use_cache(monkeypatch, RepositoryCache(clock=clock))
+    cache.enable(TABLE, ttl_seconds=5)
+    factory = sessionmaker(bind=engine)
+    with factory() as db:
+        order = OrderRepository(db, 1).create(client_id=1, amount_cents=100, category="canalizacao")
+    with factory() as db:
+        OrderRepository(db, 1).get(order.id)
+    clock.now += 6
+    statements.clear()
+    with factory() as db:
+        OrderRepository(db, 1).get(order.id)
+    assert len(statements) == 1
+
+def test_l2_is_shared_between_workers_and_follows_invalidations(engine, statements, monkeypatch):
+    redis = FakeRedis()
+    worker_a, worker_b = RepositoryCache(l2=redis), RepositoryCache(l2=redis)
+    for cache in (worker_a, worker_b):
+        cache.enable(TABLE, ttl_seconds=30)
+    factory = sessionmaker(bind=engine)
+
+    use_cache(monkeypatch, worker_a)
+    with factory() as db:
+        order = OrderRepository(db, 1).create(client_id=1, amount_cents=100, category="canalizacao")
+        db.expunge_all()
+        OrderRepository(db, 1).get(order.id)
+
+    use_cache(monkeypatch, worker_b)
+    statements.clear()
+    with factory() as db:
+        assert OrderRepository(db, 1).get(order.id).amount_cents == 100
+    assert statements == [] and worker_b.stats()["models"][TABLE]["l2_hits"] == 1
+
+    use_cache(monkeypatch, worker_a)
+    with factory() as db:
+        OrderRepository(db, 1).update(order.id, amount_cents=200)
+    use_cache(monkeypatch, worker_b)
+    worker_b.clear()  # L1 do worker B expirado
+    with factory() as db:
+        assert OrderRepository(db, 1).get(order.id).amount_cents == 200
+
+def test_async_repository_uses_the_same_cache(monkeypatch):
+    cache = use_cache(monkeypatch, RepositoryCache())
+    cache.enable(TABLE, ttl_seconds=30)
+    engine = create_async_engine("sqlite+aiosqlite://", poolclass=StaticPool)
+    seen = []
+    event.listen(engine.sync_engine, "before_cursor_execute", lambda *args: seen.append(args[2]))
+
+    async def scenario():
+        async with engine.begin() as conn:
+            await conn.run_sync(Base.metadata.create_all)
+        factory = async_sessionmaker(engine, expire_on_commit=False)
+        async with factory() as db:
+            db.add(Tenant(id=1, name="T1", slug="t1"))
+            db.add(User(id=1, tenant_id=1, email="c@x247.pt", password_hash="h", role=UserRole.CLIENT))
+            await db.commit()
+            order = await AsyncOrderRepository(db, 1).create(client_id=1, amount_cents=100, category="SOS")
+        async with factory() as db:
+            await AsyncOrderRepository(db, 1).get(order.id)
+        seen.clear()
+        async with factory() as db:
+            cached = await AsyncOrderRepository(db, 1).get(order.id)
+        await engine.dispose()
+        return cached
+
+    assert asyncio.run(scenario()).amount_cents == 100
+    assert seen == []
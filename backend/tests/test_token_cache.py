@@ -0,0 +1,109 @@
+from datetime import timedelta
+import pytest
+from fastapi import FastAPI, HTTPException
+from fastapi.testclient import TestClient
+from app.api.v1 import auth as auth_api
+from app.core import security
+from app.core.security import TokenData, create_access_token, get_current_user_claims
+from app.core.token_cache import VerifiedTokenCache
+from app.models.database import UserRole
+
+class FakeClock:
+    def __init__(self, now=1_000.0):
+        self.now = now
+
+    def __call__(self):
+        return self.now
+
+@pytest.fixture
+def cache(monkeypatch):
+    fresh = VerifiedTokenCache(maxsize=100)
+    monkeypatch.setattr(security, "token_cache", fresh)
+    return fresh
+
+def _token(user_id=1, tenant_id=1, **kwargs):
+    return create_access_token({"sub": str(user_id), "tenant_id": tenant_id, "role": "CLIENT"}, **kwargs)
+
+def test_second_request_is_served_from_cache(cache, monkeypatch):
+    token = _token()
+    first = get_current_user_claims(token)
+
+    decodes = []
+    monkeypatch.setattr(security.jwt, "decode", lambda *a, **k: decodes.append(1))
+    second = get_current_user_claims(token)
+
+    assert second is first and decodes == []
+    assert first == TokenData(user_id=1, tenant_id=1, role=UserRole.CLIENT)
+    assert cache.stats()["hits"] == 1 and cache.stats()["hit_rate"] == 0.5
+
+def test_entries_expire_with_the_token_and_lru_is_bounded():
+    clock = FakeClock()
+    cache = VerifiedTokenCache(maxsize=2, clock=clock)
+    cache.put("a", "A", user_id=1, exp=1_010)
+    cache.put("b", "B", user_id=2, exp=2_000)
+    assert cache.get("a") == "A"          # "a" passa a mais recente
+    cache.put("c", "C", user_id=3, exp=2_000)
+    assert cache.get("b") is None and cache.stats()["evictions"] == 1
+
+    clock.now = 1_010
+    assert cache.get("a") is None and cache.stats()["expired"] == 1
+    assert cache.get("c") == "C"
+
+def test_revoked_token_is_rejected_even_after_eviction(cache):
+    token = _token()
+    get_current_user_claims(token)
+    security.revoke_token(token)
+    cache.clear()
+
+    with pytest.raises(HTTPException) as exc:
+        get_current_user_claims(token)
+    assert exc.value.status_code == 401
+    assert cache.stats()["revoked"] == 1
+
+def test_revoke_user_rejects_older_tokens_only():
+    clock = FakeClock(now=5_000.0)
+    cache = VerifiedTokenCache(clock=clock)
+    events = []
+    cache.add_revocation_listener(lambda kind, value: events.append((kind, value)))
+    cache.put("old", "OLD", user_id=7, exp=9_000, issued_at=4_000)
+    cache.put("other", "OTHER", user_id=8, exp=9_000, issued_at=4_000)
+
+    cache.revoke_user(7)
+    clock.now = 5_001.0
+
+    assert cache.get("old") is None and cache.get("other") == "OTHER"
+    assert cache.put("old", "OLD", user_id=7, exp=9_000, issued_at=4_000) is False
+    assert cache.put("legacy", "L", user_id=7, exp=9_000) is False
+    assert cache.put("new", "NEW", user_id=7, exp=9_000, issued_at=5_001) is True
+    assert events == [("user", 7)]
+
+def test_expired_token_is_not_cached(cache):
+    with pytest.raises(HTTPException):
+        get_current_user_claims(_token(expires_delta=timedelta(seconds=-1)))
+    assert cache.stats()["size"] == 0
+
+def test_logout_endpoint_revokes_the_bearer_token(cache):
+    app = FastAPI()
+    app.include_router(auth_api.router)
+    token = _token()
+    get_current_user_claims(token)
+
+    response = TestClient(app).post("/auth/logout", headers={"Authorization": f"Bearer {token}"})
+
+    assert response.status_code == 200
+    with pytest.raises(HTTPException):
+        get_current_user_claims(token)
+
+def test_logout_all_revokes_older_tokens_but_accepts_immediate_relogin(cache):
+    app = FastAPI()
+    app.include_router(auth_api.router)
+    old = _token()
+    get_current_user_claims(old)
+
+    response = TestClient(app).post("/auth/logout-all", headers={"Authorization": f"Bearer {old}"})
+    relogin = _token()
+
+    assert response.status_code == 200
+    with pytest.raises(HTTPException):
+        get_current_user_claims(old)
+    assert get_current_user_claims(relogin).user_id == 1
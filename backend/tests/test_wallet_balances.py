@@ -0,0 +1,72 @@
+import pytest
+from sqlalchemy import create_engine, event, update
+from sqlalchemy.orm import sessionmaker
+from sqlalchemy.pool import StaticPool
+from app.models.database import (
+    Base, Tenant, User, UserRole, Order, WalletBalance, BalanceBucket, TxType
+)
+from app.repositories.wallet_repository import WalletRepository
+from app.jobs.wallet_reconciliation import reconcile_chunk, reconcile_wallet_balances
+
+# Setup DB Test (SQLite in memory, partilhada pelos workers da reconciliação)
+engine = create_engine("sqlite://", connect_args={"check_same_thread": False}, poolclass=StaticPool)
+TestingSessionLocal = sessionmaker(autocommit=False, autoflush=False, bind=engine)
+
+@pytest.fixture
+def db():
+    Base.metadata.create_all(bind=engine)
+    session = TestingSessionLocal()
+    try:
+        session.add(Tenant(id=1, name="Tenant Test", slug="test-tenant"))
+        for user_id in range(1, 6):
+            session.add(User(id=user_id, tenant_id=1, email=f"u{user_id}@x247.pt", password_hash="h", role=UserRole.PRO))
+        session.add(Order(id=1, tenant_id=1, client_id=1, amount_cents=10000, category="canalizacao"))
+        session.commit()
+        yield session
+    finally:
+        session.close()
+        Base.metadata.drop_all(bind=engine)
+
+def test_balances_follow_each_transaction(db):
+    repo = WalletRepository(db, tenant_id=1)
+    repo.add_transaction(order_id=1, user_id=2, amount_cents=10000, tx_type=TxType.ESCROW_IN)
+    repo.add_transaction(order_id=1, user_id=2, amount_cents=10000, tx_type=TxType.ESCROW_OUT)
+    repo.add_transaction(order_id=1, user_id=2, amount_cents=1500, tx_type=TxType.FEE)
+
+    assert repo.get_user_balances(2) == {
+        BalanceBucket.ESCROW: 0,
+        BalanceBucket.AVAILABLE: 8500,
+        BalanceBucket.FEE: 1500,
+    }
+    # Saldo disponível já não conta ESCROW_IN nem taxas
+    assert repo.get_user_balance(2) == 8500
+    assert repo.get_user_balance(3) == 0
+
+def test_reconciliation_reports_drift_per_bucket(db):
+    repo = WalletRepository(db, tenant_id=1)
+    for user_id in range(1, 6):
+        repo.add_transaction(order_id=1, user_id=user_id, amount_cents=100 * user_id, tx_type=TxType.ESCROW_IN)
+    assert reconcile_wallet_balances(TestingSessionLocal, chunk_users=2, workers=3) == []
+
+    db.execute(
+        update(WalletBalance)
+        .where(WalletBalance.user_id == 4, WalletBalance.bucket == BalanceBucket.ESCROW)
+        .values(amount_cents=1)
+    )
+    db.commit()
+    mismatches = reconcile_wallet_balances(TestingSessionLocal, chunk_users=2, workers=3)
+    assert [(m.user_id, m.bucket, m.materialised_cents, m.ledger_cents) for m in mismatches] == [
+        (4, BalanceBucket.ESCROW, 1, 400)
+    ]
+
+def test_reconcile_chunk_reads_both_sides_in_one_statement(db):
+    repo = WalletRepository(db, tenant_id=1)
+    repo.add_transaction(order_id=1, user_id=2, amount_cents=700, tx_type=TxType.ESCROW_IN)
+    statements = []
+    listener = lambda conn, cursor, statement, *args: statements.append(statement)
+    event.listen(engine, "before_cursor_execute", listener)
+    try:
+        assert reconcile_chunk(db, 1, 10) == []
+    finally:
+        event.remove(engine, "before_cursor_execute", listener)
+    assert len(statements) == 1 and "UNION ALL" in statements[0]
@@ -0,0 +1,75 @@
+import json
+from datetime import datetime, timedelta
+import pytest
+from fastapi import FastAPI
+from fastapi.testclient import TestClient
+from sqlalchemy import create_engine
+from sqlalchemy.orm import sessionmaker
+from sqlalchemy.pool import StaticPool
+from app.api.v1 import wallet as wallet_api
+from app.core.security import create_access_token
+from app.db.session import get_db
+from app.models.database import Base, Tenant, User, UserRole, Order, WalletTransaction, TxType
+from app.repositories.wallet_repository import WalletRepository
+
+# Setup DB Test (SQLite in memory)
+engine = create_engine("sqlite://", connect_args={"check_same_thread": False}, poolclass=StaticPool)
+TestingSessionLocal = sessionmaker(autocommit=False, autoflush=False, bind=engine)
+
+@pytest.fixture
+def db():
+    Base.metadata.create_all(bind=engine)
+    session = TestingSessionLocal()
+    try:
+        session.add(Tenant(id=1, name="Tenant Test", slug="test-tenant"))
+        session.add(User(id=1, tenant_id=1, email="pro@x247.pt", password_hash="h", role=UserRole.PRO))
+        session.add(Order(id=1, tenant_id=1, client_id=1, amount_cents=1000, category="canalizacao"))
+        # Timestamps repetidos aos pares: o desempate por id tem de ser estável
+        base = datetime(2026, 1, 1)
+        for i in range(1, 26):
+            session.add(WalletTransaction(
+                id=i, tenant_id=1, order_id=1, user_id=1, amount_cents=i,
+                tx_type=TxType.ESCROW_IN, created_at=base + timedelta(minutes=i // 2),
+            ))
+        session.commit()
+        yield session
+    finally:
+        session.close()
+        Base.metadata.drop_all(bind=engine)
+
+@pytest.fixture
+def client(db, monkeypatch):
+    app = FastAPI()
+    app.include_router(wallet_api.router)
+    app.dependency_overrides[get_db] = lambda: db
+    monkeypatch.setattr(wallet_api, "SessionLocal", TestingSessionLocal)
+    token = create_access_token({"sub": "1", "tenant_id": 1, "role": "PRO"})
+    return TestClient(app, headers={"Authorization": f"Bearer {token}"})
+
+def test_keyset_pages_cover_history_without_gaps(db):
+    repo = WalletRepository(db, tenant_id=1)
+    seen, after = [], None
+    while True:
+        page = repo.list_user_history(1, limit=7, after=after)
+        if not page:
+            break
+        seen.extend(tx.id for tx in page)
+        after = (page[-1].created_at, page[-1].id)
+    assert seen == list(range(25, 0, -1))
+
+def test_history_endpoint_returns_opaque_cursor(client):
+    first = client.get("/wallet/history", params={"limit": 10}).json()
+    assert [item["id"] for item in first["items"]] == list(range(25, 15, -1))
+    second = client.get("/wallet/history", params={"limit": 10, "cursor": first["next_cursor"]}).json()
+    assert [item["id"] for item in second["items"]] == list(range(15, 5, -1))
+    assert client.get("/wallet/history", params={"cursor": "lixo"}).status_code == 400
+
+def test_export_streams_csv_and_ndjson(client):
+    csv_body = client.get("/wallet/history/export", params={"format": "csv"}).text.splitlines()
+    assert csv_body[0] == "id,created_at,order_id,tx_type,amount_cents"
+    assert len(csv_body) == 26
+
+    lines = client.get("/wallet/history/export", params={"format": "ndjson"}).text.splitlines()
+    records = [json.loads(line) for line in lines]
+    assert records[0]["id"] == 25 and records[0]["tx_type"] == "ESCROW_IN"
+    assert len(records) == 25
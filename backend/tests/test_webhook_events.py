@@ -0,0 +1,194 @@
+import threading
+import time
+import pytest
+from sqlalchemy import create_engine
+from sqlalchemy.orm import sessionmaker
+from sqlalchemy.pool import StaticPool
+from app.models.database import (
+    Base, StripeWebhookDeadLetter, StripeWebhookEvent, WalletBalance, BalanceBucket, Tenant, User, UserRole, Order, OrderStatus, WalletTransaction
+)
+from app.payments import webhook_queue
+from app.payments.webhook_queue import WebhookIngestQueue, process_payment_batch
+from app.payments.webhook_spool import WebhookSpool
+from app.repositories.cache import RepositoryCache
+from app.repositories.webhook_event_repository import WebhookEventRepository
+
+# Setup DB Test (SQLite in memory, uma só ligação partilhada pela thread consumidora)
+engine = create_engine("sqlite://", connect_args={"check_same_thread": False}, poolclass=StaticPool)
+TestingSessionLocal = sessionmaker(autocommit=False, autoflush=False, bind=engine)
+
+@pytest.fixture
+def db():
+    Base.metadata.create_all(bind=engine)
+    session = TestingSessionLocal()
+    try:
+        yield session
+    finally:
+        session.close()
+        Base.metadata.drop_all(bind=engine)
+
+def test_claim_is_exactly_once(db):
+    repo = WebhookEventRepository(db)
+    assert repo.claim("evt_1", "payment_intent.succeeded", 10) is True
+    db.commit()
+    # Retry do Stripe com o mesmo event.id
+    assert repo.claim("evt_1", "payment_intent.succeeded", 10) is False
+    assert db.query(StripeWebhookEvent).count() == 1
+
+def test_rollback_releases_event(db):
+    repo = WebhookEventRepository(db)
+    assert repo.claim("evt_2", "payment_intent.succeeded", 11) is True
+    db.rollback()
+    assert repo.claim("evt_2", "payment_intent.succeeded", 11) is True
+
+# --- Ingestão em lote ---
+
+def _seed_orders(db, n):
+    db.add(Tenant(id=1, name="Tenant Test", slug="test-tenant"))
+    db.add(User(id=1, tenant_id=1, email="c@x247.pt", password_hash="h", role=UserRole.CLIENT))
+    for i in range(1, n + 1):
+        db.add(Order(id=i, tenant_id=1, client_id=1, amount_cents=1000, category="canalizacao"))
+    db.commit()
+
+def _event(event_id, order_id, amount=1000):
+    return {
+        "id": event_id,
+        "type": "payment_intent.succeeded",
+        "data": {"object": {"amount": amount, "metadata": {"order_id": str(order_id)}}},
+    }
+
+def test_batch_updates_orders_and_inserts_escrow_once(db):
+    _seed_orders(db, 3)
+    events = [_event("evt_a", 1), _event("evt_a", 1), _event("evt_b", 2), _event("evt_c", 2)]
+
+    counts = process_payment_batch(db, events)
+
+    assert counts["processed"] == 2
+    assert counts["duplicates"] == 1
+    assert db.query(WalletTransaction).count() == 2
+    assert db.get(Order, 1).status == OrderStatus.PAID
+    assert db.get(Order, 3).status == OrderStatus.PENDING
+    assert db.get(WalletBalance, (1, 1, BalanceBucket.ESCROW)).amount_cents == 2000
+
+    # Reentrega do mesmo lote: nada novo
+    assert process_payment_batch(db, events)["processed"] == 0
+    assert db.query(WalletTransaction).count() == 2
+
+def test_enqueue_does_not_wait_for_the_database(db):
+    _seed_orders(db, 50)
+    db_released = threading.Event()
+
+    def slow_session():
+        db_released.wait(5)  # DB "lenta": o consumidor fica bloqueado
+        return TestingSessionLocal()
+
+    ingest = WebhookIngestQueue(slow_session, batch_size=20, max_wait_seconds=0.01)
+    for i in range(1, 51):
+        assert ingest.enqueue(_event(f"evt_{i}", i)) is True
+    assert ingest.stats()["processed"] == 0
+
+    db_released.set()
+    ingest.join()
+    stats = ingest.stats()
+    assert stats["processed"] == 50
+    assert stats["batches"] < 50
+    assert db.query(WalletTransaction).count() == 50
+
+def test_full_queue_rejects_instead_of_blocking(db):
+    ingest = WebhookIngestQueue(TestingSessionLocal, max_pending=1)
+    ingest._thread = threading.current_thread()  # consumidor parado
+    assert ingest.enqueue(_event("evt_1", 1)) is True
+    assert ingest.enqueue(_event("evt_2", 2)) is False
+    assert ingest.stats()["rejected"] == 1
+
+def test_transient_failure_is_retried_with_backoff(db):
+    _seed_orders(db, 1)
+    calls = []
+
+    def flaky_session():
+        calls.append(time.monotonic())
+        if len(calls) <= 2:  # lote e 1ª tentativa isolada falham
+            raise RuntimeError("DB indisponível")
+        return TestingSessionLocal()
+
+    ingest = WebhookIngestQueue(flaky_session, max_wait_seconds=0.0, retry_backoff_seconds=0.05)
+    assert ingest.enqueue(_event("evt_retry", 1)) is True
+    assert ingest.join(timeout=5) is True
+    assert ingest.stats()["retried"] == 1 and ingest.stats()["processed"] == 1
+    assert calls[2] - calls[1] >= 0.05
+    assert db.query(StripeWebhookDeadLetter).count() == 0
+
+def test_exhausted_event_goes_to_dead_letter_table(db):
+    _seed_orders(db, 1)
+    broken = {"id": "evt_broken", "type": "payment_intent.succeeded", "data": {"object": {"metadata": {"order_id": "1"}}}}
+
+    ingest = WebhookIngestQueue(TestingSessionLocal, max_wait_seconds=0.0, max_attempts=3, retry_backoff_seconds=0.01)
+    ingest.enqueue(broken)
+    ingest.enqueue(_event("evt_ok", 1))
+    assert ingest.join(timeout=5) is True
+
+    stats = ingest.stats()
+    assert stats["processed"] == 1 and stats["retried"] == 2 and stats["failed"] == 1
+    letter = db.query(StripeWebhookDeadLetter).one()
+    assert letter.event_id == "evt_broken" and letter.attempts == 3 and letter.payload == broken
+
+def test_failed_dead_letter_keeps_the_event_until_the_database_returns(db):
+    _seed_orders(db, 1)
+    outage = {"calls": 0}
+
+    def down_session():
+        # Lote, 3 tentativas e a dead letter falham: a DB está em baixo
+        outage["calls"] += 1
+        if outage["calls"] <= 5:
+            raise RuntimeError("DB indisponível")
+        return TestingSessionLocal()
+
+    ingest = WebhookIngestQueue(down_session, max_wait_seconds=0.0, max_attempts=3, retry_backoff_seconds=0.01)
+    ingest.enqueue(_event("evt_outage", 1))
+    assert ingest.join(timeout=5) is True
+
+    stats = ingest.stats()
+    assert stats["processed"] == 1 and stats["failed"] == 0
+    assert db.query(StripeWebhookDeadLetter).count() == 0
+    assert db.query(WalletTransaction).count() == 1
+
+def test_spooled_events_survive_a_restart(db, tmp_path):
+    _seed_orders(db, 2)
+    spool = WebhookSpool(tmp_path / "spool.db")
+    crashed = WebhookIngestQueue(TestingSessionLocal, spool=spool)
+    crashed._thread = threading.current_thread()  # processo morre antes de a consumidora correr
+    assert crashed.enqueue(_event("evt_1", 1)) is True
+    assert crashed.enqueue(_event("evt_1", 1)) is True  # reentrega pendente: não duplica
+    assert crashed.enqueue(_event("evt_2", 2)) is True
+    assert len(spool) == 2
+
+    restarted = WebhookIngestQueue(TestingSessionLocal, spool=WebhookSpool(tmp_path / "spool.db"))
+    restarted.start()
+    assert restarted.join(timeout=5) is True
+
+    assert restarted.stats()["replayed"] == 2 and restarted.stats()["processed"] == 2
+    assert db.query(WalletTransaction).count() == 2
+    assert len(spool) == 0
+
+def test_close_drains_and_rejects_new_events(db, tmp_path):
+    _seed_orders(db, 2)
+    ingest = WebhookIngestQueue(TestingSessionLocal, max_wait_seconds=0.0, spool=WebhookSpool(tmp_path / "spool.db"))
+    assert ingest.enqueue(_event("evt_1", 1)) is True
+
+    assert ingest.close(timeout=5) is True
+    assert ingest.enqueue(_event("evt_2", 2)) is False
+    assert db.query(WalletTransaction).count() == 1
+
+def test_batch_invalidates_cached_orders_and_wallet_rows(db, monkeypatch):
+    cache = RepositoryCache()
+    cache.enable("orders", 60)
+    cache.enable("wallet_transactions", 60)
+    monkeypatch.setattr(webhook_queue, "repository_cache", cache)
+    _seed_orders(db, 1)
+    before = {table: cache.generation(table, 1) for table in ("orders", "wallet_transactions")}
+
+    process_payment_batch(db, [_event("evt_cache", 1)])
+
+    for table, gen in before.items():
+        assert cache.generation(table, 1) > gen
+    assert cache.generation("orders", 2) == (0, None)
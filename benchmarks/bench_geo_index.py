@@ -0,0 +1,37 @@
+
+"""
+Latência do GeoGridIndex: k=5 parceiros mais próximos num raio de 15 km,
+com 100k pros distribuídos pela área Lisboa/Almada/Setúbal.
+
+Uso: python -m benchmarks.bench_geo_index
+"""
+import random
+import time
+
+from app.core.geo import GeoGridIndex
+
+N_PROS = 100_000
+N_QUERIES = 2_000
+
+
+def main() -> None:
+    rng = random.Random(42)
+    index = GeoGridIndex()
+    for i in range(N_PROS):
+        index.upsert(i, 38.4 + rng.random() * 0.6, -9.4 + rng.random() * 0.8, available=rng.random() > 0.2)
+
+    queries = [(38.4 + rng.random() * 0.6, -9.4 + rng.random() * 0.8) for _ in range(N_QUERIES)]
+    latencies = []
+    for lat, lon in queries:
+        started = time.perf_counter()
+        index.nearest(lat, lon, k=5, radius_km=15.0)
+        latencies.append(time.perf_counter() - started)
+
+    latencies.sort()
+    p50 = latencies[len(latencies) // 2] * 1e6
+    p99 = latencies[int(len(latencies) * 0.99)] * 1e6
+    print(f"{N_PROS} pros | p50 {p50:.1f} µs | p99 {p99:.1f} µs")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,55 @@
+
+"""
+Listagem filtrada no OrderRepository com 1M pedidos: índices secundários vs
+scan linear equivalente ao repositório anterior (dict simples).
+
+Uso: python -m benchmarks.bench_order_repository [n_pedidos]
+"""
+import random
+import sys
+import time
+
+from app.domain.orders.models import OrderStatus
+from app.orders.repository import OrderRepository
+
+CATEGORIES = ["Canalização", "Eletricidade", "Limpeza", "Serralharia"]
+AREAS = ["Almada", "Setúbal", "Seixal", "Barreiro", "Lisboa"]
+
+
+def timed(fn, repeat: int = 20) -> float:
+    started = time.perf_counter()
+    for _ in range(repeat):
+        fn()
+    return (time.perf_counter() - started) / repeat * 1e3
+
+
+def main() -> None:
+    n = int(sys.argv[1]) if len(sys.argv) > 1 else 1_000_000
+    rng = random.Random(0)
+    repo = OrderRepository()
+    started = time.perf_counter()
+    for _ in range(n):
+        order = repo.create(rng.choice(CATEGORIES), rng.choice(AREAS), client_id=rng.randrange(1, n // 10))
+        if rng.random() < 0.3:
+            order.status = OrderStatus.ASSIGNED
+            repo.save(order)
+    print(f"{n} pedidos criados em {time.perf_counter() - started:.1f} s")
+
+    orders = repo._orders
+    queries = {
+        "client_id": (
+            lambda: repo.list(client_id=42),
+            lambda: [o for o in orders.values() if o.client_id == 42][:50],
+        ),
+        "status+categoria/área": (
+            lambda: repo.list(status=OrderStatus.ASSIGNED, category="Limpeza", area="Seixal"),
+            lambda: [o for o in orders.values()
+                     if o.status == OrderStatus.ASSIGNED and o.category == "Limpeza" and o.area == "Seixal"][:50],
+        ),
+    }
+    for name, (indexed, linear) in queries.items():
+        print(f"{name:>22}: índice {timed(indexed):8.3f} ms | scan {timed(linear, repeat=3):8.1f} ms")
+
+
+if __name__ == "__main__":
+    main()
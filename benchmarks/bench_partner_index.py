@@ -0,0 +1,59 @@
+
+"""
+Micro-benchmark do lookup de parceiros Bridge.
+
+Compara o scan linear legado com o PartnerIndex para ficheiros de 1k a 100k
+entradas. O custo do índice deve manter-se plano com o crescimento do ficheiro.
+
+Uso: python -m benchmarks.bench_partner_index
+"""
+import random
+import timeit
+from typing import Any, Dict, List
+
+from app.orders.partner_index import PartnerIndex, RoundRobinPolicy
+
+SIZES = (1_000, 10_000, 100_000)
+LOOKUPS = 2_000
+
+
+def build_partners(n: int) -> List[Dict[str, Any]]:
+    return [
+        {
+            "category": f"Categoria {i % 500}",
+            "area": f"Área {i // 500}",
+            "pros": [{"name": f"Pro {i}", "phone": f"+351{900000000 + i}"}],
+        }
+        for i in range(n)
+    ]
+
+
+def linear_lookup(config: List[Dict[str, Any]], category: str, area: str):
+    for entry in config:
+        if entry.get("category") == category and entry.get("area") == area:
+            pros = entry.get("pros", [])
+            return pros[0] if pros else None
+    return None
+
+
+def main() -> None:
+    rng = random.Random(42)
+    print(f"{'entradas':>10} | {'linear µs/op':>14} | {'índice µs/op':>14}")
+    for n in SIZES:
+        config = build_partners(n)
+        index = PartnerIndex(config)
+        policy = RoundRobinPolicy()
+        queries = [(e["category"], e["area"]) for e in rng.choices(config, k=LOOKUPS)]
+
+        linear_runs = queries[:50]  # o scan linear é demasiado lento para todas as queries
+        linear = timeit.timeit(
+            lambda: [linear_lookup(config, c, a) for c, a in linear_runs], number=1
+        ) / len(linear_runs)
+        indexed = timeit.timeit(
+            lambda: [index.find(c, a, policy) for c, a in queries], number=5
+        ) / (5 * len(queries))
+        print(f"{n:>10} | {linear * 1e6:>14.2f} | {indexed * 1e6:>14.2f}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,72 @@
+
+"""
+Pico de RSS: loader legado (json.load + PartnerIndex) vs ingestão em streaming
+(CompactPartnerIndex). Cada loader corre num subprocesso isolado para que o
+ru_maxrss reflita apenas esse loader.
+
+Uso: python -m benchmarks.bench_partner_loader [n_entradas]
+"""
+import json
+import subprocess
+import sys
+import tempfile
+from pathlib import Path
+
+PROS_PER_ENTRY = 3
+
+LOADERS = {
+    "legacy": (
+        "import json; from pathlib import Path;"
+        "from app.orders.partner_index import PartnerIndex;"
+        "idx = PartnerIndex(json.load(Path(sys.argv[1]).open(encoding='utf-8')))"
+    ),
+    "compact": (
+        "from pathlib import Path;"
+        "from app.orders.partner_stream import CompactPartnerIndex;"
+        "idx = CompactPartnerIndex.from_file(Path(sys.argv[1]))"
+    ),
+}
+
+PROBE = (
+    "import sys, resource, time; t = time.perf_counter(); {loader};"
+    "print(time.perf_counter() - t, resource.getrusage(resource.RUSAGE_SELF).ru_maxrss)"
+)
+
+
+def write_directory(path: Path, n: int) -> None:
+    with path.open("w", encoding="utf-8") as f:
+        f.write("[\n")
+        for i in range(n):
+            entry = {
+                "category": f"Categoria {i % 40}",
+                "area": f"Concelho {i % 300}",
+                "pros": [
+                    {"name": f"Profissional {i}-{j}", "phone": f"+351{910000000 + i * PROS_PER_ENTRY + j}"}
+                    for j in range(PROS_PER_ENTRY)
+                ],
+            }
+            f.write(("," if i else "") + json.dumps(entry, ensure_ascii=False) + "\n")
+        f.write("]\n")
+
+
+def main() -> None:
+    n = int(sys.argv[1]) if len(sys.argv) > 1 else 500_000
+    with tempfile.TemporaryDirectory() as tmp:
+        path = Path(tmp) / "partners.json"
+        write_directory(path, n)
+        size_mb = path.stat().st_size / 2**20
+        baseline = subprocess.run(
+            [sys.executable, "-c", PROBE.format(loader="pass")], capture_output=True, text=True, check=True
+        ).stdout.split()[1]
+        print(f"{n} entradas ({size_mb:.1f} MB), RSS base do interpretador: {int(baseline) / 1024:.1f} MB")
+        for name, loader in LOADERS.items():
+            out = subprocess.run(
+                [sys.executable, "-c", PROBE.format(loader=loader), str(path)],
+                capture_output=True, text=True, check=True,
+            ).stdout.split()
+            seconds, max_rss_kb = float(out[0]), int(out[1])
+            print(f"{name:>8}: pico RSS {max_rss_kb / 1024:8.1f} MB | carga {seconds:6.2f} s")
+
+
+if __name__ == "__main__":
+    main()
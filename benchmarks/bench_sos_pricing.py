@@ -0,0 +1,71 @@
+
+"""
+Re-quotação em massa da Taxa SOS: API vetorizada vs loop Python sobre a API
+escalar (`calculate_taxa_sos`) e vs um loop "mínimo" com as mesmas contas
+mas sem datetime/pydantic (limite inferior do que um loop pode fazer).
+
+Uso: python -m benchmarks.bench_sos_pricing [n_pedidos]
+"""
+import sys
+import time
+from datetime import datetime
+
+import numpy as np
+
+from app.payments.sos_pricing import (
+    ACRESCIMO_IMEDIATO,
+    ACRESCIMO_SEGUNDA_VISITA,
+    COMISSAO_APP,
+    DISTANCIA_INCLUIDA_KM,
+    EUR_POR_KM_EXTRA,
+    base_periodo,
+    calculate_taxa_sos,
+    calculate_taxa_sos_batch,
+)
+
+
+def scalar_api_loop(service, hours, distances, immediate, second):
+    return [
+        calculate_taxa_sos(s, datetime(2026, 1, 1, h), d, imm, sv)
+        for s, h, d, imm, sv in zip(service, hours, distances, immediate, second)
+    ]
+
+
+def minimal_loop(service, hours, distances, immediate, second):
+    out = []
+    for s, h, d, imm, sv in zip(service, hours, distances, immediate, second):
+        taxa = (
+            base_periodo(h)
+            + (ACRESCIMO_IMEDIATO if imm else 0.0)
+            + EUR_POR_KM_EXTRA * max(0.0, d - DISTANCIA_INCLUIDA_KM)
+            + (ACRESCIMO_SEGUNDA_VISITA if sv else 0.0)
+        )
+        total = s + taxa
+        out.append((taxa, total, total * COMISSAO_APP))
+    return out
+
+
+def main() -> None:
+    n = int(sys.argv[1]) if len(sys.argv) > 1 else 1_000_000
+    rng = np.random.default_rng(0)
+    service = rng.uniform(20, 400, n)
+    hours = rng.integers(0, 24, n)
+    distances = rng.uniform(0, 50, n)
+    immediate = rng.random(n) < 0.4
+    second = rng.random(n) < 0.1
+
+    as_lists = [service.tolist(), hours.tolist(), distances.tolist(), immediate.tolist(), second.tolist()]
+
+    started = time.perf_counter()
+    calculate_taxa_sos_batch(service, hours, distances, immediate, second)
+    batch_s = time.perf_counter() - started
+    print(f"{n} pedidos | batch {batch_s:.3f} s")
+
+    for name, loop in (("loop API escalar", scalar_api_loop), ("loop mínimo", minimal_loop)):
+        started = time.perf_counter()
+        loop(*as_lists)
+        loop_s = time.perf_counter() - started
+        print(f"{name:>18}: {loop_s:.3f} s | speedup batch {loop_s / batch_s:.0f}x")
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,67 @@
+"""
+Memória por movimento: dict de `WalletTransaction` pydantic (modelo antigo do
+WalletRepository) vs `ColumnarLedger`. O modelo pydantic é medido numa amostra
+com tracemalloc e extrapolado; o ledger é carregado com os N movimentos reais.
+
+Uso: python -m benchmarks.bench_wallet_ledger [n_movimentos] [amostra_pydantic]
+"""
+import sys
+import time
+import tracemalloc
+
+from app.wallet.ledger import ColumnarLedger
+from app.wallet.models import WalletTransaction, WalletTransactionType
+
+TYPES = list(WalletTransactionType)
+MODELS = ("INTERNAL", "BRIDGE")
+
+
+def pydantic_bytes_per_row(n: int) -> float:
+    tracemalloc.start()
+    before = tracemalloc.get_traced_memory()[0]
+    rows = {}
+    for i in range(1, n + 1):
+        rows[i] = WalletTransaction(
+            id=i, order_id=i // 2, user_id=i % 50_000, amount_cents=1000 + i % 997,
+            tx_type=TYPES[i % 4], model=MODELS[i % 2], commission_rate=0.15,
+        )
+    used = tracemalloc.get_traced_memory()[0] - before
+    tracemalloc.stop()
+    return used / n
+
+
+def main() -> None:
+    n = int(sys.argv[1]) if len(sys.argv) > 1 else 10_000_000
+    sample = int(sys.argv[2]) if len(sys.argv) > 2 else 200_000
+
+    per_row_pydantic = pydantic_bytes_per_row(sample)
+
+    ledger = ColumnarLedger()
+    t = time.perf_counter()
+    for i in range(1, n + 1):
+        ledger.append(
+            tx_id=i, order_id=i // 2, user_id=i % 50_000, amount_cents=1000 + i % 997,
+            tx_type=TYPES[i % 4], model=MODELS[i % 2], commission_rate=0.15,
+        )
+    load_s = time.perf_counter() - t
+    per_row_ledger = ledger.nbytes / n
+
+    t = time.perf_counter()
+    for user_id in range(100):
+        ledger.balance(user_id)
+    o1_us = (time.perf_counter() - t) / 100 * 1e6
+    t = time.perf_counter()
+    for user_id in range(10):
+        ledger.scan_balance(user_id)
+    scan_ms = (time.perf_counter() - t) / 10 * 1e3
+
+    print(f"{n} movimentos (amostra pydantic: {sample})")
+    print(f"pydantic: {per_row_pydantic:7.1f} B/movimento -> {per_row_pydantic * n / 2**20:8.1f} MB")
+    print(f"colunar : {per_row_ledger:7.1f} B/movimento -> {ledger.nbytes / 2**20:8.1f} MB "
+          f"(capacidade reservada incluída) | carga {load_s:.1f} s")
+    print(f"redução : {per_row_pydantic / per_row_ledger:.1f}x")
+    print(f"saldo O(1): {o1_us:.2f} us | saldo por máscara vetorizada: {scan_ms:.1f} ms")
+
+
+if __name__ == "__main__":
+    main()
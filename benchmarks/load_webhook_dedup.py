@@ -0,0 +1,66 @@
+
+"""
+Load test: 10k entregas duplicadas do webhook Stripe, em concorrência,
+contra o handler real (TestClient). Verifica escrita exactly-once na wallet.
+
+Uso: python -m benchmarks.load_webhook_dedup [n_entregas] [n_eventos_distintos]
+"""
+import random
+import sys
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+from fastapi import FastAPI
+from fastapi.testclient import TestClient
+
+from app.orders.repository import OrderRepository, get_order_repository
+from app.payments import webhooks
+from app.wallet.service import WalletRepository, WalletService, get_wallet_service
+
+THREADS = 32
+
+
+def main() -> None:
+    deliveries = int(sys.argv[1]) if len(sys.argv) > 1 else 10_000
+    distinct = int(sys.argv[2]) if len(sys.argv) > 2 else 100
+
+    order_repo = OrderRepository()
+    wallet_repo = WalletRepository()
+    wallet_service = WalletService(wallet_repo)
+    orders = [order_repo.create("SOS", "Almada", client_id=i + 1) for i in range(distinct)]
+
+    app = FastAPI()
+    app.include_router(webhooks.router)
+    app.dependency_overrides[get_order_repository] = lambda: order_repo
+    app.dependency_overrides[get_wallet_service] = lambda: wallet_service
+    client = TestClient(app)
+
+    events = [
+        {
+            "id": f"evt_load_{order.id}",
+            "type": "payment_intent.succeeded",
+            "data": {"object": {
+                "id": f"pi_{order.id}",
+                "amount_received": 5000,
+                "metadata": {"order_id": str(order.id), "model": "INTERNAL", "commission_rate": "0.15"},
+            }},
+        }
+        for order in orders
+    ]
+    replay = [events[i % distinct] for i in range(deliveries)]
+    random.Random(0).shuffle(replay)
+
+    started = time.perf_counter()
+    with ThreadPoolExecutor(max_workers=THREADS) as pool:
+        statuses = list(pool.map(lambda e: client.post("/payments/webhooks/stripe", json=e).status_code, replay))
+    ack_s = time.perf_counter() - started
+
+    writes = len(wallet_repo)
+    print(f"{deliveries} entregas ({distinct} eventos) em {ack_s:.2f} s | "
+          f"HTTP 200: {statuses.count(200)} | escritas wallet: {writes}")
+    assert writes == distinct, "escrita duplicada na wallet!"
+    print("OK: exactly-once")
+
+
+if __name__ == "__main__":
+    main()
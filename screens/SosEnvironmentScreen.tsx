@@ -46,7 +46,8 @@ const SosEnvironmentScreen: React.FC<SosEnvironmentScreenProps> = ({
   useEffect(() => {
     const tenantId = 1; // Mock tenant
     const protocol = window.location.protocol === 'https:' ? 'wss:' : 'ws:';
-    const wsUrl = `${protocol}//${window.location.hostname}:8000/api/realtime/sos-radar/${tenantId}`;
+    const token = localStorage.getItem('X247_TOKEN') || '';
+    const wsUrl = `${protocol}//${window.location.hostname}:8000/api/realtime/sos-radar/${tenantId}?token=${encodeURIComponent(token)}`;
     
     const ws = new WebSocket(wsUrl);
     ws.onmessage = (event) => {
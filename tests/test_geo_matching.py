@@ -0,0 +1,53 @@
+
+import json
+import random
+
+from app.core.geo import GeoGridIndex, haversine_km
+from app.orders.bridge_service import BridgeService
+from app.orders.repository import OrderRepository
+
+
+def test_nearest_matches_brute_force():
+    rng = random.Random(3)
+    points = [(38.5 + rng.random() * 0.3, -9.3 + rng.random() * 0.3) for _ in range(2_000)]
+    index = GeoGridIndex()
+    for i, (lat, lon) in enumerate(points):
+        index.upsert(i, lat, lon)
+
+    lat, lon = 38.65, -9.15
+    expected = sorted((haversine_km(lat, lon, *p), i) for i, p in enumerate(points))
+    expected = [i for d, i in expected if d <= 5.0][:10]
+    assert [item_id for _, item_id, _ in index.nearest(lat, lon, k=10, radius_km=5.0)] == expected
+
+
+def test_nearest_skips_unavailable_and_out_of_radius():
+    index = GeoGridIndex()
+    index.upsert("perto", 38.679, -9.157)
+    index.upsert("ocupado", 38.680, -9.156, available=False)
+    index.upsert("longe", 38.524, -8.893)  # Setúbal, ~28 km
+    hits = index.nearest(38.679, -9.157, k=5, radius_km=15.0)
+    assert [item_id for _, item_id, _ in hits] == ["perto"]
+
+
+def test_manual_bridge_prefers_nearest_partner(tmp_path):
+    config_path = tmp_path / "partners.json"
+    config_path.write_text(json.dumps([
+        {
+            "category": "Canalização",
+            "area": "Almada",
+            "pros": [
+                {"name": "Longe", "phone": "+351900000001", "lat": 38.524, "lon": -8.893},
+                {"name": "Perto", "phone": "+351900000002", "lat": 38.680, "lon": -9.158},
+            ],
+        }
+    ]), encoding="utf-8")
+    service = BridgeService(order_repo=OrderRepository(), config_path=config_path)
+
+    order = service.create_order("Canalização", "Almada", client_id=1, lat=38.679, lon=-9.157)
+    contact = service.manual_bridge(order.id)["proContact"]
+    assert contact["name"] == "Perto"
+    assert contact["distanceKm"] < 1
+
+    # Sem coordenadas: fallback por área (round-robin começa no primeiro)
+    order = service.create_order("Canalização", "Almada", client_id=1)
+    assert service.manual_bridge(order.id)["proContact"]["distanceKm"] is None
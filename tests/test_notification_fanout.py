@@ -0,0 +1,102 @@
+from fastapi import FastAPI
+from fastapi.testclient import TestClient
+
+from app.api.v1 import notifications as notifications_api
+from app.core.security import Role
+from app.domain.notifications.models import NotificationType
+from app.notifications.fanout import NotificationFanout, SegmentDirectory
+from app.notifications.service import NotificationRepository, NotificationService
+
+
+def _service(batch_size=100):
+    repo = NotificationRepository()
+    directory = SegmentDirectory()
+    fanout = NotificationFanout(repo, directory, batch_size=batch_size)
+    return repo, directory, fanout, NotificationService(repo, fanout)
+
+
+def test_notify_segment_reaches_only_the_segment_in_batches():
+    repo, directory, fanout, service = _service(batch_size=100)
+    for user_id in range(1, 251):
+        directory.register(user_id, tenant_id=1, role=Role.PRO)
+    directory.register(500, tenant_id=1, role=Role.CLIENT)
+    directory.register(600, tenant_id=2, role=Role.PRO)
+    batches = []
+    fanout.add_listener(lambda batch: batches.append(len(batch)))
+
+    job = service.notify_segment(1, Role.PRO, "Manutenção", "Sistema em manutenção às 02h.")
+    fanout.join()
+
+    assert job.done and job.audience == 250 and job.delivered == 250
+    assert batches == [100, 100, 50]
+    assert repo.unread_count(1) == repo.unread_count(250) == 1
+    assert repo.unread_count(500) == repo.unread_count(600) == 0
+    items, _ = repo.list_by_user(7)
+    assert items[0].type == NotificationType.SYSTEM
+
+
+def test_bulk_mark_read_by_ids_and_all():
+    repo, directory, fanout, service = _service()
+    notifs = [repo.create(1, NotificationType.SYSTEM, f"T{i}", "c", {}) for i in range(6)]
+    foreign = repo.create(2, NotificationType.SYSTEM, "T", "c", {})
+
+    assert repo.mark_many_read(1, [notifs[0].id, notifs[1].id, foreign.id, "N-999999"]) == 2
+    assert repo.unread_count(1) == 4 and repo.unread_count(2) == 1
+    assert repo.mark_many_read(1) == 4
+    assert repo.unread_count(1) == 0
+    assert all(n.is_read for n in notifs)
+
+
+def test_bulk_and_segment_endpoints(monkeypatch):
+    repo, directory, fanout, service = _service()
+    monkeypatch.setattr(notifications_api, "_notif_repo", repo)
+    monkeypatch.setattr(notifications_api, "notification_service", service)
+    app = FastAPI()
+    app.include_router(notifications_api.router)
+    client = TestClient(app)  # placeholder de autenticação: user 1, SUPER_ADMIN
+
+    directory.register(1, tenant_id=1, role=Role.CLIENT)
+    directory.register(2, tenant_id=1, role=Role.CLIENT)
+    resp = client.post("/notifications/segments", json={
+        "tenant_id": 1, "role": "CLIENT", "title": "Novidade", "content": "Nova funcionalidade.",
+    })
+    assert resp.status_code == 202 and resp.json()["audience"] == 2
+    fanout.join()
+    job = client.get(f"/notifications/segments/{resp.json()['job_id']}").json()
+    assert job["done"] and job["delivered"] == 2
+
+    repo.create(1, NotificationType.SYSTEM, "Outra", "c", {})
+    assert client.post("/notifications/read", json={"all": True}).json() == {"updated": 2, "unread_count": 0}
+    assert client.post("/notifications/read", json={}).status_code == 422
+
+
+def test_inbox_access_registers_segment_member(monkeypatch):
+    repo, directory, fanout, service = _service()
+    monkeypatch.setattr(notifications_api, "_notif_repo", repo)
+    monkeypatch.setattr(notifications_api, "notification_service", service)
+    app = FastAPI()
+    app.include_router(notifications_api.router)
+    client = TestClient(app)
+
+    assert directory.size(1, Role.SUPER_ADMIN) == 0
+    assert client.get("/notifications/unread-count").status_code == 200
+    assert directory.size(1, Role.SUPER_ADMIN) == 1
+
+
+class FailingRepo(NotificationRepository):
+    def create_many(self, *args, **kwargs):
+        raise RuntimeError("storage offline")
+
+
+def test_failed_jobs_are_reported_and_finished_jobs_are_capped():
+    directory = SegmentDirectory()
+    directory.load([(1, 1, Role.PRO), (2, 1, Role.PRO)])
+    failing = NotificationFanout(FailingRepo(), directory, max_finished_jobs=2)
+    job = failing.submit(1, Role.PRO, NotificationType.SYSTEM, "T", "c", {})
+    failing.join()
+    assert job.failed and not job.done and job.error == "storage offline"
+
+    jobs = [failing.submit(1, Role.PRO, NotificationType.SYSTEM, "T", "c", {}) for _ in range(3)]
+    failing.join()
+    assert failing.get_job(job.job_id) is None and failing.get_job(jobs[0].job_id) is None
+    assert [failing.get_job(j.job_id) for j in jobs[1:]] == jobs[1:]
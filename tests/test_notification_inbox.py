@@ -0,0 +1,76 @@
+from datetime import timedelta
+
+from fastapi import FastAPI
+from fastapi.testclient import TestClient
+
+from app.api.v1 import notifications as notifications_api
+from app.domain.notifications.models import NotificationType
+from app.notifications.service import NotificationRepository
+
+
+def _fill(repo, user_id, n):
+    return [repo.create(user_id, NotificationType.SYSTEM, f"T{i}", "c", {}) for i in range(n)]
+
+
+def test_cursor_pages_are_newest_first_and_per_user():
+    repo = NotificationRepository()
+    mine = _fill(repo, 1, 25)
+    _fill(repo, 2, 10)
+
+    seen, cursor = [], None
+    while True:
+        items, cursor = repo.list_by_user(1, limit=10, cursor=cursor)
+        seen.extend(n.id for n in items)
+        if cursor is None:
+            break
+    assert seen == [n.id for n in reversed(mine)]
+    assert repo.list_by_user(3) == ([], None)
+
+
+def test_unread_counter_tracks_reads_and_ownership():
+    repo = NotificationRepository()
+    mine = _fill(repo, 1, 5)
+    other = _fill(repo, 2, 1)[0]
+    assert repo.unread_count(1) == 5
+
+    repo.mark_as_read(mine[0].id, user_id=1)
+    repo.mark_as_read(mine[0].id, user_id=1)  # idempotente
+    assert repo.unread_count(1) == 4
+    # Não é possível marcar notificações de outro utilizador
+    assert repo.mark_as_read(other.id, user_id=1) is None
+    assert repo.unread_count(2) == 1
+
+
+def test_retention_evicts_only_old_read_notifications():
+    repo = NotificationRepository(retention_days=30)
+    old = _fill(repo, 1, 4)
+    for notif in old:
+        notif.created_at -= timedelta(days=60)
+    repo.mark_as_read(old[0].id)
+    repo.mark_as_read(old[1].id)
+    recent = _fill(repo, 1, 2)
+    repo.mark_as_read(recent[0].id)
+
+    assert repo.evict_expired() == 2
+    items, _ = repo.list_by_user(1)
+    assert [n.id for n in items] == [recent[1].id, recent[0].id, old[3].id, old[2].id]
+    assert repo.unread_count(1) == 3
+    assert repo.mark_as_read(old[0].id) is None
+
+
+def test_endpoints_paginate_and_count(monkeypatch):
+    repo = NotificationRepository()
+    monkeypatch.setattr(notifications_api, "_notif_repo", repo)
+    app = FastAPI()
+    app.include_router(notifications_api.router)
+    client = TestClient(app)
+    _fill(repo, 1, 3)  # utilizador do placeholder de autenticação: id=1
+
+    page = client.get("/notifications/", params={"limit": 2}).json()
+    assert len(page["items"]) == 2 and page["unread_count"] == 3
+    rest = client.get("/notifications/", params={"limit": 2, "cursor": page["next_cursor"]}).json()
+    assert len(rest["items"]) == 1 and rest["next_cursor"] is None
+
+    assert client.patch(f"/notifications/{page['items'][0]['id']}/read").status_code == 200
+    assert client.get("/notifications/unread-count").json() == {"unread_count": 2}
+    assert client.get("/notifications/", params={"cursor": "xpto"}).status_code == 400
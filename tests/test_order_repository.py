@@ -0,0 +1,39 @@
+
+from app.domain.orders.models import OrderStatus
+from app.orders.repository import OrderRepository, SQLiteOrderPersistence
+
+
+def test_secondary_indexes_follow_status_changes():
+    repo = OrderRepository()
+    a = repo.create("Canalização", "Almada", client_id=1)
+    b = repo.create("Eletricidade", "Almada", client_id=1)
+    repo.create("Canalização", "Setúbal", client_id=2)
+
+    assert [o.id for o in repo.list(client_id=1)] == [a.id, b.id]
+    assert [o.id for o in repo.list(category="canalizacao", area="ALMADA")] == [a.id]
+
+    a.status = OrderStatus.ASSIGNED
+    repo.save(a)
+    assert [o.id for o in repo.list(status=OrderStatus.PENDING, client_id=1)] == [b.id]
+    assert [o.id for o in repo.list(status=OrderStatus.ASSIGNED)] == [a.id]
+    assert repo.count(OrderStatus.PENDING) == 2
+
+
+def test_list_pagination():
+    repo = OrderRepository()
+    ids = [repo.create("SOS", "Almada", client_id=7).id for _ in range(5)]
+    assert [o.id for o in repo.list(client_id=7, limit=2, offset=2)] == ids[2:4]
+
+
+def test_sqlite_persistence_survives_restart(tmp_path):
+    path = tmp_path / "orders.db"
+    repo = OrderRepository(persistence=SQLiteOrderPersistence(path))
+    order = repo.create("Canalização", "Almada", client_id=3)
+    order.status = OrderStatus.MANUAL_FORWARDING
+    repo.save(order)
+
+    reloaded = OrderRepository(persistence=SQLiteOrderPersistence(path))
+    assert reloaded.get(order.id).status == OrderStatus.MANUAL_FORWARDING
+    assert [o.id for o in reloaded.list(status=OrderStatus.MANUAL_FORWARDING)] == [order.id]
+    # O contador continua depois do maior id persistido
+    assert reloaded.create("SOS", "Almada", client_id=3).id == order.id + 1
@@ -0,0 +1,66 @@
+
+import json
+import os
+
+from app.orders.bridge_service import BridgeService
+from app.orders.partner_config import PartnerConfigWatcher
+from app.orders.repository import OrderRepository
+
+
+def write_partners(path, name, mtime_ns):
+    path.write_text(json.dumps([{
+        "category": "Canalização",
+        "area": "Almada",
+        "pros": [{"name": name, "phone": "+351900000000"}],
+    }]), encoding="utf-8")
+    # Forçar mtime distinto (resolução do filesystem pode ser grosseira)
+    os.utime(path, ns=(mtime_ns, mtime_ns))
+
+
+def test_watcher_reloads_only_on_change(tmp_path):
+    config_path = tmp_path / "partners.json"
+    write_partners(config_path, "João", 1_000_000_000)
+    service = BridgeService(order_repo=OrderRepository(), config_path=config_path)
+    watcher = PartnerConfigWatcher(
+        config_path, reload=service.reload_partners_config, metrics=service.config_metrics
+    )
+
+    assert watcher.check() is False
+    assert service._find_bridge_partner("Canalização", "Almada")["name"] == "João"
+
+    write_partners(config_path, "Carlos", 2_000_000_000)
+    assert watcher.check() is True
+    assert service._find_bridge_partner("Canalização", "Almada")["name"] == "Carlos"
+
+    metrics = service.config_metrics.as_dict()
+    assert metrics["reload_count"] == 1
+    assert metrics["last_parse_ms"] >= 0
+
+
+def test_watcher_keeps_previous_snapshot_on_invalid_json(tmp_path):
+    config_path = tmp_path / "partners.json"
+    write_partners(config_path, "João", 1_000_000_000)
+    service = BridgeService(order_repo=OrderRepository(), config_path=config_path)
+    watcher = PartnerConfigWatcher(
+        config_path, reload=service.reload_partners_config, metrics=service.config_metrics
+    )
+
+    config_path.write_text("[{ incompleto", encoding="utf-8")
+    os.utime(config_path, ns=(3_000_000_000, 3_000_000_000))
+    assert watcher.check() is False
+    assert service.config_metrics.reload_errors == 1
+    assert service._find_bridge_partner("Canalização", "Almada")["name"] == "João"
+
+
+def test_change_before_watcher_start_is_reloaded(tmp_path):
+    config_path = tmp_path / "partners.json"
+    write_partners(config_path, "João", 1_000_000_000)
+    service = BridgeService(order_repo=OrderRepository(), config_path=config_path)
+
+    write_partners(config_path, "Carlos", 2_000_000_000)
+    watcher = service.start_config_watcher(interval_seconds=3600)
+    try:
+        assert watcher.check() is True
+        assert service._find_bridge_partner("Canalização", "Almada")["name"] == "Carlos"
+    finally:
+        service.stop_config_watcher()
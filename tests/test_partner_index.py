@@ -0,0 +1,77 @@
+
+import json
+import random
+
+from app.orders.bridge_service import BridgeService
+from app.orders.partner_index import (
+    LeastRecentlyAssignedPolicy,
+    PartnerIndex,
+    RoundRobinPolicy,
+    WeightedPolicy,
+    normalize_key,
+)
+from app.orders.repository import OrderRepository
+
+PARTNERS = [
+    {
+        "category": "Canalização",
+        "area": "Almada",
+        "pros": [
+            {"name": "João", "phone": "+351912345678"},
+            {"name": "Pedro", "phone": "+351987654321"},
+        ],
+    },
+    {"category": "Eletricidade", "area": "Setúbal", "pros": []},
+]
+
+
+def test_normalize_key_strips_accents_and_case():
+    assert normalize_key("  Canalização ") == "canalizacao"
+    assert normalize_key("SETÚBAL") == normalize_key("setubal")
+
+
+def test_index_lookup_is_accent_and_case_insensitive():
+    index = PartnerIndex(PARTNERS)
+    policy = RoundRobinPolicy()
+    assert index.find("canalizacao", "ALMADA", policy)["name"] == "João"
+    # Entradas sem pros não entram no índice
+    assert index.find("Eletricidade", "Setúbal", policy) is None
+
+
+def test_round_robin_rotates_partners():
+    index = PartnerIndex(PARTNERS)
+    policy = RoundRobinPolicy()
+    names = [index.find("Canalização", "Almada", policy)["name"] for _ in range(4)]
+    assert names == ["João", "Pedro", "João", "Pedro"]
+
+
+def test_least_recently_assigned_prefers_idle_partner():
+    index = PartnerIndex(PARTNERS)
+    policy = LeastRecentlyAssignedPolicy()
+    first = index.find("Canalização", "Almada", policy)
+    second = index.find("Canalização", "Almada", policy)
+    assert first["phone"] != second["phone"]
+
+
+def test_weighted_policy_respects_zero_weight():
+    entries = [{
+        "category": "SOS",
+        "area": "Almada",
+        "pros": [
+            {"name": "A", "phone": "1", "weight": 0},
+            {"name": "B", "phone": "2", "weight": 3},
+        ],
+    }]
+    index = PartnerIndex(entries)
+    policy = WeightedPolicy(rng=random.Random(7))
+    assert {index.find("SOS", "Almada", policy)["name"] for _ in range(50)} == {"B"}
+
+
+def test_bridge_service_uses_index(tmp_path):
+    config_path = tmp_path / "partners.json"
+    config_path.write_text(json.dumps(PARTNERS), encoding="utf-8")
+    service = BridgeService(order_repo=OrderRepository(), config_path=config_path)
+
+    order = service.create_order(category="canalizacao", area="almada", client_id=1)
+    result = service.manual_bridge(order.id)
+    assert result["proContact"]["name"] == "João"
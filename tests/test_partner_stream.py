@@ -0,0 +1,77 @@
+
+import io
+import json
+
+import pytest
+
+from app.orders.bridge_service import BridgeService
+from app.orders.partner_index import PartnerIndex, RoundRobinPolicy
+from app.orders.partner_stream import CompactPartnerIndex, iter_json_array
+from app.orders.repository import OrderRepository
+
+ENTRIES = [
+    {"category": "Canalização", "area": "Almada", "pros": [{"name": "João", "phone": "+351912345678"}]},
+    {"category": "Eletricidade", "area": "Almada", "pros": [{"name": "Ana", "phone": "+351911111111"}]},
+    {"category": "canalizacao", "area": "ALMADA", "pros": [{"name": "Pedro", "phone": "+351987654321"}]},
+]
+
+
+def test_iter_json_array_with_small_chunks():
+    text = json.dumps(ENTRIES, ensure_ascii=False, indent=2)
+    parsed = list(iter_json_array(io.StringIO(text), chunk_size=7))
+    assert parsed == ENTRIES
+
+
+def test_iter_json_array_rejects_truncated_file():
+    text = json.dumps(ENTRIES)[:-20]
+    with pytest.raises(ValueError):
+        list(iter_json_array(io.StringIO(text), chunk_size=16))
+
+
+def test_compact_index_matches_dict_index():
+    compact = CompactPartnerIndex.from_entries(iter(ENTRIES))
+    legacy = PartnerIndex(ENTRIES)
+    assert len(compact) == len(legacy) == 2
+    policy_compact, policy_legacy = RoundRobinPolicy(), RoundRobinPolicy()
+    for _ in range(3):
+        assert compact.find("Canalização", "Almada", policy_compact) == \
+            legacy.find("Canalização", "Almada", policy_legacy)
+
+
+def test_bridge_service_compact_ndjson(tmp_path):
+    config_path = tmp_path / "partners.ndjson"
+    config_path.write_text(
+        "\n".join(json.dumps(e, ensure_ascii=False) for e in ENTRIES), encoding="utf-8"
+    )
+    service = BridgeService(order_repo=OrderRepository(), config_path=config_path, compact=True)
+    order = service.create_order(category="Eletricidade", area="Almada", client_id=1)
+    assert service.manual_bridge(order.id)["proContact"]["name"] == "Ana"
+
+
+def test_compact_bucket_cumulative_weights_precomputed():
+    entries = [
+        {"category": "Pintura", "area": "Seixal", "pros": [{"name": "A", "phone": "1", "weight": 2}]},
+        {"category": "Jardim", "area": "Seixal", "pros": [{"name": "B", "phone": "2", "weight": 3}]},
+        {"category": "Pintura", "area": "Seixal", "pros": [{"name": "C", "phone": "3", "weight": 0.5}]},
+    ]
+    compact = CompactPartnerIndex.from_entries(iter(entries))
+    legacy = PartnerIndex(entries)
+    for category in ("Pintura", "Jardim"):
+        assert list(compact.bucket(category, "Seixal").cumulative_weights) == \
+            legacy.bucket(category, "Seixal").cumulative_weights
+
+
+def test_compact_index_keeps_availability(tmp_path):
+    entries = [{"category": "Canalização", "area": "Almada", "pros": [
+        {"name": "Ocupado", "phone": "+351900000001", "lat": 38.68, "lon": -9.16, "available": False, "weight": 5},
+        {"name": "Livre", "phone": "+351900000002", "lat": 38.70, "lon": -9.16},
+    ]}]
+    compact = CompactPartnerIndex.from_entries(iter(entries))
+    assert compact.bucket("Canalização", "Almada").pros[0]["available"] is False
+    assert list(compact.bucket("Canalização", "Almada").cumulative_weights) == [0.0, 1.0]
+
+    config_path = tmp_path / "partners.ndjson"
+    config_path.write_text(json.dumps(entries[0], ensure_ascii=False), encoding="utf-8")
+    service = BridgeService(order_repo=OrderRepository(), config_path=config_path, compact=True)
+    nearest = service.nearest_partners("Canalização", 38.68, -9.16, k=5)
+    assert [pro["name"] for _, pro in nearest] == ["Livre"]
@@ -0,0 +1,47 @@
+
+import numpy as np
+import pytest
+
+from app.domain.payments.models import CommissionModel
+from app.payments.domain import MAX_AMOUNT_CENTS, calculate_split, calculate_splits_bulk
+
+
+def test_bulk_matches_scalar_rounding():
+    rng = np.random.default_rng(1)
+    amounts = rng.integers(-50_000, 500_000, 2_000).tolist()
+    rates = rng.choice([0.10, 0.15, 0.29, 0.333, 0.07], 2_000).tolist()
+    models = rng.choice(["INTERNAL", "BRIDGE"], 2_000).tolist()
+
+    bulk = calculate_splits_bulk(amounts, rates, models)
+    for i, (amount, rate, model) in enumerate(zip(amounts, rates, models)):
+        split = calculate_split(amount, rate, CommissionModel(model))
+        assert bulk["platform_amounts"][i] == split.platform_amount
+        assert bulk["pro_amounts"][i] == split.pro_amount
+
+
+def test_integer_arithmetic_avoids_float_truncation():
+    # int(100 * 0.29) == 28 com floats; em cêntimos exatos são 29
+    assert calculate_split(100, 0.29, CommissionModel.INTERNAL).platform_amount == 29
+
+
+def test_bulk_rejects_invalid_columns():
+    with pytest.raises(ValueError):
+        calculate_splits_bulk([100, 200], [0.1], ["BRIDGE", "BRIDGE"])
+    with pytest.raises(ValueError):
+        calculate_splits_bulk([100], [0.1], ["OUTRO"])
+    with pytest.raises(ValueError):
+        calculate_splits_bulk([100], [1.5], ["BRIDGE"])
+    with pytest.raises(ValueError):
+        calculate_splits_bulk([100], [float("nan")], ["BRIDGE"])
+    with pytest.raises(ValueError):
+        calculate_split(100, -0.1, CommissionModel.INTERNAL)
+
+
+def test_bulk_rejects_amounts_that_would_overflow():
+    limit = MAX_AMOUNT_CENTS
+    bulk = calculate_splits_bulk([limit, -limit], [1.0, 1.0], ["BRIDGE", "BRIDGE"])
+    assert bulk["platform_amounts"].tolist() == [limit, -limit]
+    with pytest.raises(ValueError):
+        calculate_splits_bulk([limit + 1], [0.5], ["BRIDGE"])
+    with pytest.raises(ValueError):
+        calculate_splits_bulk([2 ** 70], [0.5], ["BRIDGE"])
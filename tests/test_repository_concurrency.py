@@ -0,0 +1,113 @@
+import sys
+import threading
+from concurrent.futures import ThreadPoolExecutor
+
+import pytest
+
+from app.domain.bonito_service.models import BonitoPackCreate, BonitoPackUpdate
+from app.domain.bonito_service.repository import BonitoPackRepository
+from app.domain.notifications.models import NotificationType
+from app.domain.support.models import SupportCategory
+from app.notifications.service import NotificationRepository
+from app.orders.repository import OrderRepository
+from app.support.service import SupportTicketRepository
+from app.wallet.models import WalletTransactionType
+from app.wallet.service import WalletRepository, WalletService
+
+THREADS = 32
+PER_THREAD = 100
+
+
+@pytest.fixture(autouse=True)
+def aggressive_switching():
+    # Trocas de thread muito frequentes tornam as corridas reprodutíveis
+    previous = sys.getswitchinterval()
+    sys.setswitchinterval(1e-5)
+    yield
+    sys.setswitchinterval(previous)
+
+
+def hammer(work):
+    barrier = threading.Barrier(THREADS)
+
+    def worker(thread_no):
+        barrier.wait()
+        return [work(thread_no, i) for i in range(PER_THREAD)]
+
+    with ThreadPoolExecutor(max_workers=THREADS) as pool:
+        return [r for chunk in pool.map(worker, range(THREADS)) for r in chunk]
+
+
+def assert_unique(ids):
+    assert len(ids) == THREADS * PER_THREAD
+    assert len(set(ids)) == len(ids)
+
+
+def test_order_repository_under_contention():
+    repo = OrderRepository()
+
+    def work(t, i):
+        order = repo.create(category="Canalização", area="Lisboa", client_id=t)
+        repo.list(client_id=t, limit=5)
+        return order.id
+
+    assert_unique(hammer(work))
+    assert repo.count() == THREADS * PER_THREAD
+    assert all(len(repo.list(client_id=t, limit=10_000)) == PER_THREAD for t in range(THREADS))
+
+
+def test_wallet_service_under_contention():
+    repo = WalletRepository()
+    service = WalletService(repo)
+
+    def work(t, i):
+        return service.add_transaction(
+            order_id=i, user_id=t, amount_cents=100, tx_type=WalletTransactionType.ESCROW_IN,
+            model="INTERNAL", commission_rate=0.15,
+        ).id
+
+    assert_unique(hammer(work))
+    assert len(repo) == THREADS * PER_THREAD
+    assert all(service.get_balance(t) == 100 * PER_THREAD for t in range(THREADS))
+
+
+def test_support_ticket_repository_under_contention():
+    repo = SupportTicketRepository()
+
+    def work(t, i):
+        ticket = repo.create(t, "CLIENT", SupportCategory.SOS, "resumo", [], escalated=True)
+        repo.list_pending_escalated()
+        return ticket.id
+
+    assert_unique(hammer(work))
+    assert len(repo.list_pending_escalated()) == THREADS * PER_THREAD
+
+
+def test_notification_repository_under_contention():
+    repo = NotificationRepository()
+
+    def work(t, i):
+        notif = repo.create(t, NotificationType.SYSTEM, "Título", "Conteúdo", {})
+        repo.mark_as_read(notif.id)
+        return notif.id
+
+    assert_unique(hammer(work))
+    assert all(len(repo.list_by_user(t, limit=PER_THREAD)[0]) == PER_THREAD for t in range(THREADS))
+    assert all(repo.unread_count(t) == 0 for t in range(THREADS))
+
+
+def test_bonito_pack_repository_under_contention():
+    repo = BonitoPackRepository()
+    data = BonitoPackCreate(
+        nome="Pack Teste", descricao="Descrição do pack de teste", preco_base=30.0,
+        categorias=[{"area": "Lisboa", "categoria": "Canalização"}],
+    )
+
+    def work(t, i):
+        pack = repo.create(data)
+        repo.update(pack.id, BonitoPackUpdate(preco_base=40.0))
+        repo.list_all(include_inactive=False)
+        return pack.id
+
+    assert_unique(hammer(work))
+    assert len(repo.list_all()) == THREADS * PER_THREAD
@@ -0,0 +1,180 @@
+import asyncio
+import json
+import threading
+import time
+import pytest
+
+from fastapi import FastAPI
+from fastapi.testclient import TestClient
+
+from app.api.v1 import admin as admin_api
+from app.support.event_bus import EventBus, InProcessEventBus, RedisStreamsEventBus, SentinelDashboard
+from app.support.sentinel_events import SentinelEventEmitter
+
+
+class RecordingRedis:
+    """Cliente mínimo com a interface de pipeline usada pelo backend Redis."""
+
+    def __init__(self, fail=False, delay=0.0):
+        self.executes = []
+        self.fail = fail
+        self.delay = delay
+
+    def pipeline(self, transaction=True):
+        assert transaction is False
+        return RecordingPipeline(self)
+
+
+class RecordingPipeline:
+    def __init__(self, client):
+        self._client = client
+        self._commands = []
+
+    def xadd(self, stream, fields, maxlen=None, approximate=False):
+        self._commands.append((stream, fields, maxlen, approximate))
+
+    def execute(self):
+        time.sleep(self._client.delay)
+        if self._client.fail:
+            raise ConnectionError("redis down")
+        self._client.executes.append(self._commands)
+        return [b"0-0"] * len(self._commands)
+
+
+def test_in_process_bus_delivers_to_subscribers_and_dashboard():
+    async def scenario():
+        bus = InProcessEventBus(max_buffer=100)
+        dashboard = SentinelDashboard()
+        bus.add_observer(dashboard)
+        queue = bus.subscribe()
+        emitter = SentinelEventEmitter(bus)
+
+        assert emitter.emit("SupportTicketEscalated", {"ticket_id": "T-1"})
+        assert emitter.emit("OrderCreated", {"order_id": 9})
+        first = await asyncio.wait_for(queue.get(), 1)
+        second = await asyncio.wait_for(queue.get(), 1)
+        return bus, dashboard, [first, second]
+
+    bus, dashboard, events = asyncio.run(scenario())
+
+    assert [e.event_type for e in events] == ["SupportTicketEscalated", "OrderCreated"]
+    assert [e.seq for e in events] == [1, 2]
+    assert dashboard.counts == {"SupportTicketEscalated": 1, "OrderCreated": 1}
+    assert dashboard.last_critical_alert.endswith("SupportTicketEscalated")
+    assert bus.metrics.delivered == 2
+
+
+def test_publish_from_worker_thread_is_delivered_on_the_app_loop():
+    async def scenario():
+        bus = InProcessEventBus()
+        queue = bus.subscribe()
+        bus.start()  # startup da aplicação: fixa o loop
+        # Rotas síncronas correm no threadpool, sem loop na thread
+        threads = [threading.Thread(target=bus.publish, args=("Tick", {"i": i})) for i in range(3)]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+        events = [await asyncio.wait_for(queue.get(), 1) for _ in range(3)]
+        return sorted(e.payload["i"] for e in events)
+
+    assert asyncio.run(scenario()) == [0, 1, 2]
+
+
+def test_full_buffer_drops_without_blocking_and_counts():
+    bus = InProcessEventBus(max_buffer=10)
+    accepted = [bus.publish("Tick", {"i": i}) for i in range(15)]
+
+    assert accepted == [True] * 10 + [False] * 5
+    stats = bus.stats()
+    assert stats["pending"] == 10 and stats["high_water"] == 10
+    assert stats["published"] == 10 and stats["dropped"] == 5
+    assert stats["buffer_utilization"] == 1.0
+
+    assert asyncio.run(bus.drain()) == 10
+    assert bus.pending == 0 and bus.publish("Tick", {})
+
+
+def test_slow_subscriber_loses_events_without_stalling_others():
+    async def scenario():
+        bus = InProcessEventBus()
+        slow = bus.subscribe(maxsize=2)
+        fast = bus.subscribe(maxsize=100)
+        for i in range(5):
+            bus.publish("Tick", {"i": i})
+        await bus.drain()
+        return bus, slow.qsize(), fast.qsize()
+
+    bus, slow_size, fast_size = asyncio.run(scenario())
+    assert (slow_size, fast_size) == (2, 5)
+    assert bus.metrics.dropped == 3
+
+
+def test_redis_backend_pipelines_batches_with_maxlen():
+    client = RecordingRedis()
+    bus = RedisStreamsEventBus(client, stream="sentinel:test", stream_maxlen=500, batch_size=4)
+    for i in range(10):
+        bus.publish("OrderCreated", {"order_id": i})
+    bus.flush()
+
+    # A thread de flush pode ter apanhado lotes antes do flush explícito: nunca mais de 4 por pipeline
+    assert all(1 <= len(cmds) <= 4 for cmds in client.executes)
+    commands = [c for batch in client.executes for c in batch]
+    assert len(commands) == 10
+    stream, fields, maxlen, approximate = commands[0]
+    assert (stream, maxlen, approximate) == ("sentinel:test", 500, True)
+    assert fields["type"] == "OrderCreated" and json.loads(fields["payload"]) == {"order_id": 0}
+    assert bus.metrics.delivered == 10
+
+
+def test_redis_backend_publish_does_not_wait_for_redis():
+    client = RecordingRedis(delay=0.2)
+    bus = RedisStreamsEventBus(client, batch_size=1, flush_interval=0.01)
+
+    started = time.perf_counter()
+    for i in range(50):
+        bus.publish("Tick", {"i": i})
+    assert time.perf_counter() - started < 0.1
+
+    deadline = time.time() + 5
+    while bus.metrics.delivered < 1 and time.time() < deadline:
+        time.sleep(0.01)
+    assert bus.metrics.delivered >= 1
+
+
+def test_redis_failures_are_counted_not_raised():
+    client = RecordingRedis(fail=True)
+    bus = RedisStreamsEventBus(client)
+    bus.publish("Tick", {})
+    bus.flush()
+    assert bus.metrics.failed == 1 and bus.metrics.delivered == 0
+
+
+def test_admin_sentinel_endpoints_expose_bus_metrics_and_events():
+    app = FastAPI()
+    app.include_router(admin_api.router)
+    client = TestClient(app)
+
+    client.post("/admin/governance/flags/toggle/sos_enabled")
+    client.post("/admin/governance/flags/toggle/sos_enabled")
+    bus = admin_api.get_event_bus()
+    asyncio.run(bus.drain()) if isinstance(bus, InProcessEventBus) else bus.flush()
+
+    status = client.get("/admin/governance/sentinel/status").json()
+    assert status["event_bus"]["published"] >= 2
+    assert status["events_by_type"]["KillswitchToggled"] >= 2
+    assert "KillswitchToggled" in status["last_critical_alert"]
+
+    events = client.get("/admin/governance/sentinel/events", params={"limit": 2}).json()
+    assert [e["event_type"] for e in events] == ["KillswitchToggled", "KillswitchToggled"]
+    assert events[0]["payload"]["enabled"] is True and events[0]["seq"] > events[1]["seq"]
+    for limit in (0, -1, 201):
+        assert client.get("/admin/governance/sentinel/events", params={"limit": limit}).status_code == 422
+
+
+def test_backend_without_wake_cannot_be_instantiated():
+    class SilentBus(EventBus):
+        backend = "silent"
+
+    with pytest.raises(TypeError):
+        SilentBus()
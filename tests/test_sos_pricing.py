@@ -0,0 +1,58 @@
+
+from datetime import datetime, timezone
+
+import numpy as np
+import pytest
+
+from app.payments.sos_pricing import calculate_taxa_sos, calculate_taxa_sos_batch
+
+
+def test_scalar_matches_frontend_rules():
+    # 20h (noite) + imediato + 25 km (10 km extra) + segunda visita
+    quote = calculate_taxa_sos(100.0, datetime(2026, 3, 10, 20, 0), 25.0, True, True)
+    assert quote.breakdown.basePeriodo == 40.0
+    assert quote.breakdown.acrescimoDistancia == 5.0
+    assert quote.taxaSOS == 40.0 + 20.0 + 5.0 + 25.0
+    assert quote.valorTotal == 190.0
+    assert round(quote.ganhoApp, 2) == 28.5
+    assert round(quote.colaboradorRecebe, 2) == 161.5
+
+
+def test_period_boundaries():
+    bases = [
+        calculate_taxa_sos(0, datetime(2026, 1, 1, h, 30), 0, False, False).breakdown.basePeriodo
+        for h in (8, 9, 17, 18, 21, 22, 3)
+    ]
+    assert bases == [50.0, 30.0, 30.0, 40.0, 40.0, 50.0, 50.0]
+
+
+def test_aware_datetime_uses_lisbon_time():
+    # 17:30 UTC em julho = 18:30 em Lisboa (WEST) -> período noite
+    quote = calculate_taxa_sos(0, datetime(2026, 7, 1, 17, 30, tzinfo=timezone.utc), 0, False, False)
+    assert quote.breakdown.basePeriodo == 40.0
+
+
+def test_batch_matches_scalar():
+    rng = np.random.default_rng(0)
+    n = 500
+    service = rng.uniform(0, 300, n)
+    hours = rng.integers(0, 24, n)
+    distances = rng.uniform(0, 40, n)
+    immediate = rng.random(n) < 0.5
+    second = rng.random(n) < 0.3
+
+    batch = calculate_taxa_sos_batch(service, hours, distances, immediate, second)
+    for i in range(n):
+        quote = calculate_taxa_sos(
+            float(service[i]), datetime(2026, 1, 1, int(hours[i])),
+            float(distances[i]), bool(immediate[i]), bool(second[i]),
+        )
+        assert batch["taxaSOS"][i] == quote.taxaSOS
+        assert batch["ganhoApp"][i] == quote.ganhoApp
+        assert batch["colaboradorRecebe"][i] == quote.colaboradorRecebe
+
+
+@pytest.mark.parametrize("bad_hours", [[-1], [24], [7.5]])
+def test_batch_rejects_invalid_hours(bad_hours):
+    with pytest.raises(ValueError):
+        calculate_taxa_sos_batch([50.0], bad_hours, [0.0], [False], [False])
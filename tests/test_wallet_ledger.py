@@ -0,0 +1,83 @@
+from datetime import datetime
+import pytest
+from app.wallet.ledger import ColumnarLedger
+from app.wallet.models import WalletTransactionType
+from app.wallet.service import WalletRepository, WalletService
+
+
+def _fill(ledger: ColumnarLedger, n: int) -> None:
+    types = list(WalletTransactionType)
+    for i in range(1, n + 1):
+        ledger.append(
+            tx_id=i, order_id=i, user_id=i % 7, amount_cents=100 + i,
+            tx_type=types[i % 4], model=("INTERNAL", "BRIDGE")[i % 2],
+            commission_rate=0.15 if i % 3 else None,
+        )
+
+
+def test_running_balance_matches_vectorised_scan():
+    ledger = ColumnarLedger(capacity=4)  # força vários crescimentos
+    _fill(ledger, 5000)
+    assert len(ledger) == 5000
+    for user_id in range(7):
+        assert ledger.balance(user_id) == ledger.scan_balance(user_id)
+    assert ledger.balance(99) == 0
+    totals = ledger.totals_by_type(user_id=3)
+    assert totals[WalletTransactionType.ESCROW_IN] - sum(
+        v for t, v in totals.items() if t != WalletTransactionType.ESCROW_IN
+    ) == ledger.balance(3)
+
+
+def test_rows_round_trip_and_models_are_interned():
+    ledger = ColumnarLedger()
+    created = datetime(2026, 3, 1, 12, 30, 15, 123456)
+    ledger.append(tx_id=10, order_id=5, user_id=2, amount_cents=2500,
+                  tx_type=WalletTransactionType.ESCROW_IN, model="BRIDGE",
+                  commission_rate=0.15, created_at=created)
+    ledger.append(tx_id=11, order_id=6, user_id=2, amount_cents=300,
+                  tx_type=WalletTransactionType.FEE, model="BRIDGE")
+
+    tx = ledger.get(10)
+    assert (tx.id, tx.order_id, tx.amount_cents, tx.model) == (10, 5, 2500, "BRIDGE")
+    assert tx.tx_type == WalletTransactionType.ESCROW_IN
+    assert tx.commission_rate == 0.15 and tx.created_at == created
+    assert ledger.get(11).commission_rate is None
+    assert ledger.model_values == ["BRIDGE"]
+    assert list(ledger.column("model")) == [0, 0]
+    with pytest.raises(KeyError):
+        ledger.get(12)
+    with pytest.raises(ValueError):
+        ledger.append(tx_id=11, order_id=1, user_id=1, amount_cents=1,
+                      tx_type=WalletTransactionType.FEE, model="BRIDGE")
+
+
+def test_wallet_service_writes_to_columnar_ledger():
+    repo = WalletRepository()
+    service = WalletService(repo)
+    tx = service.add_transaction(order_id=1, user_id=4, amount_cents=5000,
+                                 tx_type=WalletTransactionType.ESCROW_IN,
+                                 model="INTERNAL", commission_rate=0.15)
+    assert tx.id == 1 and len(repo) == 1
+    assert service.get_balance(4) == 5000
+
+
+@pytest.mark.parametrize("bad", [
+    {"amount_cents": 2 ** 63},
+    {"amount_cents": 10.5},
+    {"tx_type": "TRANSFER"},
+    {"commission_rate": 1.5},
+])
+def test_invalid_append_leaves_ledger_untouched(bad):
+    ledger = ColumnarLedger(capacity=1)
+    _fill(ledger, 1)
+    before = (len(ledger), ledger.balance(1))
+    kwargs = dict(tx_id=2, order_id=2, user_id=1, amount_cents=500,
+                  tx_type=WalletTransactionType.ESCROW_IN, model="INTERNAL")
+    kwargs.update(bad)
+    with pytest.raises(ValueError):
+        ledger.append(**kwargs)
+    assert (len(ledger), ledger.balance(1)) == before
+    assert ledger.scan_balance(1) == ledger.balance(1)
+    ledger.append(tx_id=2, order_id=2, user_id=1, amount_cents=500,
+                  tx_type=WalletTransactionType.ESCROW_IN, model="INTERNAL")
+    assert ledger.get(2).amount_cents == 500
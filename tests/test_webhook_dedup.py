@@ -0,0 +1,104 @@
+
+from concurrent.futures import ThreadPoolExecutor
+
+from fastapi import FastAPI
+from fastapi.testclient import TestClient
+
+from app.orders.repository import OrderRepository, get_order_repository
+from app.payments import webhooks
+from app.payments.event_ledger import WebhookEventLedger
+from app.wallet.service import WalletRepository, WalletService, get_wallet_service
+
+
+def build_client():
+    order_repo = OrderRepository()
+    wallet_repo = WalletRepository()
+    app = FastAPI()
+    app.include_router(webhooks.router)
+    app.dependency_overrides[get_order_repository] = lambda: order_repo
+    app.dependency_overrides[get_wallet_service] = lambda: WalletService(wallet_repo)
+    return TestClient(app), order_repo, wallet_repo
+
+
+def succeeded_event(event_id, order_id):
+    return {
+        "id": event_id,
+        "type": "payment_intent.succeeded",
+        "data": {"object": {"id": f"pi_{order_id}", "amount_received": 5000,
+                            "metadata": {"order_id": str(order_id)}}},
+    }
+
+
+def test_ledger_claims_each_event_once(tmp_path):
+    ledger = WebhookEventLedger(capacity=2, path=tmp_path / "ledger.db")
+    assert ledger.claim("evt_1") is True
+    assert ledger.claim("evt_1") is False
+    # Fora do LRU, o conjunto persistente continua a deduplicar
+    ledger.claim("evt_2")
+    ledger.claim("evt_3")
+    assert ledger.claim("evt_1") is False
+    ledger.release("evt_1")
+    assert ledger.claim("evt_1") is True
+
+
+def test_concurrent_duplicate_deliveries_write_wallet_once():
+    client, order_repo, wallet_repo = build_client()
+    order = order_repo.create("SOS", "Almada", client_id=1)
+    event = succeeded_event("evt_dup_1", order.id)
+
+    with ThreadPoolExecutor(max_workers=16) as pool:
+        responses = list(pool.map(lambda _: client.post("/payments/webhooks/stripe", json=event), range(200)))
+
+    assert all(r.status_code == 200 for r in responses)
+    assert sum(r.json().get("status") == "already_processed" for r in responses) == 199
+    assert len(wallet_repo) == 1
+    assert order_repo.get(order.id).status.value == "ASSIGNED"
+
+
+def test_distinct_events_for_same_order_are_idempotent():
+    client, order_repo, wallet_repo = build_client()
+    order = order_repo.create("SOS", "Almada", client_id=1)
+    client.post("/payments/webhooks/stripe", json=succeeded_event("evt_a", order.id))
+    client.post("/payments/webhooks/stripe", json=succeeded_event("evt_b", order.id))
+    assert len(wallet_repo) == 1
+
+
+class FlakyWalletService(WalletService):
+    def __init__(self, repo, failures):
+        super().__init__(repo)
+        self.failures = failures
+
+    def add_transaction(self, **kwargs):
+        if self.failures:
+            self.failures -= 1
+            raise RuntimeError("wallet indisponível")
+        return super().add_transaction(**kwargs)
+
+
+def test_failed_wallet_write_rolls_back_order_and_asks_for_retry():
+    client, order_repo, wallet_repo = build_client()
+    flaky = FlakyWalletService(wallet_repo, failures=1)
+    client.app.dependency_overrides[get_wallet_service] = lambda: flaky
+    order = order_repo.create("SOS", "Almada", client_id=1)
+    event = succeeded_event("evt_flaky", order.id)
+
+    first = client.post("/payments/webhooks/stripe", json=event)
+    assert first.status_code == 500
+    assert order_repo.get(order.id).status.value == "PENDING"
+    assert len(wallet_repo) == 0
+
+    retry = client.post("/payments/webhooks/stripe", json=event)
+    assert retry.status_code == 200 and retry.json()["escrow"] == "locked"
+    assert order_repo.get(order.id).status.value == "ASSIGNED"
+    assert len(wallet_repo) == 1
+
+
+def test_stale_unfinished_claims_are_released_on_restart(tmp_path):
+    path = tmp_path / "ledger.db"
+    ledger = WebhookEventLedger(path=path)
+    assert ledger.claim("evt_done") and ledger.claim("evt_crashed")
+    ledger.complete("evt_done")
+
+    reopened = WebhookEventLedger(path=path, stale_after_seconds=0.0)
+    assert reopened.claim("evt_done") is False
+    assert reopened.claim("evt_crashed") is True